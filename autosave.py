@@ -0,0 +1,258 @@
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, List, Optional, Set
+from canvas import DrawingCanvas
+from document_io import FORMAT_VERSION, _discard, encode_images, file_events, write_document
+from images import image_keys
+from logger import logger
+
+AUTOSAVE_DIR = "autosave"
+SNAPSHOT_FILE = "snapshot.json"
+JOURNAL_FILE = "journal.jsonl"
+INTERVAL_MS = 1000
+# Сколько изменённых объектов переводится в словари за один такт потока Tk
+CHANGES_PER_TICK = 2000
+# Журнал сжимается в снимок после стольких записей или байтов
+COMPACT_RECORDS = 300
+COMPACT_BYTES = 4 * 1024 * 1024
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+class JournalState:
+    """
+    Состояние документа, восстановленное из снимка и записей журнала.
+    Запись журнала — дифф сцены: изменённые и удалённые объекты, порядок, слои,
+    фон и новые изображения; 'reset' начинает документ заново.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self.layers: List[Dict[str, Any]] = []
+        self.background = "white"
+        self.images: Dict[str, str] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self.objects) or self.background != "white"
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        if record.get('reset'):
+            self.reset()
+        for oid in record.get('removed', ()):
+            self.objects.pop(oid, None)
+        for item in record.get('changed', ()):
+            self.objects[item['id']] = item
+        if 'order' in record:
+            self.order = record['order']
+        if 'layers' in record:
+            self.layers = record['layers']
+        if 'background' in record:
+            self.background = record['background']
+        self.images.update(record.get('images', {}))
+
+    def load_snapshot(self, path: str) -> None:
+        for key, value, _ in file_events(path):
+            if key == 'drawings':
+                for item in value:
+                    self.objects[item['id']] = item
+                    self.order.append(item['id'])
+            elif key == 'layers':
+                self.layers = value
+            elif key == 'background':
+                self.background = value
+            elif key == 'images':
+                self.images.update(value)
+
+    def drawings(self) -> List[Dict[str, Any]]:
+        return [self.objects[oid] for oid in self.order if oid in self.objects]
+
+    def header(self) -> Dict[str, Any]:
+        header: Dict[str, Any] = {'version': FORMAT_VERSION, 'background': self.background, 'layers': self.layers}
+        used = image_keys(self.objects.values())
+        if used:
+            header['images'] = {key: self.images[key] for key in used if key in self.images}
+        return header
+
+    def to_state(self) -> Dict[str, Any]:
+        """Состояние в виде, который принимает ProgressiveLoader.load_state."""
+        state = self.header()
+        state['drawings'] = self.drawings()
+        return state
+
+
+class Autosave:
+    """
+    Автосохранение активного документа в журнал изменений.
+    Раз в interval_ms поток Tk забирает дифф сцены (не больше CHANGES_PER_TICK объектов)
+    и кладёт его в очередь; фоновый поток кодирует запись в JSON, дописывает её в журнал
+    и периодически сжимает журнал в полный снимок. Файлы на диске поток Tk не трогает.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, directory: str = AUTOSAVE_DIR,
+                 interval_ms: int = INTERVAL_MS) -> None:
+        self.canvas = canvas
+        self.directory = directory
+        self.interval_ms = interval_ms
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+
+        self._records: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._job: Optional[str] = None
+        self._scene = None
+        self._background: Optional[str] = None
+        self._image_keys: Set[str] = set()
+        self._reset = False
+
+    @property
+    def active(self) -> bool:
+        return self._thread is not None
+
+    def pending(self) -> bool:
+        """Остался ли журнал от сеанса, который не завершился штатно."""
+        return any(os.path.exists(path) and os.path.getsize(path) > 0
+                   for path in (self.snapshot_path, self.journal_path))
+
+    def recover(self) -> Optional[Dict[str, Any]]:
+        """
+        Собирает документ из снимка и журнала прошлого сеанса.
+        Оборванная последняя запись журнала пропускается. None — восстанавливать нечего.
+        """
+        state = JournalState()
+        try:
+            if os.path.exists(self.snapshot_path):
+                state.load_snapshot(self.snapshot_path)
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, 'r', encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            logger.warning("Журнал автосохранения оборван, последняя запись пропущена")
+                            break
+                        state.apply(record)
+        except (OSError, ValueError) as error:
+            logger.error(f"Не удалось прочитать автосохранение: {error}")
+            return None
+        logger.info(f"Автосохранение прочитано: объектов {len(state.objects)}")
+        return state.to_state() if state else None
+
+    def start(self) -> None:
+        """Начинает журнал заново (прежние файлы удаляются) и запускает фоновую запись."""
+        if self._thread is not None:
+            return
+        self._records = queue.Queue()
+        self._thread = threading.Thread(target=self._write, args=(self._records,), daemon=True)
+        self._thread.start()
+        self._tick()
+        logger.info(f"Автосохранение запущено: {self.directory}")
+
+    def stop(self, discard: bool = False) -> None:
+        """
+        Останавливает автосохранение, дописав накопленные записи.
+        discard — штатное завершение: журнал и снимок удаляются.
+        """
+        if self._thread is None:
+            return
+        if self._job is not None:
+            self.canvas.root.after_cancel(self._job)
+            self._job = None
+        self._records.put(None)
+        self._thread.join()
+        self._thread = None
+        self._scene = None
+        if discard:
+            _discard(self.journal_path)
+            _discard(self.snapshot_path)
+        logger.info("Автосохранение остановлено")
+
+    def flush(self) -> None:
+        """Ждёт, пока фоновый поток запишет все переданные ему записи."""
+        self._records.join()
+
+    def _tick(self) -> None:
+        canvas = self.canvas
+        scene = canvas.scene
+        if scene is not self._scene:
+            # Другой документ (вкладка): журнал начинается с его полного снимка
+            self._scene = scene
+            scene.mark_all()
+            self._background = None
+            self._image_keys.clear()
+            self._reset = True
+
+        changes = scene.collect_changes(limit=CHANGES_PER_TICK)
+        record = {key: value for key, value in changes.items() if value or key in ('order', 'layers')}
+        if self._reset:
+            record['reset'] = True
+            self._reset = False
+        if canvas.bg != self._background:
+            record['background'] = self._background = canvas.bg
+        # Байты изображения пишутся в журнал один раз, объекты ссылаются на них ключом
+        keys = [key for key in image_keys(changes['changed']) if key not in self._image_keys]
+        if keys:
+            record['images'] = canvas.images.pack(keys)
+            self._image_keys.update(keys)
+
+        if record:
+            self._records.put(record)
+        # Непереданные объекты большого документа забираются следующими тактами без паузы
+        self._job = canvas.root.after(1 if scene.dirty else self.interval_ms, self._tick)
+
+    def _write(self, records: "queue.Queue") -> None:
+        """Тело фонового потока: записи журнала из очереди до None."""
+        state = JournalState()
+        count = 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            _discard(self.snapshot_path)
+            journal = open(self.journal_path, 'w', encoding='utf-8')
+        except OSError as error:
+            logger.error(f"Автосохранение недоступно: {error}")
+            journal = None
+
+        while True:
+            record = records.get()
+            try:
+                if record is None:
+                    break
+                if journal is None:
+                    continue
+                if 'images' in record:
+                    record['images'] = encode_images(record['images'])
+                journal.write(_ENCODER.encode(record) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+                state.apply(record)
+                count += 1
+                if count >= COMPACT_RECORDS or journal.tell() >= COMPACT_BYTES:
+                    self._compact(state)
+                    journal.seek(0)
+                    journal.truncate()
+                    count = 0
+            except OSError as error:
+                logger.error(f"Ошибка записи автосохранения: {error}")
+            finally:
+                records.task_done()
+
+        if journal is not None:
+            journal.close()
+
+    def _compact(self, state: JournalState) -> None:
+        """
+        Пишет полный снимок и заменяет им прежний. Журнал очищается после замены:
+        при сбое между ними записи просто применятся к новому снимку ещё раз.
+        """
+        temp_path = self.snapshot_path + ".part"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            count = write_document(file, state.header(), [state.drawings()])
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        logger.info(f"Журнал автосохранения сжат в снимок: объектов {count}")
@@ -0,0 +1,73 @@
+"""
+Сравнение пакетного доступа к холсту (tcl_bridge.BulkCanvas) с поэлементными вызовами Tk.
+Запуск из корня проекта: python benchmarks/bench_tcl_bridge.py [количество объектов]
+Требуется дисплей (Tk создаёт окно, которое сразу скрывается).
+"""
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tcl_bridge import BulkCanvas  # noqa: E402
+
+
+def specs(count):
+    for index in range(count):
+        x, y = index % 500, index // 500
+        yield ("rectangle", [x, y, x + 10, y + 10], {"fill": "light blue", "outline": "black"},
+               ("movable", "erasable", "shape"))
+
+
+def per_item_create(canvas, count):
+    return [canvas.create_rectangle(coords, **options, tags=tags) for _, coords, options, tags in specs(count)]
+
+
+def per_item_read(canvas, items):
+    result = []
+    for item in items:
+        config = {option: canvas.itemcget(item, option) for option in canvas.itemconfig(item)
+                  if canvas.itemcget(item, option)}
+        result.append({'type': canvas.type(item), 'coords': canvas.coords(item),
+                       'tags': canvas.gettags(item), 'config': config})
+    return result
+
+
+def per_item_update(canvas, items):
+    for item in items:
+        canvas.coords(item, 1, 1, 5, 5)
+        canvas.itemconfig(item, fill="red")
+
+
+def measure(label, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<32}{(time.perf_counter() - started) * 1000:>10.1f} мс")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    root = tk.Tk()
+    root.withdraw()
+    canvas = tk.Canvas(root, width=800, height=600)
+    bridge = BulkCanvas(canvas)
+
+    print(f"Объектов: {count}")
+    items = measure("создание, поэлементно", per_item_create, canvas, count)
+    canvas.delete("all")
+    items = measure("создание, пакетно", bridge.create_many, list(specs(count)))
+
+    measure("чтение, поэлементно", per_item_read, canvas, items)
+    measure("чтение, пакетно", bridge.read_many, items)
+
+    measure("изменение, поэлементно", per_item_update, canvas, items)
+    measure("изменение, пакетно", bridge.apply_many,
+            {item: [2, 2, 6, 6] for item in items}, {item: {"fill": "blue"} for item in items})
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import json
+import mmap
+import struct
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from raster import RasterLayer
+
+MAGIC = b"PBRD"
+BINARY_VERSION = 1
+BINARY_EXTENSION = ".board"
+
+# Заголовок: сигнатура, версия, флаги, число объектов, строк и изображений,
+# смещения разделов координат, таблицы объектов, строк, данных и служебного JSON и длина последнего
+HEADER = struct.Struct("<4sHHIII6Q")
+# Запись таблицы объектов: номера строк ID, типа, слоя и стиля (опции и теги),
+# первая координата и их число в общем массиве, рамка по координатам
+RECORD = np.dtype([('oid', '<u4'), ('type', '<u4'), ('layer', '<u4'), ('style', '<u4'),
+                   ('start', '<u8'), ('count', '<u4'), ('reserved', '<u4'),
+                   ('bbox', '<f4', (4,))])
+COORD = np.dtype('<f8')
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'), sort_keys=True)
+
+
+def is_binary_document(path: str) -> bool:
+    """Формат файла определяется по сигнатуре, а не по расширению."""
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class BinaryWriter:
+    """
+    Запись документа в двоичном формате. Координаты пишутся в файл сразу
+    по мере поступления пачек объектов; таблица объектов и интернированные
+    строки (типы, слои, стили) дописываются в конце, затем заполняется заголовок.
+    Одинаковые наборы опций и тегов хранятся один раз.
+    """
+
+    def __init__(self, file: BinaryIO) -> None:
+        self.file = file
+        self.strings: Dict[str, int] = {}
+        self.records: List[Tuple] = []
+        self.coord_count = 0
+        self.file.write(b"\0" * HEADER.size)
+
+    def intern(self, value: str) -> int:
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+    def add(self, items: Iterable[Dict[str, Any]]) -> None:
+        for item in items:
+            coords = np.asarray(item['coords'], dtype=COORD)
+            self.file.write(coords.tobytes())
+            if len(coords) >= 2:
+                xs, ys = coords[0::2], coords[1::2]
+                bbox = (xs.min(), ys.min(), xs.max(), ys.max())
+            else:
+                bbox = (0.0, 0.0, 0.0, 0.0)
+            style = _ENCODER.encode([item.get('config', {}), item.get('tags', [])])
+            self.records.append((self.intern(item.get('id') or ""), self.intern(item['type']),
+                                 self.intern(item.get('layer') or ""), self.intern(style),
+                                 self.coord_count, len(coords), 0, bbox))
+            self.coord_count += len(coords)
+
+    def finish(self, background: str, layers: List[Dict[str, Any]], images: Dict[str, bytes],
+               raster: Optional[bytes]) -> int:
+        """Дописывает таблицы, изображения и служебный JSON. Возвращает число объектов."""
+        file = self.file
+        coords_offset = HEADER.size
+        table_offset = file.tell()
+        file.write(np.array(self.records, dtype=RECORD).tobytes())
+
+        strings_offset = file.tell()
+        encoded = [value.encode('utf-8') for value in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype='<u8')
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        file.write(offsets.tobytes())
+        for data in encoded:
+            file.write(data)
+
+        # Изображения и растровый слой хранятся сырыми байтами, без base64
+        blobs_offset = file.tell()
+        position = 0
+        image_index = {}
+        for key, data in images.items():
+            file.write(data)
+            image_index[key] = [position, len(data)]
+            position += len(data)
+        raster_index = None
+        if raster is not None:
+            file.write(raster)
+            raster_index = [position, len(raster)]
+
+        meta_offset = file.tell()
+        meta = _ENCODER.encode({'background': background, 'layers': layers,
+                                'images': image_index, 'raster': raster_index}).encode('utf-8')
+        file.write(meta)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, BINARY_VERSION, 0, len(self.records), len(self.strings), len(images),
+                               coords_offset, table_offset, strings_offset, blobs_offset, meta_offset, len(meta)))
+        file.seek(0, 2)
+        return len(self.records)
+
+
+def write_binary(file: BinaryIO, header: Dict[str, Any], batches: Iterable[List[Dict[str, Any]]]) -> int:
+    """Пишет документ в двоичном формате из заголовка сохранения и пачек объектов."""
+    writer = BinaryWriter(file)
+    for batch in batches:
+        writer.add(batch)
+    raster = header.get('raster')
+    return writer.finish(header.get('background', "white"), header.get('layers', []),
+                         header.get('images', {}), raster.to_png() if raster is not None else None)
+
+
+class BinaryDocument:
+    """
+    Двоичный документ, отображённый в память. Таблица объектов и координаты —
+    массивы NumPy поверх отображения (без копирования), поэтому открытие не зависит
+    от размера файла: страницы файла читаются, только когда объект запрашивается.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Файл документа пуст")
+
+        (magic, version, _, self.count, string_count, _, coords_offset, table_offset, strings_offset,
+         blobs_offset, meta_offset, meta_length) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("Файл не является двоичным документом")
+        if version > BINARY_VERSION:
+            self.close()
+            raise ValueError(f"Неподдерживаемая версия двоичного документа: {version}")
+
+        self.table = np.frombuffer(self._map, dtype=RECORD, count=self.count, offset=table_offset)
+        self.coords = np.frombuffer(self._map, dtype=COORD, count=(table_offset - coords_offset) // COORD.itemsize,
+                                    offset=coords_offset)
+        self._string_offsets = np.frombuffer(self._map, dtype='<u8', count=string_count + 1, offset=strings_offset)
+        self._strings_data = strings_offset + self._string_offsets.nbytes
+        self._blobs_offset = blobs_offset
+        self._strings: Dict[int, str] = {}
+        self._styles: Dict[int, Tuple[Dict[str, Any], List[str]]] = {}
+        self.meta = json.loads(self._map[meta_offset:meta_offset + meta_length].decode('utf-8'))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        # Массивы держат ссылку на буфер отображения — без них его можно закрыть
+        self.table = self.coords = self._string_offsets = None
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "BinaryDocument":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def string(self, index: int) -> str:
+        value = self._strings.get(index)
+        if value is None:
+            start = self._strings_data + int(self._string_offsets[index])
+            end = self._strings_data + int(self._string_offsets[index + 1])
+            value = self._strings[index] = self._map[start:end].decode('utf-8')
+        return value
+
+    def _style(self, index: int) -> Tuple[Dict[str, Any], List[str]]:
+        # Разобранный стиль кэшируется: у многих объектов он общий
+        style = self._styles.get(index)
+        if style is None:
+            style = self._styles[index] = json.loads(self.string(index))
+        return style
+
+    def items(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Объекты с номерами от start до stop в формате файлов сохранения."""
+        records = self.table[start:stop]
+        coords = self.coords
+        items = []
+        for oid, obj_type, layer, style, first, count in zip(
+                records['oid'].tolist(), records['type'].tolist(), records['layer'].tolist(),
+                records['style'].tolist(), records['start'].tolist(), records['count'].tolist()):
+            config, tags = self._style(style)
+            items.append({'id': self.string(oid) or None, 'type': self.string(obj_type),
+                          'coords': coords[first:first + count].tolist(), 'tags': list(tags),
+                          'config': dict(config), 'layer': self.string(layer) or None})
+        return items
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> np.ndarray:
+        """Номера объектов, рамка координат которых пересекает прямоугольник (без разбора объектов)."""
+        bbox = self.table['bbox']
+        mask = (bbox[:, 0] <= x2) & (bbox[:, 2] >= x1) & (bbox[:, 1] <= y2) & (bbox[:, 3] >= y1)
+        return np.flatnonzero(mask)
+
+    def blob(self, offset: int, length: int) -> bytes:
+        start = self._blobs_offset + offset
+        return self._map[start:start + length]
+
+    def images(self) -> Dict[str, bytes]:
+        return {key: self.blob(offset, length) for key, (offset, length) in self.meta['images'].items()}
+
+    def raster(self) -> Optional[RasterLayer]:
+        if self.meta.get('raster') is None:
+            return None
+        return RasterLayer.from_png(self.blob(*self.meta['raster']))
+
+
+def binary_events(path: str, batch_size: int) -> Iterator[Tuple[str, Any, int]]:
+    """События загрузки двоичного документа в том же виде, что и у JSON (ход — в байтах файла)."""
+    with BinaryDocument(path) as document:
+        size = len(document._map)
+        yield 'layers', document.meta['layers'], 0
+        yield 'background', document.meta['background'], 0
+        images = document.images()
+        if images:
+            yield 'images', images, 0
+        raster = document.raster()
+        if raster is not None:
+            yield 'raster', raster, 0
+        for start in range(0, len(document), batch_size):
+            batch = document.items(start, start + batch_size)
+            yield 'drawings', batch, size * (start + len(batch)) // len(document)
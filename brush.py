@@ -0,0 +1,149 @@
+from typing import List, Optional, Sequence, Tuple
+from canvas import DrawingCanvas
+from localization import LocalizationManager
+from logger import logger
+from spatial_index import distance_to_segment
+
+# Тег мазков кисти: их можно перемещать и стирать, но не менять размер как фигуру
+STROKE_TAG = "stroke"
+PREVIEW_TAG = "brush_preview"
+# Допуск упрощения и радиус ластика — в экранных пикселях
+SIMPLIFY_TOLERANCE = 1.5
+ERASER_RADIUS = 6.0
+
+Point = Tuple[float, float]
+
+
+def simplify(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Упрощение ломаной алгоритмом Рамера — Дугласа — Пекера: остаются точки,
+    отклоняющиеся от хорды больше чем на tolerance. Обход итеративный,
+    чтобы длинный мазок не упирался в предел рекурсии.
+    """
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first], points[last]
+        farthest, distance = None, tolerance
+        for index in range(first + 1, last):
+            current = distance_to_segment(*points[index], x1, y1, x2, y2)
+            if current > distance:
+                farthest, distance = index, current
+        if farthest is not None:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+class Brush:
+    """
+    Кисть и ластик. Кисть собирает точки движения мыши, упрощает их
+    и сохраняет мазок одной сглаженной ломаной; ластик удаляет
+    стираемые объекты под курсором.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, shapes, loc: LocalizationManager,
+                 tolerance: float = SIMPLIFY_TOLERANCE, eraser_radius: float = ERASER_RADIUS) -> None:
+        """
+        Конструктор кисти. Цвет и толщина берутся из настроек фигур (shapes).
+        """
+        self.canvas = canvas
+        self.shapes = shapes
+        self.loc = loc
+        self.tolerance = tolerance
+        self.eraser_radius = eraser_radius
+
+        self.points: List[Point] = []
+        self.preview: Optional[int] = None
+        self.erased = 0
+        # Доля точек, оставшихся после упрощения последнего мазка
+        self.last_reduction: Optional[float] = None
+
+    def bind_brush(self) -> None:
+        self.canvas.mode = 'brush'
+        self.canvas.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.canvas.bind("<ButtonRelease-1>", self.on_release)
+
+    def bind_eraser(self) -> None:
+        self.canvas.mode = 'eraser'
+        self.canvas.canvas.bind("<ButtonPress-1>", self.on_erase)
+        self.canvas.canvas.bind("<B1-Motion>", self.on_erase)
+        self.canvas.canvas.bind("<ButtonRelease-1>", self.on_erase_release)
+
+    # --- Кисть
+
+    def on_press(self, event) -> None:
+        """Начало мазка: временная линия Tk вне модели сцены."""
+        self.points = [self.canvas.to_world(event.x, event.y)]
+        self.preview = self.canvas.canvas.create_line(
+            event.x, event.y, event.x, event.y, fill=self.shapes.shape_color,
+            width=self.shapes.line_width * self.canvas.viewport.scale,
+            capstyle="round", joinstyle="round", tags=(PREVIEW_TAG,))
+
+    def on_drag(self, event) -> None:
+        if self.preview is None:
+            return
+
+        point = self.canvas.to_world(event.x, event.y)
+        last = self.points[-1]
+        # Совпадающие точки (мышь почти не сдвинулась) не добавляют ничего, кроме веса
+        if (abs(point[0] - last[0]) + abs(point[1] - last[1])) * self.canvas.viewport.scale < 1:
+            return
+        self.points.append(point)
+        self.canvas.canvas.coords(self.preview, *self.canvas.viewport.to_screen(
+            [coord for point in self.points for coord in point]))
+
+    def on_release(self, event) -> None:
+        """Конец мазка: упрощённая ломаная становится объектом сцены."""
+        if self.preview is None:
+            return
+
+        self.canvas.canvas.delete(self.preview)
+        self.preview = None
+        points = self.points
+        self.points = []
+        if len(points) < 2:
+            points = points * 2
+
+        simplified = self.simplify(points)
+        self.last_reduction = len(simplified) / len(points)
+        self.canvas.create_object(
+            "line", [coord for point in simplified for coord in point],
+            {"fill": self.shapes.shape_color, "width": self.shapes.line_width,
+             "smooth": "true", "capstyle": "round", "joinstyle": "round"},
+            tags=("movable", "erasable", STROKE_TAG))
+
+        logger.info(
+            f"Мазок кисти: точек {len(points)} → {len(simplified)} "
+            f"({self.last_reduction:.0%} от исходного)"
+        )
+        self.canvas.bus.publish()
+
+    def simplify(self, points: Sequence[Point]) -> List[Point]:
+        """Упрощает точки мазка; допуск переводится из экранных пикселей в мировые."""
+        return simplify(points, self.tolerance / self.canvas.viewport.scale)
+
+    # --- Ластик
+
+    def on_erase(self, event) -> None:
+        """Удаляет верхний стираемый объект под курсором."""
+        item = self.canvas.pick(*self.canvas.to_world(event.x, event.y), tags=("erasable",),
+                                tolerance=self.eraser_radius)
+        if item is not None:
+            self.canvas.delete_object(item)
+            self.erased += 1
+
+    def on_erase_release(self, event) -> None:
+        # Всё стёртое за одно движение — один шаг истории
+        if self.erased:
+            logger.info(f"Ластик: удалено объектов {self.erased}")
+            self.erased = 0
+            self.canvas.bus.publish()
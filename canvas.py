@@ -1,8 +1,38 @@
 import tkinter as tk
 from tkinter import colorchooser
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Any, Iterable, Optional, Set
 from localization import LocalizationManager
 from logger import logger
+from scene_model import SceneModel, SceneObject, normalize_option, DEFAULT_LAYER
+from change_bus import ChangeBus
+from tcl_bridge import BulkCanvas
+from viewport import Viewport, scale_font
+from history import History
+from raster import RasterLayer, RasterView, RASTER_TAG, union
+from images import ImageStore, PhotoCache, IMAGE_TYPE, photo_size
+from curves import CurveCache, PATH_TYPE
+
+# Тег, которым помечаются все элементы Tk, отображающие объекты сцены
+SCENE_TAG = "scene_object"
+# Тег выделенных элементов Tk: перемещение выделения — одна команда move по тегу
+SELECTED_TAG = "selected"
+SELECTION_FRAME_TAG = "selection_frame"
+# Объекты одной группы несут общий тег с этим префиксом (сохраняется в файлах и синхронизации)
+GROUP_TAG_PREFIX = "group_"
+# Элементы Tk слоя несут тег слоя: перестановка слоя — одна команда raise по тегу
+LAYER_TAG_PREFIX = "layer_"
+
+
+# Типы объектов, элемент Tk которых строится по модели: изображение — уровнем пирамиды,
+# контур из кривых Безье — ломаной
+DERIVED_TYPES = {IMAGE_TYPE, PATH_TYPE}
+TK_TYPES = {PATH_TYPE: "line"}
+ZOOM_STEP = 1.1
+SCROLL_STEP = 40
+
+
+def layer_tag(lid: str) -> str:
+    return LAYER_TAG_PREFIX + lid
 
 
 class DrawingCanvas:
@@ -27,14 +57,753 @@ class DrawingCanvas:
         self.is_drawing = False
         self.start_x, self.start_y = None, None
 
-        self.current_segment: List[int] = []
-        self.item_to_segment_group: Dict[int, List[int]] = {}
-        self.current_segment_coord: List[Tuple[int, int]] = []
-        self.segment_groups_coord: Dict[int, List[Tuple[int, int]]] = {}
-
         self.locked = False
         self.lock_client = None
 
+        # Модель сцены: источник данных для снимков и диффов без обращений к Tk
+        self.scene = SceneModel()
+        # Шина изменений: инструменты публикуют в неё вместо прямой отправки на сервер
+        self.bus = ChangeBus(self.canvas)
+        # Пакетный доступ к Tk: один скрипт Tcl на множество элементов
+        self.bridge = BulkCanvas(self.canvas)
+        # История отмены: обратимые операции, шаг завершается публикацией в шину
+        self.history = History(self)
+        self.bus.subscribe(self._commit_history)
+
+        # Вид бесконечного холста: элементы Tk существуют только для видимых объектов
+        self.viewport = Viewport()
+        self.selection: Set[str] = set()
+        # Слой, в который попадают новые объекты
+        self.active_layer = DEFAULT_LAYER
+        self._refresh_job = None
+        self._pan_anchor = (0, 0)
+        self.bind_viewport()
+
+        # Необязательный растровый слой под векторными объектами
+        self.raster: Optional[RasterLayer] = None
+        self.raster_view: Optional[RasterView] = None
+
+        # Изображения по содержимому (общие для всех документов) и их показ в нужном масштабе
+        self.images = ImageStore()
+        self.photos = PhotoCache(self.canvas, self.images)
+        # Ломаные контуров из кривых Безье по уровням масштаба
+        self.curves = CurveCache()
+
+    # --- Вид: перевод координат между моделью (мировые) и холстом Tk (экранные)
+
+    def to_world(self, x: float, y: float) -> Tuple[float, float]:
+        """Экранная точка (например, из события мыши) → мировые координаты модели."""
+        return self.viewport.to_world(x, y)
+
+    def _screen_options(self, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Параметры модели → параметры Tk с учётом масштаба (толщина линий, размер шрифта)."""
+        scale = self.viewport.scale
+        if scale == 1:
+            return dict(options)
+
+        screen = dict(options)
+        if 'width' in screen and screen['width'] not in ('', None):
+            try:
+                screen['width'] = float(screen['width']) * scale
+            except (TypeError, ValueError):
+                pass
+        if 'font' in screen:
+            screen['font'] = scale_font(normalize_option(screen['font']), scale)
+        return screen
+
+    def _screen_item(self, obj: SceneObject) -> Tuple[List[float], Dict[str, Any]]:
+        """
+        Экранные координаты и параметры элемента Tk для объекта модели.
+        Изображение занимает прямоугольник своих координат и показывается
+        уровнем пирамиды, подходящим для текущего масштаба; контур показывается
+        ломаной, построенной с точностью текущего масштаба.
+        """
+        if obj.type == PATH_TYPE:
+            points = self.curves.flatten(obj.oid, obj.coords, self.viewport.scale)
+            return self.viewport.to_screen(points), self._screen_options(obj.config)
+        if obj.type != IMAGE_TYPE:
+            return self.viewport.to_screen(obj.coords), self._screen_options(obj.config)
+
+        x1, y1, x2, y2 = self.viewport.to_screen(obj.coords)
+        key = obj.config.get('key')
+        # Байты изображения могут ещё не прийти с сервера — тогда элемент пока пуст
+        photo = self.photos.photo(obj.oid, key, *photo_size(x2 - x1, y2 - y1)) if key in self.images else ''
+        return [min(x1, x2), min(y1, y2)], {'image': photo, 'anchor': 'nw'}
+
+    def _update_derived(self, obj: SceneObject) -> None:
+        """Заново строит элемент изображения или контура после изменения его координат или параметров."""
+        if obj.item is not None:
+            coords, options = self._screen_item(obj)
+            self.bridge.apply_many({obj.item: coords}, {obj.item: options})
+
+    def _tk_tags(self, tags: Iterable[str], obj: Optional[SceneObject] = None) -> Tuple[str, ...]:
+        """Теги элемента Tk: теги модели, тег сцены, тег слоя и (для выделенных) тег выделения."""
+        if obj is None:
+            return tuple(tags) + (SCENE_TAG,)
+        if obj.oid in self.selection:
+            return tuple(tags) + (SCENE_TAG, layer_tag(obj.layer), SELECTED_TAG)
+        return tuple(tags) + (SCENE_TAG, layer_tag(obj.layer))
+
+    def _visible_rect(self) -> Tuple[float, float, float, float]:
+        width = max(self.canvas.winfo_width(), 2) if self.canvas.winfo_ismapped() else self.width
+        height = max(self.canvas.winfo_height(), 2) if self.canvas.winfo_ismapped() else self.height
+        return self.viewport.visible_rect(width, height)
+
+    def _hidden_layers(self) -> Set[str]:
+        return {layer.lid for layer in self.scene.layers if not layer.visible}
+
+    def _is_visible(self, oid: str, rect: Tuple[float, float, float, float]) -> bool:
+        if not self.scene.get_layer(self.scene.objects[oid].layer).visible:
+            return False
+        box = self.scene.index.boxes.get(oid)
+        if box is None:
+            return True
+        return box[0] <= rect[2] and box[2] >= rect[0] and box[1] <= rect[3] and box[3] >= rect[1]
+
+    # --- Создание и удаление объектов
+
+    def create_object(self, item_type: str, coords: Iterable[float], config: Dict[str, Any],
+                      tags: Iterable[str] = (), oid: Optional[str] = None) -> int:
+        """
+        Создаёт элемент холста и регистрирует его в модели сцены.
+        Координаты мировые; объект попадает на вершину активного слоя,
+        интерактивно созданный элемент создаётся всегда.
+        """
+        coords = list(coords)
+        obj = self.scene.add(item_type, coords, config, tags, oid=oid, layer=self.active_layer)
+        screen_coords, options = self._screen_item(obj)
+        item = getattr(self.canvas, 'create_' + TK_TYPES.get(item_type, item_type))(
+            screen_coords, **options, tags=self._tk_tags(obj.tags, obj))
+        self.scene.bind_item(obj.oid, item)
+        below = self._materialized_below(obj.oid)
+        if below is not None and self.scene.rank(obj.oid) < len(self.scene.order) - 1:
+            self.canvas.tag_raise(item, below)
+        self._record_created([obj])
+        return item
+
+    def create_objects(self, items_data: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """
+        Создаёт множество объектов одним пакетом и регистрирует их в модели.
+        Элементы описываются так же, как в файлах сохранения.
+        Элементы Tk создаются только для объектов в видимой области, для остальных возвращается None.
+        """
+        objects = []
+        for item_data in items_data:
+            config = dict(item_data['config'])
+            config.pop('tags', None)
+            objects.append(self.scene.add(item_data['type'], item_data['coords'], config,
+                                          item_data['tags'], oid=item_data.get('id'),
+                                          layer=item_data.get('layer', self.active_layer)))
+
+        rect = self._visible_rect()
+        # Объекты верхнего слоя ложатся на вершину порядка и перестановки не требуют
+        on_top = all(obj.layer == self.scene.layers[-1].lid for obj in objects)
+        self._materialize([obj for obj in objects if self._is_visible(obj.oid, rect)], restack=not on_top)
+        self._record_created(objects)
+        return [obj.item for obj in objects]
+
+    def remove_objects(self, oids: Iterable[str]) -> None:
+        """Удаляет объекты из модели и их элементы с холста одним вызовом."""
+        oids = [oid for oid in oids if oid in self.scene]
+        if self._recording():
+            # Сверху вниз: при отмене нижние объекты восстанавливаются раньше верхних
+            for oid in sorted(oids, key=self.scene.rank, reverse=True):
+                self.history.record('delete', oid, self._removal_state(oid), None)
+
+        for oid in oids:
+            self.selection.discard(oid)
+            self.photos.release(oid)
+            self.curves.drop(oid)
+        items = [obj.item for obj in self.scene.remove_many(oids) if obj.item is not None]
+        if items:
+            self.canvas.delete(*items)
+
+    def delete_object(self, item: int) -> None:
+        """Удаляет элемент с холста и из модели."""
+        obj = self.scene.get_by_item(item)
+        if obj:
+            self.remove_objects([obj.oid])
+        else:
+            self.canvas.delete(item)
+
+    def clear_objects(self) -> None:
+        """Удаляет все элементы сцены с холста и очищает модель."""
+        if self._recording():
+            for oid in reversed(self.scene.order):
+                self.history.record('delete', oid, self._removal_state(oid), None)
+        self.canvas.delete(SCENE_TAG)
+        self.photos.clear()
+        self.curves.clear()
+        self.scene.clear()
+        self.clear_selection()
+        if self.scene.get_layer(self.active_layer) is None:
+            self.active_layer = self.scene.layers[-1].lid
+
+    # --- Изменение объектов
+
+    def object_of(self, item: int) -> Optional[SceneObject]:
+        """
+        Возвращает объект модели, соответствующий элементу холста.
+        """
+        return self.scene.get_by_item(item)
+
+    def pick(self, x: float, y: float, tags: Iterable[str] = ('shape', 'text_box'),
+             tolerance: float = 2.0) -> Optional[int]:
+        """
+        Верхний элемент под мировой точкой по пространственному индексу модели
+        с точной проверкой геометрии. Учитываются только объекты с одним из тегов.
+        Допуск задаётся в экранных пикселях.
+        """
+        tags = set(tags)
+        obj = self.scene.pick(x, y, tolerance / self.viewport.scale,
+                              accept=lambda candidate: candidate.item is not None and self.is_editable(candidate)
+                              and bool(tags.intersection(candidate.tags)))
+        return obj.item if obj else None
+
+    def is_editable(self, obj: SceneObject) -> bool:
+        """Объект можно выбрать и изменить, если его слой виден и не заблокирован."""
+        layer = self.scene.get_layer(obj.layer)
+        return layer.visible and not layer.locked
+
+    def update_objects(self, coords: Optional[Dict[str, List[float]]] = None,
+                       options: Optional[Dict[str, Dict[str, Any]]] = None,
+                       tags: Optional[Dict[str, Tuple[str, ...]]] = None) -> None:
+        """
+        Пакетно меняет координаты, параметры и теги объектов (ключи — ID модели).
+        Модель обновляется всегда, элементы Tk — только для видимых объектов.
+        """
+        tk_coords: Dict[int, List[float]] = {}
+        tk_options: Dict[int, Dict[str, Any]] = {}
+        recording = self._recording()
+
+        for oid, item_coords in (coords or {}).items():
+            obj = self.scene.objects[oid]
+            if recording:
+                self.history.record('coords', oid, list(obj.coords), list(item_coords))
+            self.scene.set_coords(oid, item_coords)
+            if obj.item is not None and obj.type in DERIVED_TYPES:
+                tk_coords[obj.item], tk_options[obj.item] = self._screen_item(obj)
+            elif obj.item is not None:
+                tk_coords[obj.item] = self.viewport.to_screen(item_coords)
+        for oid, item_options in (options or {}).items():
+            obj = self.scene.objects[oid]
+            if recording:
+                self.history.record('options', oid, self._options_before(obj, item_options), dict(item_options))
+            self.scene.configure(oid, **item_options)
+            if obj.item is not None and obj.type in DERIVED_TYPES:
+                tk_options[obj.item] = self._screen_item(obj)[1]
+            elif obj.item is not None:
+                tk_options[obj.item] = self._screen_options(item_options)
+        for oid, item_tags in (tags or {}).items():
+            obj = self.scene.objects[oid]
+            if recording:
+                self.history.record('tags', oid, tuple(obj.tags), tuple(item_tags))
+            self.scene.set_tags(oid, item_tags)
+            if obj.item is not None:
+                tk_options.setdefault(obj.item, {})['tags'] = self._tk_tags(item_tags, obj)
+
+        if tk_coords or tk_options:
+            self.bridge.apply_many(tk_coords, tk_options)
+
+    def set_coords(self, item: int, coords: Iterable[float]) -> None:
+        """Задаёт мировые координаты элемента и обновляет модель."""
+        coords = list(coords)
+        obj = self.scene.get_by_item(item)
+        if obj:
+            if self._recording():
+                self.history.record('coords', obj.oid, list(obj.coords), coords)
+            self.scene.set_coords(obj.oid, coords)
+        if obj is not None and obj.type in DERIVED_TYPES:
+            self._update_derived(obj)
+        else:
+            self.canvas.coords(item, *self.viewport.to_screen(coords))
+
+    def move_object(self, item: int, dx: float, dy: float) -> None:
+        """Сдвигает элемент на dx, dy в мировых координатах и обновляет модель."""
+        scale = self.viewport.scale
+        self.canvas.move(item, dx * scale, dy * scale)
+        obj = self.scene.get_by_item(item)
+        if obj:
+            before = list(obj.coords)
+            self.scene.move(obj.oid, dx, dy)
+            if self._recording():
+                self.history.record('coords', obj.oid, before, list(obj.coords))
+
+    def configure_object(self, item: int, **options: Any) -> None:
+        """Меняет параметры элемента и обновляет модель."""
+        obj = self.scene.get_by_item(item)
+        if obj:
+            if self._recording():
+                self.history.record('options', obj.oid, self._options_before(obj, options), dict(options))
+            self.scene.configure(obj.oid, **options)
+        if obj is not None and obj.type in DERIVED_TYPES:
+            self._update_derived(obj)
+        else:
+            self.canvas.itemconfig(item, **self._screen_options(options))
+
+    def set_tags(self, item: int, tags: Iterable[str]) -> None:
+        """Заменяет теги элемента и обновляет модель."""
+        tags = tuple(tags)
+        obj = self.scene.get_by_item(item)
+        self.canvas.itemconfig(item, tags=self._tk_tags(tags, obj))
+        if obj:
+            if self._recording():
+                self.history.record('tags', obj.oid, tuple(obj.tags), tags)
+            self.scene.set_tags(obj.oid, tags)
+
+    # --- Порядок отрисовки
+
+    def place_above(self, oid: str, below_oid: Optional[str]) -> None:
+        """
+        Ставит объект сразу над below_oid (без below_oid — в самый низ).
+        Элемент Tk ставится над ближайшим видимым объектом ниже него.
+        """
+        before = self._below(oid)
+        self.scene.place_above(oid, below_oid)
+        self._record_order(oid, before)
+        item = self.scene.objects[oid].item
+        if item is not None:
+            self.bridge.restack_many([(item, self._materialized_below(oid))])
+
+    def _materialized_below(self, oid: str) -> Optional[int]:
+        """Элемент Tk ближайшего видимого объекта под данным в порядке модели."""
+        order = self.scene.order
+        for index in range(self.scene.rank(oid) - 1, -1, -1):
+            item = self.scene.objects[order[index]].item
+            if item is not None:
+                return item
+        return self._bottom_item()
+
+    def _bottom_item(self) -> Optional[int]:
+        """Элемент, над которым лежат все объекты сцены: изображение растрового слоя, если оно есть."""
+        return self.raster_view.item if self.raster_view is not None else None
+
+    # --- Запись истории отмены
+
+    def _recording(self) -> bool:
+        """Изменения с сервера и загрузка документа идут при заглушённой шине и в историю не попадают."""
+        return not self.bus.is_muted and self.history.recording
+
+    def _removal_state(self, oid: str) -> Tuple[Dict[str, Any], Optional[str], Dict[str, Any]]:
+        """Данные объекта для отмены удаления: параметры, соседа снизу и служебные данные реестра."""
+        return self.scene.objects[oid].to_dict(), self._below(oid), self.scene.meta.entry(oid)
+
+    def _below(self, oid: str) -> Optional[str]:
+        rank = self.scene.rank(oid)
+        return self.scene.order[rank - 1] if rank > 0 else None
+
+    @staticmethod
+    def _options_before(obj: SceneObject, options: Dict[str, Any]) -> Dict[str, Any]:
+        return {option: obj.config.get(option, '') for option in options}
+
+    def _record_created(self, objects: List[SceneObject]) -> None:
+        if self._recording():
+            for obj in objects:
+                self.history.record('create', obj.oid, None, (obj.to_dict(), self._below(obj.oid), {}))
+
+    def _record_order(self, oid: str, before: Optional[str]) -> None:
+        if self._recording():
+            after = self._below(oid)
+            if after != before:
+                self.history.record('order', oid, before, after)
+
+    def undo(self, event=None) -> None:
+        """Отменяет последнее действие."""
+        self.history.undo()
+
+    def redo(self, event=None) -> None:
+        """Повторяет отменённое действие."""
+        self.history.redo()
+
+    # --- Выделение и группы
+
+    def group_members(self, oids: Iterable[str]) -> Set[str]:
+        """Дополняет объекты остальными участниками их групп."""
+        oids = {oid for oid in oids if oid in self.scene}
+        group_tags = {tag for oid in oids for tag in self.scene.objects[oid].tags if tag.startswith(GROUP_TAG_PREFIX)}
+        if group_tags:
+            oids.update(obj.oid for obj in self.scene.objects.values() if group_tags.intersection(obj.tags))
+        return oids
+
+    def select(self, oids: Iterable[str], add: bool = False) -> None:
+        """
+        Выделяет объекты (вместе с их группами). Без add прежнее выделение снимается.
+        """
+        oids = {oid for oid in self.group_members(oids) if self.is_editable(self.scene.objects[oid])}
+        if not add:
+            self.deselect(self.selection - oids)
+        new = oids - self.selection
+        self.selection.update(new)
+        self.bridge.tag_many([self.scene.objects[oid].item for oid in new
+                              if self.scene.objects[oid].item is not None], SELECTED_TAG)
+        self.update_selection_frame()
+
+    def deselect(self, oids: Iterable[str]) -> None:
+        """Снимает выделение с объектов."""
+        oids = self.selection.intersection(oids)
+        self.selection.difference_update(oids)
+        self.bridge.tag_many([self.scene.objects[oid].item for oid in oids
+                              if oid in self.scene and self.scene.objects[oid].item is not None],
+                             SELECTED_TAG, add=False)
+        self.update_selection_frame()
+
+    def clear_selection(self) -> None:
+        self.selection.clear()
+        self.canvas.dtag(SELECTED_TAG, SELECTED_TAG)
+        self.canvas.delete(SELECTION_FRAME_TAG)
+
+    def update_selection_frame(self) -> None:
+        """Рисует пунктирную рамку вокруг выделения по прямоугольникам из индекса модели."""
+        self.selection.intersection_update(self.scene.objects)
+        boxes = [self.scene.index.boxes[oid] for oid in self.selection if oid in self.scene.index.boxes]
+        if not boxes:
+            self.canvas.delete(SELECTION_FRAME_TAG)
+            return
+
+        frame = self.viewport.to_screen([min(box[0] for box in boxes) - 3, min(box[1] for box in boxes) - 3,
+                                         max(box[2] for box in boxes) + 3, max(box[3] for box in boxes) + 3])
+        if self.canvas.find_withtag(SELECTION_FRAME_TAG):
+            self.canvas.coords(SELECTION_FRAME_TAG, *frame)
+        else:
+            self.canvas.create_rectangle(frame, outline="#1e90ff", dash=(4, 2), tags=(SELECTION_FRAME_TAG,))
+        self.canvas.tag_raise(SELECTION_FRAME_TAG)
+
+    def move_selection(self, dx: float, dy: float) -> None:
+        """
+        Сдвигает выделение на dx, dy в мировых координатах: в Tk — одной командой
+        move по тегу независимо от числа объектов, в модели — по каждому объекту.
+        """
+        if not self.selection:
+            return
+
+        scale = self.viewport.scale
+        self.canvas.move(SELECTED_TAG, dx * scale, dy * scale)
+        self.canvas.move(SELECTION_FRAME_TAG, dx * scale, dy * scale)
+
+        recording = self._recording()
+        for oid in self.selection:
+            obj = self.scene.objects[oid]
+            before = list(obj.coords) if recording else None
+            self.scene.move(oid, dx, dy)
+            if recording:
+                self.history.record('coords', oid, before, list(obj.coords))
+
+    def translate_objects(self, oids: Iterable[str], dx: float, dy: float) -> None:
+        """Сдвигает объекты по ID (например, по операции сдвига, пришедшей с сервера)."""
+        coords = {}
+        for oid in oids:
+            obj = self.scene.get(oid)
+            if obj is not None:
+                coords[oid] = [coord + (dx if index % 2 == 0 else dy) for index, coord in enumerate(obj.coords)]
+        if coords:
+            self.update_objects(coords=coords)
+            self.update_selection_frame()
+
+    def group_selection(self) -> Optional[str]:
+        """
+        Объединяет выделенные объекты в постоянную группу. Группа хранится
+        общим тегом объектов, поэтому сохраняется в файлах и передаётся на сервер.
+        """
+        if len(self.selection) < 2:
+            return None
+
+        group_tag = GROUP_TAG_PREFIX + self.scene.new_id()
+        tags = {}
+        for oid in self.selection:
+            own = [tag for tag in self.scene.objects[oid].tags if not tag.startswith(GROUP_TAG_PREFIX)]
+            tags[oid] = tuple(own) + (group_tag,)
+        self.update_objects(tags=tags)
+        logger.info(f"Создана группа {group_tag}: объектов {len(tags)}")
+        self.bus.publish()
+        return group_tag
+
+    def ungroup_selection(self) -> None:
+        """Распускает группы выделенных объектов; выделение сохраняется."""
+        tags = {}
+        for oid in self.selection:
+            own = self.scene.objects[oid].tags
+            if any(tag.startswith(GROUP_TAG_PREFIX) for tag in own):
+                tags[oid] = tuple(tag for tag in own if not tag.startswith(GROUP_TAG_PREFIX))
+        if tags:
+            self.update_objects(tags=tags)
+            logger.info(f"Группа распущена: объектов {len(tags)}")
+            self.bus.publish()
+
+    # --- Слои
+
+    def add_layer(self, name: str) -> str:
+        """Добавляет слой над остальными и делает его активным."""
+        before = self.scene.layers_snapshot()
+        layer = self.scene.add_layer(name)
+        self._record_layers(before)
+        self.active_layer = layer.lid
+        logger.info(f"Добавлен слой '{name}'")
+        self.bus.publish()
+        return layer.lid
+
+    def remove_layer(self, lid: str) -> None:
+        """
+        Удаляет слой вместе с его объектами. В историю попадают удаление объектов и затем
+        прежний список слоёв: при отмене слой восстанавливается раньше своих объектов.
+        """
+        if len(self.scene.layers) == 1:
+            return
+        before = self.scene.layers_snapshot()
+        self.remove_objects(self.scene.layer_objects(lid))
+        self.scene.remove_layer(lid)
+        self._record_layers(before)
+        if self.active_layer == lid:
+            self.active_layer = self.scene.layers[-1].lid
+        logger.info(f"Удалён слой {lid}")
+        self.bus.publish()
+
+    def rename_layer(self, lid: str, name: str) -> None:
+        before = self.scene.layers_snapshot()
+        self.scene.get_layer(lid).name = name
+        self.scene.layers_dirty = True
+        self._record_layers(before)
+        self.bus.publish()
+
+    def set_layer_visible(self, lid: str, visible: bool) -> None:
+        """
+        Скрытый слой не имеет элементов Tk: они удаляются одной командой по тегу слоя
+        и создаются заново при показе.
+        """
+        layer = self.scene.get_layer(lid)
+        if layer.visible == visible:
+            return
+
+        before = self.scene.layers_snapshot()
+        layer.visible = visible
+        self.scene.layers_dirty = True
+        self._record_layers(before)
+        if visible:
+            self.refresh_viewport()
+        else:
+            objects = [self.scene.objects[oid] for oid in self.scene.layer_objects(lid)]
+            self.deselect([obj.oid for obj in objects])
+            for obj in objects:
+                self.scene.bind_item(obj.oid, None)
+                self.photos.release(obj.oid)
+            self.canvas.delete(layer_tag(lid))
+        self.bus.publish()
+
+    def set_layer_locked(self, lid: str, locked: bool) -> None:
+        """Объекты заблокированного слоя нельзя выбрать, выделить или переместить."""
+        before = self.scene.layers_snapshot()
+        self.scene.get_layer(lid).locked = locked
+        self.scene.layers_dirty = True
+        self._record_layers(before)
+        if locked:
+            self.deselect(self.scene.layer_objects(lid))
+        self.bus.publish()
+
+    def move_layer(self, lid: str, index: int) -> None:
+        """
+        Переставляет слой на позицию index (0 — нижний). В Tk слой переносится
+        одной командой raise/lower по тегу слоя с сохранением порядка внутри него.
+        """
+        before = self.scene.layers_snapshot()
+        self.scene.move_layer(lid, index)
+        self._record_layers(before)
+        tag = layer_tag(lid)
+        if self.canvas.find_withtag(tag):
+            below = self._materialized_layer_below(lid)
+            if below is None and self._bottom_item() is not None:
+                self.canvas.tag_raise(tag, self._bottom_item())
+            elif below is None:
+                self.canvas.tag_lower(tag)
+            else:
+                self.canvas.tag_raise(tag, layer_tag(below))
+        self.bus.publish()
+
+    def _record_layers(self, before: List[Dict[str, Any]]) -> None:
+        """Записывает в историю изменение списка слоёв (порядок, имена, видимость, блокировка)."""
+        if self._recording():
+            self.history.record('layers', None, before, self.scene.layers_snapshot())
+
+    def _materialized_layer_below(self, lid: str) -> Optional[str]:
+        """Ближайший слой ниже данного, у которого есть элементы Tk."""
+        layers = [layer.lid for layer in self.scene.layers]
+        for lower in reversed(layers[:layers.index(lid)]):
+            if any(self.scene.objects[oid].item is not None for oid in self.scene.layer_objects(lower)):
+                return lower
+        return None
+
+    def move_to_layer(self, oids: Iterable[str], lid: str) -> None:
+        """Переносит объекты на вершину слоя lid."""
+        hidden = not self.scene.get_layer(lid).visible
+        for oid in sorted(oids, key=self.scene.rank):
+            obj = self.scene.objects[oid]
+            if obj.layer == lid:
+                continue
+            before = (obj.layer, self._below(oid))
+            self.scene.set_layer(oid, lid)
+            if self._recording():
+                self.history.record('layer', oid, before, (lid, self._below(oid)))
+
+            if obj.item is None:
+                continue
+            if hidden:
+                self._dematerialize([obj])
+            else:
+                self.canvas.itemconfig(obj.item, tags=self._tk_tags(obj.tags, obj))
+                self.bridge.restack_many([(obj.item, self._materialized_below(oid))])
+        if not hidden:
+            self.refresh_viewport()
+
+    def apply_layers(self, layers_data: List[Dict[str, Any]]) -> None:
+        """
+        Применяет список слоёв из файла или с сервера: видимость и порядок
+        слоёв в Tk восстанавливаются одной командой на слой.
+        """
+        if layers_data == self.scene.layers_snapshot():
+            return
+
+        self.scene.set_layers(layers_data)
+        if self.scene.get_layer(self.active_layer) is None:
+            self.active_layer = self.scene.layers[-1].lid
+
+        hidden_layers = self._hidden_layers()
+        hidden = [obj for obj in self.scene.objects.values() if obj.item is not None and obj.layer in hidden_layers]
+        self._dematerialize(hidden)
+        for layer in self.scene.layers:
+            if layer.visible and self.canvas.find_withtag(layer_tag(layer.lid)):
+                self.canvas.tag_raise(layer_tag(layer.lid))
+        self.refresh_viewport()
+        self.update_selection_frame()
+
+    # --- Отсечение невидимых объектов
+
+    def _materialize(self, objects: List[SceneObject], restack: bool = True) -> None:
+        """
+        Создаёт элементы Tk для объектов модели одним пакетом.
+        При restack элементы ставятся на свои места в порядке отрисовки.
+        """
+        if not objects:
+            return
+
+        specs = [(TK_TYPES.get(obj.type, obj.type), *self._screen_item(obj), self._tk_tags(obj.tags, obj)) for obj in objects]
+        for obj, item in zip(objects, self.bridge.create_many(specs)):
+            self.scene.bind_item(obj.oid, item)
+
+        if restack:
+            objects = sorted(objects, key=lambda obj: self.scene.rank(obj.oid))
+            self.bridge.restack_many([(obj.item, self._materialized_below(obj.oid)) for obj in objects])
+
+    def _dematerialize(self, objects: List[SceneObject]) -> None:
+        """Удаляет элементы Tk объектов, оставляя их в модели."""
+        items = [obj.item for obj in objects if obj.item is not None]
+        for obj in objects:
+            self.scene.bind_item(obj.oid, None)
+            self.photos.release(obj.oid)
+        if items:
+            self.canvas.delete(*items)
+
+    def refresh_viewport(self, event=None) -> None:
+        """
+        Приводит набор элементов Tk к видимой области: создаёт появившиеся объекты
+        и удаляет ушедшие за её пределы (с запасом).
+        """
+        self._refresh_job = None
+        hidden_layers = self._hidden_layers()
+        visible = {obj.oid for obj in self.scene.query_rect(*self._visible_rect()) if obj.layer not in hidden_layers}
+
+        materialized = [obj for obj in self.scene.objects.values() if obj.item is not None]
+        hidden = [obj for obj in materialized if obj.oid not in visible]
+        shown = [self.scene.objects[oid] for oid in visible if self.scene.objects[oid].item is None]
+
+        self._dematerialize(hidden)
+        self._materialize(shown)
+        if hidden or shown:
+            logger.debug(f"Видимая область: создано {len(shown)}, удалено {len(hidden)} элементов")
+        if self.raster_view is not None:
+            self.raster_view.render()
+
+    def schedule_refresh(self, delay_ms: int = 50) -> None:
+        """Откладывает отсечение, чтобы не выполнять его на каждом событии перемещения."""
+        if self._refresh_job is None:
+            self._refresh_job = self.canvas.after(delay_ms, self.refresh_viewport)
+
+    def redraw_viewport(self) -> None:
+        """
+        Пересчитывает экранные координаты и параметры всех видимых элементов
+        из мировых координат модели (без накопления погрешности), затем выполняет отсечение.
+        """
+        coords: Dict[int, List[float]] = {}
+        options: Dict[int, Dict[str, Any]] = {}
+        for obj in self.scene.objects.values():
+            if obj.item is None:
+                continue
+            if obj.type in DERIVED_TYPES:
+                # Изображение заново выбирает уровень пирамиды, контур — точность ломаной
+                coords[obj.item], options[obj.item] = self._screen_item(obj)
+                continue
+            coords[obj.item] = self.viewport.to_screen(obj.coords)
+            scaled = {option: value for option, value in self._screen_options(obj.config).items()
+                      if option in ('width', 'font')}
+            if scaled:
+                options[obj.item] = scaled
+        self.bridge.apply_many(coords, options)
+        self.refresh_viewport()
+        self.update_selection_frame()
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Сдвигает вид на dx, dy экранных пикселей одним перемещением всех элементов сцены."""
+        self.viewport.pan(dx, dy)
+        self.canvas.move(SCENE_TAG, dx, dy)
+        self.canvas.move(SELECTION_FRAME_TAG, dx, dy)
+        self.canvas.move(RASTER_TAG, dx, dy)
+        self.schedule_refresh()
+
+    def zoom(self, factor: float, x: float, y: float) -> None:
+        """Масштабирует вид относительно экранной точки (x, y)."""
+        if self.viewport.zoom(factor, x, y) != 1:
+            self.redraw_viewport()
+            logger.info(f"Масштаб вида: {self.viewport.scale:.2f}")
+
+    def reset_view(self, event=None) -> None:
+        """Возвращает исходное положение и масштаб вида."""
+        self.viewport.reset()
+        self.redraw_viewport()
+
+    def bind_viewport(self) -> None:
+        """
+        Привязывает управление видом: средняя кнопка — панорамирование,
+        колесо — прокрутка (с Shift — по горизонтали), Ctrl+колесо — масштаб.
+        """
+        self.canvas.bind("<ButtonPress-2>", self._on_pan_start)
+        self.canvas.bind("<B2-Motion>", self._on_pan_move)
+        self.canvas.bind("<Configure>", self.refresh_viewport)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Shift-MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Control-MouseWheel>", self._on_wheel)
+        for button in ("4", "5"):
+            self.canvas.bind(f"<Button-{button}>", self._on_wheel)
+            self.canvas.bind(f"<Shift-Button-{button}>", self._on_wheel)
+            self.canvas.bind(f"<Control-Button-{button}>", self._on_wheel)
+
+    def _on_pan_start(self, event) -> None:
+        self._pan_anchor = (event.x, event.y)
+
+    def _on_pan_move(self, event) -> None:
+        last_x, last_y = self._pan_anchor
+        self._pan_anchor = (event.x, event.y)
+        self.pan(event.x - last_x, event.y - last_y)
+
+    def _on_wheel(self, event) -> None:
+        if getattr(event, 'num', None) in (4, 5):
+            direction = 1 if event.num == 4 else -1
+        else:
+            direction = 1 if event.delta > 0 else -1
+
+        if event.state & 0x0004:  # Ctrl
+            self.zoom(ZOOM_STEP if direction > 0 else 1 / ZOOM_STEP, event.x, event.y)
+        elif event.state & 0x0001:  # Shift
+            self.pan(direction * SCROLL_STEP, 0)
+        else:
+            self.pan(0, direction * SCROLL_STEP)
+
     def get_mode(self) -> str:
         """
         Получение текущего режима рисования (кисть, ластик и т.п.).
@@ -48,12 +817,81 @@ class DrawingCanvas:
         if new_bg:
             self.update_background(new_bg)
             logger.info(f"Изменён цвет фона холста: {new_bg}")
-            self._update_canvas_state()
+            self.bus.publish()
+
+    # --- Документы: элементы Tk существуют только у активного документа
+
+    def _commit_history(self) -> None:
+        # История меняется вместе с активным документом, поэтому подписана не сама история
+        self.history.commit()
+
+    def attach_document(self, scene: SceneModel, history: History, viewport: Viewport,
+                        background: str, active_layer: str, raster: Optional[RasterLayer] = None) -> None:
+        """
+        Делает активной модель другого документа: элементы прежнего удаляются
+        одной командой по тегу сцены, элементы видимых объектов нового
+        создаются одним пакетом. Прежние модель, история и вид остаются у вызывающего.
+        """
+        if self._refresh_job is not None:
+            self.canvas.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.clear_selection()
+        self.canvas.delete(SCENE_TAG)
+        self.photos.clear()
+        self.curves.clear()
+        for obj in self.scene.objects.values():
+            if obj.item is not None:
+                self.scene.bind_item(obj.oid, None)
+
+        self.scene = scene
+        self.history = history
+        self.viewport = viewport
+        self.active_layer = active_layer if scene.get_layer(active_layer) else scene.layers[-1].lid
+        self.bg = background
+        self.canvas.config(bg=background)
+
+        self.set_raster(raster)
+
+        # Холст пуст, поэтому элементы создаются сразу в порядке отрисовки, без перестановки
+        rect = self._visible_rect()
+        self._materialize([obj for obj in scene if self._is_visible(obj.oid, rect)], restack=False)
+
+    # --- Растровый слой
+
+    def set_raster(self, raster: Optional[RasterLayer]) -> None:
+        """Подключает растровый слой (или убирает его при raster=None)."""
+        if self.raster_view is not None:
+            self.raster_view.destroy()
+            self.raster_view = None
+        self.raster = raster
+        if raster is not None:
+            self.raster_view = RasterView(self, raster)
+            self.raster_view.render()
+
+    def record_raster(self, rect: Tuple[int, int, int, int], before, after) -> None:
+        """Записывает в историю изменение прямоугольника растрового слоя."""
+        if self._recording():
+            self.history.record('raster', None, (rect, before), (rect, after))
+
+    def restore_raster(self, rect: Tuple[int, int, int, int], pixels) -> None:
+        """
+        Возвращает пиксели прямоугольника растрового слоя (отмена и повтор);
+        pixels=None — прямоугольник очищен.
+        """
+        if self.raster is None:
+            return
+        left, top, right, bottom = rect
+        self.raster.pixels[top:bottom, left:right] = 0 if pixels is None else pixels
+        self.raster.dirty = union(self.raster.dirty, rect)
+        if self.raster_view is not None:
+            self.raster_view.flush()
 
     def update_background(self, new_bg: str) -> None:
         """
         Обновляет цвет фона холста.
         """
+        if new_bg != self.bg and self._recording():
+            self.history.record('background', None, self.bg, new_bg)
         self.bg = new_bg
         self.canvas.config(bg=new_bg)
 
@@ -66,25 +904,25 @@ class DrawingCanvas:
         self.canvas.unbind("<B1-Motion>")
         self.canvas.unbind("<Button-1>")
         self.canvas.unbind("<ButtonRelease-1>")
+        self.canvas.unbind("<Double-Button-1>")
 
     def fill_with_color(self, event) -> None:
         """
         Заливка объектов или фона цветом.
         """
         if self.fill_color:
-            item = self.canvas.find_closest(event.x, event.y)[0]
-            item_tags = self.canvas.gettags(item)
+            item = self.pick(*self.to_world(event.x, event.y))
 
-            if 'shape' in item_tags or 'text_box' in item_tags:
-                self.canvas.itemconfig(item, fill=self.fill_color)
+            if item is not None:
+                self.configure_object(item, fill=self.fill_color)
                 logger.info(f"Заливка объекта {item} цветом {self.fill_color}")
 
             else:
-                self.canvas.config(bg=self.fill_color)
+                self.update_background(self.fill_color)
                 logger.info(f"Заливка фона цветом {self.fill_color}")
 
-        # Отправляем изменения на сервер
-        self._update_canvas_state()
+        # Сообщаем об изменении холста
+        self.bus.publish()
 
     def set_mode(self, mode: str) -> None:
         """"""
@@ -98,29 +936,21 @@ class DrawingCanvas:
     def reset_canvas(self, notify: bool = True) -> None:
         """
         Сброс холста. Удаляет все объекты и сбрасывает состояние.
+        При notify=False изменение не публикуется (например, очистка пришла с сервера).
         """
-        self.canvas.delete("all")
-        self.canvas.config(bg="white")  # Устанавливаем белый фон
-        self.bg = "white"  # Обновляем переменную фона
+        self.clear_objects()
+        if self.raster is not None:
+            rect = (0, 0, self.raster.width, self.raster.height)
+            self.record_raster(rect, self.raster.pixels.copy(), None)
+            self.restore_raster(rect, None)
+        self.apply_layers([])  # Один слой по умолчанию
+        self.update_background("white")  # Устанавливаем белый фон
 
         logger.info("Холст очищен")
 
         self.is_drawing = False
         self.start_x, self.start_y = None, None
-        self.current_segment = []
-        self.item_to_segment_group = {}
-
-        # Отправляем изменения на сервер
-        self._update_canvas_state()
-
-    def _update_canvas_state(self):
-        """Вспомогательный метод для отправки состояния холста"""
-        if hasattr(self.root, 'network') and self.root.network.connected:
-            items_data = self.root.file_manager.objects_data_collector()
-            self.root.network.send({
-                'type': 'draw',
-                'data': {
-                    'drawings': items_data,
-                    'background': self.bg
-                }
-            })
\ No newline at end of file
+
+        # Сообщаем об изменении холста
+        if notify:
+            self.bus.publish()
@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+FRAME_BUDGET_MS = 16
+
+
+class ChangeBus:
+    """
+    Шина уведомлений об изменениях холста.
+    Инструменты публикуют в неё изменения, подписчики (например, отправка
+    состояния на сервер) вызываются не чаще одного раза за бюджет кадра.
+    Изменение можно описать операцией (например, сдвигом группы объектов):
+    если за кадр публиковались только операции, подписчики видят их в ops
+    и могут передать их вместо полного состояния.
+    """
+
+    def __init__(self, scheduler=None, frame_budget_ms: int = FRAME_BUDGET_MS) -> None:
+        """
+        scheduler — виджет Tk (нужны методы after/after_cancel).
+        Без планировщика или с нулевым бюджетом публикация происходит сразу.
+        """
+        self.scheduler = scheduler
+        self.frame_budget_ms = frame_budget_ms
+
+        self._subscribers: List[Callable[[], None]] = []
+        self._depth = 0
+        self._muted = 0
+        self._pending = False
+        self._full = False
+        self._ops: List[Dict[str, Any]] = []
+        self._job: Optional[str] = None
+
+        # Операции последней публикации; None — изменилось состояние целиком
+        self.ops: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def is_muted(self) -> bool:
+        return self._muted > 0
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self) -> None:
+        """
+        Отмечает, что холст изменился. Внутри транзакции публикация
+        откладывается до её завершения.
+        """
+        if self._muted:
+            return
+
+        self._full = True
+        self._pending = True
+        if self._depth == 0:
+            self._schedule()
+
+    def publish_op(self, op: Dict[str, Any]) -> None:
+        """
+        Публикует изменение в виде операции {'type': ..., 'data': ...}.
+        """
+        if self._muted:
+            return
+
+        self._ops.append(op)
+        self._pending = True
+        if self._depth == 0:
+            self._schedule()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Группирует изменения: сколько бы раз ни вызывался publish внутри,
+        подписчики получат ровно одно уведомление.
+        """
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            if self._depth == 0 and self._pending:
+                self._schedule()
+
+    @contextmanager
+    def muted(self) -> Iterator[None]:
+        """
+        Подавляет публикации, например при применении изменений, пришедших с сервера.
+        """
+        self._muted += 1
+        try:
+            yield
+        finally:
+            self._muted -= 1
+
+    def _schedule(self) -> None:
+        if self.scheduler is None or self.frame_budget_ms <= 0:
+            self.flush()
+        elif self._job is None:
+            self._job = self.scheduler.after(self.frame_budget_ms, self.flush)
+
+    def cancel(self) -> None:
+        """Отменяет отложенную публикацию."""
+        if self._job is not None:
+            self.scheduler.after_cancel(self._job)
+            self._job = None
+        self._pending = False
+        self._full = False
+        self._ops = []
+
+    def flush(self) -> None:
+        """Немедленно уведомляет подписчиков об отложенных изменениях."""
+        self._job = None
+        if not self._pending:
+            return
+
+        self._pending = False
+        self.ops = None if self._full else self._ops
+        self._full = False
+        self._ops = []
+        for callback in list(self._subscribers):
+            callback()
@@ -0,0 +1,105 @@
+import math
+from typing import Dict, List, Sequence, Tuple
+
+PATH_TYPE = "path"
+PATH_TAG = "path"
+# Наибольшее отклонение ломаной от кривой в экранных пикселях
+FLATNESS = 0.25
+# Уровни масштаба через полоктавы: ломаная пересчитывается, только когда масштаб уходит за уровень
+LEVELS_PER_OCTAVE = 2
+MAX_DEPTH = 16
+
+
+def zoom_level(scale: float) -> int:
+    return round(math.log2(scale) * LEVELS_PER_OCTAVE)
+
+
+def level_tolerance(level: int, flatness: float = FLATNESS) -> float:
+    """Допуск в мировых единицах для уровня масштаба (с запасом на его верхнюю границу)."""
+    return flatness / 2 ** ((level + 0.5) / LEVELS_PER_OCTAVE)
+
+
+def flatten_cubic(x0: float, y0: float, x1: float, y1: float, x2: float, y2: float,
+                  x3: float, y3: float, tolerance: float, out: List[float]) -> None:
+    """
+    Добавляет в out точки ломаной, приближающей кубическую кривую Безье
+    (без начальной точки). Кривая делится пополам по де Кастельжо, пока
+    контрольные точки не окажутся ближе tolerance к хорде: прямые участки
+    дают один отрезок, крутые изгибы — столько, сколько нужно.
+    """
+    stack = [(x0, y0, x1, y1, x2, y2, x3, y3, 0)]
+    while stack:
+        ax, ay, bx, by, cx, cy, dx, dy, depth = stack.pop()
+        chord_x, chord_y = dx - ax, dy - ay
+        length = math.hypot(chord_x, chord_y)
+        if length > 1e-9:
+            deviation = max(abs((bx - ax) * chord_y - (by - ay) * chord_x),
+                            abs((cx - ax) * chord_y - (cy - ay) * chord_x)) / length
+        else:
+            deviation = max(math.hypot(bx - ax, by - ay), math.hypot(cx - ax, cy - ay))
+
+        if deviation <= tolerance or depth >= MAX_DEPTH:
+            out.extend((dx, dy))
+            continue
+
+        abx, aby = (ax + bx) / 2, (ay + by) / 2
+        bcx, bcy = (bx + cx) / 2, (by + cy) / 2
+        cdx, cdy = (cx + dx) / 2, (cy + dy) / 2
+        abcx, abcy = (abx + bcx) / 2, (aby + bcy) / 2
+        bcdx, bcdy = (bcx + cdx) / 2, (bcy + cdy) / 2
+        midx, midy = (abcx + bcdx) / 2, (abcy + bcdy) / 2
+        # Правая половина кладётся первой, чтобы точки выходили по порядку
+        stack.append((midx, midy, bcdx, bcdy, cdx, cdy, dx, dy, depth + 1))
+        stack.append((ax, ay, abx, aby, abcx, abcy, midx, midy, depth + 1))
+
+
+def flatten_path(coords: Sequence[float], tolerance: float) -> List[float]:
+    """
+    Ломаная для контура из кубических сегментов. Контур хранится контрольными
+    точками: опорная, две управляющие, опорная и т. д. (3n + 1 точка);
+    у прямого сегмента управляющие точки совпадают с опорными.
+    """
+    points = [float(coord) for coord in coords[:2]]
+    for start in range(0, len(coords) - 7, 6):
+        flatten_cubic(*coords[start:start + 8], tolerance, points)
+    if len(points) == 2:
+        points.extend(points)
+    return points
+
+
+class CurveCache:
+    """
+    Ломаные контуров по уровням масштаба. Ломаная хранится относительно
+    первой опорной точки, поэтому перемещение контура её не сбрасывает;
+    сбрасывает только изменение формы (взаимного положения контрольных точек).
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Tuple[Tuple[float, ...], Dict[int, List[float]]]] = {}
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def flatten(self, oid: str, coords: Sequence[float], scale: float) -> List[float]:
+        """Ломаная контура в мировых координатах с точностью, подходящей для масштаба scale."""
+        origin_x, origin_y = coords[0], coords[1]
+        shape = tuple(coord - (origin_x if index % 2 == 0 else origin_y) for index, coord in enumerate(coords))
+        entry = self._entries.get(oid)
+        if entry is None or entry[0] != shape:
+            entry = (shape, {})
+            self._entries[oid] = entry
+
+        level = zoom_level(scale)
+        relative = entry[1].get(level)
+        if relative is None:
+            self.misses += 1
+            relative = flatten_path(shape, level_tolerance(level))
+            entry[1][level] = relative
+        return [coord + (origin_x if index % 2 == 0 else origin_y) for index, coord in enumerate(relative)]
+
+    def drop(self, oid: str) -> None:
+        self._entries.pop(oid, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
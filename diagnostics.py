@@ -0,0 +1,81 @@
+import tkinter as tk
+from localization import LocalizationManager
+from logger import logger
+
+REFRESH_MS = 500
+PING_EVERY = 2  # ping отправляется на каждом втором обновлении
+
+
+class DiagnosticsOverlay:
+    """
+    Оверлей сетевой диагностики поверх холста:
+    RTT, трафик, очередь отправки, время применения сообщений и отставание версии.
+    """
+
+    def __init__(self, master, canvas: tk.Canvas, loc: LocalizationManager) -> None:
+        """
+        Конструктор оверлея. Данные берутся из счётчиков NetworkClient.
+        """
+        self.master = master
+        self.loc = loc
+        self.visible = False
+        self._ticks = 0
+        self._job = None
+
+        self.label = tk.Label(canvas, justify="left", anchor="nw", font=("Courier", 9),
+                              background="black", foreground="light green", padx=6, pady=4)
+
+    def toggle(self, event=None) -> None:
+        """Показывает или скрывает оверлей."""
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self) -> None:
+        self.visible = True
+        self.label.place(x=8, y=8)
+        self.label.lift()
+        logger.info("Оверлей диагностики включён")
+        self.refresh()
+
+    def hide(self) -> None:
+        self.visible = False
+        self.label.place_forget()
+        if self._job:
+            self.master.after_cancel(self._job)
+            self._job = None
+        logger.info("Оверлей диагностики выключен")
+
+    def refresh(self) -> None:
+        """Перечитывает счётчики и планирует следующее обновление."""
+        if not self.visible:
+            return
+
+        network = self.master.network
+        if network.connected and self._ticks % PING_EVERY == 0:
+            network.ping()
+        self._ticks += 1
+
+        self.label.config(text=self.format_stats(network))
+        self._job = self.master.after(REFRESH_MS, self.refresh)
+
+    def format_stats(self, network) -> str:
+        """Формирует текст оверлея из счётчиков клиента."""
+        _ = self.loc.gettext
+        sent_rate, received_rate = network.traffic_rates()
+        rtt = f"{network.rtt_ms:.1f} ms" if network.rtt_ms is not None else "—"
+        apply = f"{network.last_apply_ms:.1f} ms" if network.last_apply_ms is not None else "—"
+        lag = max(network.server_version - network.applied_version, 0)
+
+        lines = [
+            f"{_('diag_status')}: {_('diag_online') if network.connected else _('diag_offline')}",
+            f"RTT: {rtt}",
+            f"{_('diag_out')}: {sent_rate:.0f} B/s",
+            f"{_('diag_in')}: {received_rate:.0f} B/s",
+            f"{_('diag_queue')}: {network.pending_sends}",
+            f"{_('diag_apply')}: {apply}",
+            f"{_('diag_touched')}: {network.last_touched if network.last_touched is not None else '—'}",
+            f"{_('diag_version_lag')}: {lag}",
+        ]
+        return "\n".join(lines)
@@ -0,0 +1,262 @@
+import base64
+import json
+import os
+import queue
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, TextIO, Tuple
+from binary_format import BINARY_EXTENSION, binary_events, is_binary_document, write_binary
+
+# Версия 2: компактный JSON, служебные разделы идут до объектов, поэтому объекты можно загружать по мере чтения
+FORMAT_VERSION = 2
+READ_CHUNK = 64 * 1024
+BATCH_SIZE = 250
+# Сколько пачек объектов может ждать в очереди между потоками
+QUEUE_BATCHES = 8
+# Разделы, которые нужны до создания объектов (порядок записи)
+HEADER_KEYS = ('version', 'background', 'layers', 'images', 'raster')
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+
+def encode_images(blobs: Dict[str, bytes]) -> Dict[str, str]:
+    return {key: base64.b64encode(data).decode('ascii') for key, data in blobs.items()}
+
+
+def write_document(file: TextIO, header: Dict[str, Any], batches: Iterable[List[Dict[str, Any]]]) -> int:
+    """
+    Пишет документ компактным JSON: сначала служебные разделы, затем объекты
+    по пачкам, по одному объекту в строке. В памяти одновременно находится
+    только текущая пачка. Возвращает число записанных объектов.
+    """
+    file.write('{')
+    for key in HEADER_KEYS:
+        if key in header:
+            file.write(f'{_ENCODER.encode(key)}:{_ENCODER.encode(header[key])},')
+    file.write('"drawings":[')
+    count = 0
+    for batch in batches:
+        for item in batch:
+            file.write(',\n' if count else '\n')
+            file.write(_ENCODER.encode(item))
+            count += 1
+    file.write('\n]}')
+    return count
+
+
+class JsonStream:
+    """
+    Инкрементальный разбор JSON из файла: значения читаются по одному,
+    а файл — порциями по chunk_size знаков.
+    """
+
+    def __init__(self, file: TextIO, chunk_size: int = READ_CHUNK) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        # Знаков прочитано из файла и разобрано (для индикатора хода загрузки)
+        self.read = 0
+        self.eof = False
+        self._decoder = json.JSONDecoder()
+
+    @property
+    def consumed(self) -> int:
+        return self.read - len(self.buffer) + self.position
+
+    def _fill(self, size: int) -> bool:
+        data = self.file.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        self.read += len(data)
+        return True
+
+    def peek(self) -> str:
+        """Следующий значащий знак ('' — конец файла)."""
+        while True:
+            self.position = _WHITESPACE.match(self.buffer, self.position).end()
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill(self.chunk_size):
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Ожидался знак {char!r}, найден {found or 'конец файла'!r} (позиция {self.consumed})")
+        self.position += 1
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.position)
+                # Число в конце буфера может продолжаться в следующей порции
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Значение не поместилось в буфер: порции растут, чтобы большие значения не разбирались заново много раз
+            self._fill(size)
+            size *= 2
+
+
+def iter_document(file: TextIO, batch_size: int = BATCH_SIZE,
+                  chunk_size: int = READ_CHUNK) -> Iterator[Tuple[str, Any, int]]:
+    """
+    Разбирает файл документа по мере чтения. Выдаёт (раздел, значение, разобрано знаков);
+    раздел 'drawings' выдаётся пачками объектов по batch_size.
+    """
+    stream = JsonStream(file, chunk_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'drawings':
+            stream.expect('[')
+            batch: List[Dict[str, Any]] = []
+            if stream.peek() != ']':
+                while True:
+                    batch.append(stream.value())
+                    if len(batch) >= batch_size:
+                        yield key, batch, stream.consumed
+                        batch = []
+                    if stream.peek() != ',':
+                        break
+                    stream.expect(',')
+            stream.expect(']')
+            if batch:
+                yield key, batch, stream.consumed
+        else:
+            yield key, stream.value(), stream.consumed
+
+        if stream.peek() != ',':
+            break
+        stream.expect(',')
+    stream.expect('}')
+
+
+def document_events(file: TextIO, batch_size: int = BATCH_SIZE,
+                    chunk_size: int = READ_CHUNK) -> Iterator[Tuple[str, Any, int]]:
+    """
+    События загрузки документа в порядке применения: служебные разделы раньше объектов.
+    В файлах версии 2 так записано, и объекты выдаются сразу по мере чтения; в старых
+    файлах объекты идут первыми, поэтому их пачки придерживаются до конца файла.
+    """
+    streaming = False
+    layers_seen = False
+    held: List[Tuple[str, Any, int]] = []
+    for key, value, consumed in iter_document(file, batch_size, chunk_size):
+        if key == 'version':
+            streaming = value >= FORMAT_VERSION
+            continue
+        if key == 'layers':
+            layers_seen = True
+        elif key == 'drawings':
+            if not layers_seen:
+                # Файл без слоёв загружается в слой по умолчанию
+                layers_seen = True
+                yield 'layers', [], consumed
+            if not streaming:
+                held.append((key, value, consumed))
+                continue
+        yield key, value, consumed
+
+    if not layers_seen:
+        yield 'layers', [], 0
+    yield from held
+
+
+def file_events(file_path: str, batch_size: int = BATCH_SIZE) -> Iterator[Tuple[str, Any, int]]:
+    """События загрузки файла документа; формат (двоичный или JSON) определяется по сигнатуре."""
+    if is_binary_document(file_path):
+        yield from binary_events(file_path, batch_size)
+    else:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            yield from document_events(file, batch_size)
+
+
+def read_in_background(file_path: str, events: "queue.Queue", stop: threading.Event,
+                       batch_size: int = BATCH_SIZE) -> None:
+    """
+    Тело фонового потока загрузки: события документа кладутся в ограниченную очередь
+    (поток ждёт, пока получатель их разберёт). В конце — ('end', None, n) или ('error', ошибка, 0).
+    """
+    def put(event: Tuple[str, Any, int]) -> bool:
+        while not stop.is_set():
+            try:
+                events.put(event, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    consumed = 0
+    source = file_events(file_path, batch_size)
+    try:
+        for event in source:
+            consumed = max(consumed, event[2])
+            if not put(event):
+                return
+    except Exception as error:
+        put(('error', error, 0))
+        return
+    finally:
+        # Закрывает файл, даже если загрузку отменили посередине
+        source.close()
+    put(('end', None, consumed))
+
+
+def write_in_background(file_path: str, header: Dict[str, Any], batches: "queue.Queue",
+                        result: "queue.Queue", stop: threading.Event) -> None:
+    """
+    Тело фонового потока сохранения: пачки объектов берутся из очереди до None.
+    Изображения кодируются в base64 здесь же, вне потока Tk. Файл пишется
+    во временный и заменяет прежний только после успешной записи.
+    """
+    def incoming() -> Iterator[List[Dict[str, Any]]]:
+        while True:
+            try:
+                batch = batches.get(timeout=0.1)
+            except queue.Empty:
+                if stop.is_set():
+                    raise InterruptedError("Сохранение отменено")
+                continue
+            if batch is None:
+                return
+            yield batch
+
+    temp_path = file_path + ".part"
+    try:
+        if file_path.endswith(BINARY_EXTENSION):
+            with open(temp_path, 'wb') as file:
+                count = write_binary(file, header, incoming())
+        else:
+            header = dict(header)
+            if 'images' in header:
+                header['images'] = encode_images(header['images'])
+            if 'raster' in header:
+                header['raster'] = header['raster'].to_dict()
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                count = write_document(file, header, incoming())
+        os.replace(temp_path, file_path)
+        result.put((count, None))
+    except Exception as error:
+        _discard(temp_path)
+        result.put((0, error))
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,235 @@
+import json
+import os
+import pickle
+import tempfile
+import zlib
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+from canvas import DrawingCanvas
+from history import History
+from raster import RasterLayer
+from scene_model import SceneModel, DEFAULT_LAYER
+from viewport import Viewport
+from logger import logger
+
+# Сколько памяти могут занимать неактивные документы, прежде чем старые уйдут на диск
+INACTIVE_BUDGET_BYTES = 32 * 1024 * 1024
+# Комната сервера, в которую клиент попадает при подключении
+DEFAULT_ROOM = "main"
+
+
+def pack_scene(scene: SceneModel, background: str) -> bytes:
+    """
+    Компактное представление документа: сжатый JSON в формате файлов сохранения
+    (плюс служебные данные объектов) вместо объектов модели и пространственного индекса.
+    """
+    state = {'drawings': scene.snapshot(), 'background': background,
+             'layers': scene.layers_snapshot(), 'meta': scene.meta.snapshot()}
+    return zlib.compress(json.dumps(state, separators=(',', ':')).encode('utf-8'), 1)
+
+
+def unpack_scene(packed: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(packed).decode('utf-8'))
+
+
+def build_scene(state: Dict[str, Any]) -> SceneModel:
+    """Строит модель сцены из состояния без обращений к Tk."""
+    scene = SceneModel()
+    scene.set_layers(state.get('layers', []))
+    for data in state.get('drawings', []):
+        scene.add(data['type'], data['coords'], data.get('config', {}), data.get('tags', []),
+                  oid=data.get('id'), layer=data.get('layer'))
+    scene.meta.restore(state.get('meta', {}))
+    return scene
+
+
+class Document:
+    """
+    Открытый документ (вкладка). У активного документа есть модель сцены и элементы Tk;
+    неактивный хранится сжатым в памяти или в файле подкачки.
+    """
+
+    def __init__(self, name: str, room: Optional[str] = None) -> None:
+        """
+        room — комната сервера, к которой привязана вкладка (None — только локально).
+        """
+        self.name = name
+        self.room = room
+
+        self.scene: Optional[SceneModel] = None
+        self.history: Optional[History] = None
+        self.viewport = Viewport()
+        self.background = "white"
+        self.active_layer = DEFAULT_LAYER
+        self.raster: Optional[RasterLayer] = None
+
+        self.packed: Optional[bytes] = None
+        self.page_path: Optional[str] = None
+        self.last_used = 0
+
+    @property
+    def paged(self) -> bool:
+        return self.page_path is not None
+
+    @property
+    def resident_bytes(self) -> int:
+        """Память, занятая неактивным документом: сжатое состояние, растровый слой и история."""
+        return ((len(self.packed) if self.packed else 0) + (self.history.size if self.history else 0)
+                + (self.raster.pixels.nbytes if self.raster is not None else 0))
+
+
+class DocumentManager:
+    """
+    Набор открытых документов над одним холстом. При переключении вкладок
+    модель прежнего документа сжимается, а холст заново собирается из модели
+    нового одним пакетом. Неактивные документы сверх бюджета памяти
+    выгружаются на диск, начиная с давно не использованных.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, name: str, room: Optional[str] = DEFAULT_ROOM,
+                 budget_bytes: int = INACTIVE_BUDGET_BYTES) -> None:
+        """
+        Конструктор. Текущее содержимое холста становится первым документом.
+        """
+        self.canvas = canvas
+        self.budget_bytes = budget_bytes
+        # Вызывается после смены активного документа (вкладки, комната сервера, панели)
+        self.on_switch: Optional[Callable[[Document], None]] = None
+
+        first = Document(name, room)
+        first.scene = canvas.scene
+        first.history = canvas.history
+        first.viewport = canvas.viewport
+        self.documents: List[Document] = [first]
+        self.index = 0
+        self._clock = 0
+
+    @property
+    def active(self) -> Document:
+        return self.documents[self.index]
+
+    def new(self, name: str, room: Optional[str] = None) -> Document:
+        """Открывает пустой документ в новой вкладке и делает его активным."""
+        document = Document(name, room)
+        document.packed = pack_scene(SceneModel(), "white")
+        self.documents.append(document)
+        self.switch(len(self.documents) - 1)
+        return document
+
+    def switch(self, index: int) -> None:
+        """Делает активным документ с номером index."""
+        if index == self.index or not 0 <= index < len(self.documents):
+            return
+
+        # Отложенные изменения относятся к прежнему документу (и его комнате)
+        self.canvas.bus.flush()
+        self._deactivate(self.active)
+        self.index = index
+        self._activate(self.active)
+        self._enforce_budget()
+
+        logger.info(f"Активный документ: {self.active.name}")
+        if self.on_switch:
+            self.on_switch(self.active)
+
+    def close(self, index: int) -> bool:
+        """
+        Закрывает документ. Последний документ не закрывается.
+        """
+        if len(self.documents) == 1 or not 0 <= index < len(self.documents):
+            return False
+
+        if index == self.index:
+            self.switch(index - 1 if index > 0 else 1)
+        document = self.documents.pop(index)
+        if index < self.index:
+            self.index -= 1
+        self._discard_page(document)
+
+        logger.info(f"Документ закрыт: {document.name}")
+        if self.on_switch:
+            self.on_switch(self.active)
+        return True
+
+    def close_all(self) -> None:
+        """Завершение работы: удаляет файлы подкачки всех выгруженных документов."""
+        for document in self.documents:
+            self._discard_page(document)
+
+    def _deactivate(self, document: Document) -> None:
+        canvas = self.canvas
+        document.packed = pack_scene(canvas.scene, canvas.bg)
+        document.history = canvas.history
+        document.viewport = canvas.viewport
+        document.background = canvas.bg
+        document.active_layer = canvas.active_layer
+        document.raster = canvas.raster
+        document.scene = None
+
+        self._clock += 1
+        document.last_used = self._clock
+
+    def _activate(self, document: Document) -> None:
+        if document.paged:
+            self._page_in(document)
+
+        state = unpack_scene(document.packed)
+        document.scene = build_scene(state)
+        document.packed = None
+        if document.history is None:
+            document.history = History(self.canvas)
+
+        self.canvas.attach_document(document.scene, document.history, document.viewport,
+                                    state.get('background', document.background), document.active_layer,
+                                    document.raster)
+
+    def _enforce_budget(self) -> None:
+        """Выгружает на диск давно не использованные документы, пока не уложимся в бюджет."""
+        resident = [document for document in self.documents
+                    if document is not self.active and not document.paged]
+        total = sum(document.resident_bytes for document in resident)
+        for document in sorted(resident, key=lambda document: document.last_used):
+            if total <= self.budget_bytes:
+                break
+            total -= document.resident_bytes
+            self._page_out(document)
+
+    def _page_out(self, document: Document) -> None:
+        history = document.history
+        payload = (document.packed,
+                   list(history.undo_stack) if history else [],
+                   list(history.redo_stack) if history else [],
+                   document.raster.pixels if document.raster is not None else None)
+
+        handle, path = tempfile.mkstemp(prefix="paint_document_", suffix=".page")
+        with os.fdopen(handle, 'wb') as file:
+            pickle.dump(payload, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        document.page_path = path
+        document.packed = None
+        document.history = None
+        document.raster = None
+        logger.info(f"Документ выгружен на диск: {document.name}")
+
+    def _page_in(self, document: Document) -> None:
+        with open(document.page_path, 'rb') as file:
+            packed, undo_steps, redo_steps, pixels = pickle.load(file)
+        self._discard_page(document)
+
+        history = History(self.canvas)
+        history.undo_stack = deque(undo_steps)
+        history.redo_stack = deque(redo_steps)
+        history.size = sum(step.size for step in undo_steps) + sum(step.size for step in redo_steps)
+        document.packed = packed
+        document.history = history
+        document.raster = RasterLayer(pixels=pixels) if pixels is not None else None
+        logger.info(f"Документ загружен с диска: {document.name}")
+
+    def _discard_page(self, document: Document) -> None:
+        if document.page_path is None:
+            return
+        try:
+            os.remove(document.page_path)
+        except OSError as error:
+            logger.warning(f"Не удалось удалить файл подкачки {document.page_path}: {error}")
+        document.page_path = None
@@ -1,12 +1,27 @@
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageDraw, ImageFont
-from typing import Tuple, List, Dict, Any
-import json
+from tkinter import filedialog, messagebox, simpledialog
+from typing import List, Dict, Any, Callable, Optional
+import os
+import queue
+import threading
 from canvas import DrawingCanvas
+from images import IMAGE_TYPE, IMAGE_TAG, image_keys
+from curves import PATH_TYPE
+from loader import POLL_MS, ProgressPanel, ProgressiveLoader, ProgressiveSaver
+from raster import RasterLayer
+from binary_format import BINARY_EXTENSION
+from renderer import EXPORT_FORMATS, Renderer, format_for_path, save_image
+from tile_export import TiledExporter
 from localization import LocalizationManager
 from logger import logger
 
 
+# Двоичный формат — основной, JSON остаётся для обмена с другими программами
+DOCUMENT_FILETYPES = [("Board", f"*{BINARY_EXTENSION}"), ("JSON files", "*.json")]
+# Увеличение холста при экспорте плаката: по умолчанию и наибольшее
+POSTER_SCALE = 4.0
+POSTER_MAX_SCALE = 32.0
+
+
 class FileManager:
     """
     Класс менеджера файлов, отвечает за сохранение и загрузку холста и изображений.
@@ -18,190 +33,204 @@ class FileManager:
         """
         self.loc = loc
         self.canvas = canvas
+        self.loader = ProgressiveLoader(canvas, self.create_items, loc)
+        self.saver = ProgressiveSaver(canvas, loc)
+        # Экспорт плитками держит пул процессов и кэш плиток между экспортами
+        self.tile_exporter = TiledExporter()
+        self.export_panel = ProgressPanel(canvas, loc, self.tile_exporter.cancel)
+        self._export_job = None
+        # Открытые документы (DocumentManager); если заданы, файл открывается в новой вкладке
+        self.documents = None
 
-
-    def objects_data_collector(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def objects_data_collector(self) -> List[Dict[str, Any]]:
         """
         Собирает данные обо всех объектах, размещённых на холсте,
         для последующего восстановления.
+        Данные берутся из модели сцены, без обращений к Tk.
         """
-        items_data = []
-
-        for item in self.canvas.canvas.find_all():
-            item_tags = self.canvas.canvas.gettags(item)
-            item_type = self.canvas.canvas.type(item)
-            item_config = self.get_item_config(item, item_type)
+        return self.canvas.scene.snapshot()
 
-            items_data.append({
-                'type': item_type,
-                'coords': self.canvas.canvas.coords(item),
-                'tags': item_tags,
-                'config': item_config})
-
-        return items_data
-
-    def get_item_config(self, item, item_type):
-        """
-        Создаёт словарь с конфигурацией (параметрами) объекта.
-        """
-        config = {option: self.canvas.canvas.itemcget(item, option) for option in self.canvas.canvas.itemconfig(item) if
-                  self.canvas.canvas.itemcget(item, option)}
-        if item_type == 'text':
-            config['text'] = self.canvas.canvas.itemcget(item, 'text')
-            config['font'] = self.canvas.canvas.itemcget(item, 'font')
-
-        return config
-
-    def save_to_file(self) -> None:
+    def save_to_file(self, on_done: Optional[Callable[[], None]] = None) -> None:
         """
         Диалог сохранения файла.
         Сохраняет данные холста для продолжения редактирования позже.
+        Запись идёт в фоне с индикатором и кнопкой отмены; on_done вызывается
+        после успешного сохранения (или сразу, если от сохранения отказались в диалоге).
         """
-        _ = self.loc.gettext
-        items_data = self.objects_data_collector()
-        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
-        if file_path:
-
-            try:
-                with open(file_path, 'w') as file:
-                    json.dump({'drawings': items_data, 'background': self.canvas.bg}, file, indent=4)
-                messagebox.showinfo(_("success"), _("canvas_saved"))
-
-            except Exception as error:
-                messagebox.showerror(_("error"), _("save_error").format(error=error))
-
-        try:
-            ...
-            logger.info(f"Холст сохранён: {file_path}")
-        except Exception as error:
-            logger.error(f"Ошибка сохранения: {error}")
+        file_path = filedialog.asksaveasfilename(defaultextension=BINARY_EXTENSION, filetypes=DOCUMENT_FILETYPES)
+        if not file_path:
+            if on_done:
+                on_done()
+            return
+        self.saver.save(file_path, on_done=on_done)
 
     def load_from_file(self) -> None:
         """
         Загружает данные из файла и создаёт объекты на холсте для редактирования.
         """
         _ = self.loc.gettext
+        if self.documents is not None:
+            # Текущий документ остаётся в своей вкладке — сохранять его перед загрузкой не нужно
+            file_path = filedialog.askopenfilename(filetypes=DOCUMENT_FILETYPES)
+            if file_path:
+                self.loader.cancel()
+                self.documents.new(os.path.basename(file_path))
+                self.loader.load_file(file_path, on_done=lambda: logger.info(f"Холст загружен: {file_path}"))
+            return
+
         response = messagebox.askokcancel(_("confirmation"), _("save_before_load"))
         if response:
             self.save_to_file()
 
         else:
-            file_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+            file_path = filedialog.askopenfilename(filetypes=DOCUMENT_FILETYPES)
             if file_path:
-
-                try:
-                    with open(file_path, 'r') as file:
-                        items_data = json.load(file)
-                    self.canvas.canvas.delete("all")
-
-                    if 'background' in items_data:
-                        self.canvas.update_background(items_data['background'])
-
-                    for item_data in items_data.get('drawings', []):
-                        self.create_item(item_data)
-
-                    # Отправляем изменения на сервер
-                    self._update_canvas_state()
-
-                except Exception as error:
-                    messagebox.showerror(_("error"), _("load_error").format(error=error))
-
-        logger.info(f"Холст загружен: {file_path}")
+                # Разбор идёт в фоне, объекты создаются порциями; по завершении изменение публикуется
+                self.loader.load_file(file_path, on_done=lambda: logger.info(f"Холст загружен: {file_path}"))
 
     def create_item(self, item_data: Dict[str, Any]) -> None:
         """
         Создаёт объект из данных, загруженных из файла.
         """
-        item_type = item_data['type']
-        coords = item_data['coords']
-        tags = tuple(item_data['tags'])
-        config = item_data['config']
-        config.pop('tags', None)
+        self.create_items([item_data])
 
-        if item_type in ['line', 'rectangle', 'oval', 'text', 'polygon']:
-            getattr(self.canvas.canvas, 'create_' + item_type)(coords, **config, tags=tags)
+    def create_items(self, items_data: List[Dict[str, Any]]) -> None:
+        """
+        Создаёт пачку объектов одним обращением к Tk.
+        Неизвестные типы объектов пропускаются.
+        """
+        supported = [item_data for item_data in items_data
+                     if item_data['type'] in ['line', 'rectangle', 'oval', 'text', 'polygon', IMAGE_TYPE, PATH_TYPE]]
+        if supported:
+            self.canvas.create_objects(supported)
 
-    def export_to_graphic_file(self, export_format: str) -> None:
+    def import_image(self) -> None:
         """
-        Преобразует холст в изображение PIL
-        и экспортирует его в графический файл.
+        Вставляет изображение из файла в центр видимой области.
+        Крупное изображение уменьшается до размера вида; на экран выводится
+        подходящий уровень его пирамиды, а не полное разрешение.
         """
-        file_ext = ".jpeg"
-        file_path = filedialog.asksaveasfilename(defaultextension=file_ext,
-                                                 filetypes=[(f"{export_format} files", f"*{file_ext}")])
+        _ = self.loc.gettext
+        file_path = filedialog.askopenfilename(
+            filetypes=[(_("images"), "*.png *.jpg *.jpeg *.gif *.bmp *.webp"), ("All files", "*.*")])
         if not file_path:
             return
 
-        items_data = self.objects_data_collector()
-        canvas_width, canvas_height = self.canvas.canvas.winfo_width(), self.canvas.canvas.winfo_height()
-        canvas_bg = self.canvas.canvas['background']
-
-        pil_image = Image.new('RGB', (canvas_width, canvas_height), canvas_bg)
-        draw = ImageDraw.Draw(pil_image)
+        try:
+            key = self.canvas.images.add_file(file_path)
+        except (OSError, ValueError) as error:
+            logger.error(f"Ошибка вставки изображения {file_path}: {error}")
+            messagebox.showerror(_("error"), _("image_error").format(error=error))
+            return
 
-        for item_data in items_data:
-            self.draw_item_on_image(draw, item_data)
+        self.place_image(key)
+        logger.info(f"Вставлено изображение {os.path.basename(file_path)} ({key[:12]})")
+        self.canvas.bus.publish()
+
+    def place_image(self, key: str) -> None:
+        """Создаёт объект-изображение по ключу хранилища в центре видимой области."""
+        widget = self.canvas.canvas
+        view_width, view_height = ((widget.winfo_width(), widget.winfo_height()) if widget.winfo_ismapped()
+                                   else (self.canvas.width, self.canvas.height))
+        x1, y1, x2, y2 = self.canvas.viewport.visible_rect(view_width, view_height, margin=0)
+        width, height = self.canvas.images.size(key)
+        fit = min((x2 - x1) / width, (y2 - y1) / height, 1.0)
+        width, height = width * fit, height * fit
+        left, top = (x1 + x2 - width) / 2, (y1 + y2 - height) / 2
+        self.canvas.create_object(IMAGE_TYPE, [left, top, left + width, top + height], {'key': key},
+                                  tags=("movable", IMAGE_TAG))
+
+    def export_to_graphic_file(self, export_format: str = "PNG") -> None:
+        """
+        Отрисовывает документ без Tk (см. renderer.Renderer) и экспортирует его
+        в графический файл. Формат (PNG, WebP, JPEG) выбирается по расширению файла.
+        """
+        filetypes = [(f"{name} files", f"*{ext}") for name, ext in EXPORT_FORMATS.items()]
+        file_path = filedialog.asksaveasfilename(defaultextension=EXPORT_FORMATS[export_format],
+                                                 filetypes=filetypes)
+        if not file_path:
+            return
 
-        pil_image.save(file_path, format=export_format.upper())
+        image = Renderer(self.canvas.images).render(self.export_document(), **self.view_region())
+        save_image(image, file_path, format_for_path(file_path, export_format))
+        logger.info(f"Документ экспортирован в {file_path}")
 
-    def draw_item_on_image(self, draw, item_data: Dict[str, Any]) -> None:
+    def view_region(self, magnify: float = 1.0) -> Dict[str, Any]:
         """
-        Отрисовывает объект на изображении PIL.
+        Размер изображения, мировые координаты его левого верхнего угла и масштаб
+        для отрисовки текущего вида; magnify увеличивает изображение (экспорт плаката).
         """
-        item_type = item_data['type']
-        coords = item_data['coords']
-        config = item_data.get('config', {})
-
-        if item_type == 'text':
-            font, font_size = self.get_font_to_pil(config.get('font', 'Arial 12'))
-            draw.text(coords, config['text'], fill=config.get('fill'), font=font)
-
-        else:
-            draw_method = getattr(self, f"draw_{item_type}", None)
-            if draw_method:
-                draw_method(draw, coords, config)
-
-    """
-    Методы рисования фигур на изображении PIL.
-    """
-
-    def draw_line(self, draw, coords: Tuple[int, int], config: Dict[str, Any]) -> None:
-        draw.line(coords, fill=config.get('fill'))
-
-    def draw_rectangle(self, draw, coords: Tuple[int, int], config: Dict[str, Any]) -> None:
-        draw.rectangle(coords, outline=config.get('outline'), fill=config.get('fill'))
+        widget = self.canvas.canvas
+        view_width, view_height = ((widget.winfo_width(), widget.winfo_height()) if widget.winfo_ismapped()
+                                   else (self.canvas.width, self.canvas.height))
+        viewport = self.canvas.viewport
+        return {'width': round(view_width * magnify), 'height': round(view_height * magnify),
+                'origin': (viewport.offset_x, viewport.offset_y), 'scale': viewport.scale * magnify}
 
-    def draw_oval(self, draw, coords: Tuple[int, int], config: Dict[str, Any]) -> None:
-        draw.ellipse(coords, outline=config.get('outline'), fill=config.get('fill'))
+    def export_document(self) -> Dict[str, Any]:
+        """Документ для отрисовки: объекты видимых слоёв в порядке отрисовки, фон и растровый слой."""
+        # Скрытые слои в изображение не попадают
+        hidden_layers = {layer.lid for layer in self.canvas.scene.layers if not layer.visible}
+        drawings = [item_data for item_data in self.objects_data_collector()
+                    if item_data.get('layer') not in hidden_layers]
+        return {'background': self.canvas.bg, 'drawings': drawings, 'raster': self.canvas.raster}
 
-    def draw_polygon(self, draw, coords: Tuple[int, int], config: Dict[str, Any]) -> None:
-        draw.polygon(coords, outline=config.get('outline'), fill=config.get('fill'))
-
-    def get_font_to_pil(self, font_str: str) -> Tuple:
+    def export_poster(self) -> None:
         """
-        Преобразует строку шрифта из Tkinter в объект PIL ImageFont, включая обработку жирного начертания.
+        Экспортирует холст, увеличенный в заданное число раз (для печати), плитками
+        в пуле процессов (см. tile_export.TiledExporter). Экспорт идёт в фоновом потоке;
+        повторный экспорт после небольших правок заново рисует только изменившиеся плитки.
         """
-        font_parts = font_str.split()
-        def_font_name = "arial"
-        font_style = ""
+        _ = self.loc.gettext
+        if self._export_job is not None:
+            return
+        scale = simpledialog.askfloat(_("export_poster"), _("export_scale_prompt"), parent=self.canvas.canvas,
+                                      minvalue=0.1, maxvalue=POSTER_MAX_SCALE, initialvalue=POSTER_SCALE)
+        if not scale:
+            return
+        filetypes = [(f"{name} files", f"*{ext}") for name, ext in EXPORT_FORMATS.items()]
+        file_path = filedialog.asksaveasfilename(defaultextension=EXPORT_FORMATS["PNG"], filetypes=filetypes)
+        if not file_path:
+            return
+
+        # Плакат — текущий вид, увеличенный в scale раз
+        region = self.view_region(magnify=scale)
+        document = self.export_document()
+        # Пиксели и байты изображений копируются: рисовать можно, пока идёт экспорт
+        if document['raster'] is not None:
+            document['raster'] = RasterLayer(pixels=document['raster'].pixels.copy())
+        document['images'] = self.canvas.images.pack(image_keys(document['drawings']))
 
-        for part in font_parts:
-            if part.isdigit():
-                font_size = int(part)
+        result: "queue.Queue" = queue.Queue()
 
-            elif part.lower() in ['bold']:
-                font_style += part.lower().capitalize()
+        def run() -> None:
+            try:
+                result.put((self.tile_exporter.export(document, file_path, **region), None))
+            except Exception as error:
+                result.put((None, error))
 
-            else:
-                font_name = part
-        font_file_name = f"{font_name}{font_style}.ttf"
+        threading.Thread(target=run, daemon=True).start()
+        self.export_panel.show("exporting", 1)
+        self._export_job = self.canvas.root.after(POLL_MS, self._wait_export, result, file_path)
 
+    def _wait_export(self, result: "queue.Queue", file_path: str) -> None:
+        self.export_panel.set(self.tile_exporter.done, self.tile_exporter.total)
         try:
-            font = ImageFont.truetype(font_file_name, font_size)
-        except IOError:
-            font = ImageFont.truetype(f"{def_font_name}.ttf", font_size)
+            stats, error = result.get_nowait()
+        except queue.Empty:
+            self._export_job = self.canvas.root.after(POLL_MS, self._wait_export, result, file_path)
+            return
 
-        return font, font_size
+        self._export_job = None
+        self.export_panel.hide()
+        _ = self.loc.gettext
+        if isinstance(error, InterruptedError):
+            logger.info(f"Экспорт отменён: {file_path}")
+        elif error is not None:
+            logger.error(f"Ошибка экспорта {file_path}: {error}")
+            messagebox.showerror(_("error"), _("export_error").format(error=error))
+        else:
+            messagebox.showinfo(_("success"), _("export_done").format(rendered=stats.rendered, reused=stats.reused))
 
     def reset_canvas_dialog(self) -> None:
         """
@@ -210,27 +239,13 @@ class FileManager:
         _ = self.loc.gettext
         response = messagebox.askokcancel(_("confirmation"), _("save_before_clear"))
         if response:
-            self.save_to_file()
-        self.canvas.reset_canvas()
+            # Холст очищается только после того, как фоновое сохранение дописало файл
+            self.save_to_file(on_done=self.canvas.reset_canvas)
+        else:
+            self.canvas.reset_canvas()
 
     def load_canvas_state(self, state: Dict[str, Any]) -> None:
         """
         Загружает состояние холста из переданных данных
         """
-        self.canvas.reset_canvas()
-        self.canvas.update_background(state['background'])
-
-        for item_data in state['drawings']:
-            self.create_item(item_data)
-
-    def _update_canvas_state(self):
-        """Вспомогательный метод для отправки состояния холста"""
-        if hasattr(self.canvas.root, 'network') and self.canvas.root.network.connected:
-            items_data = self.objects_data_collector()
-            self.canvas.root.network.send({
-                'type': 'draw',
-                'data': {
-                    'drawings': items_data,
-                    'background': self.canvas.bg
-                }
-            })
\ No newline at end of file
+        self.loader.load_state(state, publish=True)
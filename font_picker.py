@@ -0,0 +1,148 @@
+import tkinter as tk
+from typing import Callable, List, Optional, Sequence
+from fonts import filter_families
+from localization import LocalizationManager
+
+VISIBLE_ROWS = 18
+PREVIEW_TEXT = "AaBbCc АаБбВв 123"
+
+
+class FontList:
+    """
+    Виртуальный список семейств: хранит отфильтрованный список и окно видимых строк.
+    В Listbox каждый раз попадают только строки окна, сколько бы шрифтов ни было в системе.
+    """
+
+    def __init__(self, families: Sequence[str], rows: int = VISIBLE_ROWS) -> None:
+        self.families = list(families)
+        self.rows = rows
+        self.matches: List[str] = self.families
+        self.offset = 0
+        self.selected = 0
+
+    def filter(self, query: str) -> None:
+        self.matches = filter_families(self.families, query)
+        self.offset = 0
+        self.selected = 0
+
+    def window(self) -> List[str]:
+        return self.matches[self.offset:self.offset + self.rows]
+
+    def scroll_to(self, offset: int) -> None:
+        self.offset = max(0, min(offset, len(self.matches) - self.rows))
+
+    def scroll_fraction(self, fraction: float) -> None:
+        self.scroll_to(round(fraction * len(self.matches)))
+
+    def fractions(self):
+        """Положение окна для полосы прокрутки (начало и конец в долях списка)."""
+        total = max(len(self.matches), 1)
+        return self.offset / total, min((self.offset + self.rows) / total, 1.0)
+
+    def select(self, index: int) -> None:
+        """Выбор строки по номеру в отфильтрованном списке; окно сдвигается к ней."""
+        if not self.matches:
+            return
+        self.selected = max(0, min(index, len(self.matches) - 1))
+        if self.selected < self.offset:
+            self.scroll_to(self.selected)
+        elif self.selected >= self.offset + self.rows:
+            self.scroll_to(self.selected - self.rows + 1)
+
+    @property
+    def current(self) -> Optional[str]:
+        return self.matches[self.selected] if self.matches else None
+
+
+class FontPicker:
+    """
+    Окно выбора шрифта с поиском по мере ввода. Список семейств виртуальный:
+    Listbox содержит только видимые строки и перезаполняется при прокрутке.
+    """
+
+    def __init__(self, master, families: Sequence[str], loc: LocalizationManager,
+                 on_choose: Callable[[str], None], current: Optional[str] = None) -> None:
+        _ = loc.gettext
+        self.on_choose = on_choose
+        self.model = FontList(families)
+
+        self.window = tk.Toplevel(master)
+        self.window.title(_("choose_font"))
+
+        self.query = tk.StringVar()
+        self.entry = tk.Entry(self.window, textvariable=self.query)
+        self.entry.pack(side="top", fill="x", padx=5, pady=5)
+
+        body = tk.Frame(self.window)
+        body.pack(side="top", fill="both", expand=True)
+        self.listbox = tk.Listbox(body, height=self.model.rows, exportselection=False, activestyle="none")
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = tk.Scrollbar(body, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.preview = tk.Label(self.window, text=PREVIEW_TEXT, anchor="w")
+        self.preview.pack(side="bottom", fill="x", padx=5, pady=5)
+
+        self.query.trace_add("write", lambda *args: self.on_query())
+        self.listbox.bind("<<ListboxSelect>>", self.on_click)
+        self.listbox.bind("<Double-Button-1>", lambda event: self.choose())
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1))
+        for widget in (self.entry, self.listbox):
+            widget.bind("<Up>", lambda event: self.move(-1))
+            widget.bind("<Down>", lambda event: self.move(1))
+            widget.bind("<Prior>", lambda event: self.move(-self.model.rows))
+            widget.bind("<Next>", lambda event: self.move(self.model.rows))
+            widget.bind("<Return>", lambda event: self.choose())
+        self.window.bind("<Escape>", lambda event: self.window.destroy())
+
+        if current in self.model.families:
+            self.model.select(self.model.families.index(current))
+        self.render()
+        self.entry.focus_set()
+
+    def render(self) -> None:
+        model = self.model
+        self.listbox.delete(0, "end")
+        window = model.window()
+        if window:
+            self.listbox.insert("end", *window)
+        if model.offset <= model.selected < model.offset + model.rows:
+            self.listbox.selection_set(model.selected - model.offset)
+        self.scrollbar.set(*model.fractions())
+        if model.current:
+            self.preview.config(font=(model.current, 14))
+
+    def on_query(self) -> None:
+        self.model.filter(self.query.get())
+        self.render()
+
+    def on_scrollbar(self, action: str, amount: str, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.model.scroll_fraction(float(amount))
+        else:
+            self.model.scroll_to(self.model.offset + int(amount) * (self.model.rows if unit == "pages" else 1))
+        self.render()
+
+    def scroll(self, rows: int) -> str:
+        self.model.scroll_to(self.model.offset + rows * 3)
+        self.render()
+        return "break"
+
+    def move(self, rows: int) -> str:
+        self.model.select(self.model.selected + rows)
+        self.render()
+        return "break"
+
+    def on_click(self, event=None) -> None:
+        selection = self.listbox.curselection()
+        if selection:
+            self.model.select(self.model.offset + selection[0])
+            self.render()
+
+    def choose(self) -> None:
+        family = self.model.current
+        if family is not None:
+            self.window.destroy()
+            self.on_choose(family)
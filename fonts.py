@@ -0,0 +1,150 @@
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+FONT_TOKEN = re.compile(r"\{[^}]*\}|\S+")
+DEFAULT_FAMILY = "Helvetica"
+DEFAULT_SIZE = 12
+# Ширина строк запоминается для последних строк каждого шрифта
+LINE_CACHE_SIZE = 4096
+# Оценка размеров без Tk: средняя ширина знака и межстрочный интервал в долях размера шрифта
+CHAR_WIDTH = 0.6
+LINE_HEIGHT = 1.3
+
+
+class FontDescriptor(NamedTuple):
+    """Разобранный шрифт Tk: семейство, размер (отрицательный — в пикселях) и стили."""
+    family: str
+    size: int
+    styles: Tuple[str, ...] = ()
+
+    def to_tk(self) -> Tuple[Any, ...]:
+        return (self.family, self.size) + self.styles
+
+    def replace_style(self, style: str, enabled: bool) -> "FontDescriptor":
+        styles = tuple(name for name in self.styles if name != style)
+        return self._replace(styles=styles + (style,) if enabled else styles)
+
+
+@lru_cache(maxsize=1024)
+def _parse(font: str) -> FontDescriptor:
+    tokens = [token[1:-1] if token.startswith("{") else token for token in FONT_TOKEN.findall(font)]
+    size_index = next((index for index, token in enumerate(tokens) if token.lstrip("-").isdigit()), None)
+    if size_index is None:
+        return FontDescriptor(" ".join(tokens) or DEFAULT_FAMILY, DEFAULT_SIZE)
+    return FontDescriptor(" ".join(tokens[:size_index]) or DEFAULT_FAMILY, int(tokens[size_index]),
+                          tuple(tokens[size_index + 1:]))
+
+
+def parse_font(font: Any) -> FontDescriptor:
+    """
+    Шрифт из строки Tk ("{Times New Roman} 14 bold") или кортежа.
+    Разбор строки кэшируется: одни и те же шрифты разбираются при каждом изменении стиля.
+    """
+    if isinstance(font, FontDescriptor):
+        return font
+    if isinstance(font, (tuple, list)):
+        parts = [str(part) for part in font]
+        font = " ".join("{" + part + "}" if " " in part else part for part in parts)
+    return _parse(str(font or ""))
+
+
+class FontService:
+    """
+    Шрифты приложения: список семейств (запрашивается у Tk один раз),
+    метрики шрифтов и ширина строк. Пока Tk не подключён (тесты, сервер),
+    размеры текста оцениваются по размеру шрифта.
+    """
+
+    def __init__(self) -> None:
+        self.root = None
+        self._families: Optional[List[str]] = None
+        self._fonts: Dict[FontDescriptor, Any] = {}
+        self._metrics: Dict[FontDescriptor, Tuple[int, int]] = {}
+        self._widths: "OrderedDict[Tuple[FontDescriptor, str], int]" = OrderedDict()
+
+    def attach(self, root) -> None:
+        """Подключает Tk: дальше размеры текста измеряются по настоящим шрифтам."""
+        self.root = root
+        self._fonts.clear()
+        self._metrics.clear()
+        self._widths.clear()
+
+    def families(self) -> List[str]:
+        """Семейства шрифтов по алфавиту (без вертикальных вариантов «@…» Windows)."""
+        if self._families is None:
+            if self.root is None:
+                return [DEFAULT_FAMILY]
+            from tkinter import font as tkfont
+            self._families = sorted({family for family in tkfont.families(self.root) if not family.startswith("@")},
+                                    key=str.casefold)
+        return self._families
+
+    def _tk_font(self, descriptor: FontDescriptor):
+        tk_font = self._fonts.get(descriptor)
+        if tk_font is None:
+            from tkinter import font as tkfont
+            weight = "bold" if "bold" in descriptor.styles else "normal"
+            slant = "italic" if "italic" in descriptor.styles else "roman"
+            tk_font = tkfont.Font(root=self.root, family=descriptor.family, size=descriptor.size,
+                                  weight=weight, slant=slant, underline="underline" in descriptor.styles,
+                                  overstrike="overstrike" in descriptor.styles)
+            self._fonts[descriptor] = tk_font
+        return tk_font
+
+    def line_height(self, font: Any) -> int:
+        """Межстрочный интервал шрифта в пикселях."""
+        descriptor = parse_font(font)
+        metrics = self._metrics.get(descriptor)
+        if metrics is None:
+            if self.root is None:
+                height = round(abs(descriptor.size) * LINE_HEIGHT)
+                metrics = (height, round(abs(descriptor.size) * CHAR_WIDTH))
+            else:
+                tk_font = self._tk_font(descriptor)
+                metrics = (tk_font.metrics("linespace"), tk_font.measure("0"))
+            self._metrics[descriptor] = metrics
+        return metrics[0]
+
+    def measure(self, text: str, font: Any) -> int:
+        """Ширина строки в пикселях."""
+        descriptor = parse_font(font)
+        key = (descriptor, text)
+        width = self._widths.get(key)
+        if width is not None:
+            self._widths.move_to_end(key)
+            return width
+
+        if self.root is None:
+            width = round(len(text) * abs(descriptor.size) * CHAR_WIDTH)
+        else:
+            width = self._tk_font(descriptor).measure(text)
+        self._widths[key] = width
+        if len(self._widths) > LINE_CACHE_SIZE:
+            self._widths.popitem(last=False)
+        return width
+
+    def text_extent(self, text: str, font: Any) -> Tuple[int, int]:
+        """Ширина и высота многострочного текста в пикселях."""
+        lines = str(text).split("\n")
+        return max(self.measure(line, font) for line in lines), self.line_height(font) * len(lines)
+
+
+def filter_families(families: Sequence[str], query: str) -> List[str]:
+    """Семейства, содержащие query (без учёта регистра); начинающиеся с него — первыми."""
+    query = query.strip().casefold()
+    if not query:
+        return list(families)
+    prefix, inner = [], []
+    for family in families:
+        position = family.casefold().find(query)
+        if position == 0:
+            prefix.append(family)
+        elif position > 0:
+            inner.append(family)
+    return prefix + inner
+
+
+# Общий сервис шрифтов: модель сцены считает по нему рамки текста
+fonts = FontService()
@@ -0,0 +1,249 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+from logger import logger
+
+HISTORY_BUDGET_BYTES = 8 * 1024 * 1024
+OP_OVERHEAD_BYTES = 120  # примерная стоимость кортежа операции и ссылок на него
+
+# Вид операции: ('create' | 'delete' | 'coords' | 'options' | 'tags' | 'order' | 'layer' | 'layers' | 'background'
+# | 'raster', ID, до, после); для 'layers' ID не задан, состояние — список слоёв
+# Для 'create' и 'delete' состояние объекта — (данные, ID соседа снизу, данные реестра)
+Operation = Tuple[str, Optional[str], Any, Any]
+
+# Операции, последовательные изменения которых сливаются в одну (например, перетаскивание)
+_MERGEABLE = {'coords', 'options', 'tags', 'order', 'layer', 'layers', 'background'}
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Грубая оценка занимаемой памяти без обхода через sys.getsizeof:
+    числа и короткие строки считаются по фиксированной цене.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return 8
+    if hasattr(value, 'nbytes'):  # массив пикселей растрового слоя
+        return 112 + value.nbytes
+    if isinstance(value, str):
+        return 50 + len(value)
+    if isinstance(value, dict):
+        return 64 + sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 56 + sum(estimate_size(item) for item in value)
+    return 64
+
+
+class Step:
+    """Один шаг истории: операции одного действия пользователя."""
+
+    __slots__ = ('ops', 'size')
+
+    def __init__(self, ops: List[Operation]) -> None:
+        self.ops = ops
+        self.size = sum(OP_OVERHEAD_BYTES + estimate_size(op[2]) + estimate_size(op[3]) for op in ops)
+
+
+class History:
+    """
+    История отмены и повтора на обратимых операциях вместо полных снимков холста.
+    Операции записываются обёртками DrawingCanvas; шаг завершается публикацией
+    в шину изменений, поэтому всё перетаскивание до отпускания кнопки — один шаг.
+    Объём истории ограничен бюджетом памяти: старые шаги вытесняются первыми.
+    """
+
+    def __init__(self, canvas, budget_bytes: int = HISTORY_BUDGET_BYTES) -> None:
+        """
+        canvas — DrawingCanvas, к которому применяются операции при отмене и повторе.
+        """
+        self.canvas = canvas
+        self.budget_bytes = budget_bytes
+
+        self.undo_stack: Deque[Step] = deque()
+        self.redo_stack: Deque[Step] = deque()
+        self.size = 0
+
+        self._pending: List[Operation] = []
+        self._pending_index: Dict[Tuple[str, Optional[str]], int] = {}
+        self._replaying = False
+
+    @property
+    def recording(self) -> bool:
+        return not self._replaying
+
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack or self._pending)
+
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def record(self, kind: str, oid: Optional[str], before: Any, after: Any) -> None:
+        """
+        Добавляет операцию в текущий шаг. Повторные изменения того же объекта
+        сливаются: сохраняется самое раннее «до» и самое позднее «после».
+        """
+        if self._replaying:
+            return
+
+        created = self._pending_index.get(('create', oid))
+        if created is not None and kind in ('coords', 'options', 'tags'):
+            # Объект создан в этом же шаге — достаточно поправить данные создания
+            data = self._pending[created][3][0]
+            if kind == 'coords':
+                data['coords'] = list(after)
+            elif kind == 'options':
+                data['config'].update(after)
+            else:
+                data['tags'] = list(after)
+            return
+
+        key = (kind, oid)
+        index = self._pending_index.get(key)
+        if index is not None and kind in _MERGEABLE:
+            _, _, first_before, last_after = self._pending[index]
+            if kind == 'options':
+                before = dict(before, **first_before)
+                after = dict(last_after, **after)
+            else:
+                before = first_before
+            self._pending[index] = (kind, oid, before, after)
+            return
+
+        self._pending_index[key] = len(self._pending)
+        self._pending.append((kind, oid, before, after))
+
+    def commit(self) -> None:
+        """
+        Завершает текущий шаг. Вызывается при публикации изменений в шину.
+        """
+        if not self._pending:
+            return
+
+        # Служебные данные реестра задаются уже после создания объекта (вид фигуры,
+        # стиль текста) — к концу шага они дописываются в данные создания для повтора
+        meta = self.canvas.scene.meta
+        for kind, oid, _before, after in self._pending:
+            if kind == 'create':
+                after[2].update(meta.entry(oid))
+
+        step = Step(self._pending)
+        self._pending = []
+        self._pending_index = {}
+
+        self.undo_stack.append(step)
+        self.size += step.size
+        self._drop_redo()
+        self._trim()
+
+    def clear(self) -> None:
+        """Очищает историю (например, после загрузки другого документа)."""
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._pending = []
+        self._pending_index = {}
+        self.size = 0
+
+    def undo(self) -> bool:
+        """Отменяет последний шаг. Возвращает False, если отменять нечего."""
+        self.commit()
+        if not self.undo_stack:
+            return False
+
+        step = self.undo_stack.pop()
+        with self._replay():
+            for kind, oid, before, _after in reversed(step.ops):
+                self._apply(kind, oid, before)
+        self.redo_stack.append(step)
+
+        logger.info(f"Отмена: операций {len(step.ops)}")
+        self.canvas.bus.publish()
+        return True
+
+    def redo(self) -> bool:
+        """Повторяет последний отменённый шаг."""
+        self.commit()
+        if not self.redo_stack:
+            return False
+
+        step = self.redo_stack.pop()
+        with self._replay():
+            for kind, oid, _before, after in step.ops:
+                self._apply(kind, oid, after)
+        self.undo_stack.append(step)
+
+        logger.info(f"Повтор: операций {len(step.ops)}")
+        self.canvas.bus.publish()
+        return True
+
+    @contextmanager
+    def _replay(self) -> Iterator[None]:
+        self._replaying = True
+        try:
+            with self.canvas.bus.transaction():
+                yield
+        finally:
+            self._replaying = False
+
+    def _apply(self, kind: str, oid: Optional[str], value: Any) -> None:
+        """
+        Приводит объект к сохранённому состоянию. Объекты, удалённые
+        с тех пор другим участником, пропускаются.
+        """
+        canvas = self.canvas
+        scene = canvas.scene
+
+        if kind == 'background':
+            canvas.update_background(value)
+            return
+        if kind == 'raster':
+            canvas.restore_raster(*value)
+            return
+        if kind == 'layers':
+            canvas.apply_layers(value)
+            return
+
+        if kind in ('create', 'delete'):
+            if value is None:
+                if oid in scene:
+                    canvas.remove_objects([oid])
+            elif oid not in scene:
+                data, below, meta = value
+                canvas.create_objects([dict(data, config=dict(data['config']))])
+                # Служебные данные реестра удаляются вместе с объектом и возвращаются вместе с ним
+                if meta:
+                    scene.meta.restore({oid: meta})
+                self._place(oid, below)
+            return
+
+        if oid not in scene:
+            return
+        if kind == 'coords':
+            canvas.update_objects(coords={oid: value})
+        elif kind == 'options':
+            canvas.update_objects(options={oid: value})
+        elif kind == 'tags':
+            canvas.update_objects(tags={oid: tuple(value)})
+        elif kind == 'order':
+            self._place(oid, value)
+        elif kind == 'layer':
+            lid, below = value
+            if scene.get_layer(lid) is not None:
+                canvas.move_to_layer([oid], lid)
+                self._place(oid, below)
+
+    def _place(self, oid: str, below: Optional[str]) -> None:
+        if below is None or below in self.canvas.scene:
+            self.canvas.place_above(oid, below)
+
+    def _drop_redo(self) -> None:
+        for step in self.redo_stack:
+            self.size -= step.size
+        self.redo_stack.clear()
+
+    def _trim(self) -> None:
+        """Вытесняет самые старые шаги, пока история не уложится в бюджет."""
+        dropped = 0
+        while self.size > self.budget_bytes and len(self.undo_stack) > 1:
+            self.size -= self.undo_stack.popleft().size
+            dropped += 1
+        if dropped:
+            logger.debug(f"История: вытеснено шагов {dropped}, занято {self.size} байт")
@@ -0,0 +1,256 @@
+import base64
+import hashlib
+import io
+import math
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import tkinter as tk
+from PIL import Image
+from logger import logger
+
+IMAGE_TYPE = "image"
+IMAGE_TAG = "image"
+# Уровни пирамиды уменьшаются вдвое, пока большая сторона не станет меньше этого размера
+MIN_LEVEL_SIZE = 64
+# Память декодированных уровней всех изображений; сверх неё уровни давно показанных изображений забываются
+PYRAMID_BUDGET_BYTES = 64 * 1024 * 1024
+# Наибольшая сторона изображения Tk: при сильном увеличении изображение дальше не растёт
+MAX_PHOTO_SIDE = 4096
+
+Size = Tuple[int, int]
+
+
+def content_key(data: bytes) -> str:
+    """Ключ изображения — SHA-256 его байтов: одинаковые файлы хранятся и передаются один раз."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def image_keys(drawings: Iterable[Dict[str, Any]]) -> List[str]:
+    """Ключи изображений, на которые ссылаются объекты (без повторов, в порядке появления)."""
+    keys = (drawing.get('config', {}).get('key') for drawing in drawings if drawing.get('type') == IMAGE_TYPE)
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+class ImagePyramid:
+    """
+    Пирамида уменьшенных копий изображения: уровень n вдвое меньше уровня n - 1.
+    Уровни декодируются лениво; JPEG сразу декодируется в уменьшенном виде,
+    так что для показа в малом масштабе полное разрешение в памяти не нужно.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        with Image.open(io.BytesIO(data)) as image:
+            self.size: Size = image.size
+        self.levels: Dict[int, Image.Image] = {}
+
+    @property
+    def depth(self) -> int:
+        """Число уровней пирамиды."""
+        depth = 1
+        while max(self.level_size(depth)) >= MIN_LEVEL_SIZE:
+            depth += 1
+        return depth
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(image.width * image.height * 4 for image in self.levels.values())
+
+    def level_size(self, level: int) -> Size:
+        width, height = self.size
+        return max(math.ceil(width / 2 ** level), 1), max(math.ceil(height / 2 ** level), 1)
+
+    def level_for(self, width: int, height: int) -> int:
+        """Самый мелкий уровень, который при показе размером width×height не придётся увеличивать."""
+        ratio = min(self.size[0] / max(width, 1), self.size[1] / max(height, 1))
+        if ratio <= 1:
+            return 0
+        return min(int(math.log2(ratio)), self.depth - 1)
+
+    def level(self, level: int) -> Image.Image:
+        image = self.levels.get(level)
+        if image is None:
+            image = self._decode(self.level_size(level))
+            self.levels[level] = image
+        return image
+
+    def _decode(self, size: Size) -> Image.Image:
+        with Image.open(io.BytesIO(self.data)) as source:
+            # Для JPEG декодер сразу уменьшает изображение в 2, 4 или 8 раз
+            source.draft('RGB', size)
+            image = source.convert('RGBA')
+        if image.size != size:
+            image = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        return image
+
+    def render(self, width: int, height: int) -> Image.Image:
+        """Изображение размером width×height из ближайшего подходящего уровня."""
+        image = self.level(self.level_for(width, height))
+        if image.size == (width, height):
+            return image
+        return image.resize((width, height), Image.BILINEAR)
+
+    def drop_levels(self) -> None:
+        self.levels.clear()
+
+
+class ImageStore:
+    """
+    Хранилище изображений по содержимому: исходные байты по ключу SHA-256
+    и кэш пирамид для показа. Объекты сцены ссылаются на изображение только ключом,
+    поэтому в файлах и при синхронизации байты каждого изображения передаются один раз.
+    """
+
+    def __init__(self, budget_bytes: int = PYRAMID_BUDGET_BYTES) -> None:
+        self.blobs: Dict[str, bytes] = {}
+        self.budget_bytes = budget_bytes
+        self._pyramids: "OrderedDict[str, ImagePyramid]" = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.blobs
+
+    def __len__(self) -> int:
+        return len(self.blobs)
+
+    def add(self, data: bytes) -> str:
+        """
+        Добавляет изображение и возвращает его ключ.
+        Байты, которые PIL не может открыть, отвергаются с ValueError.
+        """
+        key = content_key(data)
+        if key not in self.blobs:
+            try:
+                with Image.open(io.BytesIO(data)) as image:
+                    image.verify()
+            except Exception as error:
+                raise ValueError(f"Не удалось открыть изображение: {error}") from error
+            self.blobs[key] = data
+        return key
+
+    def add_file(self, path: str) -> str:
+        with open(path, 'rb') as file:
+            return self.add(file.read())
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.blobs.get(key)
+
+    def missing(self, keys: Iterable[str]) -> List[str]:
+        return [key for key in keys if key not in self.blobs]
+
+    def merge(self, blobs: Dict[str, Union[bytes, str]]) -> int:
+        """
+        Добавляет изображения из файла (base64) или с сервера (байты).
+        Изображение, байты которого не совпадают с ключом, пропускается.
+        Возвращает число новых изображений.
+        """
+        added = 0
+        for key, blob in blobs.items():
+            if key in self.blobs:
+                continue
+            data = blob if isinstance(blob, bytes) else base64.b64decode(blob)
+            if content_key(data) != key:
+                logger.warning(f"Изображение {key[:12]} повреждено и пропущено")
+                continue
+            self.blobs[key] = data
+            added += 1
+        return added
+
+    def pack(self, keys: Iterable[str], encode: bool = False) -> Dict[str, Union[bytes, str]]:
+        """Байты изображений по ключам; encode — base64 для JSON-файла сохранения."""
+        return {key: base64.b64encode(self.blobs[key]).decode('ascii') if encode else self.blobs[key]
+                for key in keys if key in self.blobs}
+
+    def size(self, key: str) -> Size:
+        """Полный размер изображения в пикселях."""
+        return self.pyramid(key).size
+
+    def pyramid(self, key: str) -> ImagePyramid:
+        pyramid = self._pyramids.get(key)
+        if pyramid is None:
+            pyramid = ImagePyramid(self.blobs[key])
+            self._pyramids[key] = pyramid
+        self._pyramids.move_to_end(key)
+        return pyramid
+
+    def render(self, key: str, width: int, height: int) -> Image.Image:
+        """Изображение для показа размером width×height; кэш уровней держится в пределах бюджета."""
+        image = self.pyramid(key).render(width, height)
+        self._enforce_budget()
+        return image
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(pyramid.resident_bytes for pyramid in self._pyramids.values())
+
+    def _enforce_budget(self) -> None:
+        total = self.resident_bytes
+        for key in list(self._pyramids)[:-1]:
+            if total <= self.budget_bytes:
+                break
+            total -= self._pyramids[key].resident_bytes
+            self._pyramids.pop(key).drop_levels()
+
+
+def photo_size(width: float, height: float) -> Size:
+    """Размер изображения Tk для объекта размером width×height экранных пикселей."""
+    width, height = max(round(abs(width)), 1), max(round(abs(height)), 1)
+    largest = max(width, height)
+    if largest > MAX_PHOTO_SIDE:
+        width = max(width * MAX_PHOTO_SIDE // largest, 1)
+        height = max(height * MAX_PHOTO_SIDE // largest, 1)
+    return width, height
+
+
+class PhotoCache:
+    """
+    Изображения Tk для показанных объектов. Объекты с одинаковым изображением
+    и размером на экране делят одно изображение Tk; оно удаляется,
+    когда его не показывает ни один объект.
+    """
+
+    def __init__(self, master, store: ImageStore) -> None:
+        self.master = master
+        self.store = store
+        self._photos: Dict[Tuple[str, int, int], Any] = {}
+        self._users: Counter = Counter()
+        self._by_oid: Dict[str, Tuple[str, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._photos)
+
+    def photo(self, oid: str, key: str, width: int, height: int) -> str:
+        """Имя изображения Tk для объекта oid; прежнее изображение объекта освобождается."""
+        spec = (key, width, height)
+        previous = self._by_oid.get(oid)
+        if previous == spec:
+            return str(self._photos[spec])
+
+        if spec not in self._photos:
+            self._photos[spec] = self._create(self.store.render(key, width, height))
+        self._users[spec] += 1
+        self._by_oid[oid] = spec
+        if previous is not None:
+            self._release(previous)
+        return str(self._photos[spec])
+
+    def release(self, oid: str) -> None:
+        spec = self._by_oid.pop(oid, None)
+        if spec is not None:
+            self._release(spec)
+
+    def clear(self) -> None:
+        self._photos.clear()
+        self._users.clear()
+        self._by_oid.clear()
+
+    def _release(self, spec: Tuple[str, int, int]) -> None:
+        self._users[spec] -= 1
+        if self._users[spec] <= 0:
+            del self._users[spec]
+            self._photos.pop(spec, None)
+
+    def _create(self, image: Image.Image):
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=1)
+        return tk.PhotoImage(master=self.master, data=base64.b64encode(buffer.getvalue()).decode('ascii'),
+                             format='png')
@@ -0,0 +1,138 @@
+import tkinter as tk
+from tkinter import simpledialog
+from typing import Optional
+from canvas import DrawingCanvas
+from localization import LocalizationManager
+from logger import logger
+
+
+class LayersPanel:
+    """
+    Окно управления слоями: список слоёв сверху вниз, выбор активного слоя,
+    показ и скрытие, блокировка, перестановка, переименование и удаление.
+    """
+
+    def __init__(self, master, canvas: DrawingCanvas, loc: LocalizationManager) -> None:
+        """
+        Конструктор панели. Окно создаётся при первом показе.
+        """
+        self.master = master
+        self.canvas = canvas
+        self.loc = loc
+        self.window: Optional[tk.Toplevel] = None
+
+    def show(self) -> None:
+        """Открывает окно слоёв (или поднимает уже открытое)."""
+        if self.window is not None and self.window.winfo_exists():
+            self.window.lift()
+            self.refresh()
+            return
+
+        _ = self.loc.gettext
+        self.window = tk.Toplevel(self.master)
+        self.window.title(_("layers"))
+        self.window.resizable(False, True)
+
+        self.listbox = tk.Listbox(self.window, width=32, exportselection=False)
+        self.listbox.pack(side="top", fill="both", expand=True, padx=6, pady=6)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<Double-Button-1>", lambda event: self.rename())
+
+        buttons = tk.Frame(self.window)
+        buttons.pack(side="top", fill="x", padx=6, pady=(0, 6))
+        commands = [
+            ("layer_add", self.add), ("layer_remove", self.remove),
+            ("layer_up", lambda: self.move(1)), ("layer_down", lambda: self.move(-1)),
+            ("layer_visibility", self.toggle_visible), ("layer_lock", self.toggle_locked),
+            ("layer_move_selection", self.move_selection),
+        ]
+        for index, (key, command) in enumerate(commands):
+            tk.Button(buttons, text=_(key), command=command, bg="white").grid(
+                row=index // 2, column=index % 2, sticky="ew", padx=2, pady=2)
+        buttons.columnconfigure(0, weight=1)
+        buttons.columnconfigure(1, weight=1)
+
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Перечитывает слои из модели сцены (верхний слой — первой строкой)."""
+        if self.window is None or not self.window.winfo_exists():
+            return
+
+        _ = self.loc.gettext
+        layers = list(reversed(self.canvas.scene.layers))
+        self.listbox.delete(0, tk.END)
+        for layer in layers:
+            marks = ("" if layer.visible else f" [{_('layer_hidden')}]") + (f" [{_('layer_locked')}]" if layer.locked else "")
+            self.listbox.insert(tk.END, f"{layer.name}{marks}")
+
+        active = next(index for index, layer in enumerate(layers) if layer.lid == self.canvas.active_layer)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(active)
+
+    def _current(self) -> Optional[str]:
+        selection = self.listbox.curselection()
+        if not selection:
+            return None
+        return list(reversed(self.canvas.scene.layers))[selection[0]].lid
+
+    def on_select(self, event=None) -> None:
+        lid = self._current()
+        if lid is not None:
+            self.canvas.active_layer = lid
+            logger.info(f"Активный слой: {lid}")
+
+    def add(self) -> None:
+        _ = self.loc.gettext
+        name = simpledialog.askstring(_("layers"), _("layer_name"), parent=self.window,
+                                      initialvalue=f"{_('layer')} {len(self.canvas.scene.layers) + 1}")
+        if name:
+            self.canvas.add_layer(name)
+            self.refresh()
+
+    def rename(self) -> None:
+        _ = self.loc.gettext
+        lid = self._current()
+        if lid is None:
+            return
+        name = simpledialog.askstring(_("layers"), _("layer_name"), parent=self.window,
+                                      initialvalue=self.canvas.scene.get_layer(lid).name)
+        if name:
+            self.canvas.rename_layer(lid, name)
+            self.refresh()
+
+    def remove(self) -> None:
+        lid = self._current()
+        if lid is not None:
+            self.canvas.remove_layer(lid)
+            self.refresh()
+
+    def move(self, step: int) -> None:
+        """Сдвигает слой на позицию вверх (step=1) или вниз (step=-1)."""
+        lid = self._current()
+        if lid is None:
+            return
+        layers = [layer.lid for layer in self.canvas.scene.layers]
+        index = layers.index(lid) + step
+        if 0 <= index < len(layers):
+            self.canvas.move_layer(lid, index)
+            self.refresh()
+
+    def toggle_visible(self) -> None:
+        lid = self._current()
+        if lid is not None:
+            self.canvas.set_layer_visible(lid, not self.canvas.scene.get_layer(lid).visible)
+            self.refresh()
+
+    def toggle_locked(self) -> None:
+        lid = self._current()
+        if lid is not None:
+            self.canvas.set_layer_locked(lid, not self.canvas.scene.get_layer(lid).locked)
+            self.refresh()
+
+    def move_selection(self) -> None:
+        """Переносит выделенные объекты в выбранный слой."""
+        lid = self._current()
+        if lid is not None and self.canvas.selection:
+            self.canvas.move_to_layer(set(self.canvas.selection), lid)
+            self.canvas.bus.publish()
@@ -0,0 +1,346 @@
+import os
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import messagebox, ttk
+from typing import Any, Callable, Dict, List, Optional
+from canvas import DrawingCanvas
+from document_io import BATCH_SIZE, QUEUE_BATCHES, read_in_background, write_in_background, FORMAT_VERSION
+from images import IMAGE_TYPE
+from raster import RasterLayer
+from localization import LocalizationManager
+from logger import logger
+
+CHUNK_BUDGET_MS = 12
+POLL_MS = 20
+
+
+class ProgressPanel:
+    """Индикатор хода загрузки или сохранения с кнопкой отмены поверх холста."""
+
+    def __init__(self, canvas: DrawingCanvas, loc: LocalizationManager, on_cancel: Callable[[], None]) -> None:
+        self.canvas = canvas
+        self.loc = loc
+        self.on_cancel = on_cancel
+        self.frame: Optional[tk.Frame] = None
+
+    def show(self, title_key: str, maximum: int) -> None:
+        _ = self.loc.gettext
+        if self.frame is None:
+            self.frame = tk.Frame(self.canvas.canvas, background="light blue", padx=6, pady=4)
+            self.label = tk.Label(self.frame, background="light blue")
+            self.label.pack(side="left")
+            self.progress = ttk.Progressbar(self.frame, length=200, mode="determinate")
+            self.progress.pack(side="left", padx=6)
+            self.cancel_button = tk.Button(self.frame, command=self.on_cancel, bg="white")
+            self.cancel_button.pack(side="left")
+
+        self.label.config(text=_(title_key))
+        self.cancel_button.config(text=_("cancel"))
+        self.progress.config(maximum=max(maximum, 1), value=0)
+        self.frame.place(relx=0.5, rely=1.0, anchor="s", y=-8)
+        self.frame.lift()
+
+    def set(self, value: int, maximum: Optional[int] = None) -> None:
+        if self.frame:
+            if maximum is not None:
+                self.progress.config(maximum=max(maximum, 1))
+            self.progress.config(value=value)
+
+    def hide(self) -> None:
+        if self.frame:
+            self.frame.place_forget()
+
+
+class ProgressiveLoader:
+    """
+    Постепенная загрузка документа: файл разбирается по мере чтения в фоновом потоке,
+    а объекты создаются на холсте порциями, ограниченными по времени,
+    чтобы окно оставалось отзывчивым. Между потоками ходят пачки объектов
+    через ограниченную очередь, поэтому память на разбор не зависит от размера файла.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, create_items: Callable[[List[Dict[str, Any]]], None],
+                 loc: LocalizationManager, chunk_budget_ms: int = CHUNK_BUDGET_MS) -> None:
+        """
+        Конструктор загрузчика. create_items создаёт пачку объектов по их данным.
+        """
+        self.canvas = canvas
+        self.create_items = create_items
+        self.loc = loc
+        self.chunk_budget_ms = chunk_budget_ms
+
+        self.position = 0
+        self.publish = False
+        self.on_done: Optional[Callable[[], None]] = None
+        self.source = ""
+
+        self._job: Optional[str] = None
+        self._events: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._prepared = False
+        self._started = 0.0
+        self._first_paint_logged = False
+
+        self.panel = ProgressPanel(canvas, loc, self.cancel)
+
+    @property
+    def active(self) -> bool:
+        return self._job is not None
+
+    def load_file(self, file_path: str, on_done: Optional[Callable[[], None]] = None) -> None:
+        """
+        Читает файл документа в фоновом потоке и загружает его на холст по мере разбора.
+        """
+        self.cancel()
+        self._begin(file_path, publish=True, on_done=on_done, total=os.path.getsize(file_path))
+        threading.Thread(target=read_in_background, args=(file_path, self._events, self._stop),
+                         daemon=True).start()
+        self._job = self.canvas.root.after(POLL_MS, self._pump)
+
+    def load_state(self, state: Dict[str, Any], publish: bool = False,
+                   on_done: Optional[Callable[[], None]] = None, source: str = "state") -> None:
+        """
+        Загружает уже разобранное состояние (например, пришедшее с сервера).
+        """
+        self.cancel()
+        items = state.get('drawings', [])
+        self._begin(source, publish=publish, on_done=on_done, total=len(items))
+        self._events = queue.Queue()
+        self._events.put(('layers', state.get('layers', []), 0))
+        for key in ('images', 'raster', 'background'):
+            if key in state:
+                self._events.put((key, state[key], 0))
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            self._events.put(('drawings', batch, start + len(batch)))
+        self._events.put(('end', None, len(items)))
+        self._job = self.canvas.root.after(0, self._pump)
+
+    def cancel(self) -> None:
+        """
+        Останавливает загрузку; уже созданные объекты остаются на холсте.
+        """
+        if self._job is None:
+            return
+
+        self.canvas.root.after_cancel(self._job)
+        self._job = None
+        logger.info(f"Загрузка отменена: {self.source}, создано объектов {self.position}")
+        self._finish()
+
+    def _begin(self, source: str, publish: bool, on_done: Optional[Callable[[], None]], total: int) -> None:
+        self.source = source
+        self.publish = publish
+        self.on_done = on_done
+        self.position = 0
+        self._prepared = False
+        self._events = queue.Queue(maxsize=QUEUE_BATCHES)
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._first_paint_logged = False
+        self.panel.show("loading", total)
+
+    def _prepare(self) -> None:
+        """Очищает холст перед первым разобранным разделом: при ошибке в начале файла документ не теряется."""
+        self._prepared = True
+        self.canvas.clear_objects()
+        # Операции истории относятся к прежнему документу
+        self.canvas.history.clear()
+
+    def _apply(self, key: str, value: Any) -> None:
+        if not self._prepared:
+            self._prepare()
+
+        if key == 'drawings':
+            self.create_items(value)
+            self.position += len(value)
+        elif key == 'layers':
+            self.canvas.apply_layers(value)
+        elif key == 'images':
+            # Изображения нужны до создания объектов, которые на них ссылаются
+            self.canvas.images.merge(value)
+        elif key == 'raster':
+            # Растровый слой есть только в файлах; состояние с сервера его не содержит
+            # (двоичный файл передаёт уже декодированный слой)
+            if isinstance(value, dict):
+                value = RasterLayer.from_dict(value) if value else None
+            self.canvas.set_raster(value)
+        elif key == 'background':
+            self.canvas.update_background(value)
+
+    def _pump(self) -> None:
+        """
+        Применяет разобранные разделы и пачки объектов, пока не исчерпан бюджет времени на порцию.
+        """
+        deadline = time.perf_counter() + self.chunk_budget_ms / 1000
+        applied = False
+        while time.perf_counter() < deadline:
+            try:
+                key, value, progress = self._events.get_nowait()
+            except queue.Empty:
+                break
+
+            if key == 'error':
+                self._fail(value)
+                return
+            if key == 'end':
+                self._job = None
+                logger.info(
+                    f"Загрузка завершена за {(time.perf_counter() - self._started) * 1000:.0f} мс: "
+                    f"{self.source}, объектов {self.position}"
+                )
+                self._finish(completed=True)
+                return
+
+            # Загружаемые разделы не публикуются и не попадают в историю; шина заглушена только
+            # на время пачки, поэтому правки пользователя между порциями записываются и рассылаются
+            with self.canvas.bus.muted():
+                self._apply(key, value)
+            self.panel.set(progress)
+            applied = applied or key == 'drawings'
+
+        if applied and not self._first_paint_logged:
+            self._first_paint_logged = True
+            logger.info(f"Первая отрисовка через {(time.perf_counter() - self._started) * 1000:.0f} мс: {self.source}")
+
+        self._job = self.canvas.root.after(1 if applied else POLL_MS, self._pump)
+
+    def _fail(self, error: Exception) -> None:
+        self._job = None
+        self._finish()
+        _ = self.loc.gettext
+        logger.error(f"Ошибка загрузки {self.source}: {error}")
+        messagebox.showerror(_("error"), _("load_error").format(error=error))
+
+    def _finish(self, completed: bool = False) -> None:
+        """
+        Завершает загрузку. on_done вызывается, только если документ загружен целиком,
+        а не при отмене или ошибке.
+        """
+        # Фоновый поток чтения останавливается, даже если ждёт места в очереди
+        self._stop.set()
+        self.panel.hide()
+
+        if self.publish:
+            self.canvas.bus.publish()
+        if completed and self.on_done:
+            self.on_done()
+
+
+class ProgressiveSaver:
+    """
+    Постепенное сохранение документа. Поток Tk порциями превращает объекты сцены
+    в словари, фоновый поток кодирует их в JSON и пишет в файл. Пачки передаются
+    через ограниченную очередь, поэтому в памяти одновременно находится
+    лишь несколько пачек, а не весь документ.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, loc: LocalizationManager,
+                 chunk_budget_ms: int = CHUNK_BUDGET_MS) -> None:
+        self.canvas = canvas
+        self.loc = loc
+        self.chunk_budget_ms = chunk_budget_ms
+
+        self.file_path = ""
+        self.position = 0
+        self.on_done: Optional[Callable[[], None]] = None
+
+        self._scene = None
+        self._order: List[str] = []
+        self._batches: "queue.Queue" = queue.Queue()
+        self._result: "queue.Queue" = queue.Queue()
+        self._stop = threading.Event()
+        self._job: Optional[str] = None
+        self._started = 0.0
+
+        self.panel = ProgressPanel(canvas, loc, self.cancel)
+
+    @property
+    def active(self) -> bool:
+        return self._job is not None
+
+    def save(self, file_path: str, on_done: Optional[Callable[[], None]] = None) -> None:
+        """
+        Начинает сохранение документа в file_path. on_done вызывается после успешной записи.
+        Сохраняются объекты, которые были в документе в момент начала сохранения.
+        """
+        self.cancel()
+        canvas = self.canvas
+        self.file_path = file_path
+        self.on_done = on_done
+        self.position = 0
+        self._scene = canvas.scene
+        self._order = list(canvas.scene.order)
+        self._batches = queue.Queue(maxsize=QUEUE_BATCHES)
+        self._result = queue.Queue()
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+
+        header: Dict[str, Any] = {'version': FORMAT_VERSION, 'background': canvas.bg,
+                                  'layers': canvas.scene.layers_snapshot()}
+        keys = {obj.config.get('key') for obj in canvas.scene.objects.values() if obj.type == IMAGE_TYPE}
+        if keys - {None}:
+            # Байты каждого изображения хранятся один раз, объекты ссылаются на них ключом
+            header['images'] = canvas.images.pack(sorted(keys - {None}))
+        if canvas.raster is not None:
+            # Копия пикселей: слой можно рисовать, пока PNG кодируется в фоне
+            header['raster'] = RasterLayer(pixels=canvas.raster.pixels.copy())
+
+        threading.Thread(target=write_in_background,
+                         args=(file_path, header, self._batches, self._result, self._stop), daemon=True).start()
+        self.panel.show("saving", len(self._order))
+        self._job = canvas.root.after(0, self._pump)
+
+    def cancel(self) -> None:
+        """Останавливает сохранение; прежний файл остаётся нетронутым."""
+        if self._job is None:
+            return
+        self.canvas.root.after_cancel(self._job)
+        self._job = None
+        self._stop.set()
+        self.panel.hide()
+        logger.info(f"Сохранение отменено: {self.file_path}")
+
+    def _pump(self) -> None:
+        deadline = time.perf_counter() + self.chunk_budget_ms / 1000
+        objects = self._scene.objects
+        while self.position < len(self._order) and time.perf_counter() < deadline:
+            if self._batches.full():
+                break
+            oids = self._order[self.position:self.position + BATCH_SIZE]
+            # Объекты, удалённые после начала сохранения, пропускаются
+            self._batches.put([objects[oid].to_dict() for oid in oids if oid in objects])
+            self.position += len(oids)
+        self.panel.set(self.position)
+
+        if self.position >= len(self._order) and not self._batches.full():
+            self._batches.put(None)
+            self._order = []
+            self.position = 0
+            self._job = self.canvas.root.after(POLL_MS, self._wait)
+            return
+        self._job = self.canvas.root.after(1 if not self._batches.full() else POLL_MS, self._pump)
+
+    def _wait(self) -> None:
+        try:
+            count, error = self._result.get_nowait()
+        except queue.Empty:
+            self._job = self.canvas.root.after(POLL_MS, self._wait)
+            return
+
+        self._job = None
+        self._scene = None
+        self.panel.hide()
+        _ = self.loc.gettext
+        if error is not None:
+            logger.error(f"Ошибка сохранения {self.file_path}: {error}")
+            messagebox.showerror(_("error"), _("save_error").format(error=error))
+            return
+
+        logger.info(f"Холст сохранён за {(time.perf_counter() - self._started) * 1000:.0f} мс: "
+                    f"{self.file_path}, объектов {count}")
+        messagebox.showinfo(_("success"), _("canvas_saved"))
+        if self.on_done:
+            self.on_done()
@@ -3,9 +3,22 @@ from shapes import Shapes
 from text_box import TextBox
 from file_manager import FileManager
 from object_manipulator import ObjectManipulator
+from brush import Brush
+from path_tool import PathTool
+from transforms import BatchTransforms, ALIGN_EDGES
+from raster import RasterLayer, RasterTools
+import multiprocessing
+import time
 import tkinter as tk
-from tkinter import messagebox
+from tkinter import messagebox, simpledialog, ttk, colorchooser
 from network_client import NetworkClient
+from documents import DocumentManager, DEFAULT_ROOM
+from autosave import Autosave
+from images import image_keys
+from fonts import fonts
+from diagnostics import DiagnosticsOverlay
+from layers_panel import LayersPanel
+from reconciler import CanvasReconciler
 from localization import LocalizationManager
 from logger import logger
 from utils import resource_path
@@ -22,6 +35,7 @@ class MainWindow(tk.Tk):
         self.network = NetworkClient()
         self.loc = loc
         self.loc.register(self)
+        fonts.attach(self)
         logger.info("Приложение запущено")
         self.title('Сетевое приложение "Интерактивный графический редактор"')
         self.geometry("1000x600")
@@ -46,19 +60,54 @@ class MainWindow(tk.Tk):
         self.file_manager = FileManager(self.drawing_canvas, self.loc)
         self.text_box = TextBox(self.drawing_canvas, self.loc)
         self.shapes = Shapes(self.drawing_canvas, self.loc)
+        self.brush = Brush(self.drawing_canvas, self.shapes, self.loc)
+        self.path_tool = PathTool(self.drawing_canvas, self.shapes, self.loc)
+        self.raster_tools = RasterTools(self.drawing_canvas, self.shapes, self.loc)
+        self.transforms = BatchTransforms(self.drawing_canvas)
         self.object_manipulator = ObjectManipulator(self.drawing_canvas, self.text_box, self.shapes, self.loc)
+        self.reconciler = CanvasReconciler(self.drawing_canvas)
+        self.diagnostics = DiagnosticsOverlay(self, self.drawing_canvas.canvas, self.loc)
+        self.layers_panel = LayersPanel(self, self.drawing_canvas, self.loc)
+
+        # Вкладки документов: элементы Tk есть только у активного документа
+        self.documents = DocumentManager(self.drawing_canvas, self.loc.gettext("untitled"))
+        self.documents.on_switch = self.on_document_switched
+        self.file_manager.documents = self.documents
+        # Комната, из которой ожидается init после смены комнаты; до него чужие сообщения не применяются
+        self.awaiting_room = None
+        # Изображения, байты которых уже есть на сервере в текущей комнате
+        self.synced_images = set()
+        self.tabs = ttk.Notebook(self)
+        self.tabs.pack(side="top", fill="x", before=self.drawing_canvas.canvas)
+        self.tabs.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        self.refresh_tabs()
 
         self.tools_widgets()
         self.buttons_widgets()
 
-        # Обновляем состояние холста при изменениях
-        self.drawing_canvas.canvas.bind("<Configure>", self.update_canvas_state)
-        self.drawing_canvas.canvas.bind("<ButtonRelease-1>", self.update_canvas_state)
-        self.drawing_canvas.canvas.bind("<KeyRelease>", self.update_canvas_state)
+        # Отправляем состояние холста на сервер при публикации изменений инструментами
+        self.drawing_canvas.bus.subscribe(self.update_canvas_state)
+        self.drawing_canvas.bus.subscribe(self.layers_panel.refresh)
+        self.bind("<F3>", self.diagnostics.toggle)
+        self.bind("<F7>", lambda event: self.layers_panel.show())
+        self.bind("<Control-Key-0>", self.drawing_canvas.reset_view)
+        self.bind("<Control-z>", self.drawing_canvas.undo)
+        self.bind("<Control-y>", self.drawing_canvas.redo)
+        self.bind("<Control-Shift-Z>", self.drawing_canvas.redo)
+        self.bind("<Control-g>", lambda event: self.drawing_canvas.group_selection())
+        self.bind("<Control-Shift-G>", lambda event: self.drawing_canvas.ungroup_selection())
+        self.bind("<Control-t>", lambda event: self.new_document())
+        self.bind("<Control-w>", lambda event: self.close_document())
+        self.bind("<Control-i>", lambda event: self.file_manager.import_image())
 
         # Устанавливаем пустой режим вместо кисти
         self.drawing_canvas.set_mode('none')
 
+        # Журнал автосохранения; остался от прошлого сеанса — значит, тот завершился аварийно
+        self.autosave = Autosave(self.drawing_canvas)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(0, self.offer_recovery)
+
     def connect_to_server(self):
         """Подключается к серверу и начинает получать обновления"""
         if self.network.connected:
@@ -74,7 +123,8 @@ class MainWindow(tk.Tk):
 
         self.network = NetworkClient()
         self.network.connect(
-            self.handle_network_message,
+            # Сообщения приходят из потока asyncio — применяем их в потоке Tk
+            lambda message: self.after(0, self.handle_network_message, message),
             self.on_server_connected,
             self.on_server_connection_failed
         )
@@ -90,10 +140,21 @@ class MainWindow(tk.Tk):
 
     def _update_ui_connected(self):
         logger.info("Успешное подключение к серверу")
+        self.synced_images.clear()
         self.network_button.config(
             text=self.loc.gettext("disconnect"),
             bg="light green"
         )
+        # Сервер подключает клиента к общей комнате; вкладка может быть привязана к другой
+        if self.documents.active.room != DEFAULT_ROOM:
+            self.join_room(self.documents.active.room)
+
+    def join_room(self, room):
+        """Переходит в комнату сервера активной вкладки (None — работа без сервера)"""
+        self.awaiting_room = room
+        self.synced_images.clear()
+        self.network.send({'type': 'join', 'room': room})
+        logger.info(f"Переход в комнату сервера: {room}")
 
     def update_active_button(self, mode: str):
         """Обновляет активную кнопку в интерфейсе"""
@@ -111,55 +172,194 @@ class MainWindow(tk.Tk):
             return
 
         message_type = message.get('type')
+        room = self.documents.active.room
+        if message_type == 'init' and message.get('room', DEFAULT_ROOM) == self.awaiting_room:
+            self.awaiting_room = None
+        if room is None or self.awaiting_room is not None or message.get('room', room) != room:
+            # Сообщение относится к комнате другой вкладки
+            return
 
-        if message_type == 'init':
-            self.load_canvas_state(message['data'])
-            # Устанавливаем режим из состояния сервера
-            self.drawing_canvas.set_mode(message['data'].get('current_mode', 'none'))
-
-        elif message_type == 'update':
-            # Обновляем только рисунки и фон
-            self.drawing_canvas.canvas.delete("all")
-            self.drawing_canvas.update_background(message['data']['background'])
-
-            for item_data in message['data'].get('drawings', []):
-                self.file_manager.create_item(item_data)
-
-        elif message_type == 'clear':
-            self.drawing_canvas.reset_canvas(notify=False)
-            self.drawing_canvas.set_mode('none')
+        started = time.perf_counter()
+        touched = None
+
+        images = message.get('data', {}).get('images') if isinstance(message.get('data'), dict) else None
+        if images:
+            # Байты изображений приходят один раз; объекты ссылаются на них ключом
+            self.drawing_canvas.images.merge(images)
+            self.synced_images.update(images)
+
+        # Изменения с сервера не должны публиковаться обратно
+        with self.drawing_canvas.bus.muted():
+            if message_type == 'init' and self.seeds_room(message['data']):
+                # Комната пуста: её начальным состоянием становится содержимое вкладки
+                self.after(0, self.drawing_canvas.bus.publish)
+
+            elif message_type == 'init':
+                self.load_canvas_state(message['data'])
+                # Устанавливаем режим из состояния сервера
+                self.drawing_canvas.set_mode(message['data'].get('current_mode', 'none'))
+
+            elif message_type == 'update':
+                # Полное состояние с сервера заменяет незавершённую загрузку
+                self.file_manager.loader.cancel()
+
+                # Обновляем только изменившиеся рисунки и фон, не пересоздавая холст
+                if message['data']['background'] != self.drawing_canvas.bg:
+                    self.drawing_canvas.update_background(message['data']['background'])
+                if 'layers' in message['data']:
+                    self.drawing_canvas.apply_layers(message['data']['layers'])
+                    self.layers_panel.refresh()
+
+                touched = self.reconciler.apply(message['data'].get('drawings', []))
+                self.drawing_canvas.update_selection_frame()
+
+            elif message_type == 'transform':
+                # Сдвиг группы объектов — одна операция вместо полного состояния
+                data = message['data']
+                self.drawing_canvas.translate_objects(data['ids'], data['dx'], data['dy'])
+                touched = len(data['ids'])
+
+            elif message_type == 'patch':
+                # Пакетное преобразование выделения — новые координаты только изменённых объектов
+                coords = {oid: item_coords for oid, item_coords in message['data']['coords'].items()
+                          if oid in self.drawing_canvas.scene}
+                self.drawing_canvas.update_objects(coords=coords)
+                self.drawing_canvas.update_selection_frame()
+                touched = len(coords)
+
+            elif message_type == 'clear':
+                self.file_manager.loader.cancel()
+                self.synced_images.clear()
+                self.drawing_canvas.reset_canvas(notify=False)
+                self.drawing_canvas.set_mode('none')
+
+        data = message.get('data')
+        version = data.get('version') if isinstance(data, dict) else None
+        self.network.record_apply((time.perf_counter() - started) * 1000, version, touched)
+
+    def seeds_room(self, state):
+        """Новая комната сервера и непустая вкладка: содержимое вкладки не затирается"""
+        return not state.get('version') and not state.get('drawings') and len(self.drawing_canvas.scene) > 0
 
     def load_canvas_state(self, state):
         """Загружает состояние холста из данных сервера"""
         # Отключаем обработчики событий, чтобы избежать рекурсии
         self.drawing_canvas.clear_bindings()
 
-        # Очищаем холст
-        self.drawing_canvas.canvas.delete("all")
-
-        # Устанавливаем фон
-        self.drawing_canvas.update_background(state['background'])
-
-        # Восстанавливаем рисунки
-        for item_data in state['drawings']:
-            self.file_manager.create_item(item_data)
+        # Очищаем холст, устанавливаем фон и постепенно восстанавливаем рисунки
+        self.file_manager.loader.load_state(state, publish=False, source="init")
+        self.layers_panel.refresh()
 
-    def update_canvas_state(self, event=None):
-        """Отправляет текущее состояние холста на сервер"""
-        if hasattr(self, 'network') and self.network.connected:
+    def update_canvas_state(self):
+        """Отправляет текущее состояние холста на сервер (подписчик шины изменений)"""
+        if (hasattr(self, 'network') and self.network.connected
+                and self.documents.active.room is not None and self.awaiting_room is None):
             self._send_canvas_state()
 
     def _send_canvas_state(self):
         """Фактическая отправка состояния холста"""
+        ops = self.drawing_canvas.bus.ops
+        if ops:
+            # За кадр были только операции (например, сдвиг выделения) — отправляем их
+            for op in ops:
+                self.network.send(op)
+            return
+
         items_data = self.file_manager.objects_data_collector()
+        data = {
+            'drawings': items_data,
+            'background': self.drawing_canvas.bg,
+            'layers': self.drawing_canvas.scene.layers_snapshot()
+        }
+        # Байты передаются только для изображений, которых у сервера ещё нет
+        new_images = [key for key in image_keys(items_data) if key not in self.synced_images]
+        if new_images:
+            data['images'] = self.drawing_canvas.images.pack(new_images)
+            self.synced_images.update(new_images)
+
+        self.network.send({'type': 'draw', 'data': data})
+
+    def refresh_tabs(self):
+        """Приводит полосу вкладок к списку открытых документов"""
+        documents = self.documents.documents
+        while len(self.tabs.tabs()) < len(documents):
+            self.tabs.add(tk.Frame(self.tabs, height=0))
+        while len(self.tabs.tabs()) > len(documents):
+            self.tabs.forget(len(self.tabs.tabs()) - 1)
+
+        for index, document in enumerate(documents):
+            room = f" [{document.room}]" if document.room is not None else ""
+            self.tabs.tab(index, text=f"{document.name}{room}")
+        self.tabs.select(self.documents.index)
+
+    def on_tab_changed(self, event=None):
+        self.switch_document(self.tabs.index("current"))
+
+    def switch_document(self, index):
+        if index != self.documents.index:
+            # Незавершённая загрузка относится к прежнему документу
+            self.file_manager.loader.cancel()
+            self.documents.switch(index)
+
+    def on_document_switched(self, document):
+        """Подписчик смены документа: вкладки, панель слоёв и комната сервера"""
+        self.refresh_tabs()
+        self.raster_enabled.set(self.drawing_canvas.raster is not None)
+        self.layers_panel.refresh()
+        if self.network.connected:
+            self.join_room(document.room)
+
+    def offer_recovery(self):
+        """Предлагает восстановить документ из автосохранения, затем запускает журнал"""
+        _ = self.loc.gettext
+        if self.autosave.pending() and messagebox.askyesno(_("recover_title"), _("recover_prompt")):
+            state = self.autosave.recover()
+            if state is not None:
+                # Журнал начинается заново, только когда восстановленный документ загружен целиком;
+                # при отмене или ошибке загрузки файлы автосохранения остаются до следующего запуска
+                self.file_manager.loader.load_state(state, publish=True, on_done=self.autosave.start,
+                                                    source="autosave")
+                return
+        self.autosave.start()
+
+    def on_close(self):
+        """Штатное завершение: журнал автосохранения и файлы подкачки документов больше не нужны"""
+        self.autosave.stop(discard=True)
+        self.file_manager.tile_exporter.close()
+        self.documents.close_all()
+        logger.info("Приложение закрыто")
+        self.destroy()
+
+    def new_document(self):
+        self.file_manager.loader.cancel()
+        self.documents.new(f"{self.loc.gettext('untitled')} {len(self.documents.documents) + 1}")
+
+    def close_document(self):
+        self.file_manager.loader.cancel()
+        self.documents.close(self.documents.index)
+
+    def set_document_room(self):
+        """Привязывает активную вкладку к комнате сервера или отвязывает от сервера"""
+        _ = self.loc.gettext
+        document = self.documents.active
+        room = simpledialog.askstring(_("tab_room"), _("tab_room_prompt"), parent=self,
+                                      initialvalue=document.room or "")
+        if room is None:
+            return
 
-        self.network.send({
-            'type': 'draw',
-            'data': {
-                'drawings': items_data,
-                'background': self.drawing_canvas.bg
-            }
-        })
+        document.room = room.strip() or None
+        self.refresh_tabs()
+        if self.network.connected:
+            self.join_room(document.room)
+
+    def toggle_raster(self):
+        """Добавляет растровый слой под объектами или убирает его вместе с пикселями"""
+        if self.raster_enabled.get():
+            if self.drawing_canvas.raster is None:
+                self.drawing_canvas.set_raster(RasterLayer())
+        else:
+            self.drawing_canvas.set_raster(None)
+        logger.info(f"Растровый слой: {'включён' if self.raster_enabled.get() else 'выключен'}")
 
     def create_button(self, frame, image_path, command, tooltip_text, pack_side="left", pack_padx=(0, 5),
                       image_subsample=8):
@@ -200,6 +400,18 @@ class MainWindow(tk.Tk):
                                                   lambda: self.modes_modifying("polygon"),
                                                   "tooltip_polygon")
 
+        self.path_button = self.create_button(self.buttons_frame, "Images/path_image.png",
+                                              lambda: self.modes_modifying("path"),
+                                              "tooltip_path")
+
+        self.brush_button = self.create_button(self.buttons_frame, "Images/brush_image.png",
+                                               lambda: self.modes_modifying("brush"),
+                                               "tooltip_brush")
+
+        self.eraser_button = self.create_button(self.buttons_frame, "Images/eraser_image.png",
+                                                lambda: self.modes_modifying("eraser"),
+                                                "tooltip_eraser")
+
         self.drag_button = self.create_button(self.buttons_frame, "Images/drag_image.png",
                                               lambda: self.modes_modifying("drag"),
                                               "tooltip_drag")
@@ -221,7 +433,37 @@ class MainWindow(tk.Tk):
         self.file_menu.add_command(label="Новый", command=self.file_manager.reset_canvas_dialog)
         self.file_menu.add_command(label="Сохранить", command=self.file_manager.save_to_file)
         self.file_menu.add_command(label="Загрузить", command=self.file_manager.load_from_file)
-        self.file_menu.add_command(label="Экспортировать в JPEG", command=lambda: self.file_manager.export_to_graphic_file("JPEG"))
+        self.file_menu.add_command(label="Экспортировать изображение", command=self.file_manager.export_to_graphic_file)
+        self.file_menu.add_command(label="Экспорт плаката…", command=self.file_manager.export_poster)
+        self.file_menu.add_command(label="Вставить изображение…", accelerator="Ctrl+I",
+                                   command=self.file_manager.import_image)
+        self.file_menu.add_separator()
+        self.file_menu.add_command(label="Новая вкладка", accelerator="Ctrl+T", command=self.new_document)
+        self.file_menu.add_command(label="Закрыть вкладку", accelerator="Ctrl+W", command=self.close_document)
+        self.file_menu.add_command(label="Комната сервера…", command=self.set_document_room)
+
+        self.edit_menu = tk.Menu(self.menu_bar, tearoff=0, background="light blue")
+        self.menu_bar.add_cascade(label="Правка", menu=self.edit_menu)
+        self.edit_menu.add_command(label="Отменить", accelerator="Ctrl+Z", command=self.drawing_canvas.undo)
+        self.edit_menu.add_command(label="Повторить", accelerator="Ctrl+Y", command=self.drawing_canvas.redo)
+        self.edit_menu.add_separator()
+
+        # Пакетные преобразования выделения
+        self.arrange_menu = tk.Menu(self.edit_menu, tearoff=0)
+        self.edit_menu.add_cascade(label="Упорядочить", menu=self.arrange_menu)
+        for edge in ALIGN_EDGES:
+            self.arrange_menu.add_command(command=lambda edge=edge: self.transforms.align(edge))
+        self.arrange_menu.add_separator()
+        self.arrange_menu.add_command(command=lambda: self.transforms.distribute('x'))
+        self.arrange_menu.add_command(command=lambda: self.transforms.distribute('y'))
+        self.arrange_menu.add_separator()
+        self.arrange_menu.add_command(command=lambda: self.transforms.rotate(90))
+        self.arrange_menu.add_command(command=lambda: self.transforms.rotate(-90))
+        self.arrange_menu.add_command(command=self.rotate_selection)
+        self.arrange_menu.add_command(command=self.scale_selection)
+        self.arrange_menu.add_command(command=lambda: self.transforms.flip('x'))
+        self.arrange_menu.add_command(command=lambda: self.transforms.flip('y'))
+        self.update_arrange_labels()
 
         self.text_menu = tk.Menu(self.menu_bar, tearoff=0, background="light blue")
         self.menu_bar.add_cascade(label="Текст", menu=self.text_menu)
@@ -229,11 +471,34 @@ class MainWindow(tk.Tk):
         self.text_menu.add_command(label="Цвет", command=self.text_box.choose_text_color)
         self.text_menu.add_command(label="Размер", command=self.text_box.choose_text_size)
 
+        self.raster_menu = tk.Menu(self.menu_bar, tearoff=0, background="light blue")
+        self.menu_bar.add_cascade(label="Растр", menu=self.raster_menu)
+        self.raster_enabled = tk.BooleanVar(value=False)
+        self.raster_menu.add_checkbutton(label="Растровый слой", variable=self.raster_enabled,
+                                         command=self.toggle_raster)
+        self.raster_menu.add_command(label="Кисть", command=lambda: self.modes_modifying('raster_brush'))
+        self.raster_menu.add_command(label="Ластик", command=lambda: self.modes_modifying('raster_eraser'))
+        self.raster_menu.add_command(label="Заливка", command=lambda: self.modes_modifying('raster_fill'))
+
         self.settings_menu = tk.Menu(self.menu_bar, tearoff=0, background="light blue")
         self.menu_bar.add_cascade(label="Настройки", menu=self.settings_menu)
 
         self.language_menu = tk.Menu(self.settings_menu, tearoff=0)
         self.settings_menu.add_cascade(label="Язык", menu=self.language_menu)
+        self.settings_menu.add_command(label="Диагностика сети", accelerator="F3",
+                                       command=self.diagnostics.toggle)
+        self.settings_menu.add_command(label="Сбросить вид", accelerator="Ctrl+0",
+                                       command=self.drawing_canvas.reset_view)
+        self.settings_menu.add_command(label="Слои", accelerator="F7", command=self.layers_panel.show)
+
+        # Привязка при перемещении объектов
+        snapper = self.object_manipulator.snapper
+        self.snap_grid = tk.BooleanVar(value=snapper.grid_enabled)
+        self.snap_guides = tk.BooleanVar(value=snapper.guides_enabled)
+        self.settings_menu.add_checkbutton(label="Привязка к сетке", variable=self.snap_grid,
+                                           command=lambda: setattr(snapper, 'grid_enabled', self.snap_grid.get()))
+        self.settings_menu.add_checkbutton(label="Умные направляющие", variable=self.snap_guides,
+                                           command=lambda: setattr(snapper, 'guides_enabled', self.snap_guides.get()))
 
         self.language_menu.add_command(
             label="Русский",
@@ -248,10 +513,37 @@ class MainWindow(tk.Tk):
             command=lambda: self.loc.set_language("by")
         )
 
+    def update_arrange_labels(self) -> None:
+        _ = self.loc.gettext
+        labels = [f"align_{edge}" for edge in ALIGN_EDGES] + [None, "distribute_x", "distribute_y", None,
+                                                              "rotate_cw", "rotate_ccw", "rotate_by", "scale_by",
+                                                              "flip_x", "flip_y"]
+        for index, key in enumerate(labels):
+            if key is not None:
+                self.arrange_menu.entryconfig(index, label=_(key))
+
+    def rotate_selection(self) -> None:
+        """Поворот выделения на заданный угол"""
+        _ = self.loc.gettext
+        degrees = simpledialog.askfloat(_("rotate_by"), _("rotate_prompt"), parent=self,
+                                        minvalue=-360, maxvalue=360)
+        if degrees:
+            self.transforms.rotate(degrees)
+
+    def scale_selection(self) -> None:
+        """Масштаб выделения в процентах относительно его центра"""
+        _ = self.loc.gettext
+        percent = simpledialog.askfloat(_("scale_by"), _("scale_prompt"), parent=self,
+                                        minvalue=1, maxvalue=1000)
+        if percent:
+            self.transforms.scale(percent / 100)
+
     def modes_modifying(self, mode: str) -> None:
         """Метод для переключения режимов с синхронизацией с сервером"""
         self.drawing_canvas.clear_bindings()
         self.object_manipulator.unbind_objects()
+        # Начатый контур сохраняется при смене инструмента
+        self.path_tool.finish()
 
         if self.active_button:
             self.active_button.config(bg=BUTTONS_BG)
@@ -262,6 +554,23 @@ class MainWindow(tk.Tk):
         elif mode in ['fill', 'none']:
             self.drawing_canvas.set_mode(mode)
             self.active_button = getattr(self, mode + '_button', None)
+        elif mode == 'path':
+            self.path_tool.bind_path()
+            self.active_button = getattr(self, mode + '_button')
+        elif mode == 'brush':
+            self.brush.bind_brush()
+            self.active_button = getattr(self, mode + '_button')
+        elif mode == 'eraser':
+            self.brush.bind_eraser()
+            self.active_button = getattr(self, mode + '_button')
+        elif mode in ['raster_brush', 'raster_eraser']:
+            self.raster_tools.bind_brush(erase=mode == 'raster_eraser')
+            self.raster_enabled.set(True)
+            self.active_button = None
+        elif mode == 'raster_fill':
+            self.raster_tools.bind_fill(colorchooser.askcolor(title=self.loc.gettext("choose_fill_color"))[1])
+            self.raster_enabled.set(True)
+            self.active_button = None
         elif mode == 'drag':
             self.object_manipulator.bind_objects()
             self.active_button = getattr(self, mode + '_button')
@@ -331,22 +640,46 @@ class MainWindow(tk.Tk):
         self.menu_bar.delete(0, "end")
 
         self.menu_bar.add_cascade(label=_("file"), menu=self.file_menu)
+        self.menu_bar.add_cascade(label=_("edit"), menu=self.edit_menu)
         self.menu_bar.add_cascade(label=_("text"), menu=self.text_menu)
+        self.menu_bar.add_cascade(label=_("raster"), menu=self.raster_menu)
         self.menu_bar.add_cascade(label=_("settings"), menu=self.settings_menu)
 
         # Пункты меню Файл
         self.file_menu.entryconfig(0, label=_("new"))
         self.file_menu.entryconfig(1, label=_("save"))
         self.file_menu.entryconfig(2, label=_("load"))
-        self.file_menu.entryconfig(3, label=_("export_jpeg"))
+        self.file_menu.entryconfig(3, label=_("export_image"))
+        self.file_menu.entryconfig(4, label=_("export_poster"))
+        self.file_menu.entryconfig(5, label=_("insert_image"))
+        self.file_menu.entryconfig(7, label=_("new_tab"))
+        self.file_menu.entryconfig(8, label=_("close_tab"))
+        self.file_menu.entryconfig(9, label=_("tab_room"))
+
+        # Пункты меню Правка
+        self.edit_menu.entryconfig(0, label=_("undo"))
+        self.edit_menu.entryconfig(1, label=_("redo"))
+        self.edit_menu.entryconfig(3, label=_("arrange"))
+        self.update_arrange_labels()
 
         # Пункты меню Текст
         self.text_menu.entryconfig(0, label=_("font"))
         self.text_menu.entryconfig(1, label=_("color"))
         self.text_menu.entryconfig(2, label=_("size"))
 
+        # Пункты меню Растр
+        self.raster_menu.entryconfig(0, label=_("raster_layer"))
+        self.raster_menu.entryconfig(1, label=_("raster_brush"))
+        self.raster_menu.entryconfig(2, label=_("raster_eraser"))
+        self.raster_menu.entryconfig(3, label=_("raster_fill"))
+
         # Настройки → Язык
         self.settings_menu.entryconfig(0, label=_("language"))
+        self.settings_menu.entryconfig(1, label=_("diagnostics"))
+        self.settings_menu.entryconfig(2, label=_("reset_view"))
+        self.settings_menu.entryconfig(3, label=_("layers"))
+        self.settings_menu.entryconfig(4, label=_("snap_grid"))
+        self.settings_menu.entryconfig(5, label=_("snap_guides"))
 
         # Языки
         self.language_menu.entryconfig(0, label=_("ru"))
@@ -355,6 +688,8 @@ class MainWindow(tk.Tk):
 
 
 if __name__ == '__main__':
+    # Экспорт плитками запускает процессы; в собранном приложении они стартуют через этот вызов
+    multiprocessing.freeze_support()
     loc = LocalizationManager()
     app = MainWindow(loc)
     app.mainloop()
\ No newline at end of file
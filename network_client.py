@@ -1,6 +1,7 @@
 import asyncio
 import pickle
 import threading
+import time
 import websockets
 import socket
 
@@ -11,6 +12,19 @@ class NetworkClient:
         self.websocket = None
         self.connected = False
 
+        # Дешёвые счётчики для оверлея диагностики
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.pending_sends = 0
+        # Счётчик очереди меняется из потока Tk (send) и из потока asyncio (после отправки)
+        self._pending_lock = threading.Lock()
+        self.rtt_ms = None
+        self.server_version = 0
+        self.applied_version = 0
+        self.last_apply_ms = None
+        self.last_touched = None
+        self._rate_mark = (time.perf_counter(), 0, 0)
+
         self.loop = asyncio.new_event_loop()
         threading.Thread(
             target=self._run_loop,
@@ -30,14 +44,36 @@ class NetworkClient:
                 on_connected()
 
             async for message in self.websocket:
-                data = pickle.loads(message)
-                callback(data)
+                self._dispatch(message, callback)
 
         except Exception as e:
             self.connected = False
             if on_error:
                 on_error(str(e))
 
+    def _dispatch(self, message, callback):
+        """Учитывает входящий трафик, обрабатывает pong и ack и передаёт остальное в callback"""
+        self.bytes_received += len(message)
+        data = pickle.loads(message)
+
+        if data.get('type') == 'pong':
+            self.rtt_ms = (time.perf_counter() - data['time']) * 1000
+            self.server_version = data.get('version', self.server_version)
+            return
+
+        if data.get('type') == 'ack':
+            # Своё изменение клиент применил до отправки: подтверждённая версия уже применена.
+            # Версии только растут: более старое сообщение, ещё ждущее потока Tk, их не откатит
+            self.server_version = max(self.server_version, data['version'])
+            self.applied_version = max(self.applied_version, data['version'])
+            return
+
+        version = data.get('data', {}).get('version') if isinstance(data.get('data'), dict) else None
+        if version is not None:
+            self.server_version = max(self.server_version, version)
+
+        callback(data)
+
     def connect(self, callback, on_connected=None, on_error=None):
         asyncio.run_coroutine_threadsafe(
             self._connect(callback, on_connected, on_error),
@@ -48,11 +84,42 @@ class NetworkClient:
         if not self.connected:
             return
 
+        payload = pickle.dumps(data)
+        with self._pending_lock:
+            self.pending_sends += 1
+
         async def _send():
-            await self.websocket.send(pickle.dumps(data))
+            try:
+                await self.websocket.send(payload)
+                self.bytes_sent += len(payload)
+            finally:
+                with self._pending_lock:
+                    self.pending_sends -= 1
 
         asyncio.run_coroutine_threadsafe(_send(), self.loop)
 
+    def ping(self):
+        """Отправляет ping; время ответа сохраняется в rtt_ms при получении pong"""
+        self.send({'type': 'ping', 'time': time.perf_counter()})
+
+    def record_apply(self, elapsed_ms, version=None, touched=None):
+        """Запоминает длительность применения входящего сообщения, его версию и число затронутых объектов"""
+        self.last_apply_ms = elapsed_ms
+        if touched is not None:
+            self.last_touched = touched
+        if version is not None:
+            self.applied_version = max(self.applied_version, version)
+
+    def traffic_rates(self):
+        """Возвращает (исходящие, входящие) байт/с с момента предыдущего вызова"""
+        now = time.perf_counter()
+        mark_time, mark_sent, mark_received = self._rate_mark
+        elapsed = max(now - mark_time, 1e-6)
+        rates = ((self.bytes_sent - mark_sent) / elapsed,
+                 (self.bytes_received - mark_received) / elapsed)
+        self._rate_mark = (now, self.bytes_sent, self.bytes_received)
+        return rates
+
     def disconnect(self):
         if not self.connected:
             return
@@ -61,4 +128,4 @@ class NetworkClient:
             await self.websocket.close()
 
         asyncio.run_coroutine_threadsafe(_close(), self.loop)
-        self.connected = False
\ No newline at end of file
+        self.connected = False
@@ -1,12 +1,18 @@
 import tkinter as tk
-from canvas import DrawingCanvas
+from canvas import DrawingCanvas, GROUP_TAG_PREFIX
 from shapes import Shapes
 from text_box import TextBox
-from typing import Dict, Any, Optional
+from brush import STROKE_TAG
+from images import IMAGE_TAG, IMAGE_TYPE
+from curves import PATH_TAG, PATH_TYPE
+from snapping import Snapper
+from typing import Dict, Any, Optional, Set
 from localization import LocalizationManager
 from logger import logger
 
 MOVABLE_TAG = "movable"
+RUBBER_BAND_TAG = "rubber_band"
+MOTION_FRAME_MS = 16
 
 
 class ObjectManipulator:
@@ -26,10 +32,10 @@ class ObjectManipulator:
         self.drawing_canvas = canvas
         self.text_box = text_box
         self.shapes = shapes
-        self.drag_data: Dict[str, Any] = {"item": None, "x": 0, "y": 0}
-
-        self.grouped_items: Dict[int, Any] = {}
-        self.item_to_group: Dict[int, Any] = {}
+        self.drag_data: Dict[str, Any] = {"item": None, "x": 0, "y": 0, "start_x": 0, "start_y": 0,
+                                          "pending": False, "moved": False}
+        self.snapper = Snapper(canvas)
+        self._motion_job: Optional[str] = None
         self.clipboard: Optional[Any] = None
         self.current_item: Optional[Any] = None
 
@@ -39,35 +45,50 @@ class ObjectManipulator:
 
     def bind_objects(self) -> None:
         """
-        Привязка событий к тегу 'movable', чтобы перемещать объекты.
+        Привязка событий режима перемещения: выделение щелчком и рамкой, перемещение выделения.
+        Объект под курсором определяется по модели сцены, поэтому события привязаны ко всему холсту.
         """
-        self.canvas.tag_bind(MOVABLE_TAG, "<ButtonPress-1>", self.on_item_press)
-        self.canvas.tag_bind(MOVABLE_TAG, "<ButtonRelease-1>", self.on_item_release)
-        self.canvas.tag_bind(MOVABLE_TAG, "<B1-Motion>", self.on_item_move)
+        self.canvas.bind("<ButtonPress-1>", self.on_item_press)
+        self.canvas.bind("<Shift-ButtonPress-1>", lambda event: self.on_item_press(event, additive=True))
+        self.canvas.bind("<ButtonRelease-1>", self.on_item_release)
+        self.canvas.bind("<B1-Motion>", self.on_item_move)
+        self.canvas.bind("<Shift-B1-Motion>", self.on_item_move)
 
     def unbind_objects(self) -> None:
         """
         Отвязка событий после завершения перемещения.
         """
-        self.canvas.tag_unbind(MOVABLE_TAG, "<ButtonPress-1>")
-        self.canvas.tag_unbind(MOVABLE_TAG, "<ButtonRelease-1>")
-        self.canvas.tag_unbind(MOVABLE_TAG, "<B1-Motion>")
+        for sequence in ("<ButtonPress-1>", "<Shift-ButtonPress-1>", "<ButtonRelease-1>",
+                         "<B1-Motion>", "<Shift-B1-Motion>"):
+            self.canvas.unbind(sequence)
+        self.drawing_canvas.clear_selection()
 
     def raise_or_lower_item(self, item: int, command: str) -> None:
         """
-        Поднять или опустить выбранный элемент на один уровень вверх или вниз.
+        Поднять выбранный элемент наверх или опустить вниз вместе с его выделением или группой.
         """
-        if item:
-            if item in self.drawing_canvas.item_to_segment_group:
-                group = self.drawing_canvas.item_to_segment_group[item]
-                for item in group:
-                    getattr(self.canvas, f"tag_{command}")(item)
-                    # Отправляем изменения на сервер
-                    self._update_canvas_state()
+        obj = self.drawing_canvas.object_of(item) if item else None
+        if obj is None:
+            return
+
+        scene = self.drawing_canvas.scene
+        oids = self._affected(obj.oid)
+        # Группа перемещается одной транзакцией — одна публикация на всю группу
+        with self.drawing_canvas.bus.transaction():
+            if command == 'raise':
+                for oid in sorted(oids, key=scene.rank):
+                    if scene.order[-1] != oid:
+                        self.drawing_canvas.place_above(oid, scene.order[-1])
             else:
-                getattr(self.canvas, f"tag_{command}")(item)
-                # Отправляем изменения на сервер
-                self._update_canvas_state()
+                for oid in sorted(oids, key=scene.rank, reverse=True):
+                    self.drawing_canvas.place_above(oid, None)
+            self.drawing_canvas.bus.publish()
+
+    def _affected(self, oid: str) -> Set[str]:
+        """Объекты, к которым применяется команда: всё выделение, если объект в нём, иначе его группа."""
+        if oid in self.drawing_canvas.selection:
+            return set(self.drawing_canvas.selection)
+        return self.drawing_canvas.group_members([oid])
 
     def right_click_menu(self, event) -> None:
         """
@@ -75,43 +96,38 @@ class ObjectManipulator:
         """
         _ = self.loc.gettext
         self.small_menu.delete(0, tk.END)
-        items = self.canvas.find_closest(event.x, event.y, halo=1)
-
-        if not items:
-            self.background_options_menu()
-            self.small_menu.post(event.x_root, event.y_root)
-            return
-
-        closest_item = items[0]
-
-        if closest_item is not None:
-            item_tags = self.canvas.gettags(closest_item)
-            bbox = self.canvas.bbox(closest_item)
-            item_type = self.canvas.type(closest_item)
+        closest_item = self.drawing_canvas.pick(*self.drawing_canvas.to_world(event.x, event.y),
+                                                tags=("shape", "text_box", STROKE_TAG, IMAGE_TAG, PATH_TAG))
+        obj = self.drawing_canvas.object_of(closest_item) if closest_item else None
+
+        if obj is not None:
+            item_tags = obj.tags
+            item_type = obj.type
+            self.current_item = closest_item
+
+            self.small_menu.add_command(label=_("delete"), command=self.remove_item)
+            self.small_menu.add_command(label=_("move_up"),
+                                        command=lambda: self.raise_or_lower_item(closest_item, 'raise'))
+            self.small_menu.add_command(label=_("move_down"),
+                                        command=lambda: self.raise_or_lower_item(closest_item, 'lower'))
+            self.small_menu.add_command(label=_("copy"),
+                                        command=lambda: self.copy_object(closest_item, item_type))
+
+            if obj.oid in self.drawing_canvas.selection and len(self.drawing_canvas.selection) > 1:
+                self.small_menu.add_command(label=_("group"), command=self.drawing_canvas.group_selection)
+            if any(tag.startswith(GROUP_TAG_PREFIX) for tag in item_tags):
+                self.small_menu.add_command(label=_("ungroup"), command=lambda: self.ungroup(obj.oid))
+
+            if "shape" in item_tags:
+                self.shape_options_menu(closest_item, item_type)
+
+                if item_type in ['rectangle', 'oval', 'polygon']:
+                    self.small_menu.add_command(label=_("outline_color"),
+                                                command=lambda: self.shapes.set_shape_color(closest_item))
+
+            elif "text_box" in item_tags:
+                self.text_options_menu(closest_item)
 
-            if bbox and bbox[0] <= event.x <= bbox[2] and bbox[1] <= event.y <= bbox[3]:
-                self.current_item = closest_item
-
-                self.small_menu.add_command(label=_("delete"), command=self.remove_item)
-                self.small_menu.add_command(label=_("move_up"),
-                                            command=lambda: self.raise_or_lower_item(closest_item, 'raise'))
-                self.small_menu.add_command(label=_("move_down"),
-                                            command=lambda: self.raise_or_lower_item(closest_item, 'lower'))
-                self.small_menu.add_command(label=_("copy"),
-                                            command=lambda: self.copy_object(closest_item, item_type))
-
-                if "shape" in item_tags:
-                    self.shape_options_menu(closest_item, item_type)
-
-                    if item_type in ['rectangle', 'oval', 'polygon']:
-                        self.small_menu.add_command(label=_("outline_color"),
-                                                    command=lambda: self.shapes.set_shape_color(closest_item))
-
-                elif "text_box" in item_tags:
-                    self.text_options_menu(closest_item)
-
-            else:
-                self.background_options_menu()
         else:
             self.background_options_menu()
 
@@ -142,83 +158,136 @@ class ObjectManipulator:
         """
         Удаление выбранного элемента с холста.
         """
-        if self.current_item:
-            logger.info(f"Удалён объект id={self.current_item}")
-            self.canvas.delete(self.current_item)
-            self._update_canvas_state()
-
-        if self.current_item:
-            self.canvas.delete(self.current_item)
-            # Отправляем изменения на сервер
-            self._update_canvas_state()
+        obj = self.drawing_canvas.object_of(self.current_item) if self.current_item else None
+        if obj is not None:
+            oids = self._affected(obj.oid)
+            logger.info(f"Удалено объектов: {len(oids)}")
+            self.drawing_canvas.remove_objects(oids)
+            # Сообщаем об изменении холста
+            self.drawing_canvas.bus.publish()
 
         self.current_item = None
 
-    def on_item_press(self, event) -> None:
+    def ungroup(self, oid: str) -> None:
+        """Распускает группу объекта."""
+        self.drawing_canvas.select([oid])
+        self.drawing_canvas.ungroup_selection()
+
+    def on_item_press(self, event, additive: bool = False) -> None:
         """
-        Событие при нажатии на объект — начало перемещения.
+        Нажатие в режиме перемещения: по объекту — выделение и начало перемещения
+        (с Shift — добавление к выделению или исключение из него),
+        по пустому месту — начало выделения рамкой.
         """
-        item = self.canvas.find_closest(event.x, event.y)[0]
-        item_tags = self.canvas.gettags(item)
-        if MOVABLE_TAG in item_tags:
-
-            if not self.drag_data["item"]:
-                self.drag_data["item"] = item
+        x, y = self.drawing_canvas.to_world(event.x, event.y)
+        item = self.drawing_canvas.pick(x, y, tags=(MOVABLE_TAG,))
+        self.drag_data.update(x=x, y=y, start_x=x, start_y=y, pending=False, moved=False)
+
+        if item is None:
+            if not additive:
+                self.drawing_canvas.clear_selection()
+            self.drag_data["item"] = None
+            self.drag_data["band"] = self.canvas.create_rectangle(
+                event.x, event.y, event.x, event.y, outline="#1e90ff", dash=(2, 2), tags=(RUBBER_BAND_TAG,))
+            self.drag_data["band_start"] = (event.x, event.y)
+            self.drag_data["additive"] = additive
+            return
 
-            self.drag_data["x"], self.drag_data["y"] = event.x, event.y
+        oid = self.drawing_canvas.object_of(item).oid
+        self.drag_data["item"] = item
+        if additive:
+            members = self.drawing_canvas.group_members([oid])
+            if oid in self.drawing_canvas.selection:
+                self.drawing_canvas.deselect(members)
+                self.drag_data["item"] = None
+            else:
+                self.drawing_canvas.select(members, add=True)
+        elif oid not in self.drawing_canvas.selection:
+            self.drawing_canvas.select([oid])
 
     def on_item_release(self, event) -> None:
         """
-        Событие при отпускании объекта — завершение перемещения.
+        Отпускание кнопки: завершение перемещения или выделения рамкой.
+        Перемещение публикуется одной операцией сдвига для всего выделения.
         """
-        logger.info("Объект перемещён")
+        band = self.drag_data.pop("band", None)
+        if band is not None:
+            self.canvas.delete(band)
+            (x1, y1), (x2, y2) = self.drawing_canvas.to_world(*self.drag_data["band_start"]), \
+                self.drawing_canvas.to_world(event.x, event.y)
+            found = [obj.oid for obj in self.drawing_canvas.scene.query_rect(x1, y1, x2, y2, inside=True)
+                     if MOVABLE_TAG in obj.tags and self.drawing_canvas.is_editable(obj)]
+            self.drawing_canvas.select(found, add=self.drag_data["additive"])
+            logger.info(f"Выделено объектов: {len(self.drawing_canvas.selection)}")
+            return
 
-        self.drag_data["item"] = None
-        self.drag_data["x"] = 0
-        self.drag_data["y"] = 0
-        # Отправляем изменения на сервер
-        self._update_canvas_state()
+        self._apply_motion()
+        if self.drag_data["moved"]:
+            logger.info(f"Перемещено объектов: {len(self.drawing_canvas.selection)}")
+            # Другим участникам достаточно сдвига, а не полного состояния
+            self.drawing_canvas.bus.publish_op({
+                'type': 'transform',
+                'data': {'ids': sorted(self.drawing_canvas.selection),
+                         'dx': self.drag_data["total_dx"], 'dy': self.drag_data["total_dy"]}})
+
+        self.snapper.end()
+        self.drag_data.update(item=None, moved=False)
 
     def on_item_move(self, event) -> None:
         """
-        Событие при перемещении объекта — обновление координат.
+        Движение мыши с нажатой кнопкой. События накапливаются и применяются
+        не чаще одного раза за кадр.
         """
-        if self.drag_data["item"]:
-            index_x = event.x - self.drag_data["x"]
-            index_y = event.y - self.drag_data["y"]
+        if "band" in self.drag_data:
+            x1, y1 = self.drag_data["band_start"]
+            self.canvas.coords(self.drag_data["band"], x1, y1, event.x, event.y)
+            return
 
-            if isinstance(self.drag_data["item"], int):
-                self.canvas.move(self.drag_data["item"], index_x, index_y)
+        if not self.drag_data["item"]:
+            return
 
-            self.drag_data["x"] = event.x
-            self.drag_data["y"] = event.y
+        self.drag_data["x"], self.drag_data["y"] = self.drawing_canvas.to_world(event.x, event.y)
+        self.drag_data["pending"] = True
 
-    def copy_object(self, item: int, item_type: str) -> None:
+        if self._motion_job is None:
+            self._motion_job = self.canvas.after(MOTION_FRAME_MS, self._apply_motion)
+
+    def _apply_motion(self) -> None:
         """
-        Копирование объекта и его параметров в буфер обмена.
+        Применяет накопленный за кадр сдвиг одним перемещением выделения.
+        Сдвиг считается от начала перемещения и проходит через привязку
+        к сетке и направляющим.
         """
-        logger.info(f"Скопирован объект id={item}, type={item_type}")
+        if self._motion_job is not None:
+            self.canvas.after_cancel(self._motion_job)
+            self._motion_job = None
 
-        config = self.get_item_config(item, item_type)
-        self.clipboard = {
-            'type': item_type,
-            'config': config,
-            'coords': self.canvas.coords(item)}
+        if not self.drag_data["pending"]:
+            return
+        self.drag_data["pending"] = False
+
+        if not self.drag_data["moved"]:
+            self.drag_data.update(moved=True, total_dx=0.0, total_dy=0.0)
+            self.snapper.begin(self.drawing_canvas.selection)
+        target_dx, target_dy = self.snapper.snap(self.drag_data["x"] - self.drag_data["start_x"],
+                                                 self.drag_data["y"] - self.drag_data["start_y"])
+        dx, dy = target_dx - self.drag_data["total_dx"], target_dy - self.drag_data["total_dy"]
+        if not dx and not dy:
+            return
 
-    def get_item_config(self, item: int, item_type: str) -> Dict[str, Any]:
+        self.drag_data["total_dx"], self.drag_data["total_dy"] = target_dx, target_dy
+        self.drawing_canvas.move_selection(dx, dy)
+
+    def copy_object(self, item: int, item_type: str) -> None:
         """
-        Получение словаря с параметрами конфигурации объекта.
+        Копирование объекта и его параметров в буфер обмена.
         """
-        config_options = self.canvas.itemconfig(item)
-        if config_options:
-            config = {option: self.canvas.itemcget(item, option) for option in config_options if
-                        self.canvas.itemcget(item, option)}
-
-            if item_type == 'text':
-                config['text'] = self.canvas.itemcget(item, 'text')
-                config['font'] = self.canvas.itemcget(item, 'font')
+        logger.info(f"Скопирован объект id={item}, type={item_type}")
 
-        return config
+        obj = self.drawing_canvas.object_of(item)
+        if obj is None:
+            return
+        self.clipboard = obj.to_dict()
 
     def paste_object(self) -> None:
         """
@@ -235,19 +304,7 @@ class ObjectManipulator:
         item_type = self.clipboard.get('type')
 
         adjusted_coords = [coord + 100 for coord in self.clipboard['coords']]
-        if item_type in ['line', 'rectangle', 'oval', 'text', 'polygon']:
-            getattr(self.canvas, 'create_' + item_type)(*adjusted_coords, **self.clipboard['config'])
-            # Отправляем изменения на сервер
-            self._update_canvas_state()
-
-    def _update_canvas_state(self):
-        """Вспомогательный метод для отправки состояния холста"""
-        if hasattr(self.drawing_canvas.root, 'network') and self.drawing_canvas.root.network.connected:
-            items_data = self.drawing_canvas.root.file_manager.objects_data_collector()
-            self.drawing_canvas.root.network.send({
-                'type': 'draw',
-                'data': {
-                    'drawings': items_data,
-                    'background': self.drawing_canvas.bg
-                }
-            })
\ No newline at end of file
+        if item_type in ['line', 'rectangle', 'oval', 'text', 'polygon', IMAGE_TYPE, PATH_TYPE]:
+            self.drawing_canvas.create_objects([dict(self.clipboard, id=None, coords=adjusted_coords)])
+            # Сообщаем об изменении холста
+            self.drawing_canvas.bus.publish()
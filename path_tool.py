@@ -0,0 +1,100 @@
+from typing import List, Optional, Tuple
+from canvas import DrawingCanvas
+from curves import PATH_TYPE, PATH_TAG, flatten_path, level_tolerance, zoom_level
+from localization import LocalizationManager
+from logger import logger
+
+PREVIEW_TAG = "path_preview"
+
+Point = Tuple[float, float]
+
+
+class PathTool:
+    """
+    Инструмент контура из кубических кривых Безье. Щелчок добавляет опорную точку
+    с прямым сегментом, нажатие с протягиванием вытягивает симметричные управляющие
+    точки (гладкий узел), двойной щелчок завершает контур.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, shapes, loc: LocalizationManager) -> None:
+        """
+        Конструктор инструмента. Цвет и толщина берутся из настроек фигур (shapes).
+        """
+        self.canvas = canvas
+        self.shapes = shapes
+        self.loc = loc
+
+        # Контрольные точки: опорная, две управляющие, опорная и т. д.
+        self.points: List[Point] = []
+        # Исходящая управляющая точка последнего узла (None — узел острый)
+        self.handle: Optional[Point] = None
+        self.preview: Optional[int] = None
+
+    def bind_path(self) -> None:
+        self.canvas.mode = 'path'
+        self.canvas.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.canvas.bind("<Double-Button-1>", self.on_finish)
+
+    def on_press(self, event) -> None:
+        """Новая опорная точка; сегмент к ней пока прямой."""
+        point = self.canvas.to_world(event.x, event.y)
+        if self.points:
+            self.points.extend((self.handle or self.points[-1], point, point))
+        else:
+            self.points.append(point)
+        self.handle = None
+        self._update_preview()
+
+    def on_drag(self, event) -> None:
+        """Протягивание от опорной точки задаёт её управляющие точки."""
+        if not self.points:
+            return
+        anchor = self.points[-1]
+        self.handle = self.canvas.to_world(event.x, event.y)
+        if len(self.points) > 1:
+            # Входящая управляющая точка — зеркальное отражение исходящей
+            self.points[-2] = (2 * anchor[0] - self.handle[0], 2 * anchor[1] - self.handle[1])
+        self._update_preview()
+
+    def on_finish(self, event=None) -> None:
+        self.finish()
+
+    def finish(self) -> Optional[int]:
+        """Сохраняет начатый контур объектом сцены (контур из одной точки отбрасывается)."""
+        points = self.points
+        self._reset()
+        if len(points) < 4:
+            return None
+
+        item = self.canvas.create_object(
+            PATH_TYPE, [coord for point in points for coord in point],
+            {"fill": self.shapes.shape_color, "width": self.shapes.line_width,
+             "capstyle": "round", "joinstyle": "round"},
+            tags=("movable", "erasable", PATH_TAG))
+        logger.info(f"Создан контур: сегментов {(len(points) - 1) // 3}")
+        self.canvas.bus.publish()
+        return item
+
+    def cancel(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self.points = []
+        self.handle = None
+        if self.preview is not None:
+            self.canvas.canvas.delete(self.preview)
+            self.preview = None
+
+    def _update_preview(self) -> None:
+        """Временная ломаная Tk вне модели сцены."""
+        viewport = self.canvas.viewport
+        flat = flatten_path([coord for point in self.points for coord in point],
+                            level_tolerance(zoom_level(viewport.scale)))
+        screen = viewport.to_screen(flat)
+        if self.preview is None:
+            self.preview = self.canvas.canvas.create_line(
+                *screen, fill=self.shapes.shape_color, width=self.shapes.line_width * viewport.scale,
+                capstyle="round", joinstyle="round", tags=(PREVIEW_TAG,))
+        else:
+            self.canvas.canvas.coords(self.preview, *screen)
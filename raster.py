@@ -0,0 +1,341 @@
+import base64
+import io
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import tkinter as tk
+from PIL import Image, ImageColor
+from logger import logger
+
+RASTER_TAG = "raster_layer"
+# Размер растрового слоя по умолчанию в мировых пикселях
+DEFAULT_RASTER_SIZE = (1920, 1080)
+
+Rect = Tuple[int, int, int, int]
+
+
+def to_rgba(color: str, alpha: int = 255) -> np.ndarray:
+    """Цвет Tk ("#ff0000", "red") → массив RGBA."""
+    return np.array(ImageColor.getrgb(color)[:3] + (alpha,), dtype=np.uint8)
+
+
+def union(first: Optional[Rect], second: Optional[Rect]) -> Optional[Rect]:
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return (min(first[0], second[0]), min(first[1], second[1]),
+            max(first[2], second[2]), max(first[3], second[3]))
+
+
+class RasterLayer:
+    """
+    Растровый слой под векторными объектами: массив RGBA в мировых пикселях
+    с началом в точке (0, 0). Изменения копятся в прямоугольнике dirty,
+    чтобы на экран заново выгружалась только изменённая часть.
+    """
+
+    def __init__(self, width: int = DEFAULT_RASTER_SIZE[0], height: int = DEFAULT_RASTER_SIZE[1],
+                 pixels: Optional[np.ndarray] = None) -> None:
+        self.pixels = pixels if pixels is not None else np.zeros((height, width, 4), dtype=np.uint8)
+        self.dirty: Optional[Rect] = None
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    def take_dirty(self) -> Optional[Rect]:
+        """Возвращает накопленный изменённый прямоугольник (x1, y1, x2, y2) и сбрасывает его."""
+        dirty, self.dirty = self.dirty, None
+        return dirty
+
+    def _clip(self, x1: float, y1: float, x2: float, y2: float) -> Optional[Rect]:
+        x1, y1 = max(int(np.floor(x1)), 0), max(int(np.floor(y1)), 0)
+        x2, y2 = min(int(np.ceil(x2)) + 1, self.width), min(int(np.ceil(y2)) + 1, self.height)
+        if x1 >= x2 or y1 >= y2:
+            return None
+        return x1, y1, x2, y2
+
+    def _segment_mask(self, rect: Rect, x0: float, y0: float, x1: float, y1: float, radius: float) -> np.ndarray:
+        """Маска пикселей прямоугольника, лежащих не дальше radius от отрезка (центры пикселей)."""
+        left, top, right, bottom = rect
+        xs = np.arange(left, right, dtype=np.float32) + 0.5
+        ys = np.arange(top, bottom, dtype=np.float32)[:, None] + 0.5
+        dx, dy = x1 - x0, y1 - y0
+        length = dx * dx + dy * dy
+        if length == 0:
+            t = 0.0
+        else:
+            t = np.clip(((xs - x0) * dx + (ys - y0) * dy) / length, 0.0, 1.0)
+        return (xs - x0 - t * dx) ** 2 + (ys - y0 - t * dy) ** 2 <= radius * radius
+
+    def stamp_line(self, x0: float, y0: float, x1: float, y1: float, radius: float,
+                   color: Optional[np.ndarray]) -> Optional[Rect]:
+        """
+        Проводит круглой кистью отрезок за одну векторную операцию.
+        color=None стирает (делает пиксели прозрачными).
+        """
+        rect = self._clip(min(x0, x1) - radius, min(y0, y1) - radius, max(x0, x1) + radius, max(y0, y1) + radius)
+        if rect is None:
+            return None
+
+        mask = self._segment_mask(rect, x0, y0, x1, y1, radius)
+        left, top, right, bottom = rect
+        region = self.pixels[top:bottom, left:right]
+        region[mask] = 0 if color is None else color
+        self.dirty = union(self.dirty, rect)
+        return rect
+
+    def flood_fill(self, x: float, y: float, color: np.ndarray) -> int:
+        """
+        Построчная заливка области одного цвета, начиная с точки (x, y).
+        Отрезки строк ищутся векторно; возвращает число залитых пикселей.
+        """
+        x, y = int(x), int(y)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+
+        target = self.pixels[y, x].copy()
+        if np.array_equal(target, color):
+            return 0
+
+        # Пиксели исходного цвета; залитые сразу выпадают из маски
+        matches = np.all(self.pixels == target, axis=2)
+        filled = 0
+        x_min, y_min, x_max, y_max = x, y, x, y
+        seeds: List[Tuple[int, int]] = [(x, y)]
+
+        while seeds:
+            seed_x, seed_y = seeds.pop()
+            row = matches[seed_y]
+            if not row[seed_x]:
+                continue
+
+            # Границы отрезка: ближайшие несовпадающие пиксели слева и справа
+            blocked_left = np.flatnonzero(~row[:seed_x])
+            blocked_right = np.flatnonzero(~row[seed_x:])
+            start = int(blocked_left[-1]) + 1 if blocked_left.size else 0
+            end = seed_x + int(blocked_right[0]) if blocked_right.size else self.width
+
+            row[start:end] = False
+            self.pixels[seed_y, start:end] = color
+            filled += end - start
+            x_min, x_max = min(x_min, start), max(x_max, end - 1)
+            y_min, y_max = min(y_min, seed_y), max(y_max, seed_y)
+
+            # В соседних строках семенем становится начало каждого совпадающего отрезка
+            for next_y in (seed_y - 1, seed_y + 1):
+                if 0 <= next_y < self.height:
+                    span = matches[next_y, start:end]
+                    starts = np.flatnonzero(span & ~np.concatenate(([False], span[:-1])))
+                    seeds.extend((start + int(offset), next_y) for offset in starts)
+
+        self.dirty = union(self.dirty, (x_min, y_min, x_max + 1, y_max + 1))
+        return filled
+
+    def clear(self) -> None:
+        self.pixels[:] = 0
+        self.dirty = (0, 0, self.width, self.height)
+
+    def to_image(self) -> Image.Image:
+        return Image.fromarray(self.pixels, 'RGBA')
+
+    def to_png(self) -> bytes:
+        buffer = io.BytesIO()
+        self.to_image().save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Данные слоя для файла сохранения: PNG в base64."""
+        return {'width': self.width, 'height': self.height,
+                'png': base64.b64encode(self.to_png()).decode('ascii')}
+
+    @classmethod
+    def from_png(cls, data: bytes) -> "RasterLayer":
+        image = Image.open(io.BytesIO(data)).convert('RGBA')
+        return cls(pixels=np.array(image, dtype=np.uint8))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RasterLayer":
+        return cls.from_png(base64.b64decode(data['png']))
+
+
+class RasterView:
+    """
+    Показ растрового слоя одним элементом-изображением Tk под всеми объектами сцены.
+    При смене вида изображение пересчитывается целиком (по ближайшему пикселю),
+    при рисовании — выгружается только изменённый прямоугольник.
+    """
+
+    def __init__(self, canvas, layer: RasterLayer) -> None:
+        """
+        canvas — DrawingCanvas, вид которого задаёт преобразование координат.
+        """
+        self.canvas = canvas
+        self.layer = layer
+        self.photo: Optional[tk.PhotoImage] = None
+        self.item: Optional[int] = None
+        self._view: Optional[Tuple[float, float, float, int, int]] = None
+
+    def _screen_size(self) -> Tuple[int, int]:
+        widget = self.canvas.canvas
+        if widget.winfo_ismapped():
+            return max(widget.winfo_width(), 1), max(widget.winfo_height(), 1)
+        return self.canvas.width, self.canvas.height
+
+    def render(self) -> None:
+        """Перерисовывает изображение целиком, если изменились вид или размер холста."""
+        viewport = self.canvas.viewport
+        width, height = self._screen_size()
+        view = (viewport.offset_x, viewport.offset_y, viewport.scale, width, height)
+        if view == self._view:
+            self.flush()
+            return
+
+        self._view = view
+        self.layer.take_dirty()
+        if self.photo is None or (self.photo.width(), self.photo.height()) != (width, height):
+            self.photo = tk.PhotoImage(master=self.canvas.canvas, width=width, height=height)
+            if self.item is None:
+                self.item = self.canvas.canvas.create_image(0, 0, anchor="nw", image=self.photo,
+                                                            tags=(RASTER_TAG,))
+                self.canvas.canvas.tag_lower(self.item)
+            else:
+                self.canvas.canvas.itemconfig(self.item, image=self.photo)
+        self.canvas.canvas.coords(self.item, 0, 0)
+        self._upload((0, 0, width, height))
+
+    def flush(self) -> None:
+        """Выгружает на экран только изменённую с прошлого раза часть слоя."""
+        dirty = self.layer.take_dirty()
+        if dirty is None or self.photo is None:
+            return
+        viewport = self.canvas.viewport
+        x1, y1, x2, y2 = viewport.to_screen(dirty)
+        width, height = self._screen_size()
+        rect = (max(int(np.floor(x1)), 0), max(int(np.floor(y1)), 0),
+                min(int(np.ceil(x2)), width), min(int(np.ceil(y2)), height))
+        if rect[0] < rect[2] and rect[1] < rect[3]:
+            self._upload(rect)
+
+    def sample(self, rect: Rect) -> np.ndarray:
+        """Пиксели экранного прямоугольника, выбранные из слоя по ближайшему пикселю."""
+        viewport = self.canvas.viewport
+        left, top, right, bottom = rect
+        xs = np.floor((np.arange(left, right) + 0.5) / viewport.scale + viewport.offset_x).astype(np.int64)
+        ys = np.floor((np.arange(top, bottom) + 0.5) / viewport.scale + viewport.offset_y).astype(np.int64)
+        inside_x = (xs >= 0) & (xs < self.layer.width)
+        inside_y = (ys >= 0) & (ys < self.layer.height)
+
+        block = self.layer.pixels[np.clip(ys, 0, self.layer.height - 1)[:, None],
+                                  np.clip(xs, 0, self.layer.width - 1)[None, :]]
+        block[~(inside_y[:, None] & inside_x[None, :])] = 0
+        return block
+
+    def _upload(self, rect: Rect) -> None:
+        buffer = io.BytesIO()
+        Image.fromarray(self.sample(rect), 'RGBA').save(buffer, format='PNG', compress_level=1)
+        self.photo.tk.call(self.photo.name, 'put', base64.b64encode(buffer.getvalue()).decode('ascii'),
+                           '-format', 'png', '-to', rect[0], rect[1])
+        logger.debug(f"Растровый слой: выгружено {rect[2] - rect[0]}×{rect[3] - rect[1]} пикселей")
+
+    def destroy(self) -> None:
+        if self.item is not None:
+            self.canvas.canvas.delete(self.item)
+        self.item = None
+        self.photo = None
+        self._view = None
+
+
+class RasterTools:
+    """
+    Инструменты растрового слоя: кисть, ластик и заливка.
+    Мазок целиком — один шаг истории с пикселями изменённого прямоугольника до и после.
+    """
+
+    def __init__(self, canvas, shapes, loc) -> None:
+        """
+        Конструктор. Цвет и толщина кисти берутся из настроек фигур (shapes).
+        """
+        self.canvas = canvas
+        self.shapes = shapes
+        self.loc = loc
+        self.fill_color: Optional[str] = None
+
+        self._last: Optional[Tuple[float, float]] = None
+        self._erasing = False
+        self._before: Optional[np.ndarray] = None
+        self._stroke: Optional[Rect] = None
+
+    def _layer(self) -> RasterLayer:
+        if self.canvas.raster is None:
+            self.canvas.set_raster(RasterLayer())
+        return self.canvas.raster
+
+    def bind_brush(self, erase: bool = False) -> None:
+        self._layer()
+        self._erasing = erase
+        self.canvas.mode = 'raster_eraser' if erase else 'raster_brush'
+        self.canvas.canvas.bind("<ButtonPress-1>", self.on_press)
+        self.canvas.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.canvas.bind("<ButtonRelease-1>", self.on_release)
+
+    def bind_fill(self, color: Optional[str]) -> None:
+        self._layer()
+        self.fill_color = color
+        self.canvas.mode = 'raster_fill'
+        self.canvas.canvas.bind("<ButtonPress-1>", self.on_fill)
+
+    def _radius(self) -> float:
+        return max(float(self.shapes.line_width), 0.5)
+
+    def on_press(self, event) -> None:
+        layer = self._layer()
+        # Копия до мазка; в историю попадёт только изменённый прямоугольник
+        self._before = layer.pixels.copy()
+        self._stroke = None
+        self._last = self.canvas.to_world(event.x, event.y)
+        self.on_drag(event)
+
+    def on_drag(self, event) -> None:
+        if self._last is None:
+            return
+        x, y = self.canvas.to_world(event.x, event.y)
+        color = None if self._erasing else to_rgba(self.shapes.shape_color)
+        rect = self.canvas.raster.stamp_line(*self._last, x, y, self._radius(), color)
+        self._stroke = union(self._stroke, rect)
+        self._last = (x, y)
+        self.canvas.raster_view.flush()
+
+    def on_release(self, event) -> None:
+        if self._last is None:
+            return
+        self._last = None
+        if self._stroke is not None:
+            self._record(self._stroke)
+        self._before = None
+        self._stroke = None
+
+    def on_fill(self, event) -> None:
+        if not self.fill_color:
+            return
+        layer = self._layer()
+        self._before = layer.pixels.copy()
+        x, y = self.canvas.to_world(event.x, event.y)
+        filled = layer.flood_fill(x, y, to_rgba(self.fill_color))
+        rect = layer.dirty
+        self.canvas.raster_view.flush()
+        if filled:
+            logger.info(f"Заливка растрового слоя: {filled} пикселей")
+            self._record(rect)
+        self._before = None
+
+    def _record(self, rect: Rect) -> None:
+        left, top, right, bottom = rect
+        before = self._before[top:bottom, left:right].copy()
+        after = self.canvas.raster.pixels[top:bottom, left:right].copy()
+        self.canvas.record_raster(rect, before, after)
+        self.canvas.bus.publish()
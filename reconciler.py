@@ -0,0 +1,181 @@
+import hashlib
+import json
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from canvas import DrawingCanvas, TK_TYPES
+from scene_model import normalize_option
+from logger import logger
+
+# Значения параметров элементов Tk по умолчанию: параметр, которого нет в пришедшем
+# состоянии (например, снятый пунктир или стрелка), возвращается к такому значению
+TK_OPTION_DEFAULTS: Dict[str, Any] = {
+    'dash': '', 'dashoffset': 0, 'arrow': 'none', 'arrowshape': '8 10 3', 'capstyle': 'butt',
+    'joinstyle': 'round', 'smooth': 0, 'splinesteps': 12, 'stipple': '', 'outlinestipple': '',
+    'outline': 'black', 'fill': '', 'width': 1.0, 'anchor': 'center', 'justify': 'left', 'angle': 0.0,
+    'text': '', 'underline': -1, 'start': 0.0, 'extent': 90.0, 'style': 'pieslice', 'state': '',
+}
+# Отличия по типам элементов Tk
+TK_TYPE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'line': {'fill': 'black'},
+    'text': {'fill': 'black', 'width': 0},
+    'polygon': {'fill': 'black', 'outline': ''},
+}
+
+
+def option_default(item_type: str, option: str) -> Any:
+    """Значение параметра по умолчанию в Tk; None — параметр не сбрасывается."""
+    tk_type = TK_TYPES.get(item_type, item_type)
+    return TK_TYPE_DEFAULTS.get(tk_type, {}).get(option, TK_OPTION_DEFAULTS.get(option))
+
+
+def content_id(item_data: Dict[str, Any]) -> str:
+    """
+    ID для объекта, пришедшего без ID, — хэш его содержимого.
+    Неизменившийся объект получает тот же ID при каждой синхронизации и не создаётся заново.
+    """
+    content = json.dumps([item_data['type'], item_data['coords'], item_data.get('config', {}),
+                          item_data.get('tags', ()), item_data.get('layer')], sort_keys=True, default=str)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def longest_increasing_run(positions: List[int]) -> Set[int]:
+    """
+    Возвращает индексы элементов, образующих наибольшую возрастающую
+    подпоследовательность. Эти элементы уже стоят в нужном порядке
+    и при перестановке слоёв их можно не трогать.
+    """
+    tails: List[int] = []
+    tails_index: List[int] = []
+    previous: List[Optional[int]] = [None] * len(positions)
+
+    for index, position in enumerate(positions):
+        slot = bisect_left(tails, position)
+        if slot == len(tails):
+            tails.append(position)
+            tails_index.append(index)
+        else:
+            tails[slot] = position
+            tails_index[slot] = index
+        previous[index] = tails_index[slot - 1] if slot > 0 else None
+
+    result: Set[int] = set()
+    index = tails_index[-1] if tails_index else None
+    while index is not None:
+        result.add(index)
+        index = previous[index]
+    return result
+
+
+class CanvasReconciler:
+    """
+    Применяет пришедшее с сервера состояние к холсту без полной перерисовки:
+    объекты сопоставляются по стабильному ID, обновляются только изменённые
+    координаты, параметры и порядок, создаются и удаляются только разница.
+    """
+
+    def __init__(self, canvas: DrawingCanvas) -> None:
+        self.canvas = canvas
+
+    def apply(self, drawings: Iterable[Dict[str, Any]]) -> int:
+        """
+        Приводит холст к переданному списку объектов.
+        Создание и изменение элементов выполняется пакетно.
+        Возвращает количество затронутых элементов.
+        """
+        scene = self.canvas.scene
+        touched: Set[str] = set()
+        desired: List[str] = []
+
+        to_create: List[Dict[str, Any]] = []
+        coords: Dict[str, List[float]] = {}
+        options: Dict[str, Dict[str, Any]] = {}
+        tags: Dict[str, Tuple[str, ...]] = {}
+        relayered: Dict[str, List[str]] = {}
+        occurrences: Dict[str, int] = {}
+
+        for item_data in drawings:
+            oid = item_data.get('id')
+            if not oid:
+                # Одинаковые объекты различаются номером появления
+                oid = content_id(item_data)
+                occurrence = occurrences.get(oid, 0)
+                occurrences[oid] = occurrence + 1
+                if occurrence:
+                    oid = f"{oid}-{occurrence}"
+            desired.append(oid)
+            obj = scene.get(oid)
+
+            if obj is not None and obj.type != item_data['type']:
+                self.canvas.remove_objects([oid])
+                obj = None
+
+            if obj is None:
+                to_create.append(dict(item_data, id=oid))
+                touched.add(oid)
+                continue
+
+            item_coords = [float(coord) for coord in item_data['coords']]
+            if obj.coords != item_coords:
+                coords[oid] = item_coords
+                touched.add(oid)
+
+            config = dict(item_data.get('config', {}))
+            config.pop('tags', None)
+            changed_options = {option: value for option, value in config.items()
+                               if obj.config.get(option) != normalize_option(value)}
+            # Параметры, снятые у объекта на другой стороне, возвращаются к значениям Tk по умолчанию
+            for option, value in obj.config.items():
+                if option not in config:
+                    default = option_default(obj.type, option)
+                    if default is not None and value != default:
+                        changed_options[option] = default
+            if changed_options:
+                options[oid] = changed_options
+                touched.add(oid)
+
+            layer = item_data.get('layer', obj.layer)
+            if layer != obj.layer:
+                relayered.setdefault(layer, []).append(oid)
+                touched.add(oid)
+
+            item_tags = tuple(item_data.get('tags', ()))
+            if list(item_tags) != obj.tags:
+                tags[oid] = item_tags
+                touched.add(oid)
+
+        desired_set = set(desired)
+        removed = [oid for oid in scene.order if oid not in desired_set]
+        if removed:
+            self.canvas.remove_objects(removed)
+            touched.update(removed)
+
+        if coords or options or tags:
+            self.canvas.update_objects(coords, options, tags)
+        for lid, oids in relayered.items():
+            self.canvas.move_to_layer(oids, lid)
+        if to_create:
+            self.canvas.create_objects(to_create)
+
+        touched.update(self._restack(desired))
+
+        logger.debug(f"Синхронизация холста: затронуто объектов {len(touched)} из {len(desired)}")
+        return len(touched)
+
+    def _restack(self, desired: List[str]) -> Set[str]:
+        """
+        Восстанавливает порядок отрисовки минимальным числом перестановок.
+        """
+        scene = self.canvas.scene
+        if scene.order == desired:
+            return set()
+
+        current_position = {oid: index for index, oid in enumerate(scene.order)}
+        keep = longest_increasing_run([current_position[oid] for oid in desired])
+
+        moved: Set[str] = set()
+        for index, oid in enumerate(desired):
+            if index in keep:
+                continue
+            self.canvas.place_above(oid, desired[index - 1] if index > 0 else None)
+            moved.add(oid)
+        return moved
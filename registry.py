@@ -0,0 +1,48 @@
+from typing import Any, Dict, Iterator
+
+
+class ObjectRegistry:
+    """
+    Служебные данные объектов сцены, которых нет в их параметрах Tk
+    (вид фигуры, стиль текста и т. п.), по стабильным ID.
+    Реестр принадлежит модели сцены: запись удаляется вместе с объектом
+    при любом удалении, очистке или перезагрузке, поэтому не копится.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, oid: str) -> bool:
+        return oid in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def get(self, oid: str, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(oid)
+        return entry.get(key, default) if entry else default
+
+    def set(self, oid: str, key: str, value: Any) -> None:
+        self._entries.setdefault(oid, {})[key] = value
+
+    def entry(self, oid: str) -> Dict[str, Any]:
+        """Копия данных одного объекта (пустая, если их нет)."""
+        return dict(self._entries.get(oid, {}))
+
+    def drop(self, oid: str) -> None:
+        """Забывает все данные объекта."""
+        self._entries.pop(oid, None)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Копия всех записей (например, для выгрузки неактивного документа)."""
+        return {oid: dict(entry) for oid, entry in self._entries.items()}
+
+    def restore(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        for oid, entry in entries.items():
+            self._entries[oid] = dict(entry)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,338 @@
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+from curves import FLATNESS, flatten_path
+from fonts import parse_font
+from images import ImageStore
+from logger import logger
+
+# Форматы экспорта и расширения файлов; формат выбирается по расширению
+EXPORT_FORMATS = {"PNG": ".png", "WEBP": ".webp", "JPEG": ".jpeg"}
+EXTENSION_FORMATS = {".png": "PNG", ".webp": "WEBP", ".jpeg": "JPEG", ".jpg": "JPEG"}
+SAVE_OPTIONS = {"PNG": {"optimize": True},
+                "WEBP": {"quality": 90, "method": 4},
+                "JPEG": {"quality": 92, "subsampling": 0}}
+# Во сколько раз сторона изображения больше при отрисовке до сглаживающего уменьшения
+SUPERSAMPLE = 2
+# Пикселей в пункте: так Tk переводит размер шрифта на экране с 96 точками на дюйм
+POINT_PIXELS = 96 / 72
+# Отрезков на сегмент сглаженной линии (как splinesteps по умолчанию в Tk)
+SPLINE_STEPS = 12
+WHITE = (255, 255, 255)
+
+_GRAY = re.compile(r"gr[ae]y(\d{1,3})$")
+
+
+@lru_cache(maxsize=1024)
+def parse_color(color: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """
+    Цвет Tk (имя, "#rrggbb", "gray50") в RGB. Пустой цвет — None (не рисуется).
+    Разобранные цвета кэшируются: у объектов документа их обычно немного.
+    """
+    if not color:
+        return None
+    name = str(color).strip().lower()
+    gray = _GRAY.match(name)
+    if gray:
+        level = round(min(int(gray.group(1)), 100) * 255 / 100)
+        return level, level, level
+    try:
+        return ImageColor.getrgb(name.replace(" ", ""))[:3]
+    except ValueError:
+        logger.warning(f"Неизвестный цвет {color!r}, элемент не рисуется")
+        return None
+
+
+def _font_files(family: str, bold: bool, italic: bool) -> Iterator[str]:
+    """Имена файлов шрифта в порядке предпочтения: семейство, затем запасные."""
+    style = ("Bold" if bold else "") + ("Italic" if italic else "")
+    short = {(True, False): "bd", (False, True): "i", (True, True): "bi"}.get((bold, italic), "")
+    dejavu = {(True, False): "-Bold", (False, True): "-Oblique", (True, True): "-BoldOblique"}.get((bold, italic), "")
+    for name in dict.fromkeys((family, family.replace(" ", ""))):
+        yield f"{name}{style}.ttf"
+        yield f"{name.lower()}{short}.ttf"
+    yield f"DejaVuSans{dejavu}.ttf"
+    yield f"arial{short}.ttf"
+
+
+@lru_cache(maxsize=128)
+def font_file(family: str, bold: bool = False, italic: bool = False) -> Optional[str]:
+    """Первый найденный файл шрифта для семейства и начертания (поиск по системным папкам — один раз)."""
+    for name in dict.fromkeys(_font_files(family, bold, italic)):
+        try:
+            ImageFont.truetype(name, 12)
+            return name
+        except OSError:
+            continue
+    logger.warning(f"Файл шрифта для {family!r} не найден, используется встроенный шрифт")
+    return None
+
+
+@lru_cache(maxsize=256)
+def load_font(family: str, pixels: int, bold: bool = False, italic: bool = False) -> ImageFont.FreeTypeFont:
+    """Шрифт PIL заданного размера в пикселях; загруженные шрифты общие для всех отрисовок."""
+    name = font_file(family, bold, italic)
+    if name is None:
+        return ImageFont.load_default(pixels)
+    return ImageFont.truetype(name, pixels)
+
+
+def spline(points: Sequence[Tuple[float, float]], steps: int = SPLINE_STEPS) -> List[Tuple[float, float]]:
+    """
+    Сглаженная линия, как её рисует Tk при smooth=true: параболические сегменты
+    между серединами соседних отрезков, вершины ломаной служат управляющими точками.
+    """
+    if len(points) < 3:
+        return list(points)
+    result = [points[0]]
+    for index in range(1, len(points) - 1):
+        (x0, y0), (x1, y1), (x2, y2) = points[index - 1], points[index], points[index + 1]
+        start = (x0, y0) if index == 1 else ((x0 + x1) / 2, (y0 + y1) / 2)
+        end = (x2, y2) if index == len(points) - 2 else ((x1 + x2) / 2, (y1 + y2) / 2)
+        for step in range(1, steps + 1):
+            t = step / steps
+            a, b, c = (1 - t) ** 2, 2 * t * (1 - t), t * t
+            result.append((a * start[0] + b * x1 + c * end[0], a * start[1] + b * y1 + c * end[1]))
+    return result
+
+
+class TextLayout(NamedTuple):
+    """Размещение блока строк текста в пикселях изображения."""
+    font: ImageFont.FreeTypeFont
+    styles: Set[str]
+    lines: List[str]
+    widths: List[float]
+    left: float
+    top: float
+    width: float
+    ascent: int
+    line_height: int
+
+
+def text_layout(config: Dict[str, Any], x: float, y: float, factor: float) -> Optional[TextLayout]:
+    """
+    Шрифт и положение строк текста с точкой привязки (x, y) в пикселях изображения,
+    в котором на единицу мировых координат приходится factor пикселей.
+    """
+    text = str(config.get('text', ''))
+    if not text:
+        return None
+    descriptor = parse_font(config.get('font', ''))
+    styles = {style.lower() for style in descriptor.styles}
+    size = -descriptor.size if descriptor.size < 0 else descriptor.size * POINT_PIXELS
+    font = load_font(descriptor.family, max(round(size * factor), 1), 'bold' in styles, 'italic' in styles)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    lines = text.split('\n')
+    widths = [font.getlength(line) for line in lines]
+    block_width, block_height = max(widths), line_height * len(lines)
+
+    anchor = str(config.get('anchor', 'center')).replace('center', '')
+    left = x if 'w' in anchor else x - block_width if 'e' in anchor else x - block_width / 2
+    top = y if anchor.startswith('n') else y - block_height if anchor.startswith('s') else y - block_height / 2
+    return TextLayout(font, styles, lines, widths, left, top, block_width, ascent, line_height)
+
+
+def item_bounds(item: Dict[str, Any], factor: float = 1.0) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Мировые границы того, что отрисовка объекта закрасит при factor пикселей на единицу:
+    рамка координат с половиной толщины линии, для текста — по метрикам шрифта PIL.
+    Сглаженные линии и кривые не выходят за рамку своих управляющих точек.
+    """
+    coords = item['coords']
+    if len(coords) < 2:
+        return None
+    config = item.get('config', {})
+    if item['type'] == 'text':
+        layout = text_layout(config, coords[0] * factor, coords[1] * factor, factor)
+        if layout is None:
+            return None
+        # Наклонные и выносные знаки могут выступать за ширину строки
+        pad = layout.ascent / 4
+        return ((layout.left - pad) / factor, (layout.top - pad) / factor,
+                (layout.left + layout.width + pad) / factor,
+                (layout.top + layout.line_height * len(layout.lines) + pad) / factor)
+
+    xs, ys = coords[0::2], coords[1::2]
+    try:
+        pad = float(config.get('width', 1) or 1) / 2
+    except (TypeError, ValueError):
+        pad = 0.5
+    return min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad
+
+
+def format_for_path(file_path: str, default: str = "PNG") -> str:
+    return EXTENSION_FORMATS.get(os.path.splitext(file_path)[1].lower(), default)
+
+
+def save_image(image: Image.Image, file_path: str, export_format: Optional[str] = None) -> None:
+    """Сохраняет изображение в формате по расширению файла (или заданном) с настройками качества формата."""
+    export_format = (export_format or format_for_path(file_path)).upper()
+    image.save(file_path, format=export_format, **SAVE_OPTIONS.get(export_format, {}))
+
+
+def _is_true(value: Any) -> bool:
+    return str(value).lower() in ("1", "true", "yes", "bezier")
+
+
+class Frame(NamedTuple):
+    """Изображение, на котором идёт отрисовка, и перевод мировых координат в его пиксели."""
+    image: Image.Image
+    draw: ImageDraw.ImageDraw
+    x: float
+    y: float
+    factor: float
+
+    def points(self, coords: Sequence[float]) -> List[Tuple[float, float]]:
+        factor = self.factor
+        return [((coords[index] - self.x) * factor, (coords[index + 1] - self.y) * factor)
+                for index in range(0, len(coords) - 1, 2)]
+
+    def width(self, config: Dict[str, Any]) -> int:
+        try:
+            width = float(config.get('width', 1) or 1)
+        except (TypeError, ValueError):
+            width = 1.0
+        return max(round(width * self.factor), 1)
+
+
+class Renderer:
+    """
+    Отрисовка документа в изображение PIL без Tk: толщина линий, начертания шрифтов,
+    сглаженные линии и порядок отрисовки — как на холсте. Документ — словарь
+    с разделами 'background', 'drawings' (в порядке отрисовки), 'images' и 'raster'
+    ('raster_origin' — мировые координаты левого верхнего пикселя части растрового слоя).
+    Сглаживание — отрисовка в supersample раз крупнее и уменьшение.
+    """
+
+    def __init__(self, images: Optional[ImageStore] = None) -> None:
+        self.images = images if images is not None else ImageStore()
+
+    def render(self, document: Dict[str, Any], width: int, height: int, origin: Tuple[float, float] = (0.0, 0.0),
+               scale: float = 1.0, supersample: int = SUPERSAMPLE) -> Image.Image:
+        """
+        Изображение width×height пикселей; origin — мировые координаты левого верхнего пикселя,
+        scale — пикселей изображения на единицу мировых координат.
+        """
+        factor = scale * supersample
+        image = Image.new('RGB', (width * supersample, height * supersample),
+                          parse_color(document.get('background')) or WHITE)
+        if document.get('images'):
+            self.images.merge(document['images'])
+        frame = Frame(image, ImageDraw.Draw(image), origin[0], origin[1], factor)
+
+        if document.get('raster') is not None:
+            # Растровый слой лежит под всеми векторными объектами
+            self.paste_raster(frame, document['raster'], document.get('raster_origin', (0, 0)))
+        for item in document.get('drawings', ()):
+            draw_method = getattr(self, f"draw_{item['type']}", None)
+            if draw_method:
+                draw_method(frame, item['coords'], item.get('config', {}))
+
+        return image.reduce(supersample) if supersample > 1 else image
+
+    def paste_raster(self, frame: Frame, raster, raster_origin: Tuple[int, int] = (0, 0)) -> None:
+        """Вклеивает видимую часть растрового слоя (мировые пиксели с началом в raster_origin)."""
+        width, height = frame.image.size
+        left, top = frame.x - raster_origin[0], frame.y - raster_origin[1]
+        x1, y1 = max(math.floor(left), 0), max(math.floor(top), 0)
+        x2 = min(math.ceil(left + width / frame.factor), raster.width)
+        y2 = min(math.ceil(top + height / frame.factor), raster.height)
+        if x1 >= x2 or y1 >= y2:
+            return
+        part = Image.fromarray(np.ascontiguousarray(raster.pixels[y1:y2, x1:x2]), 'RGBA')
+        size = (max(round((x2 - x1) * frame.factor), 1), max(round((y2 - y1) * frame.factor), 1))
+        if size != part.size:
+            part = part.resize(size, Image.NEAREST if frame.factor >= 1 else Image.BILINEAR)
+        frame.image.paste(part, (round((x1 - left) * frame.factor), round((y1 - top) * frame.factor)), part)
+
+    # --- Элементы по типам
+
+    def draw_line(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        points = frame.points(coords)
+        if _is_true(config.get('smooth')):
+            points = spline(points)
+        self._stroke(frame, points, config)
+
+    def draw_path(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        # Кривые спрямляются с точностью пикселя изображения с учётом сглаживания
+        self._stroke(frame, frame.points(flatten_path(coords, FLATNESS / frame.factor)), config)
+
+    def _stroke(self, frame: Frame, points: List[Tuple[float, float]], config: Dict[str, Any]) -> None:
+        fill = parse_color(config.get('fill', 'black'))
+        if fill is None or not points:
+            return
+        width = frame.width(config)
+        frame.draw.line(points, fill=fill, width=width, joint="curve")
+        if config.get('capstyle') == 'round' and width > 2:
+            radius = width / 2
+            for x, y in (points[0], points[-1]):
+                frame.draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=fill)
+
+    def draw_rectangle(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        self._box(frame.draw.rectangle, frame, coords, config)
+
+    def draw_oval(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        self._box(frame.draw.ellipse, frame, coords, config)
+
+    def _box(self, method, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        (x1, y1), (x2, y2) = frame.points(coords[:4])
+        x1, x2 = sorted((x1, x2))
+        y1, y2 = sorted((y1, y2))
+        fill = parse_color(config.get('fill'))
+        outline = parse_color(config.get('outline', 'black'))
+        if outline is None:
+            if fill is not None:
+                method((x1, y1, x2, y2), fill=fill)
+            return
+        # Контур Tk лежит по центру границы фигуры, а PIL рисует его внутри прямоугольника
+        width = frame.width(config)
+        half = width / 2
+        method((x1 - half, y1 - half, x2 + half, y2 + half), fill=fill, outline=outline, width=width)
+
+    def draw_polygon(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        points = frame.points(coords)
+        if len(points) < 2:
+            return
+        fill = parse_color(config.get('fill', 'black'))
+        outline = parse_color(config.get('outline'))
+        frame.draw.polygon(points, fill=fill)
+        if outline is not None:
+            frame.draw.line(points + points[:1], fill=outline, width=frame.width(config), joint="curve")
+
+    def draw_text(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        """Текст по правилам Tk: блок строк привязан точкой anchor (по умолчанию — центр)."""
+        fill = parse_color(config.get('fill', 'black'))
+        if fill is None:
+            return
+        layout = text_layout(config, *frame.points(coords[:2])[0], frame.factor)
+        if layout is None:
+            return
+        thickness = max(round(layout.line_height / 16), 1)
+        justify = config.get('justify', 'left')
+
+        for index, (line, width) in enumerate(zip(layout.lines, layout.widths)):
+            line_left = layout.left + {'center': (layout.width - width) / 2,
+                                       'right': layout.width - width}.get(justify, 0)
+            line_top = layout.top + index * layout.line_height
+            frame.draw.text((line_left, line_top), line, fill=fill, font=layout.font, anchor='la')
+            if 'underline' in layout.styles:
+                y_line = line_top + layout.ascent + thickness
+                frame.draw.line([(line_left, y_line), (line_left + width, y_line)], fill=fill, width=thickness)
+            if 'overstrike' in layout.styles:
+                y_line = line_top + layout.ascent * 0.65
+                frame.draw.line([(line_left, y_line), (line_left + width, y_line)], fill=fill, width=thickness)
+
+    def draw_image(self, frame: Frame, coords: Sequence[float], config: Dict[str, Any]) -> None:
+        key = config.get('key')
+        if key not in self.images:
+            return
+        (x1, y1), (x2, y2) = frame.points(coords[:4])
+        width, height = max(round(abs(x2 - x1)), 1), max(round(abs(y2 - y1)), 1)
+        image = self.images.render(key, width, height)
+        frame.image.paste(image, (round(min(x1, x2)), round(min(y1, y2))), image if image.mode == 'RGBA' else None)
@@ -0,0 +1,426 @@
+import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from spatial_index import GridIndex, object_bounds, hit_test
+from registry import ObjectRegistry
+
+# Параметры, от которых зависят границы объекта в пространственном индексе
+GEOMETRY_OPTIONS = {'width', 'text', 'font'}
+# Слой, в который попадают объекты без слоя (например, из старых файлов)
+DEFAULT_LAYER = "base"
+
+
+def normalize_option(value: Any) -> Any:
+    """
+    Приводит значение опции к виду, в котором его вернул бы Tk:
+    кортежи (например, шрифт) превращаются в строку-список Tcl.
+    """
+    if isinstance(value, (tuple, list)):
+        parts = []
+        for part in value:
+            part = str(part)
+            parts.append("{" + part + "}" if not part or " " in part else part)
+        return " ".join(parts)
+    return value
+
+
+class SceneObject:
+    """
+    Объект сцены: тип, координаты, параметры и теги одного элемента холста.
+    """
+
+    __slots__ = ("oid", "type", "coords", "config", "tags", "item", "layer")
+
+    def __init__(self, oid: str, item_type: str, coords: Iterable[float], config: Dict[str, Any],
+                 tags: Iterable[str], item: Optional[int] = None, layer: str = DEFAULT_LAYER) -> None:
+        self.oid = oid
+        self.type = item_type
+        self.coords = [float(coord) for coord in coords]
+        self.config = dict(config)
+        self.tags = list(tags)
+        self.item = item
+        self.layer = layer
+
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """Ограничивающий прямоугольник по координатам объекта."""
+        xs = self.coords[::2]
+        ys = self.coords[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Данные объекта в формате файлов сохранения и сетевого протокола."""
+        return {
+            'id': self.oid,
+            'type': self.type,
+            'coords': list(self.coords),
+            'tags': list(self.tags),
+            'config': dict(self.config),
+            'layer': self.layer}
+
+
+class Layer:
+    """
+    Именованный слой: объекты слоя занимают в порядке отрисовки непрерывный отрезок.
+    Скрытый слой не создаёт элементов Tk, объекты заблокированного слоя нельзя выбрать.
+    """
+
+    __slots__ = ("lid", "name", "visible", "locked")
+
+    def __init__(self, lid: str, name: str, visible: bool = True, locked: bool = False) -> None:
+        self.lid = lid
+        self.name = name
+        self.visible = visible
+        self.locked = locked
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'id': self.lid, 'name': self.name, 'visible': self.visible, 'locked': self.locked}
+
+
+class SceneModel:
+    """
+    Модель сцены на стороне Python. Хранит объекты по стабильным ID,
+    порядок отрисовки и множество изменённых объектов, чтобы снимки и диффы
+    строились без обращений к Tk.
+    """
+
+    def __init__(self, bounds: Callable[[SceneObject], Optional[Tuple[float, float, float, float]]] = object_bounds) -> None:
+        self.objects: Dict[str, SceneObject] = {}
+        self.order: List[str] = []
+        self.by_item: Dict[int, str] = {}
+
+        self.dirty: Set[str] = set()
+        self.removed: Set[str] = set()
+        self.order_dirty = False
+
+        # Пространственный индекс для выбора объектов и запросов по области
+        self.bounds = bounds
+        self.index = GridIndex()
+        self._ranks: Optional[Dict[str, int]] = None
+
+        # Слои снизу вверх и число объектов в каждом (для вставки на вершину слоя)
+        self.layers: List[Layer] = [Layer(DEFAULT_LAYER, "1")]
+        self._layer_counts: Dict[str, int] = {DEFAULT_LAYER: 0}
+        self.layers_dirty = False
+
+        # Служебные данные объектов; живут ровно столько же, сколько сами объекты
+        self.meta = ObjectRegistry()
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, oid: str) -> bool:
+        return oid in self.objects
+
+    def __iter__(self) -> Iterator[SceneObject]:
+        """Объекты в порядке отрисовки (снизу вверх)."""
+        return (self.objects[oid] for oid in self.order)
+
+    @staticmethod
+    def new_id() -> str:
+        return uuid.uuid4().hex
+
+    def add(self, item_type: str, coords: Iterable[float], config: Dict[str, Any], tags: Iterable[str],
+            item: Optional[int] = None, oid: Optional[str] = None, layer: Optional[str] = None) -> SceneObject:
+        """
+        Добавляет объект на вершину его слоя (без слоя или с неизвестным слоем — в нижний слой).
+        """
+        oid = oid or self.new_id()
+        if oid in self.objects:
+            self.remove(oid)
+
+        layer = layer if layer in self._layer_counts else self.layers[0].lid
+        obj = SceneObject(oid, item_type, coords, config, tags, item, layer)
+        self.objects[oid] = obj
+        self.order.insert(self.layer_span(layer)[1], oid)
+        self._layer_counts[layer] += 1
+        if item is not None:
+            self.by_item[item] = oid
+
+        self.removed.discard(oid)
+        self._mark(oid)
+        self._reindex(obj)
+        self._order_changed()
+        return obj
+
+    def remove(self, oid: str) -> Optional[SceneObject]:
+        """
+        Удаляет объект из модели.
+        """
+        obj = self._detach(oid)
+        if obj is None:
+            return None
+
+        self.order.remove(oid)
+        self._order_changed()
+        return obj
+
+    def remove_many(self, oids: Iterable[str]) -> List[SceneObject]:
+        """
+        Удаляет несколько объектов; порядок отрисовки перестраивается один раз,
+        а не поиском в списке для каждого объекта.
+        """
+        removed = [obj for obj in map(self._detach, oids) if obj is not None]
+        if removed:
+            gone = {obj.oid for obj in removed}
+            self.order[:] = [oid for oid in self.order if oid not in gone]
+            self._order_changed()
+        return removed
+
+    def _detach(self, oid: str) -> Optional[SceneObject]:
+        """Убирает объект из всех таблиц модели, кроме порядка отрисовки."""
+        obj = self.objects.pop(oid, None)
+        if obj is None:
+            return None
+
+        self._layer_counts[obj.layer] -= 1
+        if obj.item is not None:
+            self.by_item.pop(obj.item, None)
+
+        self.dirty.discard(oid)
+        self.removed.add(oid)
+        self.index.remove(oid)
+        self.meta.drop(oid)
+        return obj
+
+    def clear(self) -> None:
+        """
+        Удаляет все объекты; каждый из них попадает в список удалённых.
+        """
+        self.removed.update(self.objects)
+        self.objects.clear()
+        self.order.clear()
+        self.by_item.clear()
+        self.dirty.clear()
+        self.index.clear()
+        self.meta.clear()
+        self._layer_counts = {layer.lid: 0 for layer in self.layers}
+        self._order_changed()
+
+    def get(self, oid: str) -> Optional[SceneObject]:
+        return self.objects.get(oid)
+
+    def get_by_item(self, item: int) -> Optional[SceneObject]:
+        oid = self.by_item.get(item)
+        return self.objects.get(oid) if oid else None
+
+    def bind_item(self, oid: str, item: Optional[int]) -> None:
+        """
+        Связывает объект с элементом холста Tk (или разрывает связь при item=None).
+        """
+        obj = self.objects[oid]
+        if obj.item is not None:
+            self.by_item.pop(obj.item, None)
+        obj.item = item
+        if item is not None:
+            self.by_item[item] = oid
+
+    def set_coords(self, oid: str, coords: Iterable[float]) -> None:
+        obj = self.objects[oid]
+        obj.coords = [float(coord) for coord in coords]
+        self._mark(oid)
+        self._reindex(obj)
+
+    def move(self, oid: str, dx: float, dy: float) -> None:
+        obj = self.objects[oid]
+        obj.coords = [coord + (dx if index % 2 == 0 else dy) for index, coord in enumerate(obj.coords)]
+        self._mark(oid)
+        self._reindex(obj)
+
+    def configure(self, oid: str, **options: Any) -> None:
+        obj = self.objects[oid]
+        for option, value in options.items():
+            obj.config[option] = normalize_option(value)
+        self._mark(oid)
+        if GEOMETRY_OPTIONS.intersection(options):
+            self._reindex(obj)
+
+    def set_tags(self, oid: str, tags: Iterable[str]) -> None:
+        self.objects[oid].tags = list(tags)
+        self._mark(oid)
+
+    def place_above(self, oid: str, below_oid: Optional[str]) -> None:
+        """
+        Ставит объект сразу над below_oid (или в самый низ, если below_oid не задан).
+        Объект не покидает свой слой: позиция ограничивается отрезком слоя.
+        """
+        self.order.remove(oid)
+        self._layer_counts[self.objects[oid].layer] -= 1
+        start, end = self.layer_span(self.objects[oid].layer)
+        index = self.order.index(below_oid) + 1 if below_oid else 0
+        self.order.insert(min(max(index, start), end), oid)
+        self._layer_counts[self.objects[oid].layer] += 1
+        self._order_changed()
+
+    def raise_to_top(self, oid: str) -> None:
+        """Поднимает объект на вершину его слоя."""
+        top = self.order[self.layer_span(self.objects[oid].layer)[1] - 1]
+        if top != oid:
+            self.place_above(oid, top)
+
+    def lower_to_bottom(self, oid: str) -> None:
+        """Опускает объект в самый низ его слоя."""
+        self.place_above(oid, None)
+
+    # --- Слои
+
+    def get_layer(self, lid: str) -> Optional[Layer]:
+        return next((layer for layer in self.layers if layer.lid == lid), None)
+
+    def layer_span(self, lid: str) -> Tuple[int, int]:
+        """Отрезок [начало, конец) объектов слоя в порядке отрисовки."""
+        start = 0
+        for layer in self.layers:
+            if layer.lid == lid:
+                return start, start + self._layer_counts[lid]
+            start += self._layer_counts[layer.lid]
+        raise KeyError(lid)
+
+    def layer_objects(self, lid: str) -> List[str]:
+        """ID объектов слоя снизу вверх."""
+        start, end = self.layer_span(lid)
+        return self.order[start:end]
+
+    def add_layer(self, name: str, lid: Optional[str] = None, index: Optional[int] = None) -> Layer:
+        """Добавляет пустой слой (по умолчанию — над остальными)."""
+        layer = Layer(lid or self.new_id(), name)
+        self.layers.insert(len(self.layers) if index is None else index, layer)
+        self._layer_counts[layer.lid] = 0
+        self.layers_dirty = True
+        return layer
+
+    def remove_layer(self, lid: str) -> None:
+        """Удаляет пустой слой; последний слой удалить нельзя."""
+        if self._layer_counts.get(lid) or len(self.layers) == 1:
+            raise ValueError(f"Слой {lid} нельзя удалить")
+        self.layers = [layer for layer in self.layers if layer.lid != lid]
+        del self._layer_counts[lid]
+        self.layers_dirty = True
+
+    def move_layer(self, lid: str, index: int) -> None:
+        """
+        Переставляет слой целиком: объекты всех слоёв перестраиваются
+        одним проходом с сохранением порядка внутри слоя.
+        """
+        layer = self.get_layer(lid)
+        self.layers.remove(layer)
+        self.layers.insert(index, layer)
+        self._rebuild_order()
+        self.layers_dirty = True
+
+    def set_layer(self, oid: str, lid: str) -> None:
+        """Переносит объект на вершину другого слоя."""
+        obj = self.objects[oid]
+        if obj.layer == lid:
+            return
+        self.order.remove(oid)
+        self._layer_counts[obj.layer] -= 1
+        obj.layer = lid
+        self.order.insert(self.layer_span(lid)[1], oid)
+        self._layer_counts[lid] += 1
+        self._mark(oid)
+        self._order_changed()
+
+    def set_layers(self, layers_data: Iterable[Dict[str, Any]]) -> None:
+        """
+        Заменяет список слоёв (из файла или с сервера), сохраняя объекты.
+        Объекты исчезнувших слоёв переносятся в нижний слой.
+        """
+        layers = [Layer(data['id'], data.get('name', ''), data.get('visible', True), data.get('locked', False))
+                  for data in layers_data] or [Layer(DEFAULT_LAYER, "1")]
+        self.layers = layers
+        known = {layer.lid for layer in layers}
+        self._layer_counts = {lid: 0 for lid in known}
+        for obj in self.objects.values():
+            if obj.layer not in known:
+                obj.layer = layers[0].lid
+                self._mark(obj.oid)
+            self._layer_counts[obj.layer] += 1
+        self._rebuild_order()
+        self.layers_dirty = True
+
+    def layers_snapshot(self) -> List[Dict[str, Any]]:
+        return [layer.to_dict() for layer in self.layers]
+
+    def _rebuild_order(self) -> None:
+        layer_rank = {layer.lid: index for index, layer in enumerate(self.layers)}
+        self.order.sort(key=lambda oid: layer_rank[self.objects[oid].layer])
+        self._order_changed()
+
+    def _mark(self, oid: str) -> None:
+        self.dirty.add(oid)
+
+    def _order_changed(self) -> None:
+        self.order_dirty = True
+        self._ranks = None
+
+    def _reindex(self, obj: SceneObject) -> None:
+        bounds = self.bounds(obj)
+        if bounds is None:
+            self.index.remove(obj.oid)
+        else:
+            self.index.update(obj.oid, bounds)
+
+    def reindex_all(self) -> None:
+        """Пересчитывает границы всех объектов (например, после смены способа их вычисления)."""
+        for obj in self.objects.values():
+            self._reindex(obj)
+
+    def rank(self, oid: str) -> int:
+        """Позиция объекта в порядке отрисовки; таблица позиций строится лениво."""
+        if self._ranks is None:
+            self._ranks = {oid: index for index, oid in enumerate(self.order)}
+        return self._ranks[oid]
+
+    def pick(self, x: float, y: float, tolerance: float = 2.0,
+             accept: Optional[Callable[[SceneObject], bool]] = None) -> Optional[SceneObject]:
+        """
+        Верхний объект под точкой с точной проверкой геометрии.
+        """
+        candidates = sorted(self.index.query_point(x, y, tolerance), key=self.rank, reverse=True)
+        for oid in candidates:
+            obj = self.objects[oid]
+            if (accept is None or accept(obj)) and hit_test(obj, x, y, tolerance):
+                return obj
+        return None
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float, inside: bool = False) -> List[SceneObject]:
+        """
+        Объекты, пересекающие область (или целиком лежащие в ней), в порядке отрисовки.
+        """
+        oids = self.index.query_inside(x1, y1, x2, y2) if inside else self.index.query_rect(x1, y1, x2, y2)
+        return [self.objects[oid] for oid in sorted(oids, key=self.rank)]
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Полный снимок сцены в порядке отрисовки.
+        """
+        return [self.objects[oid].to_dict() for oid in self.order]
+
+    def collect_changes(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Возвращает дифф с момента предыдущего вызова и сбрасывает отметки изменений.
+        Порядок отрисовки включается в дифф, только если он менялся.
+        При заданном limit в дифф попадает не больше limit изменённых объектов,
+        остальные остаются отмеченными до следующего вызова.
+        """
+        if limit is None or len(self.dirty) <= limit:
+            oids, self.dirty = self.dirty, set()
+        else:
+            oids = {self.dirty.pop() for _ in range(limit)}
+        changes: Dict[str, Any] = {
+            'changed': [self.objects[oid].to_dict() for oid in oids],
+            'removed': sorted(self.removed)}
+        if self.order_dirty:
+            changes['order'] = list(self.order)
+        if self.layers_dirty:
+            changes['layers'] = self.layers_snapshot()
+
+        self.removed.clear()
+        self.order_dirty = False
+        self.layers_dirty = False
+        return changes
+
+    def mark_all(self) -> None:
+        """Отмечает изменёнными все объекты, порядок и слои: следующий дифф — полный снимок."""
+        self.dirty.update(self.objects)
+        self.order_dirty = True
+        self.layers_dirty = True
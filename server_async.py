@@ -5,54 +5,142 @@ import logging
 
 logging.basicConfig(level=logging.INFO)
 
-clients = set()
+DEFAULT_ROOM = "main"
 
-canvas_state = {
-    "drawings": [],
-    "background": "white"
-}
+
+def new_state():
+    return {
+        "drawings": [],
+        "background": "white",
+        "layers": [],
+        # Байты изображений по ключу SHA-256; объекты ссылаются на них ключом
+        "images": {},
+        "version": 0
+    }
+
+
+# Каждая комната — отдельный документ со своими участниками
+canvas_state = new_state()
+rooms = {DEFAULT_ROOM: canvas_state}
+members = {DEFAULT_ROOM: set()}
 
 
 async def handler(websocket):
     logging.info("Клиент подключился")
-    clients.add(websocket)
+    room = DEFAULT_ROOM
+    members[room].add(websocket)
 
     # отправляем текущее состояние
     await websocket.send(pickle.dumps({
         "type": "init",
-        "data": canvas_state
+        "room": room,
+        "data": rooms[room]
     }))
 
     try:
         async for message in websocket:
             data = pickle.loads(message)
-
-            if data["type"] == "draw":
+            canvas_state = rooms.get(room)
+
+            if data["type"] == "join":
+                # переход в другую комнату (None — только локальная работа, без комнаты)
+                if room is not None:
+                    members[room].discard(websocket)
+                room = data.get("room")
+                if room is None:
+                    continue
+
+                rooms.setdefault(room, new_state())
+                members.setdefault(room, set()).add(websocket)
+                logging.info(f"Клиент перешёл в комнату {room}")
+                await websocket.send(pickle.dumps({
+                    "type": "init",
+                    "room": room,
+                    "data": rooms[room]
+                }))
+
+            elif data["type"] == "ping":
+                # отвечаем сразу, чтобы клиент мог измерить задержку
+                await websocket.send(pickle.dumps({
+                    "type": "pong",
+                    "time": data["time"],
+                    "version": canvas_state["version"] if canvas_state is not None else 0
+                }))
+
+            elif canvas_state is None:
+                # вне комнаты изменения никуда не рассылаются
+                continue
+
+            elif data["type"] == "draw":
                 canvas_state["drawings"] = data["data"]["drawings"]
                 canvas_state["background"] = data["data"]["background"]
+                canvas_state["layers"] = data["data"].get("layers", [])
+                new_images = {key: blob for key, blob in data["data"].get("images", {}).items()
+                              if key not in canvas_state["images"]}
+                canvas_state["images"].update(new_images)
+                canvas_state["version"] += 1
 
-                # рассылаем всем
+                # рассылаем всем; изображения — только новые, остальные у клиентов уже есть
                 await broadcast({
                     "type": "update",
-                    "data": canvas_state
-                }, sender=websocket)
+                    "data": dict(canvas_state, images=new_images)
+                }, room, sender=websocket)
+                await acknowledge(websocket, canvas_state["version"])
+
+            elif data["type"] == "transform":
+                # сдвиг группы объектов: применяем к состоянию и рассылаем только операцию
+                transform = data["data"]
+                ids = set(transform["ids"])
+                dx, dy = transform["dx"], transform["dy"]
+                for drawing in canvas_state["drawings"]:
+                    if drawing.get("id") in ids:
+                        drawing["coords"] = [
+                            coord + (dx if index % 2 == 0 else dy)
+                            for index, coord in enumerate(drawing["coords"])
+                        ]
+                canvas_state["version"] += 1
+
+                await broadcast({
+                    "type": "transform",
+                    "data": dict(transform, version=canvas_state["version"])
+                }, room, sender=websocket)
+                await acknowledge(websocket, canvas_state["version"])
+
+            elif data["type"] == "patch":
+                # пакетное преобразование: новые координаты изменённых объектов
+                coords = data["data"]["coords"]
+                for drawing in canvas_state["drawings"]:
+                    if drawing.get("id") in coords:
+                        drawing["coords"] = coords[drawing["id"]]
+                canvas_state["version"] += 1
+
+                await broadcast({
+                    "type": "patch",
+                    "data": dict(data["data"], version=canvas_state["version"])
+                }, room, sender=websocket)
+                await acknowledge(websocket, canvas_state["version"])
 
             elif data["type"] == "clear":
                 canvas_state["drawings"] = []
                 canvas_state["background"] = "white"
+                canvas_state["layers"] = []
+                canvas_state["images"] = {}
+                canvas_state["version"] += 1
 
                 await broadcast({
                     "type": "clear",
                     "data": canvas_state
-                })
+                }, room)
 
     except websockets.exceptions.ConnectionClosed:
         logging.info("Клиент отключился")
     finally:
-        clients.remove(websocket)
+        if room is not None:
+            members[room].discard(websocket)
 
 
-async def broadcast(message, sender=None):
+async def broadcast(message, room, sender=None):
+    clients = members.get(room)
     if not clients:
         return
 
@@ -65,6 +153,14 @@ async def broadcast(message, sender=None):
     ])
 
 
+async def acknowledge(websocket, version):
+    # отправитель изменение уже применил сам — ему сообщается только новая версия комнаты
+    await websocket.send(pickle.dumps({
+        "type": "ack",
+        "version": version
+    }))
+
+
 async def main():
     async with websockets.serve(handler, "0.0.0.0", 8765):
         logging.info("Async сервер запущен ws://0.0.0.0:8765")
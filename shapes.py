@@ -1,6 +1,6 @@
 from tkinter import colorchooser, Button, messagebox, Entry, Label
 import tkinter as tk
-from typing import Optional, List, Dict, Any
+from typing import Optional, List
 from canvas import DrawingCanvas
 from localization import LocalizationManager
 from logger import logger
@@ -23,7 +23,12 @@ class Shapes:
         self.fill_color = "white"
         self.line_width = 2  # Толщина линии по умолчанию
 
-        self.drawn_shapes: Dict[int, Any] = {}
+    def shape_type(self, item: int) -> str:
+        """Вид фигуры (например, triangle), а для чужих фигур — тип элемента."""
+        obj = self.canvas.object_of(item)
+        if obj is None:
+            return "unknown"
+        return self.canvas.scene.meta.get(obj.oid, "shape", obj.type)
 
     def set_line_width(self, width: int) -> None:
         """Установка толщины линии"""
@@ -37,14 +42,14 @@ class Shapes:
         color_code = colorchooser.askcolor(title=_("choose_color"))
         if color_code[1]:
             if clicked_shape:
-                self.canvas.canvas.itemconfig(clicked_shape, outline=color_code[1])
+                self.canvas.configure_object(clicked_shape, outline=color_code[1])
 
                 logger.info(
                     f"Изменён цвет контура фигуры id={clicked_shape} "
                     f"на {color_code[1]}"
                 )
 
-                self._update_canvas_state()
+                self.canvas.bus.publish()
             else:
                 self.shape_color = color_code[1]
 
@@ -57,14 +62,14 @@ class Shapes:
         if color_code[1]:
 
             if clicked_shape:
-                self.canvas.canvas.itemconfig(clicked_shape, fill=color_code[1])
+                self.canvas.configure_object(clicked_shape, fill=color_code[1])
 
                 logger.info(
                     f"Изменён цвет заливки фигуры id={clicked_shape} "
                     f"на {color_code[1]}"
                 )
 
-                self._update_canvas_state()
+                self.canvas.bus.publish()
             else:
                 self.fill_color = color_code[1]
 
@@ -78,9 +83,9 @@ class Shapes:
 
         new_coords = [center_x - new_width / 2, center_y - new_height / 2,
                       center_x + new_width / 2, center_y + new_height / 2]
-        self.canvas.canvas.coords(clicked_shape, new_coords)
+        self.canvas.set_coords(clicked_shape, new_coords)
 
-        shape_type = self.drawn_shapes.get(clicked_shape, {}).get("type", "unknown")
+        shape_type = self.shape_type(clicked_shape)
 
         logger.info(
             f"Изменён размер фигуры "
@@ -88,7 +93,7 @@ class Shapes:
             f"ширина={int(new_width)}, высота={int(new_height)}"
         )
 
-        self._update_canvas_state()
+        self.canvas.bus.publish()
 
     def change_specific_polygon(self, clicked_shape: int, new_width: float, new_height: float,
                                  coords: List[float]) -> None:
@@ -103,9 +108,9 @@ class Shapes:
         vertex3 = (center_x + new_width / 2, center_y + new_height / 3)
 
         new_coords = [coord for vertex in [vertex1, vertex2, vertex3] for coord in vertex]
-        self.canvas.canvas.coords(clicked_shape, *new_coords)
+        self.canvas.set_coords(clicked_shape, new_coords)
 
-        shape_type = self.drawn_shapes.get(clicked_shape, {}).get("type", "unknown")
+        shape_type = self.shape_type(clicked_shape)
 
         logger.info(
             f"Изменён размер фигуры "
@@ -113,7 +118,7 @@ class Shapes:
             f"ширина={int(new_width)}, высота={int(new_height)}"
         )
 
-        self._update_canvas_state()
+        self.canvas.bus.publish()
 
     def change_specific_line(self, clicked_shape: int, new_length: float, new_thickness: float,
                              coords: List[float]) -> None:
@@ -125,10 +130,10 @@ class Shapes:
         angle = math.atan2(y2 - y1, x2 - x1)
         x2_new = x1 + new_length * math.cos(angle)
         y2_new = y1 + new_length * math.sin(angle)
-        self.canvas.canvas.coords(clicked_shape, x1, y1, x2_new, y2_new)
-        self.canvas.canvas.itemconfig(clicked_shape, width=new_thickness)
+        self.canvas.set_coords(clicked_shape, [x1, y1, x2_new, y2_new])
+        self.canvas.configure_object(clicked_shape, width=new_thickness)
 
-        shape_type = self.drawn_shapes.get(clicked_shape, {}).get("type", "unknown")
+        shape_type = self.shape_type(clicked_shape)
 
         logger.info(
             f"Изменён размер фигуры "
@@ -136,7 +141,7 @@ class Shapes:
             f"длина={int(new_length)}, толщина={int(new_thickness)}"
         )
 
-        self._update_canvas_state()
+        self.canvas.bus.publish()
 
     def set_shape_size(self, shape_type: str, clicked_shape: Optional[int] = None) -> None:
         """
@@ -156,7 +161,7 @@ class Shapes:
                 return
 
             if clicked_shape:
-                coords = self.canvas.canvas.coords(clicked_shape)
+                coords = list(self.canvas.object_of(clicked_shape).coords)
 
                 if shape_type == "line":
                     # Ограничения для линии
@@ -186,12 +191,13 @@ class Shapes:
         size_dialog = tk.Toplevel()
         size_dialog.title(_("resize_shape"))
 
-        coords = self.canvas.canvas.coords(clicked_shape)
+        obj = self.canvas.object_of(clicked_shape)
+        coords = obj.coords
 
         if shape_type == "line":
             x1, y1, x2, y2 = coords
             current_length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
-            current_thickness = self.canvas.canvas.itemcget(clicked_shape, "width")
+            current_thickness = obj.config.get("width", 1)
             entry_hint = _("line_size_hint")
             current_values = f"{int(current_length)},{int(float(current_thickness))}"
 
@@ -232,26 +238,28 @@ class Shapes:
 
     def on_press(self, event) -> None:
         """Начало рисования фигуры"""
-        self.start_x = event.x
-        self.start_y = event.y
+        self.start_x, self.start_y = self.canvas.to_world(event.x, event.y)
 
         if self.dragged_shape_name == "polygon":
-            self.dragged_shape = self.canvas.canvas.create_polygon(
-                self.start_x, self.start_y,
-                self.start_x + 1, self.start_y + 1,
-                self.start_x - 1, self.start_y + 1,
-                fill=self.fill_color, outline=self.shape_color,
+            self.dragged_shape = self.canvas.create_object(
+                "polygon",
+                [self.start_x, self.start_y,
+                 self.start_x + 1, self.start_y + 1,
+                 self.start_x - 1, self.start_y + 1],
+                {"fill": self.fill_color, "outline": self.shape_color},
                 tags=("movable", "erasable", "shape"))
         elif self.dragged_shape_name == "line":
-            self.dragged_shape = self.canvas.canvas.create_line(
-                self.start_x, self.start_y,
-                self.start_x, self.start_y,
-                fill=self.shape_color, width=self.line_width,
+            self.dragged_shape = self.canvas.create_object(
+                "line",
+                [self.start_x, self.start_y,
+                 self.start_x, self.start_y],
+                {"fill": self.shape_color, "width": self.line_width},
                 tags=("movable", "erasable", "shape"))
         else:  # Для прямоугольника и эллипса
-            self.dragged_shape = getattr(self.canvas.canvas, f"create_{self.dragged_shape_name}")(
-                self.start_x, self.start_y, self.start_x, self.start_y,
-                fill=self.fill_color, outline=self.shape_color,
+            self.dragged_shape = self.canvas.create_object(
+                self.dragged_shape_name,
+                [self.start_x, self.start_y, self.start_x, self.start_y],
+                {"fill": self.fill_color, "outline": self.shape_color},
                 tags=("movable", "erasable", "shape"))
 
     def on_drag(self, event) -> None:
@@ -259,31 +267,31 @@ class Shapes:
         if not self.dragged_shape:
             return
 
+        x, y = self.canvas.to_world(event.x, event.y)
+
         if self.dragged_shape_name == "polygon":
-            width = event.x - self.start_x
-            height = event.y - self.start_y
+            width = x - self.start_x
+            height = y - self.start_y
             top = (self.start_x, self.start_y)
             bottom_right = (self.start_x + width, self.start_y + height)
             bottom_left = (self.start_x - width, self.start_y + height)
-            self.canvas.canvas.coords(self.dragged_shape, *top, *bottom_right, *bottom_left)
+            self.canvas.set_coords(self.dragged_shape, [*top, *bottom_right, *bottom_left])
 
         elif self.dragged_shape_name == "line":
-            self.canvas.canvas.coords(
+            self.canvas.set_coords(
                 self.dragged_shape,
-                self.start_x, self.start_y, event.x, event.y)
+                [self.start_x, self.start_y, x, y])
 
         else:  # Для прямоугольника и эллипса
-            self.canvas.canvas.coords(
+            self.canvas.set_coords(
                 self.dragged_shape,
-                self.start_x, self.start_y, event.x, event.y)
+                [self.start_x, self.start_y, x, y])
 
     def on_release(self, event) -> None:
         """Завершение рисования фигуры"""
         if self.dragged_shape:
-            self.drawn_shapes[self.dragged_shape] = {
-                'type': self.dragged_shape_name,
-                'object': self.dragged_shape
-            }
+            obj = self.canvas.object_of(self.dragged_shape)
+            self.canvas.scene.meta.set(obj.oid, "shape", self.dragged_shape_name)
 
             logger.info(
                 f"Создана фигура: "
@@ -291,17 +299,5 @@ class Shapes:
                 f"id={self.dragged_shape}"
             )
 
-            self._update_canvas_state()
+            self.canvas.bus.publish()
         self.dragged_shape = None
-
-    def _update_canvas_state(self):
-        """Вспомогательный метод для отправки состояния холста"""
-        if hasattr(self.canvas.root, 'network') and self.canvas.root.network.connected:
-            items_data = self.canvas.root.file_manager.objects_data_collector()
-            self.canvas.root.network.send({
-                'type': 'draw',
-                'data': {
-                    'drawings': items_data,
-                    'background': self.canvas.bg
-                }
-            })
\ No newline at end of file
@@ -0,0 +1,191 @@
+import bisect
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from canvas import DrawingCanvas
+from logger import logger
+
+GUIDE_TAG = "snap_guide"
+GUIDE_COLOR = "#ff00cc"
+# Расстояние притяжения к направляющей или узлу сетки в экранных пикселях
+SNAP_DISTANCE_PX = 6
+GRID_SIZE = 20
+# Сколько объектов на одной направляющей учитывается при её отрисовке
+MAX_GUIDE_OBJECTS = 64
+
+BBox = Tuple[float, float, float, float]
+
+
+class EdgeIndex:
+    """
+    Отсортированные координаты краёв и центров объектов вдоль одной оси.
+    Ближайшая к значению направляющая ищется двоичным поиском,
+    поэтому запрос не зависит от числа объектов на холсте.
+    """
+
+    def __init__(self, values: np.ndarray, owners: np.ndarray) -> None:
+        order = np.argsort(values, kind='stable')
+        self.values: List[float] = values[order].tolist()
+        self.owners: List[int] = owners[order].tolist()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def nearest(self, value: float, tolerance: float) -> Optional[int]:
+        """Позиция ближайшего значения не дальше tolerance (None — такого нет)."""
+        values = self.values
+        position = bisect.bisect_left(values, value)
+        best, best_distance = None, tolerance
+        for candidate in (position - 1, position):
+            if 0 <= candidate < len(values):
+                distance = abs(values[candidate] - value)
+                if distance <= best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+    def owners_at(self, position: int) -> List[int]:
+        """Объекты, у которых край или центр лежит на той же прямой."""
+        values = self.values
+        value = values[position]
+        start = bisect.bisect_left(values, value)
+        end = min(bisect.bisect_right(values, value), start + MAX_GUIDE_OBJECTS)
+        return self.owners[start:end]
+
+
+def snap_axis(index: EdgeIndex, edges: Sequence[float], offset: float,
+              tolerance: float) -> Tuple[float, Optional[Tuple[float, int]]]:
+    """
+    Поправка к сдвигу вдоль оси, притягивающая ближайший из краёв (начало, центр, конец)
+    перемещаемой рамки к краю или центру другого объекта.
+    Возвращает поправку и найденную направляющую (координата, позиция в индексе).
+    """
+    best: Optional[Tuple[float, int]] = None
+    correction = 0.0
+    for edge in edges:
+        position = index.nearest(edge + offset, tolerance)
+        if position is None:
+            continue
+        delta = index.values[position] - (edge + offset)
+        if best is None or abs(delta) < abs(correction):
+            best, correction = (index.values[position], position), delta
+    return correction, best
+
+
+def snap_to_grid(value: float, grid: float) -> float:
+    return round(value / grid) * grid - value
+
+
+class Snapper:
+    """
+    Привязка перемещаемого выделения к сетке и к краям и центрам других объектов
+    (умные направляющие). Индексы краёв строятся один раз в начале перемещения;
+    на каждое движение мыши приходится несколько двоичных поисков.
+    """
+
+    def __init__(self, canvas: DrawingCanvas, grid_size: float = GRID_SIZE) -> None:
+        self.canvas = canvas
+        self.grid_size = grid_size
+        self.grid_enabled = False
+        self.guides_enabled = True
+
+        self.frame: Optional[BBox] = None
+        # Левый верхний угол выделения по координатам объектов (без толщины линий) — для сетки
+        self.corner: Tuple[float, float] = (0.0, 0.0)
+        self.boxes: Optional[np.ndarray] = None
+        self.x_index: Optional[EdgeIndex] = None
+        self.y_index: Optional[EdgeIndex] = None
+        self._guides: List[int] = []
+
+    @property
+    def active(self) -> bool:
+        return self.frame is not None
+
+    def begin(self, oids: Iterable[str]) -> None:
+        """
+        Начало перемещения объектов oids: их общая рамка и индексы краёв остальных объектов
+        в видимой области (на видимых слоях).
+        """
+        moving = set(oids)
+        scene = self.canvas.scene
+        boxes = scene.index.boxes
+        own = [boxes[oid] for oid in moving if oid in boxes]
+        if not own:
+            self.frame = None
+            return
+        self.frame = (min(box[0] for box in own), min(box[1] for box in own),
+                      max(box[2] for box in own), max(box[3] for box in own))
+        corners = [scene.objects[oid].bbox() for oid in moving if oid in boxes]
+        self.corner = (min(box[0] for box in corners), min(box[1] for box in corners))
+        if not self.guides_enabled:
+            return
+
+        # Направляющие дают только объекты, нарисованные в текущем виде (та же область, что при отсечении),
+        # поэтому построение индексов зависит от числа видимых объектов, а не всей сцены
+        hidden = {layer.lid for layer in scene.layers if not layer.visible}
+        visible = scene.index.query_rect(*self.canvas._visible_rect())
+        others = [boxes[oid] for oid in sorted(visible)
+                  if oid not in moving and scene.objects[oid].layer not in hidden]
+        self.boxes = np.array(others, dtype=np.float64).reshape(-1, 4)
+        owners = np.tile(np.arange(len(self.boxes)), 3)
+        self.x_index = EdgeIndex(np.concatenate((self.boxes[:, 0], (self.boxes[:, 0] + self.boxes[:, 2]) / 2,
+                                                 self.boxes[:, 2])), owners)
+        self.y_index = EdgeIndex(np.concatenate((self.boxes[:, 1], (self.boxes[:, 1] + self.boxes[:, 3]) / 2,
+                                                 self.boxes[:, 3])), owners)
+        logger.debug(f"Индексы направляющих: {len(self.x_index)} значений по каждой оси")
+
+    def snap(self, dx: float, dy: float) -> Tuple[float, float]:
+        """
+        Сдвиг от начала перемещения с учётом привязки. Направляющие объектов важнее
+        сетки; каждая ось привязывается независимо.
+        """
+        if self.frame is None:
+            return dx, dy
+
+        tolerance = SNAP_DISTANCE_PX / self.canvas.viewport.scale
+        x1, y1, x2, y2 = self.frame
+        guides = []
+        snapped = []
+        for axis, (start, end, offset, index) in enumerate(((x1, x2, dx, self.x_index),
+                                                            (y1, y2, dy, self.y_index))):
+            guide = None
+            correction = 0.0
+            if self.guides_enabled and index is not None and len(index):
+                correction, guide = snap_axis(index, (start, (start + end) / 2, end), offset, tolerance)
+            if guide is None and self.grid_enabled:
+                grid_correction = snap_to_grid(self.corner[axis] + offset, self.grid_size)
+                if abs(grid_correction) <= tolerance:
+                    correction = grid_correction
+            if guide is not None:
+                guides.append((axis, guide))
+            snapped.append(offset + correction)
+
+        self._show_guides(guides, snapped[0], snapped[1])
+        return snapped[0], snapped[1]
+
+    def end(self) -> None:
+        self._clear_guides()
+        self.frame = None
+        self.boxes = None
+        self.x_index = self.y_index = None
+
+    def _show_guides(self, guides: List[Tuple[int, Tuple[float, int]]], dx: float, dy: float) -> None:
+        """Линии направляющих от перемещаемой рамки до объектов на той же прямой."""
+        self._clear_guides()
+        x1, y1, x2, y2 = self.frame
+        x1, y1, x2, y2 = x1 + dx, y1 + dy, x2 + dx, y2 + dy
+        viewport = self.canvas.viewport
+        for axis, (value, position) in guides:
+            index = self.x_index if axis == 0 else self.y_index
+            boxes = self.boxes[index.owners_at(position)]
+            if axis == 0:
+                low, high = min(y1, boxes[:, 1].min()), max(y2, boxes[:, 3].max())
+                coords = viewport.to_screen([value, low, value, high])
+            else:
+                low, high = min(x1, boxes[:, 0].min()), max(x2, boxes[:, 2].max())
+                coords = viewport.to_screen([low, value, high, value])
+            self._guides.append(self.canvas.canvas.create_line(
+                *coords, fill=GUIDE_COLOR, dash=(4, 2), tags=(GUIDE_TAG,)))
+
+    def _clear_guides(self) -> None:
+        if self._guides:
+            self.canvas.canvas.delete(GUIDE_TAG)
+            self._guides = []
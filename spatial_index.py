@@ -0,0 +1,210 @@
+import math
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from curves import PATH_TYPE, flatten_path
+from fonts import fonts
+
+BBox = Tuple[float, float, float, float]
+
+CELL_SIZE = 64
+MAX_CELLS = 256  # объекты крупнее этого числа ячеек хранятся отдельно
+
+
+def _to_float(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def object_bounds(obj) -> Optional[BBox]:
+    """
+    Ограничивающий прямоугольник объекта сцены с учётом толщины линии.
+    Размер текста берётся из кэша метрик сервиса шрифтов.
+    """
+    if len(obj.coords) < 2:
+        return None
+
+    if obj.type == 'text':
+        x, y = obj.coords[0], obj.coords[1]
+        width, height = fonts.text_extent(obj.config.get('text', ''), obj.config.get('font', ''))
+        half_width, half_height = width / 2, height / 2
+        return x - half_width, y - half_height, x + half_width, y + half_height
+
+    x1, y1, x2, y2 = obj.bbox()
+    pad = _to_float(obj.config.get('width', 1), 1.0) / 2
+    return x1 - pad, y1 - pad, x2 + pad, y2 + pad
+
+
+def distance_to_segment(px: float, py: float, x1: float, y1: float, x2: float, y2: float) -> float:
+    """Расстояние от точки до отрезка."""
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    if length_sq == 0:
+        return math.hypot(px - x1, py - y1)
+    t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def point_in_polygon(px: float, py: float, coords: Sequence[float]) -> bool:
+    """Проверка попадания точки в многоугольник (метод лучей)."""
+    inside = False
+    count = len(coords) // 2
+    j = count - 1
+    for i in range(count):
+        xi, yi = coords[2 * i], coords[2 * i + 1]
+        xj, yj = coords[2 * j], coords[2 * j + 1]
+        if (yi > py) != (yj > py) and px < (xj - xi) * (py - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def _near_polyline(px: float, py: float, coords: Sequence[float], limit: float, closed: bool = False) -> bool:
+    points = list(zip(coords[::2], coords[1::2]))
+    if closed and points:
+        points.append(points[0])
+    return any(distance_to_segment(px, py, *points[i], *points[i + 1]) <= limit
+               for i in range(len(points) - 1))
+
+
+def hit_test(obj, px: float, py: float, tolerance: float = 2.0) -> bool:
+    """
+    Точная проверка попадания точки в объект с учётом его геометрии:
+    расстояние до отрезков для линий, попадание внутрь для фигур.
+    Фигуры без заливки попадаются только по контуру.
+    """
+    width = _to_float(obj.config.get('width', 1), 1.0)
+    limit = width / 2 + tolerance
+    coords = obj.coords
+    filled = obj.config.get('fill', '') != ''
+
+    if obj.type == 'line':
+        return _near_polyline(px, py, coords, limit)
+
+    if obj.type == PATH_TYPE:
+        return _near_polyline(px, py, flatten_path(coords, tolerance / 4), limit)
+
+    if obj.type == 'polygon':
+        return (filled and point_in_polygon(px, py, coords)) or _near_polyline(px, py, coords, limit, closed=True)
+
+    if obj.type == 'rectangle':
+        x1, y1, x2, y2 = obj.bbox()
+        inside = x1 - limit <= px <= x2 + limit and y1 - limit <= py <= y2 + limit
+        if filled or not inside:
+            return inside
+        return not (x1 + limit < px < x2 - limit and y1 + limit < py < y2 - limit)
+
+    if obj.type == 'oval':
+        x1, y1, x2, y2 = obj.bbox()
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        rx, ry = (x2 - x1) / 2, (y2 - y1) / 2
+        outer = ((px - cx) / (rx + limit)) ** 2 + ((py - cy) / (ry + limit)) ** 2 <= 1
+        if filled or not outer:
+            return outer
+        if rx <= limit or ry <= limit:
+            return True
+        return ((px - cx) / (rx - limit)) ** 2 + ((py - cy) / (ry - limit)) ** 2 >= 1
+
+    bounds = object_bounds(obj)
+    if bounds is None:
+        return False
+    x1, y1, x2, y2 = bounds
+    return x1 - tolerance <= px <= x2 + tolerance and y1 - tolerance <= py <= y2 + tolerance
+
+
+class GridIndex:
+    """
+    Равномерная сетка по ограничивающим прямоугольникам объектов.
+    Обновляется инкрементально; запросы по точке и прямоугольнику
+    просматривают только затронутые ячейки.
+    """
+
+    def __init__(self, cell_size: float = CELL_SIZE) -> None:
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Set[str]] = {}
+        self.boxes: Dict[str, BBox] = {}
+        self.large: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def _cell_range(self, bbox: BBox) -> Tuple[range, range]:
+        size = self.cell_size
+        return (range(math.floor(bbox[0] / size), math.floor(bbox[2] / size) + 1),
+                range(math.floor(bbox[1] / size), math.floor(bbox[3] / size) + 1))
+
+    def insert(self, oid: str, bbox: BBox) -> None:
+        if oid in self.boxes:
+            self.remove(oid)
+        self.boxes[oid] = bbox
+
+        xs, ys = self._cell_range(bbox)
+        if len(xs) * len(ys) > MAX_CELLS:
+            self.large.add(oid)
+            return
+        for cx in xs:
+            for cy in ys:
+                self.cells.setdefault((cx, cy), set()).add(oid)
+
+    def update(self, oid: str, bbox: BBox) -> None:
+        """Перемещает объект в сетке, только если изменились его ячейки."""
+        old = self.boxes.get(oid)
+        if old is not None and self._cell_range(old) == self._cell_range(bbox) and oid not in self.large:
+            self.boxes[oid] = bbox
+            return
+        self.insert(oid, bbox)
+
+    def remove(self, oid: str) -> None:
+        bbox = self.boxes.pop(oid, None)
+        if bbox is None:
+            return
+        if oid in self.large:
+            self.large.discard(oid)
+            return
+
+        xs, ys = self._cell_range(bbox)
+        for cx in xs:
+            for cy in ys:
+                cell = self.cells.get((cx, cy))
+                if cell is not None:
+                    cell.discard(oid)
+                    if not cell:
+                        del self.cells[(cx, cy)]
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.boxes.clear()
+        self.large.clear()
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> Set[str]:
+        """Объекты, чьи прямоугольники пересекают заданную область."""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        xs, ys = self._cell_range((x1, y1, x2, y2))
+
+        candidates: Set[str] = set(self.large)
+        if len(xs) * len(ys) > len(self.cells):
+            for cell in self.cells.values():
+                candidates.update(cell)
+        else:
+            for cx in xs:
+                for cy in ys:
+                    candidates.update(self.cells.get((cx, cy), ()))
+
+        result = set()
+        for oid in candidates:
+            bx1, by1, bx2, by2 = self.boxes[oid]
+            if bx1 <= x2 and bx2 >= x1 and by1 <= y2 and by2 >= y1:
+                result.add(oid)
+        return result
+
+    def query_point(self, x: float, y: float, tolerance: float = 0.0) -> Set[str]:
+        return self.query_rect(x - tolerance, y - tolerance, x + tolerance, y + tolerance)
+
+    def query_inside(self, x1: float, y1: float, x2: float, y2: float) -> List[str]:
+        """Объекты, целиком лежащие внутри области (для выделения рамкой)."""
+        x1, x2 = min(x1, x2), max(x1, x2)
+        y1, y2 = min(y1, y2), max(y1, y2)
+        return [oid for oid in self.query_rect(x1, y1, x2, y2)
+                if x1 <= self.boxes[oid][0] and self.boxes[oid][2] <= x2
+                and y1 <= self.boxes[oid][1] and self.boxes[oid][3] <= y2]
@@ -0,0 +1,119 @@
+import tkinter as tk
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_TCL_SPECIAL = {
+    "\\": "\\\\", "{": "\\{", "}": "\\}", "[": "\\[", "]": "\\]", "$": "\\$",
+    '"': '\\"', ";": "\\;", " ": "\\ ", "\t": "\\t", "\n": "\\n", "\r": "\\r",
+}
+
+
+def tcl_quote(value: Any) -> str:
+    """
+    Превращает значение в одно слово Tcl, экранируя спецсимволы обратной косой чертой.
+    Кортежи и списки становятся списками Tcl.
+    """
+    if isinstance(value, (tuple, list)):
+        return "[list " + " ".join(tcl_quote(part) for part in value) + "]" if value else "{}"
+    if isinstance(value, float):
+        return repr(value)
+
+    text = str(value)
+    if not text:
+        return "{}"
+    return "".join(_TCL_SPECIAL.get(char, char) for char in text)
+
+
+def _options_words(options: Dict[str, Any]) -> str:
+    return " ".join(f"-{option} {tcl_quote(value)}" for option, value in options.items())
+
+
+class BulkCanvas:
+    """
+    Пакетный доступ к холсту Tk: создание, изменение и чтение множества
+    элементов одним вычисляемым скриптом Tcl вместо отдельного вызова на каждый элемент.
+    """
+
+    def __init__(self, canvas: tk.Canvas) -> None:
+        self.canvas = canvas
+        self.path = str(canvas)
+
+    def _run(self, body: List[str]) -> Tuple[str, ...]:
+        if not body:
+            return ()
+        script = "apply {{} {\nset r {}\n" + "\n".join(body) + "\nreturn $r\n}}"
+        return self.canvas.tk.splitlist(self.canvas.tk.eval(script))
+
+    def create_many(self, specs: Iterable[Tuple[str, Sequence[float], Dict[str, Any], Sequence[str]]]) -> List[int]:
+        """
+        Создаёт элементы по списку (тип, координаты, параметры, теги).
+        Возвращает их идентификаторы в том же порядке.
+        """
+        body = []
+        for item_type, coords, options, tags in specs:
+            words = " ".join(tcl_quote(float(coord)) for coord in coords)
+            options = dict(options, tags=tuple(tags))
+            body.append(f"lappend r [{self.path} create {item_type} {words} {_options_words(options)}]")
+        return [int(item) for item in self._run(body)]
+
+    def apply_many(self, coords: Optional[Dict[int, Sequence[float]]] = None,
+                   options: Optional[Dict[int, Dict[str, Any]]] = None) -> None:
+        """
+        Применяет координаты и параметры к множеству элементов одним скриптом.
+        """
+        body = []
+        for item, item_coords in (coords or {}).items():
+            words = " ".join(tcl_quote(float(coord)) for coord in item_coords)
+            body.append(f"{self.path} coords {int(item)} {words}")
+        for item, item_options in (options or {}).items():
+            if item_options:
+                body.append(f"{self.path} itemconfigure {int(item)} {_options_words(item_options)}")
+        self._run(body)
+
+    def read_many(self, items: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Читает тип, координаты, теги и непустые параметры множества элементов.
+        """
+        ids = " ".join(str(int(item)) for item in items)
+        if not ids:
+            return []
+
+        body = [
+            f"foreach id {{{ids}}} {{",
+            f"lappend r [list [{self.path} type $id] [{self.path} coords $id] "
+            f"[{self.path} gettags $id] [{self.path} itemconfigure $id]]",
+            "}",
+        ]
+        splitlist = self.canvas.tk.splitlist
+        result = []
+        for record in self._run(body):
+            item_type, item_coords, item_tags, item_config = splitlist(record)
+            config = {}
+            for option in splitlist(item_config):
+                parts = splitlist(option)
+                if parts[-1] != "":
+                    config[parts[0].lstrip("-")] = parts[-1]
+            config.pop("tags", None)
+            result.append({
+                'type': item_type,
+                'coords': [float(coord) for coord in splitlist(item_coords)],
+                'tags': list(splitlist(item_tags)),
+                'config': config})
+        return result
+
+    def tag_many(self, items: Iterable[int], tag: str, add: bool = True) -> None:
+        """Добавляет тег множеству элементов (или снимает его при add=False) одним скриптом."""
+        command = "addtag {tag} withtag {item}" if add else "dtag {item} {tag}"
+        self._run([f"{self.path} " + command.format(tag=tcl_quote(tag), item=int(item)) for item in items])
+
+    def restack_many(self, placements: Iterable[Tuple[int, Optional[int]]]) -> None:
+        """
+        Переставляет элементы по списку (элемент, элемент под ним) одним скриптом.
+        Без нижнего элемента элемент опускается в самый низ.
+        """
+        body = []
+        for item, below in placements:
+            if below is None:
+                body.append(f"{self.path} lower {int(item)}")
+            else:
+                body.append(f"{self.path} raise {int(item)} {int(below)}")
+        self._run(body)
@@ -0,0 +1,222 @@
+import time
+from canvas import DrawingCanvas
+from change_bus import ChangeBus
+from scene_model import SceneModel, DEFAULT_LAYER
+from viewport import Viewport
+from history import History
+from images import ImageStore, PhotoCache
+from curves import CurveCache
+
+
+class FakeTkCanvas:
+    """
+    Минимальная замена tk.Canvas в памяти: хранит элементы и порядок отрисовки
+    и считает вызовы, чтобы тесты могли проверять число обращений к Tk.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.stack = []
+        self.calls = 0
+        self._next_id = 1
+
+    def _create(self, item_type, coords, **options):
+        self.calls += 1
+        item = self._next_id
+        self._next_id += 1
+        tags = options.pop("tags", ())
+        self.items[item] = {"type": item_type, "coords": [float(c) for c in coords],
+                            "options": options, "tags": tuple(tags)}
+        self.stack.append(item)
+        return item
+
+    def __getattr__(self, name):
+        if name.startswith("create_"):
+            item_type = name[len("create_"):]
+            # Координаты передаются списком или отдельными аргументами, как в Tk
+            return lambda *coords, **options: self._create(
+                item_type, coords[0] if len(coords) == 1 else coords, **options)
+        raise AttributeError(name)
+
+    def coords(self, tag_or_id, *coords):
+        self.calls += 1
+        item = self._resolve(tag_or_id)[0]
+        if coords:
+            self.items[item]["coords"] = [float(c) for c in coords]
+        return list(self.items[item]["coords"])
+
+    def _resolve(self, tag_or_id):
+        if tag_or_id == "all":
+            return list(self.stack)
+        if tag_or_id in self.items:
+            return [tag_or_id]
+        return [item for item in self.stack if tag_or_id in self.items[item]["tags"]]
+
+    def move(self, tag_or_id, dx, dy):
+        self.calls += 1
+        for item in self._resolve(tag_or_id):
+            coords = self.items[item]["coords"]
+            self.items[item]["coords"] = [c + (dx if i % 2 == 0 else dy) for i, c in enumerate(coords)]
+
+    def itemconfig(self, item, **options):
+        self.calls += 1
+        if "tags" in options:
+            self.items[item]["tags"] = tuple(options.pop("tags"))
+        self.items[item]["options"].update(options)
+
+    def _restack(self, tag_or_id, anchor, above):
+        self.calls += 1
+        items = self._resolve(tag_or_id)
+        for item in items:
+            self.stack.remove(item)
+        if anchor is None:
+            index = len(self.stack) if above else 0
+        else:
+            anchors = [self.stack.index(item) for item in self._resolve(anchor) if item in self.stack]
+            index = max(anchors) + 1 if above else min(anchors)
+        self.stack[index:index] = items
+
+    def tag_raise(self, tag_or_id, above=None):
+        self._restack(tag_or_id, above, above=True)
+
+    def tag_lower(self, tag_or_id, below=None):
+        self._restack(tag_or_id, below, above=False)
+
+    def delete(self, *tags_or_ids):
+        self.calls += 1
+        for tag_or_id in tags_or_ids:
+            for item in self._resolve(tag_or_id):
+                del self.items[item]
+                self.stack.remove(item)
+
+    def find_withtag(self, tag_or_id):
+        return tuple(self._resolve(tag_or_id))
+
+    def addtag_withtag(self, tag, tag_or_id):
+        self.calls += 1
+        for item in self._resolve(tag_or_id):
+            if tag not in self.items[item]["tags"]:
+                self.items[item]["tags"] += (tag,)
+
+    def dtag(self, tag_or_id, tag=None):
+        self.calls += 1
+        tag = tag if tag is not None else tag_or_id
+        for item in self._resolve(tag_or_id):
+            self.items[item]["tags"] = tuple(t for t in self.items[item]["tags"] if t != tag)
+
+    def config(self, **options):
+        pass
+
+    def winfo_ismapped(self):
+        return False
+
+    def after(self, delay, callback, *args):
+        callback(*args)
+
+
+class FakeBulkCanvas:
+    """Пакетный доступ поверх FakeTkCanvas; каждый пакет считается одним вызовом Tk."""
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.batches = 0
+
+    def create_many(self, specs):
+        self.batches += 1
+        return [self.canvas._create(item_type, coords, **dict(options, tags=tags))
+                for item_type, coords, options, tags in specs]
+
+    def apply_many(self, coords=None, options=None):
+        self.batches += 1
+        for item, item_coords in (coords or {}).items():
+            self.canvas.coords(item, *item_coords)
+        for item, item_options in (options or {}).items():
+            self.canvas.itemconfig(item, **item_options)
+
+    def tag_many(self, items, tag, add=True):
+        self.batches += 1
+        for item in items:
+            if add:
+                self.canvas.addtag_withtag(tag, item)
+            else:
+                self.canvas.dtag(item, tag)
+
+    def restack_many(self, placements):
+        self.batches += 1
+        for item, below in placements:
+            if below is None:
+                self.canvas.tag_lower(item)
+            else:
+                self.canvas.tag_raise(item, below)
+
+
+class FakePhotoCache(PhotoCache):
+    """Изображения Tk заменены именами; запоминаются размеры созданных изображений."""
+
+    def __init__(self, store):
+        super().__init__(None, store)
+        self.created = []
+
+    def _create(self, image):
+        self.created.append(image.size)
+        return f"photo{len(self.created)}"
+
+
+class FakeRoot:
+    """Планировщик after для тестов: отложенные вызовы выполняются по run()."""
+
+    def __init__(self):
+        self.jobs = []
+        self.counter = 0
+
+    def after(self, delay, callback, *args):
+        self.counter += 1
+        self.jobs.append((str(self.counter), callback, args))
+        return str(self.counter)
+
+    def after_cancel(self, job):
+        self.jobs = [entry for entry in self.jobs if entry[0] != job]
+
+    def run(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.jobs and time.monotonic() < deadline:
+            job, callback, args = self.jobs.pop(0)
+            callback(*args)
+            time.sleep(0.001)
+
+
+class FakePanel:
+
+    def show(self, title_key, maximum):
+        self.maximum = maximum
+
+    def set(self, value, maximum=None):
+        self.value = value
+
+    def hide(self):
+        pass
+
+
+def make_drawing_canvas():
+    """DrawingCanvas с поддельным холстом Tk и синхронной шиной изменений."""
+    drawing_canvas = DrawingCanvas.__new__(DrawingCanvas)
+    drawing_canvas.canvas = FakeTkCanvas()
+    drawing_canvas.root = None
+    drawing_canvas.bg = "white"
+    drawing_canvas.width = 800
+    drawing_canvas.height = 600
+    drawing_canvas.scene = SceneModel()
+    drawing_canvas.bus = ChangeBus()
+    drawing_canvas.bridge = FakeBulkCanvas(drawing_canvas.canvas)
+    drawing_canvas.viewport = Viewport()
+    drawing_canvas.selection = set()
+    drawing_canvas.active_layer = DEFAULT_LAYER
+    drawing_canvas._refresh_job = None
+    drawing_canvas.raster = None
+    drawing_canvas.raster_view = None
+    drawing_canvas.images = ImageStore()
+    drawing_canvas.photos = FakePhotoCache(drawing_canvas.images)
+    drawing_canvas.curves = CurveCache()
+    drawing_canvas.history = History(drawing_canvas)
+    drawing_canvas.bus.subscribe(drawing_canvas._commit_history)
+    return drawing_canvas
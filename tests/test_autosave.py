@@ -0,0 +1,164 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from PIL import Image
+
+import autosave
+from autosave import Autosave
+from fake_canvas import FakePanel, FakeRoot, make_drawing_canvas
+from images import content_key
+from loader import ProgressiveLoader
+
+
+def drawing(index):
+    return {"id": f"o{index}", "type": "rectangle", "coords": [index, 0, index + 5, 5],
+            "tags": ["movable"], "config": {"fill": "red"}, "layer": "base"}
+
+
+class TestAutosave(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.canvas = make_drawing_canvas()
+        self.canvas.root = FakeRoot()
+        self.autosave = Autosave(self.canvas, self.directory)
+        self.addCleanup(self.autosave.stop)
+
+    def tick(self):
+        """Один такт автосохранения и ожидание записи в фоне."""
+        job, callback, args = self.canvas.root.jobs.pop(0)
+        callback(*args)
+        self.autosave.flush()
+
+    def test_journal_recovers_edits(self):
+        self.canvas.create_objects([drawing(index) for index in range(3)])
+        self.autosave.start()
+        self.autosave.flush()
+
+        self.canvas.remove_objects(["o1"])
+        self.canvas.scene.move("o2", 10, 0)
+        self.canvas.update_background("black")
+        self.tick()
+
+        # Сеанс оборвался: файлы остались, новый экземпляр их находит
+        recovered = Autosave(make_drawing_canvas(), self.directory)
+        self.assertTrue(recovered.pending())
+        state = recovered.recover()
+        self.assertEqual([item["id"] for item in state["drawings"]], ["o0", "o2"])
+        self.assertEqual(state["drawings"][1]["coords"], [12.0, 0.0, 17.0, 5.0])
+        self.assertEqual(state["background"], "black")
+
+    def test_compaction_replaces_journal_with_snapshot(self):
+        self.autosave.start()
+        with patch.object(autosave, "COMPACT_RECORDS", 3):
+            for index in range(7):
+                self.canvas.create_objects([drawing(index)])
+                self.tick()
+
+        self.assertTrue(os.path.exists(self.autosave.snapshot_path))
+        # Начальная запись и семь правок: после двух сжатий в журнале остаются две записи
+        with open(self.autosave.journal_path, encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 2)
+        state = Autosave(make_drawing_canvas(), self.directory).recover()
+        self.assertEqual(len(state["drawings"]), 7)
+
+    def test_torn_last_record_is_skipped(self):
+        self.canvas.create_objects([drawing(0)])
+        self.autosave.start()
+        self.autosave.stop()
+        with open(self.autosave.journal_path, "a", encoding="utf-8") as file:
+            file.write('{"changed":[{"id":"o9"')
+
+        state = Autosave(make_drawing_canvas(), self.directory).recover()
+
+        self.assertEqual([item["id"] for item in state["drawings"]], ["o0"])
+
+    def test_large_scene_is_journaled_over_several_ticks(self):
+        self.canvas.create_objects([drawing(index) for index in range(50)])
+        with patch.object(autosave, "CHANGES_PER_TICK", 20):
+            self.autosave.start()
+            self.autosave.flush()
+            self.assertEqual(len(self.canvas.scene.dirty), 30)
+            self.tick()
+            self.tick()
+        self.assertFalse(self.canvas.scene.dirty)
+
+        state = Autosave(make_drawing_canvas(), self.directory).recover()
+        self.assertEqual(len(state["drawings"]), 50)
+
+    def test_images_are_journaled_once(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (4, 4), "blue").save(buffer, format="PNG")
+        key = self.canvas.images.add(buffer.getvalue())
+        image = {"id": "img", "type": "image", "coords": [0, 0, 4, 4], "tags": [], "config": {"key": key}}
+        self.canvas.create_objects([image])
+        self.autosave.start()
+        self.canvas.scene.move("img", 5, 5)
+        self.tick()
+
+        with open(self.autosave.journal_path, encoding="utf-8") as file:
+            self.assertEqual(file.read().count('"images"'), 1)
+        state = Autosave(make_drawing_canvas(), self.directory).recover()
+        self.assertEqual(list(state["images"]), [content_key(buffer.getvalue())])
+
+    def recovery_loader(self):
+        """Новый сеанс: холст, загрузчик и автосохранение в том же каталоге."""
+        canvas = make_drawing_canvas()
+        canvas.root = FakeRoot()
+        loader = ProgressiveLoader(canvas, canvas.create_objects, SimpleNamespace(gettext=str))
+        loader.panel = FakePanel()
+        recovering = Autosave(canvas, self.directory)
+        self.addCleanup(recovering.stop)
+        return canvas, loader, recovering
+
+    def test_cancelled_recovery_keeps_journal_and_snapshot(self):
+        self.autosave.start()
+        with patch.object(autosave, "COMPACT_RECORDS", 2):
+            for index in range(3):
+                self.canvas.create_objects([drawing(index)])
+                self.tick()
+        files = {}
+        for path in (self.autosave.snapshot_path, self.autosave.journal_path):
+            with open(path, encoding="utf-8") as file:
+                files[path] = file.read()
+
+        canvas, loader, recovering = self.recovery_loader()
+        loader.load_state(recovering.recover(), publish=True, on_done=recovering.start, source="autosave")
+        loader.cancel()
+
+        self.assertFalse(recovering.active)
+        for path, content in files.items():
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(file.read(), content)
+
+    def test_journal_restarts_after_recovery_loads(self):
+        self.canvas.create_objects([drawing(0)])
+        self.autosave.start()
+        self.autosave.flush()
+
+        canvas, loader, recovering = self.recovery_loader()
+        loader.load_state(recovering.recover(), publish=True, on_done=recovering.start, source="autosave")
+        self.assertFalse(recovering.active)
+        job, callback, args = canvas.root.jobs.pop(0)
+        callback(*args)
+
+        self.assertTrue(recovering.active)
+        self.assertEqual(list(canvas.scene.objects), ["o0"])
+
+    def test_clean_exit_discards_journal(self):
+        self.canvas.create_objects([drawing(0)])
+        self.autosave.start()
+        self.autosave.stop(discard=True)
+
+        self.assertFalse(self.autosave.pending())
+        self.assertIsNone(self.autosave.recover())
+
+
+if __name__ == '__main__':
+    unittest.main()
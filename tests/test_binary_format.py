@@ -0,0 +1,83 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from binary_format import MAGIC, BinaryDocument, is_binary_document, write_binary
+from document_io import file_events, write_document
+from images import content_key
+from raster import RasterLayer
+
+
+def drawing(index):
+    return {"id": f"o{index}", "type": "rectangle", "coords": [index * 10.0, 0.0, index * 10.0 + 5, 5.5],
+            "tags": ["movable", "shape"], "config": {"fill": "red", "width": "2"}, "layer": "base"}
+
+
+def png_bytes():
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 4), "blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class TestBinaryFormat(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, "board.board")
+        self.json_path = os.path.join(directory, "board.json")
+        self.addCleanup(lambda: [os.remove(path) for path in (self.path, self.json_path) if os.path.exists(path)])
+
+        self.image = png_bytes()
+        self.raster = RasterLayer(16, 8)
+        self.raster.pixels[2, 3] = (255, 0, 0, 255)
+        self.header = {"background": "black", "layers": [{"id": "base", "name": "Base", "visible": True}],
+                       "images": {content_key(self.image): self.image}, "raster": self.raster}
+        self.items = [drawing(index) for index in range(1000)]
+        with open(self.path, "wb") as file:
+            write_binary(file, self.header, [self.items[:400], self.items[400:]])
+
+    def test_round_trip(self):
+        with BinaryDocument(self.path) as document:
+            self.assertEqual(len(document), 1000)
+            self.assertEqual(document.items(998), self.items[998:])
+            self.assertEqual(document.meta["background"], "black")
+            self.assertEqual(document.images(), {content_key(self.image): self.image})
+            np.testing.assert_array_equal(document.raster().pixels, self.raster.pixels)
+
+    def test_styles_are_interned_and_coords_packed(self):
+        with BinaryDocument(self.path) as document:
+            # Один стиль, один тип и один слой на тысячу объектов
+            self.assertEqual(len(set(document.table["style"].tolist())), 1)
+            self.assertEqual(document.coords.dtype, np.float64)
+            self.assertEqual(len(document.coords), 4000)
+
+    def test_visible_objects_without_decoding(self):
+        with BinaryDocument(self.path) as document:
+            indices = document.query_rect(100, 0, 125, 10)
+
+            self.assertEqual(indices.tolist(), [10, 11, 12])
+            self.assertEqual(document.items(10, 11)[0]["id"], "o10")
+
+    def test_format_is_detected_by_magic_bytes(self):
+        with open(self.json_path, "w") as file:
+            write_document(file, {"version": 2, "background": "black"}, [self.items])
+        renamed = self.path + ".json"
+        os.rename(self.path, renamed)
+        self.path = renamed
+
+        self.assertTrue(is_binary_document(renamed))
+        self.assertFalse(is_binary_document(self.json_path))
+        with open(renamed, "rb") as file:
+            self.assertEqual(file.read(4), MAGIC)
+
+        binary = [item for key, batch, _ in file_events(renamed) if key == "drawings" for item in batch]
+        text = [item for key, batch, _ in file_events(self.json_path) if key == "drawings" for item in batch]
+        self.assertEqual(binary, text)
+
+
+if __name__ == '__main__':
+    unittest.main()
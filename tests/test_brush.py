@@ -0,0 +1,73 @@
+import math
+import unittest
+from types import SimpleNamespace
+
+from brush import Brush, STROKE_TAG, simplify
+from fake_canvas import make_drawing_canvas
+from spatial_index import distance_to_segment
+
+
+def event(x, y):
+    return SimpleNamespace(x=x, y=y)
+
+
+class TestSimplify(unittest.TestCase):
+
+    def test_collinear_points_collapse_to_endpoints(self):
+        points = [(float(x), 2.0 * x) for x in range(1000)]
+
+        self.assertEqual(simplify(points, 0.5), [(0.0, 0.0), (999.0, 1998.0)])
+
+    def test_curve_stays_within_tolerance(self):
+        points = [(100 * math.cos(step / 100), 100 * math.sin(step / 100)) for step in range(315)]
+        simplified = simplify(points, 1.0)
+
+        self.assertLess(len(simplified), len(points) / 5)
+        self.assertEqual(simplified[0], points[0])
+        self.assertEqual(simplified[-1], points[-1])
+        # Каждая исходная точка лежит не дальше допуска от упрощённой ломаной
+        segments = list(zip(simplified, simplified[1:]))
+        for x, y in points:
+            self.assertLessEqual(min(distance_to_segment(x, y, *start, *end) for start, end in segments), 1.0)
+
+
+class TestBrush(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        shapes = SimpleNamespace(shape_color="black", line_width=3)
+        self.brush = Brush(self.drawing_canvas, shapes, loc=None)
+
+    def stroke(self, points):
+        self.brush.on_press(event(*points[0]))
+        for point in points[1:]:
+            self.brush.on_drag(event(*point))
+        self.brush.on_release(event(*points[-1]))
+
+    def test_stroke_is_one_smoothed_polyline(self):
+        self.stroke([(x, 100 + (x % 2) * 0.3) for x in range(10, 400)])
+
+        (obj,) = self.drawing_canvas.scene
+        self.assertEqual(obj.type, "line")
+        self.assertIn(STROKE_TAG, obj.tags)
+        self.assertEqual(obj.config["smooth"], "true")
+        self.assertEqual(len(obj.coords), 4)
+        self.assertLess(self.brush.last_reduction, 0.01)
+        # Временная линия удалена, на холсте только сам мазок
+        self.assertEqual(list(self.drawing_canvas.canvas.items), [obj.item])
+
+    def test_eraser_drag_is_one_history_step(self):
+        self.stroke([(10, 10), (100, 10)])
+        self.stroke([(10, 50), (100, 50)])
+
+        self.brush.on_erase(event(50, 10))
+        self.brush.on_erase(event(50, 50))
+        self.brush.on_erase_release(event(50, 50))
+
+        self.assertEqual(len(self.drawing_canvas.scene), 0)
+        self.drawing_canvas.history.undo()
+        self.assertEqual(len(self.drawing_canvas.scene), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import MagicMock
+
+from change_bus import ChangeBus
+
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = []
+
+    def after(self, delay, callback):
+        self.jobs.append(callback)
+        return f"job{len(self.jobs)}"
+
+    def after_cancel(self, job):
+        self.jobs.clear()
+
+    def run(self):
+        jobs, self.jobs = self.jobs, []
+        for job in jobs:
+            job()
+
+
+class TestChangeBus(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = FakeScheduler()
+        self.bus = ChangeBus(self.scheduler, frame_budget_ms=16)
+        self.subscriber = MagicMock()
+        self.bus.subscribe(self.subscriber)
+
+    def test_publications_within_frame_are_coalesced(self):
+        for _ in range(5):
+            self.bus.publish()
+
+        self.subscriber.assert_not_called()
+        self.scheduler.run()
+        self.subscriber.assert_called_once_with()
+
+    def test_transaction_emits_single_publication(self):
+        with self.bus.transaction():
+            for _ in range(3):
+                self.bus.publish()
+            self.assertEqual(self.scheduler.jobs, [])
+
+        self.scheduler.run()
+        self.subscriber.assert_called_once_with()
+
+    def test_muted_changes_are_not_published(self):
+        with self.bus.muted():
+            self.bus.publish()
+
+        self.scheduler.run()
+        self.subscriber.assert_not_called()
+
+    def test_zero_budget_publishes_immediately(self):
+        bus = ChangeBus(self.scheduler, frame_budget_ms=0)
+        subscriber = MagicMock()
+        bus.subscribe(subscriber)
+
+        bus.publish()
+
+        subscriber.assert_called_once_with()
+
+    def test_operations_are_passed_unless_full_state_changed(self):
+        op = {"type": "transform", "data": {"ids": ["a"], "dx": 1, "dy": 2}}
+        self.bus.publish_op(op)
+        self.scheduler.run()
+        self.assertEqual(self.bus.ops, [op])
+
+        self.bus.publish_op(op)
+        self.bus.publish()
+        self.scheduler.run()
+        self.assertIsNone(self.bus.ops)
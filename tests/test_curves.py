@@ -0,0 +1,105 @@
+import unittest
+from types import SimpleNamespace
+
+from curves import CurveCache, flatten_path
+from fake_canvas import make_drawing_canvas
+from path_tool import PathTool
+from spatial_index import distance_to_segment
+
+# Один S-образный сегмент
+S_CURVE = [0, 0, 100, 0, -50, 100, 50, 100]
+
+
+def bezier(coords, t):
+    x0, y0, x1, y1, x2, y2, x3, y3 = coords
+    u = 1 - t
+    return (u ** 3 * x0 + 3 * u * u * t * x1 + 3 * u * t * t * x2 + t ** 3 * x3,
+            u ** 3 * y0 + 3 * u * u * t * y1 + 3 * u * t * t * y2 + t ** 3 * y3)
+
+
+def event(x, y):
+    return SimpleNamespace(x=x, y=y)
+
+
+class TestFlatten(unittest.TestCase):
+
+    def test_straight_segment_is_one_line(self):
+        self.assertEqual(flatten_path([0, 0, 0, 0, 10, 10, 10, 10, 10, 10, 20, 0, 20, 0], 0.1),
+                         [0.0, 0.0, 10.0, 10.0, 20.0, 0.0])
+
+    def test_curve_stays_within_tolerance(self):
+        coarse = flatten_path(S_CURVE, 1.0)
+        fine = flatten_path(S_CURVE, 0.05)
+
+        self.assertLess(len(coarse), len(fine))
+        points = list(zip(fine[::2], fine[1::2]))
+        segments = list(zip(points, points[1:]))
+        for step in range(101):
+            x, y = bezier(S_CURVE, step / 100)
+            self.assertLessEqual(min(distance_to_segment(x, y, *start, *end) for start, end in segments), 0.05 + 1e-9)
+
+
+class TestCurveCache(unittest.TestCase):
+
+    def test_flattening_is_reused_until_shape_or_level_changes(self):
+        cache = CurveCache()
+        first = cache.flatten("p", S_CURVE, 1.0)
+
+        moved = [coord + 30 for coord in S_CURVE]
+        self.assertEqual(cache.flatten("p", moved, 1.1), [coord + 30 for coord in first])
+        self.assertEqual(cache.misses, 1)
+
+        cache.flatten("p", moved, 4.0)
+        self.assertEqual(cache.misses, 2)
+        cache.flatten("p", moved, 1.0)
+        self.assertEqual(cache.misses, 2)
+
+        cache.flatten("p", moved[:-1] + [moved[-1] + 5], 1.0)
+        self.assertEqual(cache.misses, 3)
+
+
+class TestPathTool(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        shapes = SimpleNamespace(shape_color="black", line_width=2)
+        self.tool = PathTool(self.drawing_canvas, shapes, loc=None)
+
+    def draw(self):
+        self.tool.on_press(event(0, 0))
+        self.tool.on_press(event(100, 100))
+        self.tool.on_drag(event(150, 100))
+        self.tool.on_press(event(200, 0))
+        return self.tool.finish()
+
+    def test_path_is_stored_as_control_points(self):
+        item = self.draw()
+
+        obj = self.drawing_canvas.object_of(item)
+        self.assertEqual(obj.type, "path")
+        # Прямой первый сегмент к гладкому узлу с зеркальной входящей управляющей точкой
+        self.assertEqual(obj.coords, [0, 0, 0, 0, 50, 100, 100, 100, 150, 100, 200, 0, 200, 0])
+        fake_item = self.drawing_canvas.canvas.items[item]
+        self.assertEqual(fake_item["type"], "line")
+        self.assertGreater(len(fake_item["coords"]), len(obj.coords))
+        self.assertFalse(self.drawing_canvas.canvas.find_withtag("path_preview"))
+
+    def test_zoom_refines_and_pick_follows_curve(self):
+        item = self.draw()
+        coarse = len(self.drawing_canvas.canvas.items[item]["coords"])
+
+        self.drawing_canvas.zoom(8.0, 0, 0)
+        self.assertGreater(len(self.drawing_canvas.canvas.items[item]["coords"]), coarse)
+
+        self.assertEqual(self.drawing_canvas.pick(100, 100, tags=("path",)), item)
+        self.assertIsNone(self.drawing_canvas.pick(100, 20, tags=("path",)))
+
+    def test_single_point_is_discarded(self):
+        self.tool.on_press(event(10, 10))
+
+        self.assertIsNone(self.tool.finish())
+        self.assertEqual(len(self.drawing_canvas.scene), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
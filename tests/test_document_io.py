@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from document_io import document_events, iter_document, read_in_background, write_document
+from fake_canvas import FakePanel, FakeRoot, make_drawing_canvas
+from loader import ProgressiveLoader, ProgressiveSaver
+
+
+def drawing(index):
+    return {"id": f"o{index}", "type": "line", "coords": [index * 1.5, -index, 12345.25, 0.125],
+            "tags": ["movable"], "config": {"fill": "red", "width": 2}, "layer": "base"}
+
+
+class TestStreamingFormat(unittest.TestCase):
+
+    def test_round_trip_with_tiny_read_chunks(self):
+        buffer = io.StringIO()
+        header = {"version": 2, "background": "white", "layers": [{"id": "base", "name": "Base"}]}
+        write_document(buffer, header, ([drawing(index) for index in range(start, start + 10)]
+                                        for start in range(0, 30, 10)))
+        text = buffer.getvalue()
+
+        self.assertEqual(json.loads(text)["drawings"][29], drawing(29))
+        self.assertNotIn("  ", text)
+
+        # Порции по 7 знаков разрезают числа и строки посередине
+        events = list(document_events(io.StringIO(text), batch_size=8, chunk_size=7))
+        self.assertEqual([key for key, _, _ in events], ["background", "layers"] + ["drawings"] * 4)
+        self.assertEqual([item for key, batch, _ in events if key == "drawings" for item in batch],
+                         [drawing(index) for index in range(30)])
+        self.assertEqual(events[-1][2], text.rindex("]") + 1)
+
+    def test_old_files_apply_metadata_before_objects(self):
+        old = json.dumps({"drawings": [drawing(0)], "background": "black", "images": {}}, indent=4)
+
+        keys = [key for key, _, _ in document_events(io.StringIO(old))]
+
+        self.assertEqual(keys, ["layers", "background", "images", "drawings"])
+
+    def test_malformed_file_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_document(io.StringIO('{"drawings": [1, 2')))
+
+    def test_reader_stops_when_cancelled(self):
+        with tempfile.NamedTemporaryFile('w', suffix=".json", delete=False) as file:
+            write_document(file, {"version": 2}, [[drawing(index) for index in range(5000)]])
+        self.addCleanup(os.remove, file.name)
+        events, stop = queue.Queue(maxsize=2), threading.Event()
+        thread = threading.Thread(target=read_in_background, args=(file.name, events, stop, 10))
+        thread.start()
+
+        time.sleep(0.05)
+        # Поток ждёт места в ограниченной очереди, а не читает файл целиком в память
+        self.assertEqual(events.qsize(), 2)
+        stop.set()
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+
+
+class TestSaveAndLoad(unittest.TestCase):
+
+    def make_canvas(self):
+        drawing_canvas = make_drawing_canvas()
+        drawing_canvas.root = FakeRoot()
+        return drawing_canvas
+
+    def test_saved_document_loads_back(self):
+        source = self.make_canvas()
+        with source.bus.muted():
+            source.create_objects([drawing(index) for index in range(600)])
+        path = os.path.join(tempfile.mkdtemp(), "board.json")
+        self.addCleanup(os.remove, path)
+
+        saver = ProgressiveSaver(source, SimpleNamespace(gettext=str))
+        saver.panel = FakePanel()
+        done = []
+        with patch("loader.messagebox") as messagebox:
+            saver.save(path, on_done=lambda: done.append(True))
+            # Удаление после начала сохранения не ломает запись
+            source.remove_objects(["o599"])
+            source.root.run()
+        messagebox.showerror.assert_not_called()
+        self.assertEqual(done, [True])
+        self.assertFalse(os.path.exists(path + ".part"))
+
+        target = self.make_canvas()
+        loader = ProgressiveLoader(target, target.create_objects, SimpleNamespace(gettext=str))
+        loader.panel = FakePanel()
+        loader.load_file(path)
+        target.root.run()
+
+        self.assertFalse(loader.active)
+        self.assertEqual(len(target.scene.objects), 599)
+        self.assertEqual(target.scene.order[:3], ["o0", "o1", "o2"])
+        self.assertEqual(target.scene.objects["o7"].coords, [10.5, -7.0, 12345.25, 0.125])
+
+    def test_edits_between_batches_are_recorded_and_published(self):
+        target = self.make_canvas()
+        published = []
+        target.bus.subscribe(lambda: published.append(True))
+
+        def slow_create(items):
+            target.create_objects(items)
+            time.sleep(0.003)
+
+        loader = ProgressiveLoader(target, slow_create, SimpleNamespace(gettext=str), chunk_budget_ms=1)
+        loader.panel = FakePanel()
+        loader.load_state({"drawings": [drawing(index) for index in range(600)]})
+        job, callback, args = target.root.jobs.pop(0)
+        callback(*args)
+        self.assertTrue(loader.active)
+        self.assertFalse(target.bus.is_muted)
+        self.assertEqual(published, [])
+
+        # Пользователь рисует, пока документ догружается
+        target.create_object("oval", [0, 0, 5, 5], {"fill": "blue"}, oid="user")
+        target.bus.publish()
+        self.assertEqual(published, [True])
+        self.assertTrue(target.history.can_undo())
+
+        target.root.run()
+        self.assertFalse(loader.active)
+        self.assertEqual(len(target.scene.objects), 601)
+
+
+if __name__ == '__main__':
+    unittest.main()
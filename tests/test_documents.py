@@ -0,0 +1,95 @@
+import os
+import unittest
+
+from documents import DocumentManager
+from fake_canvas import make_drawing_canvas
+
+
+def rect(oid, x):
+    return {"id": oid, "type": "rectangle", "coords": [x, 0, x + 10, 10],
+            "tags": ["movable", "shape"], "config": {"fill": "red"}}
+
+
+class TestDocuments(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.documents = DocumentManager(self.drawing_canvas, "first")
+        self.fake = self.drawing_canvas.canvas
+
+    def fill(self, count, offset=0):
+        self.drawing_canvas.create_objects([rect(f"r{index}", offset + index * 20) for index in range(count)])
+        self.drawing_canvas.bus.publish()
+
+    def tearDown(self):
+        self.documents.close_all()
+
+    def test_only_active_document_has_items(self):
+        self.fill(100)
+        self.drawing_canvas.scene.meta.set("r1", "bold", True)
+        self.documents.new("second")
+
+        self.assertEqual(len(self.fake.items), 0)
+        self.assertIsNone(self.documents.documents[0].scene)
+        self.fill(3)
+        self.assertEqual(len(self.fake.items), 3)
+
+        batches = self.drawing_canvas.bridge.batches
+        self.documents.switch(0)
+        # Видимые объекты создаются одним пакетом, без перестановки
+        self.assertEqual(self.drawing_canvas.bridge.batches - batches, 1)
+        scene = self.drawing_canvas.scene
+        self.assertEqual(len(scene), 100)
+        self.assertEqual(self.fake.stack, [obj.item for obj in scene if obj.item is not None])
+        self.assertTrue(scene.meta.get("r1", "bold"))
+
+    def test_history_follows_document(self):
+        self.fill(2)
+        self.documents.new("second")
+        self.assertFalse(self.drawing_canvas.history.can_undo())
+
+        self.documents.switch(0)
+        self.drawing_canvas.history.undo()
+        self.assertEqual(len(self.drawing_canvas.scene), 0)
+
+    def test_inactive_documents_are_paged_past_budget(self):
+        self.fill(50)
+        self.documents.budget_bytes = 0
+        self.documents.new("second")
+
+        first = self.documents.documents[0]
+        self.assertTrue(first.paged)
+        self.assertTrue(os.path.exists(first.page_path))
+        self.assertIsNone(first.packed)
+
+        page_path = first.page_path
+        self.documents.switch(0)
+        self.assertFalse(os.path.exists(page_path))
+        self.assertEqual(len(self.drawing_canvas.scene), 50)
+        self.assertTrue(self.drawing_canvas.history.can_undo())
+
+    def test_close_all_removes_page_files(self):
+        self.fill(5)
+        self.documents.budget_bytes = 0
+        self.documents.new("second")
+        self.documents.new("third")
+        paths = [document.page_path for document in self.documents.documents[:2]]
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+
+        self.documents.close_all()
+
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+        self.assertTrue(all(document.page_path is None for document in self.documents.documents))
+
+    def test_close_active_document(self):
+        self.fill(1)
+        self.documents.new("second")
+        self.assertTrue(self.documents.close(1))
+
+        self.assertEqual(self.documents.active.name, "first")
+        self.assertEqual(len(self.drawing_canvas.scene), 1)
+        self.assertFalse(self.documents.close(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
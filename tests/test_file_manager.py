@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from PIL import Image
+
+import file_manager
+from fake_canvas import FakeRoot, make_drawing_canvas
+from file_manager import FileManager
+
+
+class TestGraphicExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.canvas = make_drawing_canvas()
+        self.canvas.width = self.canvas.height = 40
+        self.canvas.canvas.winfo_ismapped = lambda: False
+        self.manager = FileManager.__new__(FileManager)
+        self.manager.canvas = self.canvas
+        self.manager.loc = SimpleNamespace(gettext=str)
+
+    def export(self):
+        path = os.path.join(self.directory, "view.png")
+        with patch.object(file_manager.filedialog, "asksaveasfilename", return_value=path):
+            self.manager.export_to_graphic_file()
+        return Image.open(path)
+
+    def test_export_follows_viewport_offset_and_scale(self):
+        self.canvas.create_object("rectangle", [100, 100, 110, 110], {"fill": "red", "outline": ""})
+        self.canvas.viewport.offset_x = self.canvas.viewport.offset_y = 95.0
+        self.canvas.viewport.scale = 2.0
+
+        with self.export() as image:
+            self.assertEqual(image.size, (40, 40))
+            self.assertEqual(image.getpixel((15, 15)), (255, 0, 0))
+            self.assertEqual(image.getpixel((5, 5)), (255, 255, 255))
+
+    def test_view_region_is_magnified(self):
+        self.canvas.viewport.offset_x, self.canvas.viewport.offset_y = -20.0, 30.0
+
+        region = self.manager.view_region(magnify=3.0)
+
+        self.assertEqual(region, {"width": 120, "height": 120, "origin": (-20.0, 30.0), "scale": 3.0})
+
+    def test_poster_exports_magnified_view(self):
+        self.canvas.root = FakeRoot()
+        self.canvas.viewport.offset_x, self.canvas.viewport.offset_y = 50.0, -10.0
+        self.manager.tile_exporter = MagicMock()
+        self.manager.export_panel = MagicMock()
+        self.manager._export_job = None
+        path = os.path.join(self.directory, "poster.png")
+
+        with patch.object(file_manager.simpledialog, "askfloat", return_value=4.0), \
+                patch.object(file_manager.filedialog, "asksaveasfilename", return_value=path), \
+                patch.object(file_manager.threading, "Thread") as thread:
+            self.manager.export_poster()
+        thread.call_args.kwargs["target"]()
+
+        args, options = self.manager.tile_exporter.export.call_args
+        self.assertEqual(args[1], path)
+        self.assertEqual(options, {"width": 160, "height": 160, "origin": (50.0, -10.0), "scale": 4.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
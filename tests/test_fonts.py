@@ -0,0 +1,99 @@
+import unittest
+
+from font_picker import FontList
+from fonts import FontDescriptor, FontService, filter_families, parse_font
+from scene_model import SceneModel
+
+
+class CountingFont:
+    """Шрифт Tk с подсчётом обращений: 8 пикселей на знак, строка 16 пикселей."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def measure(self, text):
+        self.calls += 1
+        return len(text) * 8
+
+    def metrics(self, name):
+        self.calls += 1
+        return 16
+
+
+class TkFontService(FontService):
+
+    def __init__(self):
+        super().__init__()
+        self.root = object()
+        self.font = CountingFont()
+
+    def _tk_font(self, descriptor):
+        return self.font
+
+
+class TestParseFont(unittest.TestCase):
+
+    def test_tcl_string_and_tuple(self):
+        expected = FontDescriptor("Times New Roman", 14, ("bold", "italic"))
+
+        self.assertEqual(parse_font("{Times New Roman} 14 bold italic"), expected)
+        self.assertEqual(parse_font(("Times New Roman", 14, "bold", "italic")), expected)
+        self.assertEqual(parse_font("Helvetica -12").size, -12)
+        self.assertEqual(parse_font(""), FontDescriptor("Helvetica", 12))
+
+    def test_descriptor_round_trip(self):
+        descriptor = parse_font("{Comic Sans MS} 20").replace_style("bold", True)
+
+        self.assertEqual(descriptor.to_tk(), ("Comic Sans MS", 20, "bold"))
+        self.assertEqual(descriptor.replace_style("bold", False).styles, ())
+
+
+class TestFontService(unittest.TestCase):
+
+    def test_measurements_are_cached(self):
+        service = TkFontService()
+
+        self.assertEqual(service.text_extent("Hello\nWorld!", "Arial 12"), (48, 32))
+        calls = service.font.calls
+        self.assertEqual(service.text_extent("Hello\nWorld!", ("Arial", 12)), (48, 32))
+
+        self.assertEqual(service.font.calls, calls)
+
+    def test_text_bounds_come_from_metrics(self):
+        scene = SceneModel()
+        text = scene.add("text", [100, 100], {"text": "abcd", "font": "Arial 10"}, [])
+
+        # Без Tk: ширина 0.6 и высота 1.3 размера шрифта на знак и строку
+        self.assertEqual(scene.index.boxes[text.oid], (88.0, 93.5, 112.0, 106.5))
+
+
+class TestFontList(unittest.TestCase):
+
+    def setUp(self):
+        self.families = [f"Font {index:04d}" for index in range(5000)] + ["Arial", "Gill Sans", "Noto Sans"]
+        self.model = FontList(self.families, rows=10)
+
+    def test_only_visible_rows_are_materialized(self):
+        self.assertEqual(len(self.model.window()), 10)
+
+        self.model.scroll_fraction(0.5)
+        self.assertEqual(self.model.window()[0], self.families[self.model.offset])
+        self.model.scroll_to(10 ** 6)
+        self.assertEqual(self.model.window()[-1], "Noto Sans")
+
+    def test_filter_puts_prefix_matches_first(self):
+        self.assertEqual(filter_families(["Noto Sans", "Sans", "Gill Sans"], "sans"),
+                         ["Sans", "Noto Sans", "Gill Sans"])
+
+        self.model.filter("SANS")
+        self.assertEqual(self.model.window(), ["Gill Sans", "Noto Sans"])
+
+    def test_selection_keeps_window_in_view(self):
+        self.model.select(25)
+
+        self.assertEqual(self.model.offset, 16)
+        self.assertEqual(self.model.current, "Font 0025")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from fake_canvas import make_drawing_canvas
+
+
+class TestHistory(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.history = self.drawing_canvas.history
+
+    def create(self, x, fill="red"):
+        item = self.drawing_canvas.create_object("rectangle", [x, 0, x + 10, 10], {"fill": fill},
+                                                 tags=("movable", "shape"))
+        self.drawing_canvas.bus.publish()
+        return self.drawing_canvas.object_of(item).oid
+
+    def item_of(self, oid):
+        return self.drawing_canvas.scene.objects[oid].item
+
+    def test_drag_is_one_step(self):
+        oid = self.create(0)
+        for _ in range(20):
+            self.drawing_canvas.move_object(self.item_of(oid), 1, 2)
+        self.drawing_canvas.bus.publish()
+
+        self.assertEqual(len(self.history.undo_stack), 2)
+        self.history.undo()
+        self.assertEqual(self.drawing_canvas.scene.objects[oid].coords, [0.0, 0.0, 10.0, 10.0])
+        self.history.redo()
+        self.assertEqual(self.drawing_canvas.scene.objects[oid].coords, [20.0, 40.0, 30.0, 50.0])
+
+    def test_create_with_drag_folds_into_creation(self):
+        item = self.drawing_canvas.create_object("line", [0, 0, 0, 0], {"fill": "black", "width": 2})
+        for x in range(1, 30):
+            self.drawing_canvas.set_coords(item, [0, 0, x, x])
+        self.drawing_canvas.bus.publish()
+
+        step = self.history.undo_stack[-1]
+        self.assertEqual(len(step.ops), 1)
+        self.history.undo()
+        self.assertEqual(len(self.drawing_canvas.scene), 0)
+        self.history.redo()
+        (obj,) = self.drawing_canvas.scene
+        self.assertEqual(obj.coords, [0.0, 0.0, 29.0, 29.0])
+
+    def test_undo_delete_restores_order_and_style(self):
+        first, second, third = self.create(0), self.create(20, "blue"), self.create(40)
+        self.drawing_canvas.delete_object(self.item_of(second))
+        self.drawing_canvas.bus.publish()
+
+        self.history.undo()
+        scene = self.drawing_canvas.scene
+        self.assertEqual(scene.order, [first, second, third])
+        self.assertEqual(scene.objects[second].config["fill"], "blue")
+        self.assertEqual(self.drawing_canvas.canvas.stack, [scene.objects[oid].item for oid in scene.order])
+
+    def test_undo_clear_and_background(self):
+        oids = [self.create(x) for x in (0, 20, 40)]
+        self.drawing_canvas.update_background("yellow")
+        self.drawing_canvas.bus.publish()
+        self.drawing_canvas.reset_canvas()
+
+        self.history.undo()
+        self.assertEqual(self.drawing_canvas.scene.order, oids)
+        self.assertEqual(self.drawing_canvas.bg, "yellow")
+        self.history.undo()
+        self.assertEqual(self.drawing_canvas.bg, "white")
+
+    def test_remote_changes_are_not_recorded(self):
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([{"id": "remote", "type": "oval", "coords": [0, 0, 5, 5],
+                                                 "tags": [], "config": {}}])
+        self.drawing_canvas.bus.publish()
+
+        self.assertFalse(self.history.can_undo())
+
+    def test_new_action_drops_redo(self):
+        self.create(0)
+        self.history.undo()
+        self.assertTrue(self.history.can_redo())
+        self.create(20)
+        self.assertFalse(self.history.can_redo())
+
+    def test_budget_evicts_oldest_steps(self):
+        self.history.budget_bytes = 4000
+        for x in range(50):
+            self.create(x)
+
+        self.assertLessEqual(self.history.size, 4000)
+        self.assertLess(len(self.history.undo_stack), 50)
+        while self.history.undo():
+            pass
+        # Отменяются только шаги, уместившиеся в бюджет
+        self.assertGreater(len(self.drawing_canvas.scene), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
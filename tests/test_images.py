@@ -0,0 +1,133 @@
+import base64
+import io
+import unittest
+
+from PIL import Image
+
+from fake_canvas import make_drawing_canvas
+from images import ImagePyramid, ImageStore, content_key, image_keys, photo_size, MAX_PHOTO_SIDE
+
+
+def encode(size, color="red", image_format="JPEG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestImagePyramid(unittest.TestCase):
+
+    def test_small_display_never_decodes_full_resolution(self):
+        pyramid = ImagePyramid(encode((4000, 2000)))
+
+        self.assertEqual(pyramid.level_for(500, 250), 3)
+        image = pyramid.render(500, 250)
+
+        self.assertEqual(image.size, (500, 250))
+        self.assertEqual(list(pyramid.levels), [3])
+        self.assertEqual(pyramid.resident_bytes, 500 * 250 * 4)
+
+    def test_enlarged_display_uses_full_resolution(self):
+        pyramid = ImagePyramid(encode((300, 200), image_format="PNG"))
+
+        self.assertEqual(pyramid.level_for(600, 400), 0)
+        self.assertEqual(pyramid.render(600, 400).size, (600, 400))
+        self.assertEqual(pyramid.level_for(10, 10), pyramid.depth - 1)
+
+    def test_photo_size_is_capped(self):
+        self.assertEqual(photo_size(MAX_PHOTO_SIDE * 4, MAX_PHOTO_SIDE * 2), (MAX_PHOTO_SIDE, MAX_PHOTO_SIDE // 2))
+        self.assertEqual(photo_size(0.2, -10), (1, 10))
+
+
+class TestImageStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ImageStore()
+        self.data = encode((64, 32))
+
+    def test_same_bytes_are_stored_once(self):
+        key = self.store.add(self.data)
+
+        self.assertEqual(self.store.add(bytes(self.data)), key)
+        self.assertEqual(key, content_key(self.data))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.size(key), (64, 32))
+
+    def test_rejects_non_images(self):
+        with self.assertRaises(ValueError):
+            self.store.add(b"not an image")
+
+    def test_merge_checks_content_and_accepts_base64(self):
+        key = content_key(self.data)
+        other = encode((8, 8), "blue")
+        added = self.store.merge({key: base64.b64encode(self.data).decode("ascii"),
+                                  content_key(other): self.data})
+
+        self.assertEqual(added, 1)
+        self.assertIn(key, self.store)
+        self.assertNotIn(content_key(other), self.store)
+        self.assertEqual(self.store.pack([key], encode=True)[key], base64.b64encode(self.data).decode("ascii"))
+
+    def test_levels_beyond_budget_are_dropped(self):
+        self.store.budget_bytes = 64 * 32 * 4
+        first = self.store.add(self.data)
+        second = self.store.add(encode((64, 32), "blue"))
+
+        self.store.render(first, 64, 32)
+        self.store.render(second, 64, 32)
+
+        self.assertEqual(self.store.resident_bytes, 64 * 32 * 4)
+        self.assertEqual(self.store.pyramid(second).levels.keys(), {0})
+
+
+class TestCanvasImages(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.key = self.drawing_canvas.images.add(encode((800, 400)))
+
+    def image_data(self, oid, x):
+        return {"id": oid, "type": "image", "coords": [x, 0, x + 200, 100],
+                "tags": ["movable", "image"], "config": {"key": self.key}}
+
+    def test_objects_share_photo_of_display_size(self):
+        self.drawing_canvas.create_objects([self.image_data("a", 0), self.image_data("b", 300)])
+        photos = self.drawing_canvas.photos
+
+        item = self.drawing_canvas.canvas.items[self.drawing_canvas.scene.objects["a"].item]
+        self.assertEqual(item["coords"], [0.0, 0.0])
+        self.assertEqual(item["options"]["anchor"], "nw")
+        self.assertEqual(photos.created, [(200, 100)])
+        self.assertEqual(len(photos), 1)
+        self.assertEqual(image_keys(self.drawing_canvas.scene.snapshot()), [self.key])
+
+    def test_zoom_picks_new_size_and_remove_releases(self):
+        self.drawing_canvas.create_objects([self.image_data("a", 0)])
+        photos = self.drawing_canvas.photos
+
+        self.drawing_canvas.zoom(2.0, 0, 0)
+        self.assertEqual(photos.created[-1], (400, 200))
+        self.assertEqual(len(photos), 1)
+
+        self.drawing_canvas.remove_objects(["a"])
+        self.assertEqual(len(photos), 0)
+
+    def test_move_and_undo_keep_image(self):
+        self.drawing_canvas.create_objects([self.image_data("a", 0)])
+        self.drawing_canvas.bus.publish()
+        self.drawing_canvas.update_objects(coords={"a": [50, 50, 150, 100]})
+        self.drawing_canvas.bus.publish()
+
+        item = self.drawing_canvas.canvas.items[self.drawing_canvas.scene.objects["a"].item]
+        self.assertEqual(item["coords"], [50.0, 50.0])
+        self.assertEqual(self.drawing_canvas.photos.created[-1], (100, 50))
+
+        self.drawing_canvas.history.undo()
+        self.drawing_canvas.history.undo()
+        self.drawing_canvas.history.redo()
+        obj = self.drawing_canvas.scene.objects["a"]
+        self.assertEqual(obj.config["key"], self.key)
+        self.assertEqual(self.drawing_canvas.canvas.items[obj.item]["coords"], [0.0, 0.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+
+from fake_canvas import make_drawing_canvas
+from scene_model import DEFAULT_LAYER, SceneModel
+
+
+def rect(oid, x, layer):
+    return {"id": oid, "type": "rectangle", "coords": [x, 0, x + 10, 10],
+            "tags": ["movable", "shape"], "config": {"fill": "red"}, "layer": layer}
+
+
+class TestSceneLayers(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = SceneModel()
+        self.top = self.scene.add_layer("top", lid="top").lid
+
+    def test_objects_stay_contiguous_per_layer(self):
+        self.scene.add("oval", [0, 0, 1, 1], {}, [], oid="t1", layer=self.top)
+        self.scene.add("oval", [0, 0, 1, 1], {}, [], oid="b1")
+        self.scene.add("oval", [0, 0, 1, 1], {}, [], oid="t2", layer=self.top)
+        self.scene.add("oval", [0, 0, 1, 1], {}, [], oid="b2", layer=DEFAULT_LAYER)
+
+        self.assertEqual(self.scene.order, ["b1", "b2", "t1", "t2"])
+        # Перестановка не выводит объект за пределы слоя
+        self.scene.place_above("b1", "t2")
+        self.assertEqual(self.scene.order, ["b2", "b1", "t1", "t2"])
+
+        self.scene.move_layer(self.top, 0)
+        self.assertEqual(self.scene.order, ["t1", "t2", "b2", "b1"])
+
+    def test_unknown_layers_fall_back_to_bottom(self):
+        self.scene.add("oval", [0, 0, 1, 1], {}, [], oid="t1", layer=self.top)
+        self.scene.set_layers([{"id": "other", "name": "other"}])
+
+        self.assertEqual(self.scene.objects["t1"].layer, "other")
+        self.assertEqual(self.scene.layer_objects("other"), ["t1"])
+
+
+class TestCanvasLayers(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.scene = self.drawing_canvas.scene
+        self.top = self.scene.add_layer("top", lid="top").lid
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([rect("t1", 0, "top"), rect("b1", 0, DEFAULT_LAYER),
+                                                rect("t2", 20, "top"), rect("b2", 20, DEFAULT_LAYER)])
+        self.fake = self.drawing_canvas.canvas
+
+    def assert_stack_matches_model(self):
+        items = [self.scene.objects[oid].item for oid in self.scene.order
+                 if self.scene.objects[oid].item is not None]
+        self.assertEqual(self.fake.stack, items)
+
+    def test_creation_respects_layers(self):
+        self.assertEqual(self.scene.order, ["b1", "b2", "t1", "t2"])
+        self.assert_stack_matches_model()
+
+    def test_hidden_layer_has_no_items(self):
+        self.drawing_canvas.set_layer_visible(self.top, False)
+
+        self.assertEqual(len(self.fake.items), 2)
+        self.assertIsNone(self.scene.objects["t1"].item)
+        picked = self.drawing_canvas.object_of(self.drawing_canvas.pick(5, 5, tags=("shape",)))
+        self.assertEqual(picked.oid, "b1")
+
+        self.drawing_canvas.set_layer_visible(self.top, True)
+        self.assertEqual(len(self.fake.items), 4)
+        self.assert_stack_matches_model()
+
+    def test_locked_layer_is_not_pickable(self):
+        self.drawing_canvas.set_layer_locked(self.top, True)
+
+        picked = self.drawing_canvas.object_of(self.drawing_canvas.pick(5, 5, tags=("shape",)))
+        self.assertEqual(picked.oid, "b1")
+
+    def test_move_layer_is_one_tk_call(self):
+        calls = self.fake.calls
+        self.drawing_canvas.move_layer(self.top, 0)
+
+        self.assertEqual(self.fake.calls - calls, 1)
+        self.assertEqual(self.scene.order, ["t1", "t2", "b1", "b2"])
+        self.assert_stack_matches_model()
+
+    def test_move_to_layer_is_undoable(self):
+        self.drawing_canvas.move_to_layer(["b1"], self.top)
+        self.drawing_canvas.bus.publish()
+        self.assertEqual(self.scene.order, ["b2", "t1", "t2", "b1"])
+        self.assert_stack_matches_model()
+
+        self.drawing_canvas.history.undo()
+        self.assertEqual(self.scene.order, ["b1", "b2", "t1", "t2"])
+        self.assert_stack_matches_model()
+
+    def test_removed_layer_comes_back_with_its_objects(self):
+        self.drawing_canvas.history.clear()
+        self.drawing_canvas.remove_layer(self.top)
+        self.drawing_canvas.bus.publish()
+        self.assertEqual(self.scene.order, ["b1", "b2"])
+
+        self.drawing_canvas.history.undo()
+        self.assertEqual([layer.lid for layer in self.scene.layers], [DEFAULT_LAYER, self.top])
+        self.assertEqual(self.scene.layer_objects(self.top), ["t1", "t2"])
+        self.assertEqual(self.scene.order, ["b1", "b2", "t1", "t2"])
+        self.assert_stack_matches_model()
+
+        self.drawing_canvas.history.redo()
+        self.assertIsNone(self.scene.get_layer(self.top))
+        self.assertEqual(self.scene.order, ["b1", "b2"])
+
+    def test_layer_edits_are_undoable(self):
+        self.drawing_canvas.history.clear()
+        before = self.scene.layers_snapshot()
+        lid = self.drawing_canvas.add_layer("new")
+        self.drawing_canvas.rename_layer(self.top, "renamed")
+        self.drawing_canvas.set_layer_locked(self.top, True)
+        self.drawing_canvas.set_layer_visible(self.top, False)
+        self.drawing_canvas.move_layer(self.top, 0)
+
+        self.drawing_canvas.history.undo()
+        self.assertEqual(self.scene.order, ["b1", "b2", "t1", "t2"])
+        self.drawing_canvas.history.undo()
+        self.assertTrue(self.scene.get_layer(self.top).visible)
+        self.assert_stack_matches_model()
+
+        for _ in range(3):
+            self.drawing_canvas.history.undo()
+        self.assertEqual(self.scene.layers_snapshot(), before)
+        self.assertIsNone(self.scene.get_layer(lid))
+
+    def test_apply_layers_from_remote(self):
+        layers = [{"id": "top", "name": "top", "visible": True, "locked": False},
+                  {"id": DEFAULT_LAYER, "name": "1", "visible": False, "locked": False}]
+        self.drawing_canvas.apply_layers(layers)
+
+        self.assertEqual(self.scene.order, ["t1", "t2", "b1", "b2"])
+        self.assertIsNone(self.scene.objects["b1"].item)
+        self.assert_stack_matches_model()
+
+
+if __name__ == '__main__':
+    unittest.main()
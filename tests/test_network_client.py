@@ -1,3 +1,5 @@
+import pickle
+import time
 import unittest
 from unittest.mock import MagicMock
 
@@ -25,4 +27,40 @@ class TestNetworkClient(unittest.TestCase):
 
         callback(data)
 
-        callback.assert_called_once_with(data)
\ No newline at end of file
+        callback.assert_called_once_with(data)
+
+    def test_pong_updates_rtt_without_callback(self):
+        callback = MagicMock()
+        message = pickle.dumps({"type": "pong", "time": time.perf_counter(), "version": 7})
+
+        self.client._dispatch(message, callback)
+
+        callback.assert_not_called()
+        self.assertIsNotNone(self.client.rtt_ms)
+        self.assertEqual(self.client.server_version, 7)
+        self.assertEqual(self.client.bytes_received, len(message))
+
+    def test_update_tracks_server_version(self):
+        callback = MagicMock()
+        data = {"type": "update", "data": {"drawings": [], "version": 3}}
+
+        self.client._dispatch(pickle.dumps(data), callback)
+
+        callback.assert_called_once_with(data)
+        self.assertEqual(self.client.server_version, 3)
+
+    def test_ack_advances_applied_version(self):
+        callback = MagicMock()
+        self.client.applied_version = 4
+
+        self.client._dispatch(pickle.dumps({"type": "ack", "version": 5}), callback)
+
+        callback.assert_not_called()
+        self.assertEqual((self.client.server_version, self.client.applied_version), (5, 5))
+
+    def test_late_apply_does_not_move_version_back(self):
+        self.client._dispatch(pickle.dumps({"type": "ack", "version": 7}), MagicMock())
+
+        self.client.record_apply(1.0, version=6)
+
+        self.assertEqual(self.client.applied_version, 7)
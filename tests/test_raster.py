@@ -0,0 +1,119 @@
+import unittest
+from types import SimpleNamespace
+
+import numpy as np
+
+from fake_canvas import make_drawing_canvas
+from raster import RasterLayer, RasterTools, RasterView, to_rgba
+from viewport import Viewport
+
+RED = to_rgba("red")
+BLUE = to_rgba("#0000ff")
+
+
+def event(x, y):
+    return SimpleNamespace(x=x, y=y)
+
+
+class FakeRasterView:
+    """Показ слоя без Tk: запоминает выгруженные прямоугольники."""
+
+    def __init__(self, layer):
+        self.layer = layer
+        self.item = None
+        self.uploads = []
+
+    def flush(self):
+        dirty = self.layer.take_dirty()
+        if dirty is not None:
+            self.uploads.append(dirty)
+
+
+class TestRasterLayer(unittest.TestCase):
+
+    def setUp(self):
+        self.layer = RasterLayer(200, 100)
+
+    def test_stamp_and_erase_touch_only_the_stroke(self):
+        rect = self.layer.stamp_line(20, 50, 80, 50, 5, RED)
+
+        self.assertEqual(self.layer.take_dirty(), rect)
+        self.assertTrue(np.array_equal(self.layer.pixels[50, 50], RED))
+        self.assertEqual(self.layer.pixels[60, 50, 3], 0)
+        self.assertEqual(self.layer.pixels[50, 90, 3], 0)
+
+        self.layer.stamp_line(50, 50, 50, 50, 3, None)
+        self.assertEqual(self.layer.pixels[50, 50, 3], 0)
+        self.assertTrue(np.array_equal(self.layer.pixels[50, 30], RED))
+
+    def test_flood_fill_stays_inside_outline(self):
+        # Замкнутый контур прямоугольника 40..120 × 20..80
+        for x0, y0, x1, y1 in ((40, 20, 120, 20), (120, 20, 120, 80), (120, 80, 40, 80), (40, 80, 40, 20)):
+            self.layer.stamp_line(x0, y0, x1, y1, 2, RED)
+        self.layer.take_dirty()
+
+        filled = self.layer.flood_fill(80, 50, BLUE)
+
+        self.assertGreater(filled, 70 * 50)
+        self.assertTrue(np.array_equal(self.layer.pixels[50, 80], BLUE))
+        self.assertTrue(np.array_equal(self.layer.pixels[24, 44], BLUE))
+        self.assertEqual(self.layer.pixels[10, 10, 3], 0)
+        self.assertTrue(np.array_equal(self.layer.pixels[20, 80], RED))
+        left, top, right, bottom = self.layer.take_dirty()
+        self.assertTrue(40 < left and right < 120 and 20 < top and bottom < 80)
+
+    def test_fill_of_concave_region(self):
+        # Перегородка с проходом снизу: заливка должна обойти её
+        self.layer.stamp_line(100, 0, 100, 80, 1, RED)
+        self.assertEqual(self.layer.flood_fill(10, 10, BLUE), 200 * 100 - int(np.sum(self.layer.pixels[..., 0] == 255)))
+        self.assertTrue(np.array_equal(self.layer.pixels[10, 150], BLUE))
+
+    def test_round_trip_through_file_data(self):
+        self.layer.stamp_line(10, 10, 30, 30, 4, RED)
+
+        restored = RasterLayer.from_dict(self.layer.to_dict())
+
+        self.assertTrue(np.array_equal(restored.pixels, self.layer.pixels))
+
+    def test_view_samples_visible_region(self):
+        self.layer.stamp_line(10, 10, 10, 10, 1, RED)
+        canvas = SimpleNamespace(viewport=Viewport(offset_x=5, offset_y=5, scale=2.0))
+        view = RasterView(canvas, self.layer)
+
+        block = view.sample((0, 0, 40, 40))
+
+        self.assertEqual(block.shape, (40, 40, 4))
+        # Мировой пиксель (10, 10) на экране при масштабе 2 — точки 10..11
+        self.assertTrue(np.array_equal(block[10, 10], RED))
+        self.assertEqual(block[0, 0, 3], 0)
+
+
+class TestRasterTools(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.drawing_canvas.raster = RasterLayer(300, 200)
+        self.drawing_canvas.raster_view = FakeRasterView(self.drawing_canvas.raster)
+        shapes = SimpleNamespace(shape_color="red", line_width=3)
+        self.tools = RasterTools(self.drawing_canvas, shapes, loc=None)
+
+    def test_stroke_uploads_dirty_rects_and_is_undoable(self):
+        view = self.drawing_canvas.raster_view
+        self.tools.on_press(event(10, 10))
+        for x in range(20, 120, 10):
+            self.tools.on_drag(event(x, 10))
+        self.tools.on_release(event(110, 10))
+
+        pixels = self.drawing_canvas.raster.pixels
+        self.assertTrue(np.array_equal(pixels[10, 60], RED))
+        # Каждое движение выгружает только небольшой прямоугольник
+        self.assertTrue(all((right - left) <= 20 for left, top, right, bottom in view.uploads))
+
+        self.drawing_canvas.history.undo()
+        self.assertFalse(pixels.any())
+        self.drawing_canvas.history.redo()
+        self.assertTrue(np.array_equal(pixels[10, 60], RED))
+
+
+if __name__ == '__main__':
+    unittest.main()
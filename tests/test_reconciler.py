@@ -0,0 +1,79 @@
+import unittest
+
+from fake_canvas import make_drawing_canvas
+from reconciler import CanvasReconciler, longest_increasing_run
+
+
+def rect(oid, x, fill="red"):
+    return {"id": oid, "type": "rectangle", "coords": [x, 0, x + 10, 10],
+            "tags": ["movable", "shape"], "config": {"fill": fill}}
+
+
+class TestReconciler(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.reconciler = CanvasReconciler(self.drawing_canvas)
+        self.reconciler.apply([rect("a", 0), rect("b", 20), rect("c", 40)])
+        self.items = {oid: obj.item for oid, obj in self.drawing_canvas.scene.objects.items()}
+
+    def test_unchanged_state_touches_nothing(self):
+        touched = self.reconciler.apply([rect("a", 0), rect("b", 20), rect("c", 40)])
+
+        self.assertEqual(touched, 0)
+
+    def test_single_change_keeps_other_items(self):
+        touched = self.reconciler.apply([rect("a", 0), rect("b", 25, fill="blue"), rect("c", 40)])
+
+        self.assertEqual(touched, 1)
+        fake = self.drawing_canvas.canvas
+        self.assertEqual(fake.items[self.items["b"]]["coords"], [25.0, 0.0, 35.0, 10.0])
+        self.assertEqual(fake.items[self.items["b"]]["options"]["fill"], "blue")
+        self.assertEqual({oid: obj.item for oid, obj in self.drawing_canvas.scene.objects.items()}, self.items)
+
+    def test_added_removed_and_restacked(self):
+        touched = self.reconciler.apply([rect("c", 40), rect("a", 0), rect("d", 60)])
+
+        scene = self.drawing_canvas.scene
+        self.assertEqual(scene.order, ["c", "a", "d"])
+        self.assertEqual(self.drawing_canvas.canvas.stack, [scene.objects[oid].item for oid in scene.order])
+        # b удалён, d создан, c переставлен
+        self.assertEqual(touched, 3)
+
+    def test_removed_options_return_to_tk_defaults(self):
+        line = {"id": "l", "type": "line", "coords": [0, 0, 50, 50], "tags": [],
+                "config": {"fill": "blue", "dash": "4 2", "arrow": "last", "key": "custom"}}
+        self.reconciler.apply([line])
+
+        touched = self.reconciler.apply([dict(line, config={"fill": "blue"})])
+
+        config = self.drawing_canvas.scene.objects["l"].config
+        self.assertEqual(touched, 1)
+        self.assertEqual((config["dash"], config["arrow"], config["key"]), ("", "none", "custom"))
+        self.assertEqual(self.reconciler.apply([dict(line, config={"fill": "blue"})]), 0)
+
+    def test_dropped_polygon_fill_returns_to_black(self):
+        polygon = {"id": "p", "type": "polygon", "coords": [0, 0, 10, 0, 5, 10], "tags": [],
+                   "config": {"fill": "red", "outline": "blue"}}
+        self.reconciler.apply([polygon])
+
+        self.reconciler.apply([dict(polygon, config={})])
+
+        config = self.drawing_canvas.scene.objects["p"].config
+        self.assertEqual((config["fill"], config["outline"]), ("black", ""))
+
+    def test_items_without_id_are_not_recreated(self):
+        anonymous = [dict(rect(None, 0), id=None), dict(rect(None, 0), id=None), dict(rect(None, 50), id=None)]
+        self.reconciler.apply(anonymous)
+        scene = self.drawing_canvas.scene
+        items = {oid: obj.item for oid, obj in scene.objects.items()}
+
+        touched = self.reconciler.apply(anonymous)
+
+        self.assertEqual(touched, 0)
+        self.assertEqual(len(scene.objects), 3)
+        self.assertEqual({oid: obj.item for oid, obj in scene.objects.items()}, items)
+
+    def test_longest_increasing_run(self):
+        self.assertEqual(longest_increasing_run([2, 0, 1, 3]), {1, 2, 3})
+        self.assertEqual(longest_increasing_run([]), set())
@@ -0,0 +1,96 @@
+import gc
+import tracemalloc
+import unittest
+
+from fake_canvas import make_drawing_canvas
+from reconciler import CanvasReconciler
+
+# Учитывается только память, выделенная кодом модели и холста (без буфера журнала pytest)
+TRACKED = [tracemalloc.Filter(True, f"*{name}") for name in
+           ("registry.py", "scene_model.py", "spatial_index.py", "canvas.py", "history.py")]
+
+
+def rect(oid, x):
+    return {"id": oid, "type": "rectangle", "coords": [x, 0, x + 10, 10],
+            "tags": ["movable", "shape"], "config": {"fill": "red"}}
+
+
+class TestObjectRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.scene = self.drawing_canvas.scene
+
+    def create(self, count):
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([rect(f"r{index}", index) for index in range(count)])
+        for oid in self.scene.objects:
+            self.scene.meta.set(oid, "shape", "triangle")
+            self.scene.meta.set(oid, "bold", True)
+
+    def cycle(self):
+        self.create(50)
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.remove_objects(list(self.scene.objects)[:25])
+            self.drawing_canvas.reset_canvas(notify=False)
+
+    def test_entries_follow_every_removal_path(self):
+        self.create(3)
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.remove_objects(["r0"])
+            # Удалённый участником и пересозданный объект начинает с чистой записи
+            CanvasReconciler(self.drawing_canvas).apply([rect("r2", 0)])
+            self.drawing_canvas.create_objects([rect("r2", 5)])
+
+        self.assertEqual(list(self.scene.meta), [])
+        self.scene.meta.set("r2", "bold", True)
+        self.drawing_canvas.clear_objects()
+        self.assertEqual(len(self.scene.meta), 0)
+
+    def test_undo_of_delete_restores_entry(self):
+        self.create(2)
+        self.drawing_canvas.history.clear()
+        self.drawing_canvas.remove_objects(["r1"])
+        self.drawing_canvas.bus.publish()
+        self.assertNotIn("r1", self.scene.meta)
+
+        self.drawing_canvas.history.undo()
+        self.assertEqual(self.scene.meta.get("r1", "shape"), "triangle")
+        self.assertTrue(self.scene.meta.get("r1", "bold"))
+
+        self.drawing_canvas.history.redo()
+        self.assertNotIn("r1", self.scene.meta)
+
+    def test_redo_of_create_restores_entry(self):
+        self.drawing_canvas.create_object("polygon", [0, 0, 10, 0, 5, 10], {"fill": "red"}, oid="p")
+        self.scene.meta.set("p", "shape", "triangle")
+        self.drawing_canvas.bus.publish()
+
+        self.drawing_canvas.history.undo()
+        self.assertNotIn("p", self.scene.meta)
+
+        self.drawing_canvas.history.redo()
+        self.assertEqual(self.scene.meta.get("p", "shape"), "triangle")
+
+    def test_memory_stays_flat_across_cycles(self):
+        for _ in range(5):
+            self.cycle()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.take_snapshot().filter_traces(TRACKED)
+            for _ in range(200):
+                self.cycle()
+            gc.collect()
+            after = tracemalloc.take_snapshot().filter_traces(TRACKED)
+            grown = sum(stat.size_diff for stat in after.compare_to(baseline, "filename"))
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(self.scene.meta), 0)
+        # 10000 созданных объектов; утечка хотя бы одной записи на объект дала бы сотни КБ
+        self.assertLess(grown, 64 * 1024)
+
+
+if __name__ == '__main__':
+    unittest.main()
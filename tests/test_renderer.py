@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from raster import RasterLayer
+from renderer import Renderer, load_font, parse_color, save_image, spline
+
+
+def item(item_type, coords, **config):
+    return {"id": None, "type": item_type, "coords": coords, "tags": [], "config": config}
+
+
+class TestRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.renderer = Renderer()
+
+    def render(self, drawings, size=(40, 40), **options):
+        document = {"background": "white", "drawings": drawings}
+        return np.asarray(self.renderer.render(document, *size, **options))
+
+    def test_line_width_is_honoured(self):
+        pixels = self.render([item("line", [0, 20, 40, 20], fill="black", width=6)], supersample=1)
+
+        dark = np.flatnonzero(pixels[:, 20, 0] < 128)
+        self.assertEqual(len(dark), 6)
+
+    def test_later_objects_are_drawn_on_top(self):
+        pixels = self.render([item("rectangle", [5, 5, 30, 30], fill="red", outline=""),
+                              item("rectangle", [10, 10, 35, 35], fill="blue", outline="")], supersample=1)
+
+        self.assertEqual(tuple(pixels[20, 20]), (0, 0, 255))
+        self.assertEqual(tuple(pixels[7, 7]), (255, 0, 0))
+
+    def test_outline_is_centred_on_the_edge_like_tk(self):
+        pixels = self.render([item("rectangle", [10, 10, 30, 30], outline="black", width=4)], supersample=1)
+
+        row = np.flatnonzero(pixels[20, :, 0] < 128)
+        self.assertEqual(row[0], 8)
+        self.assertEqual(row[-1], 32)
+
+    def test_supersampling_smooths_edges(self):
+        diagonal = [item("line", [0, 0, 40, 30], fill="black", width=3)]
+
+        aliased = self.render(diagonal, supersample=1)
+        smooth = self.render(diagonal, supersample=4)
+
+        self.assertEqual(len(np.unique(aliased[..., 0])), 2)
+        self.assertGreater(len(np.unique(smooth[..., 0])), 2)
+
+    def test_origin_and_scale_map_world_to_pixels(self):
+        pixels = self.render([item("rectangle", [100, 100, 110, 110], fill="red", outline="")],
+                             origin=(95.0, 95.0), scale=2.0, supersample=1)
+
+        self.assertEqual(tuple(pixels[15, 15]), (255, 0, 0))
+        self.assertEqual(tuple(pixels[5, 5]), (255, 255, 255))
+
+    def test_raster_lies_under_objects(self):
+        raster = RasterLayer(40, 40)
+        raster.pixels[:, :] = (0, 255, 0, 255)
+        document = {"background": "white", "raster": raster,
+                    "drawings": [item("rectangle", [0, 0, 10, 10], fill="red", outline="")]}
+
+        pixels = np.asarray(self.renderer.render(document, 40, 40, supersample=1))
+
+        self.assertEqual(tuple(pixels[5, 5]), (255, 0, 0))
+        self.assertEqual(tuple(pixels[30, 30]), (0, 255, 0))
+
+    def test_text_is_drawn_around_its_anchor(self):
+        pixels = self.render([item("text", [20, 20], text="WW", font="Arial 12 bold", fill="black")])
+
+        rows, columns = np.nonzero(pixels[..., 0] < 128)
+        self.assertTrue(abs(columns.mean() - 20) < 3 and abs(rows.mean() - 20) < 3)
+
+
+class TestCaches(unittest.TestCase):
+
+    def test_fonts_are_loaded_once(self):
+        self.assertIs(load_font("Arial", 17, True), load_font("Arial", 17, True))
+
+    def test_tk_colors(self):
+        self.assertEqual(parse_color("light blue"), (173, 216, 230))
+        self.assertEqual(parse_color("gray50"), (128, 128, 128))
+        self.assertEqual(parse_color("#ff0000"), (255, 0, 0))
+        self.assertIsNone(parse_color(""))
+
+    def test_spline_keeps_end_points(self):
+        points = spline([(0, 0), (10, 10), (20, 0)])
+
+        self.assertEqual(points[0], (0, 0))
+        self.assertEqual(points[-1], (20.0, 0.0))
+        self.assertGreater(len(points), 3)
+
+
+class TestSaveImage(unittest.TestCase):
+
+    def test_format_follows_extension(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        image = Image.new("RGB", (8, 8), "red")
+
+        for name, expected in (("a.png", "PNG"), ("b.webp", "WEBP"), ("c.jpg", "JPEG")):
+            path = os.path.join(directory, name)
+            save_image(image, path)
+            with Image.open(path) as saved:
+                self.assertEqual(saved.format, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
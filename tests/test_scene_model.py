@@ -0,0 +1,58 @@
+import unittest
+
+from scene_model import SceneModel, normalize_option
+
+
+class TestSceneModel(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = SceneModel()
+        self.rect = self.scene.add("rectangle", [0, 0, 10, 10], {"fill": "red"}, ("shape",), item=1)
+        self.line = self.scene.add("line", [0, 0, 5, 5], {"width": 2}, ("shape",), item=2)
+        self.scene.collect_changes()
+
+    def test_snapshot_keeps_stacking_order(self):
+        snapshot = self.scene.snapshot()
+
+        self.assertEqual([obj["id"] for obj in snapshot], [self.rect.oid, self.line.oid])
+        self.assertEqual(snapshot[0]["coords"], [0.0, 0.0, 10.0, 10.0])
+        self.assertEqual(snapshot[0]["config"], {"fill": "red"})
+
+    def test_changes_contain_only_dirty_objects(self):
+        self.scene.move(self.rect.oid, 5, 1)
+
+        changes = self.scene.collect_changes()
+
+        self.assertEqual([obj["id"] for obj in changes["changed"]], [self.rect.oid])
+        self.assertEqual(changes["changed"][0]["coords"], [5.0, 1.0, 15.0, 11.0])
+        self.assertNotIn("order", changes)
+        self.assertEqual(self.scene.collect_changes()["changed"], [])
+
+    def test_remove_and_order_are_reported(self):
+        self.scene.raise_to_top(self.rect.oid)
+        self.scene.remove(self.line.oid)
+
+        changes = self.scene.collect_changes()
+
+        self.assertEqual(changes["removed"], [self.line.oid])
+        self.assertEqual(changes["order"], [self.rect.oid])
+        self.assertIsNone(self.scene.get_by_item(2))
+
+    def test_remove_many_rebuilds_order_once(self):
+        extra = self.scene.add("oval", [20, 20, 30, 30], {}, (), item=3)
+        self.scene.collect_changes()
+
+        removed = self.scene.remove_many([self.rect.oid, extra.oid, "missing"])
+
+        self.assertEqual([obj.oid for obj in removed], [self.rect.oid, extra.oid])
+        self.assertEqual(self.scene.order, [self.line.oid])
+        self.assertEqual(self.scene.layer_span(self.line.layer), (0, 1))
+        self.assertEqual(set(self.scene.index.query_rect(0, 0, 40, 40)), {self.line.oid})
+        changes = self.scene.collect_changes()
+        self.assertEqual(sorted(changes["removed"]), sorted([self.rect.oid, extra.oid]))
+
+    def test_font_tuple_is_normalized(self):
+        self.scene.configure(self.rect.oid, font=("Times New Roman", 14, "bold"))
+
+        self.assertEqual(self.rect.config["font"], "{Times New Roman} 14 bold")
+        self.assertEqual(normalize_option("red"), "red")
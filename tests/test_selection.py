@@ -0,0 +1,78 @@
+import unittest
+
+from canvas import SELECTED_TAG
+from fake_canvas import make_drawing_canvas
+
+
+def rect(oid, x, tags=("movable", "shape")):
+    return {"id": oid, "type": "rectangle", "coords": [x, 0, x + 10, 10],
+            "tags": list(tags), "config": {"fill": "red"}}
+
+
+class TestSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([rect(f"r{index}", index * 20) for index in range(300)])
+        self.fake = self.drawing_canvas.canvas
+
+    def tagged(self):
+        return {oid for oid, obj in self.drawing_canvas.scene.objects.items()
+                if obj.item is not None and SELECTED_TAG in self.fake.items[obj.item]["tags"]}
+
+    def test_move_selection_is_one_tk_call(self):
+        oids = [f"r{index}" for index in range(200)]
+        self.drawing_canvas.select(oids)
+        calls = self.fake.calls
+
+        self.drawing_canvas.move_selection(5, 5)
+
+        # Один move по тегу выделения и один — для рамки
+        self.assertEqual(self.fake.calls - calls, 2)
+        scene = self.drawing_canvas.scene
+        self.assertEqual(scene.objects["r0"].coords, [5.0, 5.0, 15.0, 15.0])
+        self.assertEqual(scene.objects["r250"].coords, [5000.0, 0.0, 5010.0, 10.0])
+        first = scene.objects["r0"].item
+        self.assertEqual(self.fake.items[first]["coords"], [5.0, 5.0, 15.0, 15.0])
+
+    def test_group_is_selected_as_unit(self):
+        self.drawing_canvas.select(["r1", "r2", "r3"])
+        group_tag = self.drawing_canvas.group_selection()
+        self.drawing_canvas.clear_selection()
+
+        self.drawing_canvas.select(["r2"])
+
+        self.assertEqual(self.drawing_canvas.selection, {"r1", "r2", "r3"})
+        self.assertIn(group_tag, self.drawing_canvas.scene.objects["r1"].tags)
+        self.assertEqual(self.tagged(), {"r1", "r2", "r3"})
+
+        self.drawing_canvas.ungroup_selection()
+        self.drawing_canvas.select(["r2"])
+        self.assertEqual(self.drawing_canvas.selection, {"r2"})
+
+    def test_drag_of_selection_is_one_history_step(self):
+        self.drawing_canvas.select(["r1", "r2"])
+        for _ in range(10):
+            self.drawing_canvas.move_selection(1, 0)
+        self.drawing_canvas.bus.publish_op({"type": "transform", "data": {"ids": ["r1", "r2"], "dx": 10, "dy": 0}})
+
+        self.drawing_canvas.history.undo()
+        self.assertEqual(self.drawing_canvas.scene.objects["r1"].coords, [20.0, 0.0, 30.0, 10.0])
+
+    def test_remote_transform(self):
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.translate_objects(["r1", "missing"], 3, -2)
+
+        self.assertEqual(self.drawing_canvas.scene.objects["r1"].coords, [23.0, -2.0, 33.0, 8.0])
+        self.assertFalse(self.drawing_canvas.history.can_undo())
+
+    def test_removed_objects_leave_selection(self):
+        self.drawing_canvas.select(["r1", "r2"])
+        self.drawing_canvas.remove_objects(["r1"])
+
+        self.assertEqual(self.drawing_canvas.selection, {"r2"})
+
+
+if __name__ == '__main__':
+    unittest.main()
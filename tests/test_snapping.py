@@ -0,0 +1,100 @@
+import math
+import unittest
+
+from fake_canvas import make_drawing_canvas
+from snapping import GUIDE_TAG, Snapper
+
+
+def rect(oid, x1, y1, x2, y2):
+    return {"id": oid, "type": "rectangle", "coords": [x1, y1, x2, y2],
+            "tags": ["movable"], "config": {"fill": "red"}}
+
+
+class TestSnapper(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([
+                rect("moving", 0, 0, 10, 10),
+                rect("target", 100, 200, 140, 240),
+            ])
+        self.fake = self.drawing_canvas.canvas
+        self.snapper = Snapper(self.drawing_canvas)
+
+    def guides(self):
+        return [item for item in self.fake.items.values() if GUIDE_TAG in item["tags"]]
+
+    def test_snaps_edges_and_centers_to_other_objects(self):
+        self.snapper.begin(["moving"])
+
+        # Левый край притягивается к левому краю цели, центр по y — к её центру
+        self.assertEqual(self.snapper.snap(98, 213), (100, 215))
+        self.assertEqual(len(self.guides()), 2)
+
+        # Далеко от всех краёв — сдвиг не меняется, направляющих нет
+        self.assertEqual(self.snapper.snap(60, 60), (60, 60))
+        self.assertEqual(self.guides(), [])
+
+    def test_tolerance_follows_zoom(self):
+        self.drawing_canvas.viewport.scale = 4
+        self.snapper.begin(["moving"])
+
+        self.assertEqual(self.snapper.snap(98, 0), (98, 0))
+        self.assertEqual(self.snapper.snap(99, 0), (100, 0))
+
+    def test_grid_is_used_without_guides(self):
+        self.snapper.grid_enabled = True
+        self.snapper.begin(["moving"])
+
+        self.assertEqual(self.snapper.snap(38, 63), (40, 60))
+
+        self.snapper.end()
+        self.assertEqual(self.snapper.snap(38, 63), (38, 63))
+        self.assertEqual(self.guides(), [])
+
+    def test_only_objects_in_view_are_indexed(self):
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([rect("far", 5000, 5000, 5010, 5010)])
+        self.snapper.begin(["moving"])
+
+        self.assertEqual(len(self.snapper.x_index), 3)
+        self.assertEqual(self.snapper.snap(4998, 0), (4998, 0))
+
+        self.drawing_canvas.viewport.offset_x = self.drawing_canvas.viewport.offset_y = 4900
+        self.snapper.begin(["moving"])
+        self.assertEqual(len(self.snapper.x_index), 3)
+        self.assertEqual(self.snapper.snap(4998, 0), (5000, 0))
+
+    def test_lookup_cost_does_not_grow_with_objects(self):
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([rect(f"r{index}", index * 7.3, index % 50 * 11.1,
+                                                     index * 7.3 + 5, index % 50 * 11.1 + 5)
+                                                for index in range(20000)])
+        # Весь холст в виде: индексируются все объекты
+        self.drawing_canvas.viewport.scale = 0.005
+        self.snapper.begin(["moving"])
+        values = CountingList(self.snapper.x_index.values)
+        self.snapper.x_index.values = values
+
+        for step in range(200):
+            self.snapper.snap(step * 13.7, step * 3.1)
+
+        # На движение: двоичный поиск для трёх краёв рамки и два — для концов направляющей,
+        # то есть O(log n) просмотренных значений, а не все 60 тысяч
+        per_event = values.reads / 200
+        self.assertEqual(len(values), 60003)
+        self.assertLess(per_event, 8 * math.log2(len(values)))
+
+
+class CountingList(list):
+    """Список, считающий обращения к элементам: сколько значений индекса просмотрено."""
+
+    reads = 0
+
+    def __getitem__(self, index):
+        self.reads += 1
+        return super().__getitem__(index)
+
+if __name__ == '__main__':
+    unittest.main()
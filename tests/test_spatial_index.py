@@ -0,0 +1,66 @@
+import unittest
+
+from scene_model import SceneModel
+from spatial_index import GridIndex, distance_to_segment, point_in_polygon
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def test_rect_query_and_incremental_update(self):
+        index = GridIndex(cell_size=10)
+        index.insert("a", (0, 0, 5, 5))
+        index.insert("b", (100, 100, 120, 120))
+
+        self.assertEqual(index.query_rect(-1, -1, 6, 6), {"a"})
+        index.update("a", (200, 200, 205, 205))
+        self.assertEqual(index.query_rect(-1, -1, 6, 6), set())
+        self.assertEqual(index.query_point(202, 202), {"a"})
+
+        index.remove("a")
+        self.assertEqual(index.query_rect(0, 0, 1000, 1000), {"b"})
+        self.assertEqual(index.query_inside(90, 90, 130, 130), ["b"])
+
+    def test_large_objects_are_always_candidates(self):
+        index = GridIndex(cell_size=1)
+        index.insert("huge", (0, 0, 1000, 1000))
+
+        self.assertEqual(index.query_point(500, 500), {"huge"})
+        self.assertEqual(index.cells, {})
+
+    def test_geometry_helpers(self):
+        self.assertAlmostEqual(distance_to_segment(5, 3, 0, 0, 10, 0), 3)
+        self.assertTrue(point_in_polygon(5, 5, [0, 0, 10, 0, 10, 10, 0, 10]))
+        self.assertFalse(point_in_polygon(15, 5, [0, 0, 10, 0, 10, 10, 0, 10]))
+
+
+class TestScenePicking(unittest.TestCase):
+
+    def setUp(self):
+        self.scene = SceneModel()
+
+    def test_pick_uses_exact_line_geometry(self):
+        line = self.scene.add("line", [0, 0, 100, 100], {"width": 2}, ("shape",))
+
+        self.assertIs(self.scene.pick(50, 51), line)
+        # внутри ограничивающего прямоугольника, но далеко от отрезка
+        self.assertIsNone(self.scene.pick(90, 10))
+
+    def test_pick_returns_topmost_and_follows_moves(self):
+        bottom = self.scene.add("rectangle", [0, 0, 50, 50], {"fill": "red"}, ("shape",))
+        top = self.scene.add("oval", [0, 0, 50, 50], {"fill": "blue"}, ("shape",))
+
+        self.assertIs(self.scene.pick(25, 25), top)
+        # угол прямоугольника вне эллипса
+        self.assertIs(self.scene.pick(2, 2), bottom)
+
+        self.scene.move(top.oid, 200, 0)
+        self.assertIs(self.scene.pick(25, 25), bottom)
+        self.assertIs(self.scene.pick(225, 25), top)
+
+    def test_query_rect_in_stacking_order(self):
+        first = self.scene.add("rectangle", [0, 0, 10, 10], {}, ())
+        second = self.scene.add("rectangle", [5, 5, 15, 15], {}, ())
+        self.scene.add("rectangle", [500, 500, 510, 510], {}, ())
+
+        self.assertEqual(self.scene.query_rect(0, 0, 20, 20), [first, second])
+        self.assertEqual(self.scene.query_rect(-5, -5, 12, 12, inside=True), [first])
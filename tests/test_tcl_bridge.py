@@ -0,0 +1,96 @@
+import tkinter
+import unittest
+
+from tcl_bridge import BulkCanvas, tcl_quote
+
+# Поддельная команда холста на Tcl: хранит элементы в массиве и ведёт журнал вызовов
+FAKE_CANVAS = r"""
+set next 1
+set calls 0
+proc .c {cmd args} {
+    global items next calls
+    incr calls
+    switch -- $cmd {
+        create {
+            set type [lindex $args 0]
+            set rest [lrange $args 1 end]
+            set coords {}
+            while {[llength $rest] && ![string match -* [lindex $rest 0]]} {
+                lappend coords [lindex $rest 0]
+                set rest [lrange $rest 1 end]
+            }
+            set id $next
+            incr next
+            set items($id,type) $type
+            set items($id,coords) $coords
+            set items($id,opts) $rest
+            return $id
+        }
+        coords {
+            if {[llength $args] == 1} { return $items([lindex $args 0],coords) }
+            set items([lindex $args 0],coords) [lrange $args 1 end]
+        }
+        itemconfigure {
+            set id [lindex $args 0]
+            if {[llength $args] == 1} {
+                set result {}
+                foreach {option value} $items($id,opts) {
+                    lappend result [list $option {} {} {} $value]
+                }
+                return $result
+            }
+            foreach {option value} [lrange $args 1 end] {
+                dict set items($id,opts) $option $value
+            }
+        }
+        type { return $items([lindex $args 0],type) }
+        gettags { return [dict get $items([lindex $args 0],opts) -tags] }
+    }
+}
+"""
+
+
+class StubCanvas:
+    def __init__(self, interpreter):
+        self.tk = interpreter
+
+    def __str__(self):
+        return ".c"
+
+
+class TestTclBridge(unittest.TestCase):
+
+    def setUp(self):
+        self.tcl = tkinter.Tcl()
+        self.tcl.eval(FAKE_CANVAS)
+        self.bridge = BulkCanvas(StubCanvas(self.tcl.tk))
+
+    def test_quote_survives_special_characters(self):
+        for value in ["plain", "two words", "{unbalanced", "$x [cmd] \\ \"q\";\nnext", ""]:
+            self.assertEqual(self.tcl.eval("lindex [list " + tcl_quote(value) + "] 0"), value)
+
+    def test_create_and_read_in_one_script_each(self):
+        items = self.bridge.create_many([
+            ("rectangle", [0, 0, 10, 10], {"fill": "light blue"}, ("shape", "movable")),
+            ("text", [5, 5], {"text": "Hello {world}", "font": "{Times New Roman} 14 bold"}, ("text_box",)),
+        ])
+        self.assertEqual(items, [1, 2])
+
+        self.tcl.eval("set calls 0")
+        data = self.bridge.read_many(items)
+
+        self.assertEqual(data[0]["type"], "rectangle")
+        self.assertEqual(data[0]["coords"], [0.0, 0.0, 10.0, 10.0])
+        self.assertEqual(data[0]["tags"], ["shape", "movable"])
+        self.assertEqual(data[0]["config"]["fill"], "light blue")
+        self.assertEqual(data[1]["config"]["text"], "Hello {world}")
+        self.assertEqual(data[1]["config"]["font"], "{Times New Roman} 14 bold")
+
+    def test_apply_many(self):
+        items = self.bridge.create_many([("line", [0, 0, 1, 1], {"width": 2}, ())] * 3)
+
+        self.bridge.apply_many(coords={items[1]: [5, 5, 6, 6]}, options={items[2]: {"fill": "red"}})
+
+        data = self.bridge.read_many(items)
+        self.assertEqual(data[1]["coords"], [5.0, 5.0, 6.0, 6.0])
+        self.assertEqual(data[2]["config"]["fill"], "red")
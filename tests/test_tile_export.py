@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from raster import RasterLayer
+from renderer import Renderer
+from tile_export import TiledExporter
+
+
+def item(item_type, coords, **config):
+    return {"id": None, "type": item_type, "coords": coords, "tags": [], "config": config}
+
+
+def make_document():
+    raster = RasterLayer(60, 60)
+    raster.pixels[10:50, 10:50] = (0, 200, 0, 255)
+    return {"background": "white", "raster": raster, "drawings": [
+        item("rectangle", [5, 5, 70, 40], fill="red", outline="black", width=3),
+        item("line", [0, 60, 99, 10, 50, 69], fill="blue", width=4, smooth="true", capstyle="round"),
+        item("oval", [60, 30, 95, 65], fill="yellow", outline="black"),
+        item("text", [64, 33], text="Плитки", font="Arial 10 bold", fill="black"),
+        item("rectangle", [80, 2, 84, 6], fill="black", outline=""),
+    ]}
+
+
+def assert_nearly_equal(test, actual, expected):
+    """Сглаженные края в плитке могут округлиться иначе, чем в целом изображении, — на единицы пикселей."""
+    different = np.any(actual != expected, axis=-1)
+    test.assertLess(different.mean(), 0.005)
+
+
+class TestTiledExport(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.exporter = TiledExporter(tile_size=32, workers=0)
+        self.addCleanup(self.exporter.close)
+        self.document = make_document()
+
+    def export(self, name="poster.png", **options):
+        path = os.path.join(self.directory, name)
+        stats = self.exporter.export(self.document, path, 100, 70, **options)
+        return path, stats
+
+    def test_tiles_match_single_render(self):
+        path, stats = self.export()
+
+        expected = np.asarray(Renderer().render(self.document, 100, 70))
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (100, 70))
+            assert_nearly_equal(self, np.asarray(image.convert("RGB")), expected)
+        self.assertEqual(stats.rendered, 12)
+        self.assertFalse(os.path.exists(path + ".part"))
+
+    def test_scaled_export_matches_single_render(self):
+        path, _ = self.export(scale=2.0, origin=(10.0, 5.0))
+
+        expected = np.asarray(Renderer().render(self.document, 100, 70, origin=(10.0, 5.0), scale=2.0))
+        with Image.open(path) as image:
+            assert_nearly_equal(self, np.asarray(image), expected)
+
+    def test_tile_gets_only_intersecting_objects(self):
+        tiles = self.exporter.tiles(100, 70)
+        assigned = self.exporter.assign(self.document["drawings"], tiles, (0.0, 0.0), 1.0)
+
+        self.assertEqual(assigned[2, 0], [0, 1, 2, 3, 4])
+        self.assertEqual(assigned[0, 2], [1])
+
+    def test_small_edit_rerenders_only_affected_tiles(self):
+        self.export()
+        self.document["drawings"][4]["config"]["fill"] = "green"
+
+        path, stats = self.export()
+
+        self.assertEqual(stats.rendered, 1)
+        self.assertEqual(stats.reused, 11)
+        with Image.open(path) as image:
+            self.assertEqual(image.getpixel((82, 4)), (0, 128, 0))
+
+    def test_other_formats_are_assembled(self):
+        for name, expected in (("poster.jpeg", "JPEG"), ("poster.webp", "WEBP")):
+            path, _ = self.export(name)
+            with Image.open(path) as image:
+                self.assertEqual((image.format, image.size), (expected, (100, 70)))
+
+    def test_process_pool(self):
+        exporter = TiledExporter(tile_size=64, workers=2)
+        self.addCleanup(exporter.close)
+        path = os.path.join(self.directory, "pool.png")
+
+        exporter.export(self.document, path, 100, 70)
+
+        expected = np.asarray(Renderer().render(self.document, 100, 70))
+        with Image.open(path) as image:
+            assert_nearly_equal(self, np.asarray(image), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
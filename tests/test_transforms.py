@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from fake_canvas import make_drawing_canvas
+from transforms import BatchTransforms, affine, distribute_offsets
+
+
+def rect(oid, x1, y1, x2, y2, obj_type="rectangle"):
+    return {"id": oid, "type": obj_type, "coords": [x1, y1, x2, y2],
+            "tags": ["movable"], "config": {"fill": "red"}}
+
+
+class TestTransformMath(unittest.TestCase):
+
+    def test_distribute_keeps_outer_objects_and_equalizes_gaps(self):
+        boxes = np.array([[0, 0, 10, 10], [12, 0, 32, 10], [90, 0, 100, 10], [40, 0, 45, 10]], dtype=float)
+
+        moved = boxes[:, [0, 2]] + distribute_offsets(boxes, 0)[:, [0]]
+
+        self.assertEqual(moved[0].tolist(), [0, 10])
+        self.assertEqual(moved[2].tolist(), [90, 100])
+        # Промежутки: (100 - 0 - 45) / 3 = 55 / 3
+        order = np.argsort(moved[:, 0])
+        gaps = moved[order[1:], 0] - moved[order[:-1], 1]
+        np.testing.assert_allclose(gaps, [55 / 3] * 3)
+
+
+class TestBatchTransforms(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        with self.drawing_canvas.bus.muted():
+            self.drawing_canvas.create_objects([
+                rect("a", 0, 0, 40, 20),
+                rect("b", 100, 50, 120, 90),
+                {"id": "p", "type": "polygon", "coords": [200, 0, 240, 0, 200, 20],
+                 "tags": ["movable"], "config": {"fill": "blue"}},
+            ])
+        self.transforms = BatchTransforms(self.drawing_canvas)
+        self.ops = []
+        self.drawing_canvas.bus.subscribe(lambda: self.ops.append(self.drawing_canvas.bus.ops))
+
+    def coords(self, oid):
+        return self.drawing_canvas.scene.objects[oid].coords
+
+    def test_align_left(self):
+        self.drawing_canvas.select(["a", "b", "p"])
+        self.transforms.align("left")
+
+        self.assertEqual(self.coords("b"), [0.0, 50.0, 20.0, 90.0])
+        self.assertEqual(self.coords("p"), [0.0, 0.0, 40.0, 0.0, 0.0, 20.0])
+        # Объект, который уже стоит у края, в операцию не попадает
+        self.assertEqual(len(self.ops), 1)
+        self.assertEqual(self.ops[0][0]["type"], "patch")
+        self.assertEqual(set(self.ops[0][0]["data"]["coords"]), {"b", "p"})
+
+    def test_quarter_turn_swaps_box_and_rotates_points(self):
+        self.drawing_canvas.select(["a"])
+        self.transforms.rotate(90)
+        # Центр (20, 10) на месте, стороны поменялись местами
+        self.assertEqual(self.coords("a"), [10.0, -10.0, 30.0, 30.0])
+
+        self.drawing_canvas.select(["p"])
+        self.transforms.rotate(90, pivot=(200, 0))
+        np.testing.assert_allclose(self.coords("p"), [200, 0, 200, 40, 180, 0], atol=1e-9)
+
+    def test_image_keeps_aspect_ratio(self):
+        image = self.drawing_canvas.scene.add("image", [0, 0, 40, 20], {"key": "k"}, ["movable"])
+        matrix = np.array([[2.0, 0.0], [0.0, 0.5]])
+
+        coords = affine([image], matrix, (0, 0))[image.oid]
+
+        self.assertAlmostEqual((coords[2] - coords[0]) / (coords[3] - coords[1]), 2.0)
+
+    def test_scale_and_flip(self):
+        self.drawing_canvas.select(["b"])
+        self.transforms.scale(2, pivot=(100, 50))
+        self.assertEqual(self.coords("b"), [100.0, 50.0, 140.0, 130.0])
+
+        self.drawing_canvas.select(["p"])
+        self.transforms.flip("x")
+        self.assertEqual(self.coords("p"), [240.0, 0.0, 200.0, 0.0, 240.0, 20.0])
+
+    def test_transform_is_one_history_step(self):
+        self.drawing_canvas.select(["a", "b", "p"])
+        self.transforms.rotate(30)
+
+        self.drawing_canvas.history.undo()
+
+        self.assertEqual(self.coords("a"), [0.0, 0.0, 40.0, 20.0])
+        self.assertEqual(self.coords("p"), [200.0, 0.0, 240.0, 0.0, 200.0, 20.0])
+        self.assertFalse(self.drawing_canvas.history.can_undo())
+
+
+if __name__ == '__main__':
+    unittest.main()
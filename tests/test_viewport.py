@@ -0,0 +1,75 @@
+import unittest
+
+from fake_canvas import make_drawing_canvas
+from viewport import Viewport, scale_font
+
+
+def rect(oid, x, y=0):
+    return {"id": oid, "type": "rectangle", "coords": [x, y, x + 10, y + 10],
+            "tags": ["movable", "shape"], "config": {"fill": "red", "width": 2}}
+
+
+class TestViewport(unittest.TestCase):
+
+    def test_round_trip_after_pan_and_zoom(self):
+        viewport = Viewport()
+        viewport.pan(30, -20)
+        viewport.zoom(2.0, 100, 50)
+
+        screen = viewport.to_screen([10.0, 15.0])
+        self.assertEqual(viewport.to_world(*screen), (10.0, 15.0))
+
+    def test_zoom_keeps_point_under_cursor(self):
+        viewport = Viewport()
+        before = viewport.to_world(120, 80)
+        viewport.zoom(3.0, 120, 80)
+
+        self.assertEqual(viewport.to_world(120, 80), before)
+
+    def test_scale_font(self):
+        self.assertEqual(scale_font("{Times New Roman} 14 bold", 2), "{Times New Roman} 28 bold")
+        self.assertEqual(scale_font("Helvetica -12", 0.5), "Helvetica -6")
+
+
+class TestCulling(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing_canvas = make_drawing_canvas()
+        self.drawing_canvas.create_objects([rect("near", 10), rect("far", 5000)])
+
+    def test_only_visible_objects_are_materialized(self):
+        scene = self.drawing_canvas.scene
+
+        self.assertIsNotNone(scene.objects["near"].item)
+        self.assertIsNone(scene.objects["far"].item)
+        self.assertEqual(len(self.drawing_canvas.canvas.items), 1)
+        self.assertEqual(len(scene.snapshot()), 2)
+
+    def test_pan_materializes_and_drops_items(self):
+        self.drawing_canvas.pan(-4900, 0)
+
+        scene = self.drawing_canvas.scene
+        self.assertIsNone(scene.objects["near"].item)
+        far = scene.objects["far"].item
+        self.assertEqual(self.drawing_canvas.canvas.items[far]["coords"], [100.0, 0.0, 110.0, 10.0])
+
+    def test_zoom_rescales_from_model(self):
+        self.drawing_canvas.zoom(2.0, 0, 0)
+
+        item = self.drawing_canvas.scene.objects["near"].item
+        fake_item = self.drawing_canvas.canvas.items[item]
+        self.assertEqual(fake_item["coords"], [20.0, 0.0, 40.0, 20.0])
+        self.assertEqual(fake_item["options"]["width"], 4.0)
+        # Модель хранит мировые значения
+        self.assertEqual(self.drawing_canvas.scene.objects["near"].coords, [10.0, 0.0, 20.0, 10.0])
+
+    def test_update_of_culled_object_touches_model_only(self):
+        calls = self.drawing_canvas.canvas.calls
+        self.drawing_canvas.update_objects(coords={"far": [6000, 0, 6010, 10]})
+
+        self.assertEqual(self.drawing_canvas.canvas.calls, calls)
+        self.assertEqual(self.drawing_canvas.scene.objects["far"].coords, [6000.0, 0.0, 6010.0, 10.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import tkinter as tk
-from tkinter import simpledialog, colorchooser, font, messagebox
-from typing import Dict, Tuple, List, Optional, Any
+from tkinter import simpledialog, colorchooser, messagebox
+from typing import Tuple, List, Optional, Any
 from canvas import DrawingCanvas
+from fonts import fonts, parse_font
+from font_picker import FontPicker
 from localization import LocalizationManager
 from logger import logger
 
@@ -24,9 +26,6 @@ class TextBox:
         self.font = font
         self.color = color
 
-        self.text_styles: Dict[int, Dict[str, bool]] = {}
-        self.text_boxes: Dict[int, Dict[str, Any]] = {}
-
     def update_text(self, new_text: str) -> None:
         """
         Метод обновляет текст, если он уже создан.
@@ -57,9 +56,9 @@ class TextBox:
         new_color = colorchooser.askcolor(title=_("choose_text_color"))[1]
         if new_color:
             if clicked_text:
-                self.canvas.canvas.itemconfig(clicked_text, fill=new_color)
+                self.canvas.configure_object(clicked_text, fill=new_color)
                 logger.info(f"Изменён цвет текста id={clicked_text} на {new_color}")
-                self._update_canvas_state()
+                self.canvas.bus.publish()
             else:
                 self.update_color(new_color)
 
@@ -81,9 +80,9 @@ class TextBox:
             if clicked_text:
                 font_attributes = self.text_font_sync(clicked_text)
                 font_attributes[1] = size
-                self.canvas.canvas.itemconfig(clicked_text, font=tuple(font_attributes))
+                self.canvas.configure_object(clicked_text, font=tuple(font_attributes))
                 logger.info(f"Изменён размер текста id={clicked_text} на {size}")
-                self._update_canvas_state()
+                self.canvas.bus.publish()
             else:
                 self.font = (self.font[0], size)
                 logger.info(f"Установлен размер текста по умолчанию: {size}")
@@ -103,53 +102,39 @@ class TextBox:
 
     def create_text_box(self) -> None:
         """
-        Метод создаёт новый текстовый блок и сохраняет его ID в словаре.
+        Метод создаёт новый текстовый блок.
+        Положение (x, y) задано в точках экрана и переводится в координаты сцены.
         """
-        text_id = self.canvas.canvas.create_text(
-            self.x,
-            self.y,
-            text=self.text,
-            font=self.font,
-            fill=self.color,
+        text_id = self.canvas.create_object(
+            "text",
+            list(self.canvas.to_world(self.x, self.y)),
+            {"text": self.text, "font": self.font, "fill": self.color},
             tags=("movable", "erasable", "text_box"))
-        self.text_boxes[text_id] = {"text": self.text, "font": self.font, "fill": self.color}
-        self.text_styles[text_id] = {"bold": False}
 
         logger.info(
             f"Создан текстовый блок id={text_id}, "
             f"текст='{self.text}', шрифт={self.font}, цвет={self.color}"
         )
 
-        self._update_canvas_state()
+        self.canvas.bus.publish()
 
     def split_text_font_attributes(self, clicked_text: int) -> Tuple[str, Optional[int], Optional[str], Optional[str]]:
         """
         Метод помогает отслеживать атрибуты шрифта текста.
+        Строка шрифта разбирается сервисом шрифтов (с кэшем разобранных строк).
         """
-        font_attr_string = self.canvas.canvas.itemcget(clicked_text, "font")
-        font_attributes = font_attr_string.split()
-
-        font_name_parts: List[str] = []
-        font_size: Optional[int] = None
-        font_style_1: Optional[str] = None
-        font_style_2: Optional[str]
-
-        for attr in font_attributes:
-            if attr.isdigit():
-                font_size = attr
-                break
-            else:
-                font_name_parts.append(attr)
+        descriptor = parse_font(self.canvas.object_of(clicked_text).config.get("font", ""))
+        styles = descriptor.styles + (None, None)
+        return descriptor.family, descriptor.size, styles[0], styles[1]
 
-        font_name = " ".join(font_name_parts)
-
-        size_index = font_attributes.index(str(font_size))
-        styles = font_attributes[size_index + 1:]
-
-        font_style_1 = styles[0] if len(styles) > 0 else None
-        font_style_2 = styles[1] if len(styles) > 1 else None
-
-        return font_name, font_size, font_style_1, font_style_2
+    def text_style(self, clicked_text: int, style: str) -> bool:
+        """
+        Включён ли стиль у текстового блока. Пока стиль не переключали,
+        он определяется по шрифту (например, у текста из файла или от другого участника).
+        """
+        oid = self.canvas.object_of(clicked_text).oid
+        styles = self.split_text_font_attributes(clicked_text)[2:]
+        return self.canvas.scene.meta.get(oid, style, style in styles)
 
     def text_font_sync(self, clicked_text: int) -> List[Any]:
         """
@@ -158,7 +143,7 @@ class TextBox:
         font_name, font_size, font_style_1, font_style_2 = self.split_text_font_attributes(clicked_text)
         font_attributes: List[Any] = [font_name, font_size]
 
-        if self.text_styles[clicked_text]["bold"]:
+        if self.text_style(clicked_text, "bold"):
             font_attributes.append("bold")
 
         return font_attributes
@@ -167,62 +152,34 @@ class TextBox:
         """
         Метод изменяет стиль текста (например, жирный).
         """
-        if clicked_text not in self.text_styles:
-            self.text_styles[clicked_text] = {"bold": False}
-
-        self.text_styles[clicked_text][style] = not self.text_styles[clicked_text][style]
+        oid = self.canvas.object_of(clicked_text).oid
+        self.canvas.scene.meta.set(oid, style, not self.text_style(clicked_text, style))
         font_attributes = self.text_font_sync(clicked_text)
 
-        self.canvas.canvas.itemconfig(clicked_text, font=tuple(font_attributes))
+        self.canvas.configure_object(clicked_text, font=tuple(font_attributes))
         logger.info(f"Изменён стиль текста id={clicked_text}: {style}")
 
-        self._update_canvas_state()
+        self.canvas.bus.publish()
 
     def choose_font_family(self, clicked_text: Optional[int] = None) -> None:
         """
-        Метод открывает окно с полосой прокрутки для выбора шрифта.
+        Метод открывает окно выбора шрифта с поиском.
+        Список семейств берётся из кэша сервиса шрифтов.
         """
-        _ = self.loc.gettext
-        self.font_window = tk.Toplevel(self.canvas.canvas)
-        self.font_window.title(_("choose_font"))
-
-        self.font_listbox = tk.Listbox(self.font_window)
-        self.font_listbox.pack(side="right", fill="both", expand=True)
+        current = self.split_text_font_attributes(clicked_text)[0] if clicked_text else parse_font(self.font).family
+        FontPicker(self.canvas.canvas, fonts.families(), self.loc,
+                   on_choose=lambda family: self.update_font(family, clicked_text), current=current)
 
-        scrollbar = tk.Scrollbar(self.font_window, orient="vertical", command=self.font_listbox.yview)
-        scrollbar.pack(side="top", fill="y")
-        self.font_listbox.config(yscrollcommand=scrollbar.set)
-
-        for family in font.families():
-            self.font_listbox.insert("end", family)
-        self.font_listbox.bind("<<ListboxSelect>>", lambda event: self.update_font(event, clicked_text))
-
-    def update_font(self, event=None, clicked_text: Optional[int] = None) -> None:
+    def update_font(self, selected_font: str, clicked_text: Optional[int] = None) -> None:
         """
         Метод обновляет шрифт текста.
         """
-        if not self.font_listbox.curselection():
-            return
-
-        selected_font = self.font_listbox.get(self.font_listbox.curselection())
         if clicked_text:
             font_attributes = self.text_font_sync(clicked_text)
             font_attributes[0] = selected_font
-            self.canvas.canvas.itemconfig(clicked_text, font=tuple(font_attributes))
+            self.canvas.configure_object(clicked_text, font=tuple(font_attributes))
             logger.info(f"Изменён шрифт текста id={clicked_text} на '{selected_font}'")
-            self._update_canvas_state()
+            self.canvas.bus.publish()
         else:
-            self.font = selected_font
-        self.font_window.destroy()
-
-    def _update_canvas_state(self):
-        """Вспомогательный метод для отправки состояния холста"""
-        if hasattr(self.canvas.root, 'network') and self.canvas.root.network.connected:
-            items_data = self.canvas.root.file_manager.objects_data_collector()
-            self.canvas.root.network.send({
-                'type': 'draw',
-                'data': {
-                    'drawings': items_data,
-                    'background': self.canvas.bg
-                }
-            })
\ No newline at end of file
+            self.font = (selected_font,) + parse_font(self.font).to_tk()[1:]
+            logger.info(f"Установлен шрифт по умолчанию: '{selected_font}'")
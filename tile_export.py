@@ -0,0 +1,302 @@
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import weakref
+import zlib
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from PIL import Image
+from images import image_keys
+from raster import RasterLayer
+from renderer import SUPERSAMPLE, Renderer, format_for_path, item_bounds, save_image
+from logger import logger
+
+TILE_SIZE = 1024
+# Запас вокруг границ объекта в пикселях изображения: сглаживание и округление координат
+TILE_MARGIN = 2
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Размер блока IDAT, после которого сжатые строки уходят в файл
+PNG_CHUNK = 256 * 1024
+
+_ENCODER = json.JSONEncoder(separators=(',', ':'), sort_keys=True)
+
+# Отрисовщик процесса-исполнителя: кэши шрифтов, цветов и изображений живут между плитками
+_renderer: Optional[Renderer] = None
+
+
+class Tile(NamedTuple):
+    column: int
+    row: int
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class ExportStats(NamedTuple):
+    rendered: int
+    reused: int
+
+
+def render_tile(task: Dict[str, Any]) -> str:
+    """
+    Тело задачи процесса-исполнителя: отрисовывает плитку и пишет её пиксели RGB
+    в файл кэша (через временный — незаконченная плитка не попадает в кэш).
+    """
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    image = _renderer.render(task['document'], task['width'], task['height'], task['origin'],
+                             task['scale'], task['supersample'])
+    temp_path = task['path'] + ".part"
+    with open(temp_path, 'wb') as file:
+        file.write(image.tobytes())
+    os.replace(temp_path, task['path'])
+    return task['path']
+
+
+class PngStreamWriter:
+    """
+    Запись PNG (RGB, 8 бит) по строкам: строки сжимаются по мере поступления,
+    поэтому в памяти не бывает всего изображения.
+    """
+
+    def __init__(self, file: BinaryIO, width: int, height: int) -> None:
+        self.file = file
+        self.width = width
+        self._compressor = zlib.compressobj(6)
+        self._pending: List[bytes] = []
+        self._pending_size = 0
+        file.write(PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        self.file.write(struct.pack(">I", len(data)) + kind + data)
+        self.file.write(struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    def _emit(self, data: bytes) -> None:
+        if data:
+            self._pending.append(data)
+            self._pending_size += len(data)
+        if self._pending_size >= PNG_CHUNK:
+            self._chunk(b"IDAT", b"".join(self._pending))
+            self._pending, self._pending_size = [], 0
+
+    def write_rows(self, rows: np.ndarray) -> None:
+        """Дописывает строки (массив высота×ширина×3) с фильтром None перед каждой строкой."""
+        filtered = np.zeros((rows.shape[0], self.width * 3 + 1), dtype=np.uint8)
+        filtered[:, 1:] = rows.reshape(rows.shape[0], -1)
+        self._emit(self._compressor.compress(filtered.tobytes()))
+
+    def finish(self) -> None:
+        self._emit(self._compressor.flush())
+        if self._pending:
+            self._chunk(b"IDAT", b"".join(self._pending))
+        self._chunk(b"IEND", b"")
+
+
+class TiledExporter:
+    """
+    Экспорт больших изображений плитками. Каждая плитка отрисовывается в пуле процессов
+    только с теми объектами, границы которых её задевают; готовые плитки собираются
+    в файл полосами (PNG пишется потоком, без изображения целиком в памяти).
+    Отрисованные плитки кэшируются на диске по отпечатку содержимого: после небольшой
+    правки повторный экспорт заново рисует только затронутые плитки.
+    workers=0 — отрисовка в текущем процессе.
+    """
+
+    def __init__(self, tile_size: int = TILE_SIZE, workers: Optional[int] = None,
+                 supersample: int = SUPERSAMPLE) -> None:
+        self.tile_size = tile_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.supersample = supersample
+        self.done = 0
+        self.total = 0
+
+        self.cache_dir = tempfile.mkdtemp(prefix="paint_tiles_")
+        self._cache: Dict[Tuple[int, int], str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._stop = threading.Event()
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.cache_dir, True)
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self._cache.clear()
+        self._finalizer()
+
+    def tiles(self, width: int, height: int) -> List[Tile]:
+        size = self.tile_size
+        return [Tile(column, row, x, y, min(size, width - x), min(size, height - y))
+                for row, y in enumerate(range(0, height, size))
+                for column, x in enumerate(range(0, width, size))]
+
+    def assign(self, drawings: List[Dict[str, Any]], tiles: List[Tile], origin: Tuple[float, float],
+               scale: float) -> Dict[Tuple[int, int], List[int]]:
+        """Номера объектов (в порядке отрисовки), чьи границы задевают каждую плитку."""
+        columns = max(tile.column for tile in tiles) + 1
+        rows = max(tile.row for tile in tiles) + 1
+        assigned: Dict[Tuple[int, int], List[int]] = {(tile.column, tile.row): [] for tile in tiles}
+        factor = scale * self.supersample
+        size, margin = self.tile_size, TILE_MARGIN
+        for index, item in enumerate(drawings):
+            bounds = item_bounds(item, factor)
+            if bounds is None:
+                continue
+            x1, y1, x2, y2 = bounds
+            column1 = max(math.floor(((x1 - origin[0]) * scale - margin) / size), 0)
+            column2 = min(math.floor(((x2 - origin[0]) * scale + margin) / size), columns - 1)
+            row1 = max(math.floor(((y1 - origin[1]) * scale - margin) / size), 0)
+            row2 = min(math.floor(((y2 - origin[1]) * scale + margin) / size), rows - 1)
+            for row in range(row1, row2 + 1):
+                for column in range(column1, column2 + 1):
+                    assigned[column, row].append(index)
+        return assigned
+
+    def export(self, document: Dict[str, Any], file_path: str, width: int, height: int,
+               origin: Tuple[float, float] = (0.0, 0.0), scale: float = 1.0,
+               progress: Optional[Callable[[int, int], None]] = None) -> ExportStats:
+        """
+        Экспортирует документ в файл width×height пикселей (формат — по расширению).
+        Вызывается из фонового потока; cancel() прерывает экспорт с InterruptedError.
+        """
+        self._stop.clear()
+        drawings = document.get('drawings', [])
+        tiles = self.tiles(width, height)
+        assigned = self.assign(drawings, tiles, origin, scale)
+        encoded: Dict[int, bytes] = {}
+        self.done, self.total = 0, len(tiles)
+
+        futures: Dict[Tuple[int, int], Future] = {}
+        paths: Dict[Tuple[int, int], str] = {}
+        reused = 0
+        for tile in tiles:
+            key = (tile.column, tile.row)
+            items = [drawings[index] for index in assigned[key]]
+            for index in assigned[key]:
+                if index not in encoded:
+                    encoded[index] = _ENCODER.encode(drawings[index]).encode('utf-8')
+            task = self._task(document, tile, items, origin, scale)
+            digest = hashlib.sha1(_ENCODER.encode([task['width'], task['height'], task['origin'], scale,
+                                                   self.supersample, document.get('background')]).encode('utf-8'))
+            for index in assigned[key]:
+                digest.update(encoded[index])
+            if 'raster' in task['document']:
+                digest.update(task['document']['raster'].pixels.tobytes())
+            task['path'] = os.path.join(self.cache_dir, digest.hexdigest() + ".rgb")
+            paths[key] = task['path']
+
+            if os.path.exists(task['path']):
+                reused += 1
+            elif self.workers:
+                futures[key] = self._executor().submit(render_tile, task)
+            else:
+                render_tile(task)
+
+        try:
+            self._assemble(file_path, width, height, tiles, paths, futures, progress)
+        finally:
+            for future in futures.values():
+                future.cancel()
+        self._prune(paths)
+        logger.info(f"Экспорт плитками {file_path}: {width}×{height}, плиток {len(tiles)}, "
+                    f"отрисовано {len(tiles) - reused}, из кэша {reused}")
+        return ExportStats(len(tiles) - reused, reused)
+
+    def _task(self, document: Dict[str, Any], tile: Tile, items: List[Dict[str, Any]],
+              origin: Tuple[float, float], scale: float) -> Dict[str, Any]:
+        """Задача для процесса: только объекты плитки, их изображения и часть растрового слоя под плиткой."""
+        tile_origin = (origin[0] + tile.x / scale, origin[1] + tile.y / scale)
+        part: Dict[str, Any] = {'background': document.get('background'), 'drawings': items}
+        keys = image_keys(items)
+        if keys:
+            part['images'] = {key: document['images'][key] for key in keys if key in document.get('images', {})}
+        raster = document.get('raster')
+        if raster is not None:
+            x1, y1 = max(math.floor(tile_origin[0]), 0), max(math.floor(tile_origin[1]), 0)
+            x2 = min(math.ceil(tile_origin[0] + tile.width / scale), raster.width)
+            y2 = min(math.ceil(tile_origin[1] + tile.height / scale), raster.height)
+            if x1 < x2 and y1 < y2:
+                part['raster'] = RasterLayer(pixels=np.ascontiguousarray(raster.pixels[y1:y2, x1:x2]))
+                part['raster_origin'] = (x1, y1)
+        return {'document': part, 'width': tile.width, 'height': tile.height, 'origin': tile_origin,
+                'scale': scale, 'supersample': self.supersample}
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: дочерний процесс не наследует потоки и состояние Tk родителя
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _assemble(self, file_path: str, width: int, height: int, tiles: List[Tile],
+                  paths: Dict[Tuple[int, int], str], futures: Dict[Tuple[int, int], Future],
+                  progress: Optional[Callable[[int, int], None]]) -> None:
+        """Собирает плитки полосами по мере готовности; PNG пишется потоком, остальные форматы — целиком."""
+        export_format = format_for_path(file_path)
+        strips = self._strips(width, tiles, paths, futures, progress)
+        temp_path = file_path + ".part"
+        try:
+            if export_format == "PNG":
+                with open(temp_path, 'wb') as file:
+                    writer = PngStreamWriter(file, width, height)
+                    for _, strip in strips:
+                        writer.write_rows(strip)
+                    writer.finish()
+            else:
+                image = Image.new('RGB', (width, height))
+                for y, strip in strips:
+                    image.paste(Image.fromarray(strip, 'RGB'), (0, y))
+                save_image(image, temp_path, export_format)
+            os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _strips(self, width: int, tiles: List[Tile], paths: Dict[Tuple[int, int], str],
+                futures: Dict[Tuple[int, int], Future],
+                progress: Optional[Callable[[int, int], None]]) -> Iterator[Tuple[int, np.ndarray]]:
+        """Полосы изображения высотой в плитку, сверху вниз; каждая ждёт только свои плитки."""
+        for y in sorted({tile.y for tile in tiles}):
+            row_tiles = [tile for tile in tiles if tile.y == y]
+            strip = np.empty((row_tiles[0].height, width, 3), dtype=np.uint8)
+            for tile in row_tiles:
+                key = (tile.column, tile.row)
+                if key in futures:
+                    self._wait(futures[key])
+                pixels = np.fromfile(paths[key], dtype=np.uint8)
+                strip[:, tile.x:tile.x + tile.width] = pixels.reshape(tile.height, tile.width, 3)
+                self.done += 1
+                if progress:
+                    progress(self.done, self.total)
+            yield y, strip
+
+    def _wait(self, future: Future) -> None:
+        while True:
+            if self._stop.is_set():
+                raise InterruptedError("Экспорт отменён")
+            try:
+                future.result(timeout=0.1)
+                return
+            except FutureTimeout:
+                continue
+
+    def _prune(self, paths: Dict[Tuple[int, int], str]) -> None:
+        """Удаляет из кэша плитки, которых нет в последнем экспорте."""
+        current = set(paths.values())
+        for stale in set(self._cache.values()) - current:
+            if os.path.exists(stale):
+                os.remove(stale)
+        self._cache = dict(paths)
@@ -0,0 +1,187 @@
+import math
+from itertools import chain
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from canvas import DrawingCanvas
+from images import IMAGE_TYPE
+from scene_model import SceneObject
+from logger import logger
+
+# Объекты, заданные прямоугольником: Tk рисует их только вдоль осей
+BOX_TYPES = {'rectangle', 'oval', IMAGE_TYPE}
+ALIGN_EDGES = ('left', 'center', 'right', 'top', 'middle', 'bottom')
+
+
+def pack(objects: Sequence[SceneObject]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Координаты всех объектов одним массивом точек (N × 2) и номер объекта для каждой точки.
+    """
+    counts = np.fromiter((len(obj.coords) // 2 for obj in objects), dtype=np.int64, count=len(objects))
+    points = np.fromiter(chain.from_iterable(obj.coords for obj in objects), dtype=np.float64,
+                         count=int(counts.sum()) * 2).reshape(-1, 2)
+    return points, np.repeat(np.arange(len(objects)), counts)
+
+
+def unpack(objects: Sequence[SceneObject], points: np.ndarray) -> Dict[str, List[float]]:
+    """Обратно к координатам по ID объектов."""
+    counts = [len(obj.coords) for obj in objects]
+    parts = np.split(points.ravel(), np.cumsum(counts)[:-1])
+    return {obj.oid: part.tolist() for obj, part in zip(objects, parts)}
+
+
+def affine(objects: Sequence[SceneObject], matrix: np.ndarray, pivot: Tuple[float, float]) -> Dict[str, List[float]]:
+    """
+    Применяет линейное преобразование matrix (2 × 2) относительно точки pivot
+    ко всем объектам сразу. Ломаные, многоугольники, контуры и текст преобразуются
+    по точкам. У прямоугольных объектов преобразуется центр; размеры меняются,
+    только если преобразование сохраняет оси (масштаб, отражение, поворот на 90°),
+    иначе прямоугольник остаётся прежнего размера. Изображение не искажается:
+    его размер меняется в одинаковое число раз по обеим осям.
+    """
+    points, owner = pack(objects)
+    origin = np.asarray(pivot, dtype=np.float64)
+    moved = (points - origin) @ matrix.T + origin
+
+    is_box = np.fromiter((obj.type in BOX_TYPES and len(obj.coords) == 4 for obj in objects),
+                         dtype=bool, count=len(objects))
+    if is_box.any():
+        # Прямоугольник хранится двумя углами: точки с чётным номером — первые углы
+        box_points = is_box[owner]
+        first = points[box_points][0::2]
+        second = points[box_points][1::2]
+        center = ((first + second) / 2 - origin) @ matrix.T + origin
+        half = np.abs(second - first) / 2
+        is_image = np.array([obj.type == IMAGE_TYPE for obj, box in zip(objects, is_box) if box])
+        image_half = half * math.sqrt(abs(np.linalg.det(matrix)))
+        if np.count_nonzero(np.round(matrix, 9)) == 2:
+            half = half @ np.abs(matrix).T
+        half[is_image] = image_half[is_image]
+        corners = np.empty_like(points[box_points])
+        corners[0::2] = center - half
+        corners[1::2] = center + half
+        moved[box_points] = corners
+
+    return unpack(objects, moved)
+
+
+def boxes_of(canvas: DrawingCanvas, objects: Sequence[SceneObject]) -> np.ndarray:
+    """Ограничивающие прямоугольники объектов из пространственного индекса (N × 4)."""
+    boxes = canvas.scene.index.boxes
+    return np.array([boxes.get(obj.oid) or obj.bbox() for obj in objects], dtype=np.float64).reshape(-1, 4)
+
+
+def align_offsets(boxes: np.ndarray, edge: str) -> np.ndarray:
+    """Сдвиги (N × 2), выравнивающие прямоугольники по краю или центру общей рамки."""
+    offsets = np.zeros((len(boxes), 2))
+    if edge == 'left':
+        offsets[:, 0] = boxes[:, 0].min() - boxes[:, 0]
+    elif edge == 'right':
+        offsets[:, 0] = boxes[:, 2].max() - boxes[:, 2]
+    elif edge == 'center':
+        offsets[:, 0] = (boxes[:, 0].min() + boxes[:, 2].max()) / 2 - (boxes[:, 0] + boxes[:, 2]) / 2
+    elif edge == 'top':
+        offsets[:, 1] = boxes[:, 1].min() - boxes[:, 1]
+    elif edge == 'bottom':
+        offsets[:, 1] = boxes[:, 3].max() - boxes[:, 3]
+    elif edge == 'middle':
+        offsets[:, 1] = (boxes[:, 1].min() + boxes[:, 3].max()) / 2 - (boxes[:, 1] + boxes[:, 3]) / 2
+    else:
+        raise ValueError(f"Неизвестный край выравнивания: {edge}")
+    return offsets
+
+
+def distribute_offsets(boxes: np.ndarray, axis: int) -> np.ndarray:
+    """
+    Сдвиги (N × 2), расставляющие прямоугольники вдоль оси (0 — x, 1 — y)
+    с равными промежутками; крайние объекты остаются на месте.
+    """
+    offsets = np.zeros((len(boxes), 2))
+    if len(boxes) < 3:
+        return offsets
+
+    starts, ends = boxes[:, axis], boxes[:, axis + 2]
+    order = np.argsort((starts + ends) / 2, kind='stable')
+    sizes = (ends - starts)[order]
+    gap = (ends[order[-1]] - starts[order[0]] - sizes.sum()) / (len(boxes) - 1)
+    # Начало каждого объекта — начало первого плюс размеры предыдущих и промежутки
+    targets = starts[order[0]] + np.concatenate(([0.0], np.cumsum(sizes[:-1] + gap)))
+    inner = order[1:-1]
+    offsets[inner, axis] = targets[1:-1] - starts[inner]
+    return offsets
+
+
+class BatchTransforms:
+    """
+    Пакетные преобразования выделения: выравнивание, распределение, масштаб,
+    поворот и отражение. Координаты всех выделенных объектов пересчитываются
+    одной операцией NumPy и применяются к холсту одним пакетом; другим
+    участникам уходит одна операция с новыми координатами.
+    """
+
+    def __init__(self, canvas: DrawingCanvas) -> None:
+        self.canvas = canvas
+
+    def _objects(self) -> List[SceneObject]:
+        scene = self.canvas.scene
+        return [scene.objects[oid] for oid in sorted(self.canvas.selection, key=scene.rank)]
+
+    def _pivot(self, objects: Sequence[SceneObject]) -> Tuple[float, float]:
+        """Центр общей рамки объектов."""
+        boxes = boxes_of(self.canvas, objects)
+        return ((boxes[:, 0].min() + boxes[:, 2].max()) / 2, (boxes[:, 1].min() + boxes[:, 3].max()) / 2)
+
+    def _translate(self, objects: Sequence[SceneObject], offsets: np.ndarray) -> Dict[str, List[float]]:
+        points, owner = pack(objects)
+        return unpack(objects, points + offsets[owner])
+
+    def align(self, edge: str) -> None:
+        objects = self._objects()
+        if len(objects) > 1:
+            self._apply(objects, self._translate(objects, align_offsets(boxes_of(self.canvas, objects), edge)),
+                        f"выравнивание ({edge})")
+
+    def distribute(self, axis: str) -> None:
+        """Равные промежутки по горизонтали (axis='x') или вертикали ('y')."""
+        objects = self._objects()
+        if len(objects) > 2:
+            offsets = distribute_offsets(boxes_of(self.canvas, objects), 0 if axis == 'x' else 1)
+            self._apply(objects, self._translate(objects, offsets), f"распределение по {axis}")
+
+    def scale(self, factor_x: float, factor_y: Optional[float] = None,
+              pivot: Optional[Tuple[float, float]] = None) -> None:
+        """Масштаб относительно pivot (по умолчанию — центра выделения)."""
+        objects = self._objects()
+        if objects:
+            factor_y = factor_x if factor_y is None else factor_y
+            matrix = np.array([[factor_x, 0.0], [0.0, factor_y]])
+            self._apply(objects, affine(objects, matrix, pivot or self._pivot(objects)),
+                        f"масштаб {factor_x:g}×{factor_y:g}")
+
+    def rotate(self, degrees: float, pivot: Optional[Tuple[float, float]] = None) -> None:
+        """Поворот по часовой стрелке на экране (ось y холста направлена вниз)."""
+        objects = self._objects()
+        if objects:
+            angle = math.radians(degrees)
+            # Округление делает повороты на четверть оборота точными
+            cos, sin = round(math.cos(angle), 12), round(math.sin(angle), 12)
+            matrix = np.array([[cos, -sin], [sin, cos]])
+            self._apply(objects, affine(objects, matrix, pivot or self._pivot(objects)), f"поворот на {degrees:g}°")
+
+    def flip(self, axis: str) -> None:
+        """Отражение слева направо (axis='x') или сверху вниз ('y') относительно центра выделения."""
+        if axis == 'x':
+            self.scale(-1.0, 1.0)
+        else:
+            self.scale(1.0, -1.0)
+
+    def _apply(self, objects: Sequence[SceneObject], coords: Dict[str, List[float]], action: str) -> None:
+        changed = {oid: item_coords for oid, item_coords in coords.items()
+                   if item_coords != self.canvas.scene.objects[oid].coords}
+        if not changed:
+            return
+
+        self.canvas.update_objects(coords=changed)
+        self.canvas.update_selection_frame()
+        logger.info(f"Пакетное преобразование: {action}, объектов {len(changed)}")
+        # Другим участникам — одна операция с новыми координатами вместо полного состояния
+        self.canvas.bus.publish_op({'type': 'patch', 'data': {'coords': changed}})
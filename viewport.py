@@ -0,0 +1,73 @@
+from typing import Iterable, List, Tuple
+from fonts import FONT_TOKEN
+
+MIN_SCALE = 0.05
+MAX_SCALE = 20.0
+CULL_MARGIN = 200  # запас вокруг видимой области в экранных пикселях
+
+
+def scale_font(font: str, scale: float) -> str:
+    """
+    Масштабирует размер в строке шрифта Tk ("{Times New Roman} 14 bold").
+    """
+    if scale == 1 or not isinstance(font, str):
+        return font
+
+    tokens = FONT_TOKEN.findall(font)
+    for index, token in enumerate(tokens):
+        if token.lstrip("-").isdigit():
+            size = int(token)
+            scaled = max(1, round(abs(size) * scale))
+            tokens[index] = str(-scaled if size < 0 else scaled)
+            break
+    return " ".join(tokens)
+
+
+class Viewport:
+    """
+    Видимая область бесконечного холста: смещение в мировых координатах и масштаб.
+    Модель сцены хранит мировые координаты, на холсте Tk — экранные.
+    """
+
+    def __init__(self, offset_x: float = 0.0, offset_y: float = 0.0, scale: float = 1.0) -> None:
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.scale = scale
+
+    def to_screen(self, coords: Iterable[float]) -> List[float]:
+        """Мировые координаты → экранные."""
+        scale = self.scale
+        return [(coord - (self.offset_x if index % 2 == 0 else self.offset_y)) * scale
+                for index, coord in enumerate(coords)]
+
+    def to_world(self, x: float, y: float) -> Tuple[float, float]:
+        """Экранная точка → мировая."""
+        return x / self.scale + self.offset_x, y / self.scale + self.offset_y
+
+    def pan(self, dx: float, dy: float) -> None:
+        """Сдвигает вид на dx, dy экранных пикселей."""
+        self.offset_x -= dx / self.scale
+        self.offset_y -= dy / self.scale
+
+    def zoom(self, factor: float, x: float, y: float) -> float:
+        """
+        Меняет масштаб, оставляя экранную точку (x, y) на месте.
+        Возвращает фактический коэффициент изменения.
+        """
+        new_scale = min(max(self.scale * factor, MIN_SCALE), MAX_SCALE)
+        world_x, world_y = self.to_world(x, y)
+        applied = new_scale / self.scale
+        self.scale = new_scale
+        self.offset_x = world_x - x / new_scale
+        self.offset_y = world_y - y / new_scale
+        return applied
+
+    def reset(self) -> None:
+        self.offset_x = self.offset_y = 0.0
+        self.scale = 1.0
+
+    def visible_rect(self, width: float, height: float, margin: float = CULL_MARGIN) -> Tuple[float, float, float, float]:
+        """Видимая область с запасом в мировых координатах."""
+        x1, y1 = self.to_world(-margin, -margin)
+        x2, y2 = self.to_world(width + margin, height + margin)
+        return x1, y1, x2, y2